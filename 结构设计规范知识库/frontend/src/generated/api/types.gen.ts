@@ -611,6 +611,14 @@ export type JobRequest = {
      * Apply Corrections
      */
     apply_corrections?: boolean;
+    /**
+     * Incremental
+     */
+    incremental?: boolean;
+    /**
+     * Parse Workers
+     */
+    parse_workers?: number;
     /**
      * Parser Backend
      */
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.app.core.config import settings  # noqa: E402
+from src.app.core.embeddings import (  # noqa: E402
+    EmbeddingProvider,
+    LocalEmbeddingProvider,
+    ZhipuEmbeddingProvider,
+)
+from src.pipeline.paths import PROCESSED_DIR  # noqa: E402
+
+PROVIDERS = ("local", "zhipu")
+
+
+class EmbeddingBenchmarkError(RuntimeError):
+    pass
+
+
+def _sample_texts(processed_dir: Path, limit: int) -> list[str]:
+    texts: list[str] = []
+    for path in sorted(processed_dir.glob("*_chunks.json")):
+        try:
+            chunks = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        texts.extend(
+            str(chunk["text"]) for chunk in chunks if isinstance(chunk, dict) and chunk.get("text")
+        )
+        if len(texts) >= limit:
+            break
+    if not texts:
+        raise EmbeddingBenchmarkError(f"未在 {processed_dir} 找到可用于基准的 chunk 文本")
+    return texts[:limit]
+
+
+def _provider(name: str) -> EmbeddingProvider:
+    if name == "local":
+        if settings.local_embedding_model_dir is None:
+            raise EmbeddingBenchmarkError(
+                "LOCAL_EMBEDDING_MODEL_DIR 未设置，无法测试本地 embedding"
+            )
+        return LocalEmbeddingProvider(
+            model_dir=settings.local_embedding_model_dir,
+            dimensions=settings.embedding_dimensions,
+            batch_size=settings.local_embedding_batch_size,
+            max_length=settings.local_embedding_max_length,
+            threads=settings.local_embedding_threads,
+            pooling=settings.local_embedding_pooling,
+        )
+    api_key = os.environ.get("ZHIPUAI_API_KEY")
+    if not api_key:
+        raise EmbeddingBenchmarkError("ZHIPUAI_API_KEY 未设置，无法测试远程 embedding")
+    from zai import ZhipuAiClient
+
+    return ZhipuEmbeddingProvider(settings, ZhipuAiClient(api_key=api_key))
+
+
+def benchmark_provider(
+    provider: EmbeddingProvider, texts: list[str], *, batch_size: int
+) -> dict[str, Any]:
+    """Embed ``texts`` in ``batch_size`` requests; no disk cache, so every text is computed."""
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        provider.embed(texts[start : start + batch_size])
+    elapsed = time.perf_counter() - started
+    return {
+        "provider": provider.name,
+        "model_id": provider.model_id,
+        "dimensions": provider.dimensions,
+        "text_count": len(texts),
+        "seconds": round(elapsed, 3),
+        "texts_per_second": round(len(texts) / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比本地与远程 embedding 的吞吐量")
+    parser.add_argument("--provider", choices=PROVIDERS, action="append")
+    parser.add_argument("--processed-dir", type=Path, default=PROCESSED_DIR)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=10)
+    args = parser.parse_args()
+    try:
+        texts = _sample_texts(args.processed_dir, max(args.limit, 1))
+        results = [
+            benchmark_provider(_provider(name), texts, batch_size=max(args.batch_size, 1))
+            for name in args.provider or PROVIDERS
+        ]
+    except EmbeddingBenchmarkError as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=True, indent=2))
+        return 1
+    print(json.dumps({"ok": True, "results": results}, ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
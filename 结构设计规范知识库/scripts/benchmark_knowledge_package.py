@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.pipeline.knowledge_package import (  # noqa: E402
+    DEFAULT_HASH_WORKERS,
+    _file_entry,
+    _verify_member_hashes,
+    _write_payloads,
+    _zip_member_sha256,
+)
+
+IMAGE_BYTES = 256 * 1024
+# Share of the payload made of page images; the rest is a compressible vector index.
+IMAGE_SHARE = 0.8
+
+
+def _synthetic_payload(root: Path, size_mb: int) -> list[tuple[str, Path, str]]:
+    """Random (incompressible) images plus a repetitive index file, ``size_mb`` in total."""
+    total = size_mb * 1024 * 1024
+    images_dir = root / "images"
+    images_dir.mkdir(parents=True)
+    payloads: list[tuple[str, Path, str]] = []
+    for index in range(int(total * IMAGE_SHARE) // IMAGE_BYTES):
+        image = images_dir / f"spec_p{index + 1:04d}.png"
+        image.write_bytes(os.urandom(IMAGE_BYTES))
+        payloads.append((f"runtime/images/{image.name}", image, "image"))
+    index_file = root / "chroma.sqlite3"
+    row = bytes(range(256)) * 16
+    with index_file.open("wb") as handle:
+        for _ in range(int(total * (1 - IMAGE_SHARE)) // len(row)):
+            handle.write(row)
+    payloads.append(("runtime/db/chroma.sqlite3", index_file, "vector_index"))
+    return payloads
+
+
+def _sequential_export(archive_path: Path, payloads: list[tuple[str, Path, str]]) -> None:
+    """The previous export: hash every file first, then deflate everything in one thread."""
+    for archive_name, source, role in payloads:
+        _file_entry(archive_name, source, role)
+    with zipfile.ZipFile(
+        archive_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6
+    ) as archive:
+        for archive_name, source, _ in payloads:
+            archive.write(source, archive_name)
+
+
+def _streaming_export(
+    archive_path: Path, payloads: list[tuple[str, Path, str]], workers: int
+) -> dict[str, str]:
+    with zipfile.ZipFile(
+        archive_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6
+    ) as archive:
+        entries = _write_payloads(archive, payloads, workers=workers)
+    return {entry["path"]: entry["sha256"] for entry in entries}
+
+
+def _timed(action) -> float:
+    started = time.perf_counter()
+    action()
+    return round(time.perf_counter() - started, 3)
+
+
+def benchmark_size(size_mb: int, *, workers: int, sample: int) -> list[dict[str, Any]]:
+    with tempfile.TemporaryDirectory(prefix="package-benchmark-") as scratch:
+        root = Path(scratch)
+        payloads = _synthetic_payload(root / "payload", size_mb)
+        sequential = root / "sequential.zip"
+        streaming = root / "streaming.zip"
+        hashes: dict[str, str] = {}
+
+        def export() -> None:
+            hashes.update(_streaming_export(streaming, payloads, workers))
+
+        def validate_sequential() -> None:
+            with zipfile.ZipFile(streaming) as archive:
+                for path in sorted(hashes):
+                    _zip_member_sha256(archive, path)
+
+        rows = [
+            (
+                "export",
+                "sequential_deflate",
+                _timed(lambda: _sequential_export(sequential, payloads)),
+            ),
+            ("export", "parallel_hash_stored_media", _timed(export)),
+        ]
+        sampled = dict(random.sample(sorted(hashes.items()), min(sample, len(hashes))))
+        rows.extend(
+            [
+                ("validate", "sequential", _timed(validate_sequential)),
+                (
+                    "validate",
+                    "parallel",
+                    _timed(lambda: _verify_member_hashes(streaming, hashes, workers=workers)),
+                ),
+                (
+                    "validate",
+                    f"sampled_{len(sampled)}",
+                    _timed(lambda: _verify_member_hashes(streaming, sampled, workers=workers)),
+                ),
+            ]
+        )
+        archive_sizes = {
+            "sequential_deflate": sequential.stat().st_size,
+            "parallel_hash_stored_media": streaming.stat().st_size,
+        }
+        return [
+            {
+                "payload_mb": size_mb,
+                "file_count": len(payloads),
+                "operation": operation,
+                "mode": mode,
+                "seconds": seconds,
+                "archive_mb": round(archive_sizes[mode] / 1024 / 1024, 1)
+                if mode in archive_sizes
+                else None,
+            }
+            for operation, mode, seconds in rows
+        ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比知识包导出与校验在不同 payload 大小下的耗时")
+    parser.add_argument(
+        "--sizes-mb", default="32,128,512", help="逗号分隔的合成 payload 大小（MB）"
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_HASH_WORKERS, help="哈希线程数")
+    parser.add_argument("--sample", type=int, default=32, help="抽样校验的文件数")
+    args = parser.parse_args()
+
+    rows: list[dict[str, Any]] = []
+    for size in (int(value) for value in args.sizes_mb.split(",") if value.strip()):
+        rows.extend(benchmark_size(size, workers=args.workers, sample=args.sample))
+    print(json.dumps({"workers": args.workers, "results": rows}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,6 +14,7 @@ if __package__ in (None, "") and str(PROJECT_ROOT) not in sys.path:
 
 from src.app.admin.workflows import write_candidate_activation_artifacts  # noqa: E402
 from src.app.core.config import settings  # noqa: E402
+from src.app.core.embeddings import embedding_model_id  # noqa: E402
 from src.pipeline.active_db import (  # noqa: E402
     active_db_dir,
     active_images_dir,
@@ -114,7 +115,7 @@ def _candidate_manifest(
         }
     )
     manifest["built_at"] = datetime.now(UTC).isoformat()
-    manifest["embedding_model"] = settings.embedding_model
+    manifest["embedding_model"] = embedding_model_id(settings)
     manifest["embedding_dimensions"] = settings.embedding_dimensions
     manifest["build_params"] = build_params
     manifest["data_version_hash"] = compute_data_version_hash(
@@ -136,7 +137,7 @@ def migrate_embedding_model(
     output_dir: Path | None = None,
     activate: bool = False,
 ) -> dict[str, Any]:
-    if not settings.zhipuai_api_key:
+    if settings.embedding_provider != "local" and not settings.zhipuai_api_key:
         raise EmbeddingMigrationError("ZHIPUAI_API_KEY 未设置")
     source_manifest = read_manifest(MANIFEST_PATH) or {}
     sources = _production_sources(source_manifest)
@@ -185,7 +186,7 @@ def migrate_embedding_model(
             "activated": False,
             "candidate_dir": str(version_dir),
             "candidate_manifest": str(candidate_manifest_path),
-            "embedding_model": settings.embedding_model,
+            "embedding_model": embedding_model_id(settings),
             "embedding_dimensions": settings.embedding_dimensions,
             "document_count": manifest.get("document_count", 0),
             "chunk_count": loaded_chunks,
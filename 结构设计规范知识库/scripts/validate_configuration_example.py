@@ -48,12 +48,37 @@ EXPECTED_EXAMPLE_KEYS = {
     "CORS_ORIGINS",
     "DATA_DIR",
     "DB_DIR",
+    "DENSE_VECTOR_IVF_LISTS",
+    "DENSE_VECTOR_IVF_PROBES",
+    "DENSE_VECTOR_QUANTIZATION",
+    "EMBEDDING_BASE_URL",
     "EMBEDDING_DIMENSIONS",
+    "EMBEDDING_INGEST_BACKOFF_SECONDS",
+    "EMBEDDING_INGEST_BATCH_SIZE",
+    "EMBEDDING_INGEST_MAX_RETRIES",
+    "EMBEDDING_INGEST_REQUESTS_PER_SECOND",
+    "EMBEDDING_INGEST_WORKERS",
     "EMBEDDING_MODEL",
+    "EMBEDDING_PROVIDER",
+    "EMBEDDING_TIMEOUT_SECONDS",
+    "HTTP2_ENABLED",
+    "HTTP_POOL_KEEPALIVE_SECONDS",
+    "HTTP_POOL_MAX_CONNECTIONS",
+    "HTTP_POOL_MAX_KEEPALIVE",
     "IMG_BASE_URL",
     "JOB_HEARTBEAT_SECONDS",
     "JOB_STALE_AFTER_SECONDS",
     "LLM_TIMEOUT_SECONDS",
+    "LOCAL_EMBEDDING_BATCH_SIZE",
+    "LOCAL_EMBEDDING_CACHE_PATH",
+    "LOCAL_EMBEDDING_MAX_LENGTH",
+    "LOCAL_EMBEDDING_MODEL_DIR",
+    "LOCAL_EMBEDDING_POOLING",
+    "LOCAL_EMBEDDING_THREADS",
+    "LOCAL_RERANK_BATCH_SIZE",
+    "LOCAL_RERANK_MAX_LENGTH",
+    "LOCAL_RERANK_MODEL_DIR",
+    "LOCAL_RERANK_THREADS",
     "LOG_FORMAT",
     "LOG_LEVEL",
     "MAX_REQUEST_BYTES",
@@ -63,11 +88,28 @@ EXPECTED_EXAMPLE_KEYS = {
     "MINERU_ARGS",
     "MINERU_BIN",
     "MINERU_COMPATIBILITY_POLICY",
+    "MODEL_IMAGE_CACHE_MB",
+    "MODEL_IMAGE_FORMAT",
+    "MODEL_IMAGE_JPEG_QUALITY",
+    "MODEL_IMAGE_MAX_EDGE",
     "OPENWEBUI_API_KEY",
     "OPENWEBUI_AUTH",
+    "PAGE_RENDER_CACHE_MAX_MB",
+    "PARSE_CACHE_MAX_AGE_DAYS",
+    "PARSE_CACHE_MAX_MB",
+    "PARSE_SERVICE_QUEUE_SIZE",
+    "PARSE_SERVICE_SOCKET",
+    "PARSE_SERVICE_WORKERS",
     "PDF_PARSER_BACKEND",
+    "PDF_RENDER_DPI",
+    "PDF_RENDER_FORMAT",
+    "PDF_RENDER_MODE",
+    "PDF_RENDER_WORKERS",
     "PUBLIC_ASSET_BASE_URL",
     "QUALITY_API_KEY",
+    "QUERY_EMBEDDING_CACHE_PERSIST",
+    "QUERY_EMBEDDING_CACHE_SIZE",
+    "QUERY_EMBEDDING_CACHE_TTL_SECONDS",
     "RAG_MIN_SCORE",
     "RAG_TOP_K",
     "RATE_LIMIT_ENABLED",
@@ -75,13 +117,18 @@ EXPECTED_EXAMPLE_KEYS = {
     "RERANK_ENABLED",
     "RERANK_BASE_URL",
     "RERANK_CANDIDATE_MULTIPLIER",
+    "RERANK_FALLBACK_PROVIDER",
     "RERANK_MODEL",
     "RERANK_MODEL_WEIGHT",
     "RERANK_PROVIDER",
+    "RERANK_SCORE_CACHE_SIZE",
     "RERANK_TIMEOUT_SECONDS",
     "RETRIEVAL_BM25_WEIGHT",
     "RETRIEVAL_CLAUSE_BOOST",
     "RETRIEVAL_DENSE_WEIGHT",
+    "RETRIEVAL_WORKER_THREADS",
+    "SEARCH_RESULT_CACHE_SHARED_PATH",
+    "SEARCH_RESULT_CACHE_SIZE",
     "STATIC_DIR",
     "VERSION_RETENTION_FAILED_DAYS",
     "VERSION_RETENTION_HIGH_WATERMARK_BYTES",
@@ -102,8 +102,17 @@ def rebuild_workflow(job: Job, store: JobStore) -> dict[str, Any]:
     source = Path(job.params.get("source", RAW_DIR))
     parser_backend = str(job.params.get("parser_backend", builder.DEFAULT_PARSER_BACKEND))
     apply_corrections = bool(job.params.get("apply_corrections", True))
+    incremental = bool(job.params.get("incremental", False))
+    parse_workers = int(job.params.get("parse_workers", 1))
     _set_step(
-        job, store, "rebuild", "开始重建知识库", source=str(source), parser_backend=parser_backend
+        job,
+        store,
+        "rebuild",
+        "开始重建知识库",
+        source=str(source),
+        parser_backend=parser_backend,
+        incremental=incremental,
+        parse_workers=parse_workers,
     )
     version_dir = DB_VERSIONS_DIR / job.job_id
     db_dir = version_dir / "db"
@@ -124,6 +133,8 @@ def rebuild_workflow(job: Job, store: JobStore) -> dict[str, Any]:
         images_dir=images_dir,
         mineru_output_dir=mineru_dir,
         audit_dir=audit_dir,
+        incremental=incremental,
+        parse_workers=parse_workers,
     )
     _set_step(
         job,
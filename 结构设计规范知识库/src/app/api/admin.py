@@ -115,6 +115,8 @@ class JobRequest(BaseModel):
     source: str = "data/raw"
     parser_backend: str = "mineru"
     apply_corrections: bool = True
+    incremental: bool = False
+    parse_workers: int = Field(default=1, ge=1, le=32)
 
 
 class ReviewRequest(BaseModel):
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from src.pipeline.active_db import read_active_manifest
 
 from ..core.config import settings
+from ..core.http_clients import http_clients
 from ..core.metrics import metrics
 from ..retrieval.hybrid_search import retrieval_state
 
@@ -102,4 +103,4 @@ def readiness_snapshot() -> dict[str, Any]:
 
 @router.get("/metrics")
 async def metrics_endpoint():
-    return metrics.snapshot()
+    return metrics.snapshot() | {"http_pools": http_clients.snapshot()}
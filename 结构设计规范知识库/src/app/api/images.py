@@ -1,3 +1,4 @@
+import asyncio
 import mimetypes
 from urllib.parse import unquote
 
@@ -5,13 +6,14 @@ from fastapi import APIRouter, Request
 from fastapi.responses import FileResponse
 
 from src.pipeline.active_db import active_images_dir
-from src.pipeline.audit.multimodal import find_source_pdf, render_pdf_pages
-from src.pipeline.paths import AUDIT_DIR, RAW_DIR
+from src.pipeline.audit.multimodal import find_source_pdf
+from src.pipeline.paths import RAW_DIR
 
 from ..core.config import settings
 from ..core.content_access import asset_access_scope
 from ..core.errors import ErrorCode, error_response
 from ..core.security import is_asset_request_allowed
+from ..rag.images import page_render_cache
 
 router = APIRouter()
 
@@ -24,7 +26,7 @@ async def serve_page_image(doc: str, page: int, request: Request):
     pdf_path = find_source_pdf(decoded_doc := unquote(doc), RAW_DIR)
     if not pdf_path:
         return error_response(404, ErrorCode.IMAGE_NOT_FOUND, f"源 PDF 不存在: {decoded_doc}")
-    rendered = render_pdf_pages(pdf_path, [page], AUDIT_DIR / "page_images")
+    rendered = await asyncio.to_thread(page_render_cache.render_pages, pdf_path, [page])
     image_path = rendered.get(page)
     if not image_path or not image_path.exists():
         return error_response(
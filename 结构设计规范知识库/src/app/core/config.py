@@ -2,6 +2,7 @@ import json
 import os
 import sys
 from dataclasses import dataclass, field
+from importlib.util import find_spec
 from math import isfinite
 from pathlib import Path
 
@@ -24,8 +25,16 @@ FALSE_VALUES = {"0", "false", "no", "off"}
 PLACEHOLDER_API_KEYS = {"change-me", "changeme", "not-needed", "your-api-key"}
 VALID_LOG_LEVELS = {"CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"}
 VALID_LOG_FORMATS = {"json", "text"}
-VALID_RERANK_PROVIDERS = {"none", "zhipu"}
+VALID_RERANK_PROVIDERS = {"none", "zhipu", "local"}
+VALID_RERANK_FALLBACK_PROVIDERS = {"none", "local"}
 VALID_EMBEDDING_DIMENSIONS = {256, 512, 1024, 2048}
+VALID_EMBEDDING_PROVIDERS = {"zhipu", "local"}
+VALID_EMBEDDING_POOLINGS = {"cls", "mean"}
+LOCAL_MODEL_PACKAGES = ("onnxruntime", "tokenizers")
+VALID_DENSE_VECTOR_QUANTIZATIONS = {"none", "float16", "int8"}
+VALID_MODEL_IMAGE_FORMATS = {"original", "png", "jpeg"}
+VALID_PDF_RENDER_MODES = {"eager", "lazy"}
+VALID_PDF_RENDER_FORMATS = {"png", "jpg"}
 
 
 class ConfigurationError(ValueError):
@@ -75,6 +84,12 @@ def _env_http_base_url(name: str, default: str) -> str:
         raise ConfigurationError(str(exc)) from exc
 
 
+def _env_optional_path(name: str) -> Path | None:
+    if not os.getenv(name, "").strip():
+        return None
+    return configured_project_path(name, "")
+
+
 @dataclass(frozen=True)
 class Settings:
     app_title: str = "结构设计规范知识库 RAG API (多模态)"
@@ -88,6 +103,16 @@ class Settings:
     )
     mimo_model: str = field(default_factory=lambda: os.getenv("MIMO_MODEL", "mimo-v2.5"))
     llm_timeout_seconds: int = field(default_factory=lambda: _env_int("LLM_TIMEOUT_SECONDS", "180"))
+    http2_enabled: bool = field(default_factory=lambda: _env_bool("HTTP2_ENABLED", "true"))
+    http_pool_max_connections: int = field(
+        default_factory=lambda: _env_int("HTTP_POOL_MAX_CONNECTIONS", "100")
+    )
+    http_pool_max_keepalive: int = field(
+        default_factory=lambda: _env_int("HTTP_POOL_MAX_KEEPALIVE", "20")
+    )
+    http_pool_keepalive_seconds: float = field(
+        default_factory=lambda: _env_float("HTTP_POOL_KEEPALIVE_SECONDS", "30")
+    )
 
     rag_top_k: int = field(default_factory=lambda: _env_int("RAG_TOP_K", "12"))
     rag_min_score: float = field(default_factory=lambda: _env_float("RAG_MIN_SCORE", "0.65"))
@@ -97,6 +122,110 @@ class Settings:
     embedding_dimensions: int = field(
         default_factory=lambda: _env_int("EMBEDDING_DIMENSIONS", "1024")
     )
+    embedding_base_url: str = field(
+        default_factory=lambda: _env_http_base_url(
+            "EMBEDDING_BASE_URL", "https://open.bigmodel.cn/api/paas/v4"
+        )
+    )
+    embedding_timeout_seconds: int = field(
+        default_factory=lambda: _env_int("EMBEDDING_TIMEOUT_SECONDS", "30")
+    )
+    embedding_provider: str = field(
+        default_factory=lambda: os.getenv("EMBEDDING_PROVIDER", "zhipu").strip().lower()
+    )
+    local_embedding_model_dir: Path | None = field(
+        default_factory=lambda: _env_optional_path("LOCAL_EMBEDDING_MODEL_DIR")
+    )
+    local_embedding_pooling: str = field(
+        default_factory=lambda: os.getenv("LOCAL_EMBEDDING_POOLING", "cls").strip().lower()
+    )
+    local_embedding_batch_size: int = field(
+        default_factory=lambda: _env_int("LOCAL_EMBEDDING_BATCH_SIZE", "32")
+    )
+    local_embedding_max_length: int = field(
+        default_factory=lambda: _env_int("LOCAL_EMBEDDING_MAX_LENGTH", "512")
+    )
+    local_embedding_threads: int = field(
+        default_factory=lambda: _env_int("LOCAL_EMBEDDING_THREADS", "4")
+    )
+    local_embedding_cache_path: Path | None = field(
+        default_factory=lambda: _env_optional_path("LOCAL_EMBEDDING_CACHE_PATH")
+    )
+    embedding_ingest_workers: int = field(
+        default_factory=lambda: _env_int("EMBEDDING_INGEST_WORKERS", "4")
+    )
+    embedding_ingest_batch_size: int = field(
+        default_factory=lambda: _env_int("EMBEDDING_INGEST_BATCH_SIZE", "10")
+    )
+    embedding_ingest_requests_per_second: float = field(
+        default_factory=lambda: _env_float("EMBEDDING_INGEST_REQUESTS_PER_SECOND", "5")
+    )
+    embedding_ingest_max_retries: int = field(
+        default_factory=lambda: _env_int("EMBEDDING_INGEST_MAX_RETRIES", "3")
+    )
+    embedding_ingest_backoff_seconds: float = field(
+        default_factory=lambda: _env_float("EMBEDDING_INGEST_BACKOFF_SECONDS", "1")
+    )
+    dense_vector_quantization: str = field(
+        default_factory=lambda: os.getenv("DENSE_VECTOR_QUANTIZATION", "none").strip().lower()
+    )
+    dense_vector_ivf_lists: int = field(
+        default_factory=lambda: _env_int("DENSE_VECTOR_IVF_LISTS", "0")
+    )
+    dense_vector_ivf_probes: int = field(
+        default_factory=lambda: _env_int("DENSE_VECTOR_IVF_PROBES", "8")
+    )
+    query_embedding_cache_size: int = field(
+        default_factory=lambda: _env_int("QUERY_EMBEDDING_CACHE_SIZE", "2048")
+    )
+    query_embedding_cache_ttl_seconds: int = field(
+        default_factory=lambda: _env_int("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "86400")
+    )
+    query_embedding_cache_persist: bool = field(
+        default_factory=lambda: _env_bool("QUERY_EMBEDDING_CACHE_PERSIST", "false")
+    )
+    search_result_cache_size: int = field(
+        default_factory=lambda: _env_int("SEARCH_RESULT_CACHE_SIZE", "1024")
+    )
+    search_result_cache_shared_path: Path | None = field(
+        default_factory=lambda: _env_optional_path("SEARCH_RESULT_CACHE_SHARED_PATH")
+    )
+    page_render_cache_max_mb: int = field(
+        default_factory=lambda: _env_int("PAGE_RENDER_CACHE_MAX_MB", "1024")
+    )
+    parse_cache_max_mb: int = field(default_factory=lambda: _env_int("PARSE_CACHE_MAX_MB", "20480"))
+    parse_cache_max_age_days: int = field(
+        default_factory=lambda: _env_int("PARSE_CACHE_MAX_AGE_DAYS", "30")
+    )
+    parse_service_socket: Path | None = field(
+        default_factory=lambda: _env_optional_path("PARSE_SERVICE_SOCKET")
+    )
+    parse_service_workers: int = field(
+        default_factory=lambda: _env_int("PARSE_SERVICE_WORKERS", "2")
+    )
+    parse_service_queue_size: int = field(
+        default_factory=lambda: _env_int("PARSE_SERVICE_QUEUE_SIZE", "8")
+    )
+    pdf_render_mode: str = field(
+        default_factory=lambda: os.getenv("PDF_RENDER_MODE", "eager").strip().lower()
+    )
+    pdf_render_dpi: int = field(default_factory=lambda: _env_int("PDF_RENDER_DPI", "216"))
+    pdf_render_format: str = field(
+        default_factory=lambda: os.getenv("PDF_RENDER_FORMAT", "png").strip().lower()
+    )
+    pdf_render_workers: int = field(default_factory=lambda: _env_int("PDF_RENDER_WORKERS", "1"))
+    model_image_cache_mb: int = field(
+        default_factory=lambda: _env_int("MODEL_IMAGE_CACHE_MB", "128")
+    )
+    model_image_max_edge: int = field(
+        default_factory=lambda: _env_int("MODEL_IMAGE_MAX_EDGE", "1600")
+    )
+    model_image_format: str = field(
+        default_factory=lambda: os.getenv("MODEL_IMAGE_FORMAT", "original").strip().lower()
+    )
+    model_image_jpeg_quality: int = field(
+        default_factory=lambda: _env_int("MODEL_IMAGE_JPEG_QUALITY", "85")
+    )
     retrieval_dense_weight: float = field(
         default_factory=lambda: _env_float("RETRIEVAL_DENSE_WEIGHT", "1.0")
     )
@@ -106,6 +235,9 @@ class Settings:
     retrieval_clause_boost: float = field(
         default_factory=lambda: _env_float("RETRIEVAL_CLAUSE_BOOST", "5.0")
     )
+    retrieval_worker_threads: int = field(
+        default_factory=lambda: _env_int("RETRIEVAL_WORKER_THREADS", "4")
+    )
     rerank_enabled: bool = field(default_factory=lambda: _env_bool("RERANK_ENABLED", "false"))
     rerank_provider: str = field(
         default_factory=lambda: os.getenv("RERANK_PROVIDER", "none").strip().lower()
@@ -125,6 +257,22 @@ class Settings:
     rerank_model_weight: float = field(
         default_factory=lambda: _env_float("RERANK_MODEL_WEIGHT", "0.35")
     )
+    rerank_score_cache_size: int = field(
+        default_factory=lambda: _env_int("RERANK_SCORE_CACHE_SIZE", "20000")
+    )
+    rerank_fallback_provider: str = field(
+        default_factory=lambda: os.getenv("RERANK_FALLBACK_PROVIDER", "none").strip().lower()
+    )
+    local_rerank_model_dir: Path | None = field(
+        default_factory=lambda: _env_optional_path("LOCAL_RERANK_MODEL_DIR")
+    )
+    local_rerank_batch_size: int = field(
+        default_factory=lambda: _env_int("LOCAL_RERANK_BATCH_SIZE", "16")
+    )
+    local_rerank_max_length: int = field(
+        default_factory=lambda: _env_int("LOCAL_RERANK_MAX_LENGTH", "512")
+    )
+    local_rerank_threads: int = field(default_factory=lambda: _env_int("LOCAL_RERANK_THREADS", "2"))
     api_auth_enabled: bool = field(default_factory=lambda: _env_bool("API_AUTH_ENABLED", "false"))
     api_keys: list[str] = field(default_factory=lambda: _split_csv(os.getenv("API_KEYS", "")))
     openwebui_api_key: str = field(
@@ -216,12 +364,97 @@ class Settings:
         issues: list[str] = []
         if self.llm_timeout_seconds <= 0:
             issues.append("LLM_TIMEOUT_SECONDS 必须大于 0")
+        if not 1 <= self.http_pool_max_connections <= 1000:
+            issues.append("HTTP_POOL_MAX_CONNECTIONS 必须在 1 到 1000 之间")
+        if not 0 <= self.http_pool_max_keepalive <= self.http_pool_max_connections:
+            issues.append("HTTP_POOL_MAX_KEEPALIVE 必须在 0 到 HTTP_POOL_MAX_CONNECTIONS 之间")
+        if not 1 <= self.http_pool_keepalive_seconds <= 600:
+            issues.append("HTTP_POOL_KEEPALIVE_SECONDS 必须在 1 到 600 之间")
         if not 1 <= self.rag_top_k <= 100:
             issues.append("RAG_TOP_K 必须在 1 到 100 之间")
         if self.rag_min_score < 0:
             issues.append("RAG_MIN_SCORE 不能小于 0")
-        if self.embedding_dimensions not in VALID_EMBEDDING_DIMENSIONS:
+        if self.embedding_provider not in VALID_EMBEDDING_PROVIDERS:
+            issues.append(
+                f"EMBEDDING_PROVIDER 必须是 {', '.join(sorted(VALID_EMBEDDING_PROVIDERS))} 之一"
+            )
+        if self.embedding_provider == "local":
+            # A local encoder's width is fixed by the model, not chosen per request.
+            if not 1 <= self.embedding_dimensions <= 8192:
+                issues.append("使用本地 embedding 时 EMBEDDING_DIMENSIONS 必须在 1 到 8192 之间")
+            if self.local_embedding_model_dir is None:
+                issues.append("使用本地 embedding 时 LOCAL_EMBEDDING_MODEL_DIR 不能为空")
+        elif self.embedding_dimensions not in VALID_EMBEDDING_DIMENSIONS:
             issues.append("EMBEDDING_DIMENSIONS 必须是 256、512、1024 或 2048 之一")
+        if self.local_embedding_pooling not in VALID_EMBEDDING_POOLINGS:
+            issues.append(
+                f"LOCAL_EMBEDDING_POOLING 必须是 {', '.join(sorted(VALID_EMBEDDING_POOLINGS))} 之一"
+            )
+        if not 1 <= self.local_embedding_batch_size <= 1024:
+            issues.append("LOCAL_EMBEDDING_BATCH_SIZE 必须在 1 到 1024 之间")
+        if not 16 <= self.local_embedding_max_length <= 8192:
+            issues.append("LOCAL_EMBEDDING_MAX_LENGTH 必须在 16 到 8192 之间")
+        if not 1 <= self.local_embedding_threads <= 64:
+            issues.append("LOCAL_EMBEDDING_THREADS 必须在 1 到 64 之间")
+        if not 1 <= self.embedding_ingest_workers <= 32:
+            issues.append("EMBEDDING_INGEST_WORKERS 必须在 1 到 32 之间")
+        if not 1 <= self.embedding_ingest_batch_size <= 256:
+            issues.append("EMBEDDING_INGEST_BATCH_SIZE 必须在 1 到 256 之间")
+        if not 0 <= self.embedding_ingest_requests_per_second <= 1000:
+            issues.append("EMBEDDING_INGEST_REQUESTS_PER_SECOND 必须在 0 到 1000 之间")
+        if not 0 <= self.embedding_ingest_max_retries <= 10:
+            issues.append("EMBEDDING_INGEST_MAX_RETRIES 必须在 0 到 10 之间")
+        if not 0 <= self.embedding_ingest_backoff_seconds <= 60:
+            issues.append("EMBEDDING_INGEST_BACKOFF_SECONDS 必须在 0 到 60 之间")
+        if not 1 <= self.embedding_timeout_seconds <= 180:
+            issues.append("EMBEDDING_TIMEOUT_SECONDS 必须在 1 到 180 之间")
+        if self.dense_vector_quantization not in VALID_DENSE_VECTOR_QUANTIZATIONS:
+            issues.append(
+                "DENSE_VECTOR_QUANTIZATION 必须是 "
+                f"{', '.join(sorted(VALID_DENSE_VECTOR_QUANTIZATIONS))} 之一"
+            )
+        if self.dense_vector_ivf_lists != 0 and not 2 <= self.dense_vector_ivf_lists <= 65536:
+            issues.append("DENSE_VECTOR_IVF_LISTS 必须为 0（关闭）或在 2 到 65536 之间")
+        if not 1 <= self.dense_vector_ivf_probes <= 65536:
+            issues.append("DENSE_VECTOR_IVF_PROBES 必须在 1 到 65536 之间")
+        if not 0 <= self.query_embedding_cache_size <= 100000:
+            issues.append("QUERY_EMBEDDING_CACHE_SIZE 必须在 0 到 100000 之间")
+        if not 60 <= self.query_embedding_cache_ttl_seconds <= 2592000:
+            issues.append("QUERY_EMBEDDING_CACHE_TTL_SECONDS 必须在 60 到 2592000 之间")
+        if not 16 <= self.page_render_cache_max_mb <= 1048576:
+            issues.append("PAGE_RENDER_CACHE_MAX_MB 必须在 16 到 1048576 之间")
+        if not 0 <= self.parse_cache_max_mb <= 1048576:
+            issues.append("PARSE_CACHE_MAX_MB 必须在 0 到 1048576 之间")
+        if not 0 <= self.parse_cache_max_age_days <= 3650:
+            issues.append("PARSE_CACHE_MAX_AGE_DAYS 必须在 0 到 3650 之间")
+        if not 1 <= self.parse_service_workers <= 32:
+            issues.append("PARSE_SERVICE_WORKERS 必须在 1 到 32 之间")
+        if not 1 <= self.parse_service_queue_size <= 1024:
+            issues.append("PARSE_SERVICE_QUEUE_SIZE 必须在 1 到 1024 之间")
+        if self.pdf_render_mode not in VALID_PDF_RENDER_MODES:
+            issues.append(
+                f"PDF_RENDER_MODE 必须是 {', '.join(sorted(VALID_PDF_RENDER_MODES))} 之一"
+            )
+        if not 36 <= self.pdf_render_dpi <= 600:
+            issues.append("PDF_RENDER_DPI 必须在 36 到 600 之间")
+        if self.pdf_render_format not in VALID_PDF_RENDER_FORMATS:
+            issues.append(
+                f"PDF_RENDER_FORMAT 必须是 {', '.join(sorted(VALID_PDF_RENDER_FORMATS))} 之一"
+            )
+        if not 1 <= self.pdf_render_workers <= 32:
+            issues.append("PDF_RENDER_WORKERS 必须在 1 到 32 之间")
+        if not 0 <= self.model_image_cache_mb <= 65536:
+            issues.append("MODEL_IMAGE_CACHE_MB 必须在 0 到 65536 之间")
+        if self.model_image_max_edge != 0 and not 256 <= self.model_image_max_edge <= 16384:
+            issues.append("MODEL_IMAGE_MAX_EDGE 必须为 0（不缩放）或在 256 到 16384 之间")
+        if self.model_image_format not in VALID_MODEL_IMAGE_FORMATS:
+            issues.append(
+                f"MODEL_IMAGE_FORMAT 必须是 {', '.join(sorted(VALID_MODEL_IMAGE_FORMATS))} 之一"
+            )
+        if not 1 <= self.model_image_jpeg_quality <= 100:
+            issues.append("MODEL_IMAGE_JPEG_QUALITY 必须在 1 到 100 之间")
+        if not 0 <= self.search_result_cache_size <= 100000:
+            issues.append("SEARCH_RESULT_CACHE_SIZE 必须在 0 到 100000 之间")
         weights = {
             "RETRIEVAL_DENSE_WEIGHT": self.retrieval_dense_weight,
             "RETRIEVAL_BM25_WEIGHT": self.retrieval_bm25_weight,
@@ -230,6 +463,8 @@ class Settings:
         issues.extend(f"{name} 不能小于 0" for name, value in weights.items() if value < 0)
         if self.retrieval_dense_weight == 0 and self.retrieval_bm25_weight == 0:
             issues.append("RETRIEVAL_DENSE_WEIGHT 与 RETRIEVAL_BM25_WEIGHT 不能同时为 0")
+        if not 1 <= self.retrieval_worker_threads <= 64:
+            issues.append("RETRIEVAL_WORKER_THREADS 必须在 1 到 64 之间")
         if self.max_request_bytes <= 0:
             issues.append("MAX_REQUEST_BYTES 必须大于 0")
         if self.rate_limit_enabled and self.rate_limit_per_minute <= 0:
@@ -280,15 +515,35 @@ class Settings:
             issues.append("RERANK_CANDIDATE_MULTIPLIER 必须在 1 到 10 之间")
         if not 0 <= self.rerank_model_weight <= 1:
             issues.append("RERANK_MODEL_WEIGHT 必须在 0 到 1 之间")
+        if not 0 <= self.rerank_score_cache_size <= 1000000:
+            issues.append("RERANK_SCORE_CACHE_SIZE 必须在 0 到 1000000 之间")
+        if self.rerank_fallback_provider not in VALID_RERANK_FALLBACK_PROVIDERS:
+            issues.append(
+                "RERANK_FALLBACK_PROVIDER 必须是 "
+                f"{', '.join(sorted(VALID_RERANK_FALLBACK_PROVIDERS))} 之一"
+            )
+        if not 1 <= self.local_rerank_batch_size <= 256:
+            issues.append("LOCAL_RERANK_BATCH_SIZE 必须在 1 到 256 之间")
+        if not 32 <= self.local_rerank_max_length <= 8192:
+            issues.append("LOCAL_RERANK_MAX_LENGTH 必须在 32 到 8192 之间")
+        if not 1 <= self.local_rerank_threads <= 64:
+            issues.append("LOCAL_RERANK_THREADS 必须在 1 到 64 之间")
         if self.rerank_enabled:
             if self.rerank_provider == "none":
                 issues.append("启用 RERANK_ENABLED 时 RERANK_PROVIDER 不能为 none")
-            if not self.rerank_model:
-                issues.append("启用 RERANK_ENABLED 时 RERANK_MODEL 不能为空")
-            if not self.zhipuai_api_key:
-                issues.append("启用智谱 reranker 时 ZHIPUAI_API_KEY 不能为空")
-            elif self.zhipuai_api_key.casefold() in PLACEHOLDER_API_KEYS:
-                issues.append("启用智谱 reranker 时 ZHIPUAI_API_KEY 不能使用示例占位值")
+            if self.rerank_provider == "zhipu":
+                if not self.rerank_model:
+                    issues.append("启用 RERANK_ENABLED 时 RERANK_MODEL 不能为空")
+                if not self.zhipuai_api_key:
+                    issues.append("启用智谱 reranker 时 ZHIPUAI_API_KEY 不能为空")
+                elif self.zhipuai_api_key.casefold() in PLACEHOLDER_API_KEYS:
+                    issues.append("启用智谱 reranker 时 ZHIPUAI_API_KEY 不能使用示例占位值")
+            uses_local = "local" in {self.rerank_provider, self.rerank_fallback_provider}
+            if uses_local and self.local_rerank_model_dir is None:
+                issues.append("使用本地精排时 LOCAL_RERANK_MODEL_DIR 不能为空")
+            missing = [name for name in LOCAL_MODEL_PACKAGES if find_spec(name) is None]
+            if uses_local and missing:
+                issues.append(f"使用本地精排时需要安装 {'、'.join(missing)}")
         if self.log_level not in VALID_LOG_LEVELS:
             issues.append(f"LOG_LEVEL 必须是 {', '.join(sorted(VALID_LOG_LEVELS))} 之一")
         if self.log_format not in VALID_LOG_FORMATS:
@@ -1,8 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import logging
+import math
+import sqlite3
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
 from typing import Any
 
+import httpx
+import numpy as np
+
 from .config import Settings
+from .onnx_models import (
+    MODEL_FILE_NAME,
+    configure_tokenizer,
+    encoding_feed,
+    load_onnx_encoder,
+)
 
 
 def embedding_request_kwargs(
@@ -17,3 +37,283 @@ def embedding_request_kwargs(
     if config.embedding_model == "embedding-3":
         request["dimensions"] = config.embedding_dimensions
     return request
+
+
+class AsyncEmbeddingClient:
+    """Awaitable embeddings call against the provider's HTTP API."""
+
+    def __init__(self, config: Settings, *, client: httpx.AsyncClient | None = None) -> None:
+        self._config = config
+        self._url = f"{config.embedding_base_url.rstrip('/')}/embeddings"
+        self._client = client or httpx.AsyncClient(timeout=config.embedding_timeout_seconds)
+
+    async def embed(self, inputs: list[str]) -> list[list[float]]:
+        response = await self._client.post(
+            self._url,
+            json=embedding_request_kwargs(self._config, inputs),
+            headers={"Authorization": f"Bearer {self._config.zhipuai_api_key}"},
+        )
+        response.raise_for_status()
+        rows = response.json().get("data")
+        if not isinstance(rows, list) or len(rows) != len(inputs):
+            raise ValueError("Embedding 响应条目数与输入不一致")
+        rows = sorted(rows, key=lambda row: int(row.get("index", 0)))
+        return [list(row["embedding"]) for row in rows]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+@lru_cache(maxsize=8)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    del mtime_ns, size  # part of the cache key only
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_model_id(model_dir: Path | None) -> str:
+    """``local/<dir>@<sha256 prefix of model.onnx>``; the same file gives the same id anywhere."""
+    if model_dir is None:
+        return "local"
+    model_path = model_dir / MODEL_FILE_NAME
+    try:
+        stat = model_path.stat()
+    except OSError:
+        return f"local/{model_dir.name}"
+    digest = _file_digest(str(model_path), stat.st_mtime_ns, stat.st_size)
+    return f"local/{model_dir.name}@{digest[:12]}"
+
+
+def embedding_model_id(config: Settings) -> str:
+    """Identity recorded with built vectors and checked before they are queried."""
+    if config.embedding_provider == "local":
+        return local_model_id(config.local_embedding_model_dir)
+    return config.embedding_model
+
+
+def is_valid_embedding(vector: Any, dimensions: int) -> bool:
+    return len(vector) == dimensions and all(math.isfinite(float(value)) for value in vector)
+
+
+def check_embeddings(vectors: list[list[float]], count: int, dimensions: int) -> list[list[float]]:
+    """Reject a response with the wrong count, a wrong width or non-finite values."""
+    if len(vectors) != count:
+        raise ValueError("Embedding 响应条目数与输入不一致")
+    if not all(is_valid_embedding(vector, dimensions) for vector in vectors):
+        raise ValueError(f"Embedding 响应维度不是 {dimensions} 或包含非有限数值")
+    return vectors
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into ``dimensions``-wide vectors for one ``model_id``."""
+
+    name = "unknown"
+    model_id = ""
+    dimensions = 0
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return one vector per input text, in input order."""
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        """Awaitable embed; providers with an async client override this."""
+        return await asyncio.to_thread(self.embed, texts)
+
+    async def aclose(self) -> None:
+        return None
+
+
+class ZhipuEmbeddingProvider(EmbeddingProvider):
+    """Remote embeddings through the Zhipu SDK client, with an HTTP client for async calls."""
+
+    name = "zhipu"
+
+    def __init__(
+        self,
+        config: Settings,
+        client: Any,
+        *,
+        async_client: AsyncEmbeddingClient | None = None,
+    ) -> None:
+        self._config = config
+        self.client = client
+        self.async_client = async_client
+        self.model_id = config.embedding_model
+        self.dimensions = config.embedding_dimensions
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        response = self.client.embeddings.create(**embedding_request_kwargs(self._config, texts))
+        vectors = [list(item.embedding) for item in response.data]
+        return check_embeddings(vectors, len(texts), self.dimensions)
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        if self.async_client is None:
+            self.async_client = AsyncEmbeddingClient(self._config)
+        vectors = await self.async_client.embed(texts)
+        return check_embeddings(vectors, len(texts), self.dimensions)
+
+    async def aclose(self) -> None:
+        client, self.async_client = self.async_client, None
+        if client is not None:
+            await client.aclose()
+
+
+class EmbeddingDiskCache:
+    """SQLite store of computed embeddings keyed by (model_id, dimensions, text) digests.
+
+    Local rebuilds re-embed mostly unchanged chunks; the cache turns those
+    into lookups. Failures degrade to misses.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a connection that is closed afterwards."""
+        with closing(sqlite3.connect(self.path, timeout=5)) as connection, connection:
+            yield connection
+
+    @staticmethod
+    def _key(model_id: str, dimensions: int, text: str) -> str:
+        return hashlib.sha256(f"{model_id}\0{dimensions}\0{text}".encode()).hexdigest()
+
+    def get_many(self, model_id: str, dimensions: int, texts: list[str]) -> dict[str, list[float]]:
+        keys = {self._key(model_id, dimensions, text): text for text in dict.fromkeys(texts)}
+        found: dict[str, list[float]] = {}
+        try:
+            with self._connect() as connection:
+                items = list(keys)
+                for start in range(0, len(items), 500):
+                    chunk = items[start : start + 500]
+                    rows = connection.execute(
+                        "SELECT key, vector FROM embeddings WHERE key IN "
+                        f"({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, vector in rows:
+                        found[keys[key]] = np.frombuffer(vector, dtype=np.float32).tolist()
+        except sqlite3.Error as exc:
+            logging.warning("本地 embedding 缓存读取失败，按未命中处理: %s", exc)
+            return {}
+        return found
+
+    def put_many(self, model_id: str, dimensions: int, vectors: dict[str, list[float]]) -> None:
+        rows = [
+            (self._key(model_id, dimensions, text), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in vectors.items()
+        ]
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+                )
+        except sqlite3.Error as exc:
+            logging.warning("本地 embedding 缓存写入失败: %s", exc)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """Sentence embeddings from an ONNX encoder on CPU.
+
+    ``model_dir`` holds ``model.onnx`` and ``tokenizer.json``. Models that
+    output token states are pooled (CLS or attention-masked mean); models
+    that already output sentence vectors are used as is. Vectors are L2
+    normalized, batched ``batch_size`` texts per run, and ONNX Runtime
+    spreads each run over ``threads`` intra-op threads.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        *,
+        model_dir: Path | None,
+        dimensions: int,
+        batch_size: int = 32,
+        max_length: int = 512,
+        threads: int = 4,
+        pooling: str = "cls",
+        cache: EmbeddingDiskCache | None = None,
+        session: Any = None,
+        tokenizer: Any = None,
+    ) -> None:
+        if pooling not in {"cls", "mean"}:
+            raise ValueError(f"不支持的本地 embedding 池化方式：{pooling}")
+        self.model_dir = model_dir
+        self.model_id = local_model_id(model_dir)
+        self.dimensions = dimensions
+        self._batch_size = batch_size
+        self._max_length = max_length
+        self._threads = threads
+        self._pooling = pooling
+        self._cache = cache
+        self._session = session
+        self._tokenizer = (
+            configure_tokenizer(tokenizer, max_length) if tokenizer is not None else None
+        )
+        self._load_lock = Lock()
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> LocalEmbeddingProvider:
+        cache_path = config.local_embedding_cache_path
+        return cls(
+            model_dir=config.local_embedding_model_dir,
+            dimensions=config.embedding_dimensions,
+            batch_size=config.local_embedding_batch_size,
+            max_length=config.local_embedding_max_length,
+            threads=config.local_embedding_threads,
+            pooling=config.local_embedding_pooling,
+            cache=EmbeddingDiskCache(cache_path) if cache_path else None,
+        )
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        vectors = self._cache.get_many(self.model_id, self.dimensions, texts) if self._cache else {}
+        missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+        if missing:
+            computed: dict[str, list[float]] = {}
+            for start in range(0, len(missing), self._batch_size):
+                batch = missing[start : start + self._batch_size]
+                computed.update(zip(batch, self._encode(batch), strict=True))
+            if self._cache is not None:
+                self._cache.put_many(self.model_id, self.dimensions, computed)
+            vectors.update(computed)
+        return [vectors[text] for text in texts]
+
+    def _encode(self, batch: list[str]) -> list[list[float]]:
+        session, tokenizer = self._load()
+        encodings = tokenizer.encode_batch(batch)
+        feed = encoding_feed(session, encodings)
+        output = np.asarray(session.run(None, feed)[0], dtype=np.float32)
+        if output.ndim == 3:
+            if self._pooling == "cls":
+                output = output[:, 0, :]
+            else:
+                mask = np.asarray(
+                    [encoding.attention_mask for encoding in encodings], dtype=np.float32
+                )[:, :, None]
+                output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+        if output.ndim != 2 or output.shape != (len(batch), self.dimensions):
+            raise ValueError(
+                f"本地 embedding 维度不一致: expected={self.dimensions}, actual={output.shape[-1]}"
+            )
+        if not np.isfinite(output).all():
+            raise ValueError("本地 embedding 包含非有限数值")
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return (output / np.maximum(norms, 1e-12)).tolist()
+
+    def _load(self) -> tuple[Any, Any]:
+        with self._load_lock:
+            if self._session is None or self._tokenizer is None:
+                self._session, self._tokenizer = load_onnx_encoder(
+                    self.model_dir, threads=self._threads, max_length=self._max_length
+                )
+            return self._session, self._tokenizer
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+from importlib.util import find_spec
+from threading import Lock
+from typing import Any
+
+import httpx
+
+from .config import Settings, settings
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports back when the caller has finished with it."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close) -> None:
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Counts requests holding a pooled connection, from send until the body is closed."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, max_connections: int) -> None:
+        self._inner = inner
+        self._lock = Lock()
+        self.max_connections = max_connections
+        self.requests_total = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests_total += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self._release),
+            extensions=response.extensions,
+        )
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+    def snapshot(self) -> dict[str, Any]:
+        # httpcore keeps its pool on a private attribute; counts are best effort.
+        connections = list(getattr(getattr(self._inner, "_pool", None), "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        with self._lock:
+            return {
+                "requests_total": self.requests_total,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "max_connections": self.max_connections,
+                "utilization": round(self.in_flight / self.max_connections, 4),
+                "open_connections": len(connections),
+                "idle_connections": idle,
+            }
+
+
+class SharedHttpClients:
+    """Application-scoped pooled async clients, one per upstream provider.
+
+    Clients are opened in the FastAPI lifespan and reused by every request, so
+    connections (and TLS sessions) are kept alive between calls. A client used
+    before startup, e.g. in a script, is created on first access.
+    """
+
+    def __init__(self, config: Settings = settings) -> None:
+        self._config = config
+        self._lock = Lock()
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._transports: dict[str, InstrumentedTransport] = {}
+
+    @property
+    def http2(self) -> bool:
+        return self._config.http2_enabled and find_spec("h2") is not None
+
+    @property
+    def llm(self) -> httpx.AsyncClient:
+        return self._client("llm")
+
+    @property
+    def rerank(self) -> httpx.AsyncClient:
+        return self._client("rerank")
+
+    def open(self) -> None:
+        if self._config.http2_enabled and not self.http2:
+            logging.warning("未安装 h2，上游 HTTP 连接池使用 HTTP/1.1")
+        for name in self._timeouts():
+            self._client(name)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._transports.clear()
+        for client in clients:
+            await client.aclose()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            transports = dict(self._transports)
+        return {name: transport.snapshot() for name, transport in sorted(transports.items())}
+
+    def _timeouts(self) -> dict[str, float]:
+        return {
+            "llm": self._config.llm_timeout_seconds,
+            "rerank": self._config.rerank_timeout_seconds,
+        }
+
+    def _client(self, name: str) -> httpx.AsyncClient:
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                limits = httpx.Limits(
+                    max_connections=self._config.http_pool_max_connections,
+                    max_keepalive_connections=self._config.http_pool_max_keepalive,
+                    keepalive_expiry=self._config.http_pool_keepalive_seconds,
+                )
+                transport = InstrumentedTransport(
+                    httpx.AsyncHTTPTransport(http2=self.http2, limits=limits),
+                    limits.max_connections,
+                )
+                client = httpx.AsyncClient(timeout=self._timeouts()[name], transport=transport)
+                self._clients[name] = client
+                self._transports[name] = transport
+            return client
+
+
+http_clients = SharedHttpClients()
@@ -22,6 +22,28 @@ def _route_group(path: str) -> str:
     return "other"
 
 
+class _Distribution:
+    """Count, average and maximum of an observed quantity; guarded by the owner's lock."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, value: float) -> None:
+        value = max(0.0, value)
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "average": round(self.total / self.count, 2) if self.count else 0,
+            "max": round(self.maximum, 2),
+        }
+
+
 class Metrics:
     def __init__(self) -> None:
         self._lock = Lock()
@@ -36,6 +58,22 @@ class Metrics:
         self.rerank_requests_total = 0
         self.rerank_success_total = 0
         self.rerank_fallback_total = 0
+        self.rerank_score_cache_hits_total = 0
+        self.rerank_score_cache_misses_total = 0
+        self.rerank_documents_sent_total = 0
+        self.rerank_duplicate_candidates_total = 0
+        self.query_embedding_cache_hits_total = 0
+        self.query_embedding_cache_misses_total = 0
+        self.search_result_cache_hits_total = 0
+        self.search_result_cache_misses_total = 0
+        self._search_result_cache_saved_ms = 0.0
+        self.model_image_cache_hits_total = 0
+        self.model_image_cache_misses_total = 0
+        self.model_image_source_bytes_total = 0
+        self.model_image_encoded_bytes_total = 0
+        self._model_image_encode_ms = _Distribution()
+        self._llm_request_body_bytes = _Distribution()
+        self._llm_upload_ms = _Distribution()
         self.llm_errors_total = 0
         self.errors_total = 0
         self.last_error = ""
@@ -97,6 +135,53 @@ class Metrics:
             self._rerank_duration_total_ms += normalized_duration
             self._rerank_duration_max_ms = max(self._rerank_duration_max_ms, normalized_duration)
 
+    def record_rerank_scores(
+        self, *, cache_hits: int, cache_misses: int, documents_sent: int, duplicates: int
+    ) -> None:
+        with self._lock:
+            self.rerank_score_cache_hits_total += max(0, cache_hits)
+            self.rerank_score_cache_misses_total += max(0, cache_misses)
+            self.rerank_documents_sent_total += max(0, documents_sent)
+            self.rerank_duplicate_candidates_total += max(0, duplicates)
+
+    def record_query_embedding_cache(self, *, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.query_embedding_cache_hits_total += 1
+            else:
+                self.query_embedding_cache_misses_total += 1
+
+    def record_search_result_cache(self, *, hit: bool, saved_ms: float = 0.0) -> None:
+        with self._lock:
+            if hit:
+                self.search_result_cache_hits_total += 1
+                self._search_result_cache_saved_ms += max(0.0, saved_ms)
+            else:
+                self.search_result_cache_misses_total += 1
+
+    def record_model_image_encode(
+        self,
+        *,
+        hit: bool,
+        duration_ms: float = 0.0,
+        source_bytes: int = 0,
+        encoded_bytes: int = 0,
+    ) -> None:
+        with self._lock:
+            if hit:
+                self.model_image_cache_hits_total += 1
+                return
+            self.model_image_cache_misses_total += 1
+            self.model_image_source_bytes_total += max(0, source_bytes)
+            self.model_image_encoded_bytes_total += max(0, encoded_bytes)
+            self._model_image_encode_ms.add(duration_ms)
+
+    def record_llm_request(self, *, body_bytes: int, upload_ms: float) -> None:
+        """Record an outbound LLM request; upload time ends when the last body byte is sent."""
+        with self._lock:
+            self._llm_request_body_bytes.add(body_bytes)
+            self._llm_upload_ms.add(upload_ms)
+
     def snapshot(self) -> dict:
         with self._lock:
             average = (
@@ -109,6 +194,12 @@ class Metrics:
                 if self._rerank_duration_count
                 else 0
             )
+            search_cache_lookups = (
+                self.search_result_cache_hits_total + self.search_result_cache_misses_total
+            )
+            rerank_score_lookups = (
+                self.rerank_score_cache_hits_total + self.rerank_score_cache_misses_total
+            )
             return {
                 "started_at": self.started_at,
                 "uptime_seconds": int(time.monotonic() - self._started_monotonic),
@@ -121,6 +212,29 @@ class Metrics:
                 "rerank_requests_total": self.rerank_requests_total,
                 "rerank_success_total": self.rerank_success_total,
                 "rerank_fallback_total": self.rerank_fallback_total,
+                "rerank_score_cache_hits_total": self.rerank_score_cache_hits_total,
+                "rerank_score_cache_misses_total": self.rerank_score_cache_misses_total,
+                "rerank_score_cache_hit_ratio": round(
+                    self.rerank_score_cache_hits_total / rerank_score_lookups, 4
+                )
+                if rerank_score_lookups
+                else 0,
+                "rerank_documents_sent_total": self.rerank_documents_sent_total,
+                "rerank_duplicate_candidates_total": self.rerank_duplicate_candidates_total,
+                "query_embedding_cache_hits_total": self.query_embedding_cache_hits_total,
+                "query_embedding_cache_misses_total": self.query_embedding_cache_misses_total,
+                "search_result_cache_hits_total": self.search_result_cache_hits_total,
+                "search_result_cache_misses_total": self.search_result_cache_misses_total,
+                "search_result_cache_hit_ratio": round(
+                    self.search_result_cache_hits_total / search_cache_lookups, 4
+                )
+                if search_cache_lookups
+                else 0,
+                "search_result_cache_saved_ms_total": round(self._search_result_cache_saved_ms, 2),
+                "model_image_cache_hits_total": self.model_image_cache_hits_total,
+                "model_image_cache_misses_total": self.model_image_cache_misses_total,
+                "model_image_source_bytes_total": self.model_image_source_bytes_total,
+                "model_image_encoded_bytes_total": self.model_image_encoded_bytes_total,
                 "llm_errors_total": self.llm_errors_total,
                 "errors_total": self.errors_total,
                 "last_error": self.last_error,
@@ -138,6 +252,9 @@ class Metrics:
                     "average": rerank_average,
                     "max": self._rerank_duration_max_ms,
                 },
+                "model_image_encode_ms": self._model_image_encode_ms.snapshot(),
+                "llm_request_body_bytes": self._llm_request_body_bytes.snapshot(),
+                "llm_upload_duration_ms": self._llm_upload_ms.snapshot(),
             }
 
 
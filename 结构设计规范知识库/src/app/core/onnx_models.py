@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+MODEL_FILE_NAME = "model.onnx"
+TOKENIZER_FILE_NAME = "tokenizer.json"
+# ONNX input name -> attribute of a tokenizers.Encoding.
+ENCODING_INPUTS = {
+    "input_ids": "ids",
+    "attention_mask": "attention_mask",
+    "token_type_ids": "type_ids",
+}
+
+
+class OnnxModelUnavailable(RuntimeError):
+    pass
+
+
+# Pad tokens probed when tokenizer.json ships no padding configuration.
+PAD_TOKENS = ("[PAD]", "<pad>")
+
+
+def configure_tokenizer(tokenizer: Any, max_length: int) -> Any:
+    tokenizer.enable_truncation(max_length=max_length)
+    # Padding from tokenizer.json wins: the defaults (id 0, "[PAD]") would pad
+    # XLM-R/BGE inputs with "<s>".
+    if tokenizer.padding is None:
+        for token in PAD_TOKENS:
+            pad_id = tokenizer.token_to_id(token)
+            if pad_id is not None:
+                tokenizer.enable_padding(pad_id=pad_id, pad_token=token)
+                break
+        else:
+            tokenizer.enable_padding()
+    return tokenizer
+
+
+def load_onnx_encoder(model_dir: Path | None, *, threads: int, max_length: int) -> tuple[Any, Any]:
+    """Load ``model.onnx`` on the CPU provider with its Hugging Face ``tokenizer.json``."""
+    if onnxruntime is None or Tokenizer is None:
+        raise OnnxModelUnavailable("未安装 onnxruntime 或 tokenizers，无法加载本地模型")
+    model_path = model_dir / MODEL_FILE_NAME if model_dir else None
+    tokenizer_path = model_dir / TOKENIZER_FILE_NAME if model_dir else None
+    if not (model_path and model_path.is_file() and tokenizer_path.is_file()):
+        raise OnnxModelUnavailable(
+            f"本地模型目录缺少 {MODEL_FILE_NAME} 或 {TOKENIZER_FILE_NAME}: {model_dir}"
+        )
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    session = onnxruntime.InferenceSession(
+        str(model_path), options, providers=["CPUExecutionProvider"]
+    )
+    tokenizer = configure_tokenizer(Tokenizer.from_file(str(tokenizer_path)), max_length)
+    return session, tokenizer
+
+
+def encoding_feed(session: Any, encodings: list[Any]) -> dict[str, np.ndarray]:
+    """Session inputs for a padded batch of encodings."""
+    feed: dict[str, np.ndarray] = {}
+    for item in session.get_inputs():
+        attribute = ENCODING_INPUTS.get(item.name)
+        if attribute is None:
+            raise OnnxModelUnavailable(f"本地模型输入不受支持：{item.name}")
+        feed[item.name] = np.asarray(
+            [getattr(encoding, attribute) for encoding in encodings], dtype=np.int64
+        )
+    return feed
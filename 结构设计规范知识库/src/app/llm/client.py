@@ -3,11 +3,11 @@ import logging
 import time
 from collections.abc import AsyncIterator
 
-import httpx
 from fastapi.responses import JSONResponse
 
 from ..core.config import settings
 from ..core.errors import ErrorCode, error_response, stream_error
+from ..core.http_clients import http_clients
 from ..core.metrics import metrics
 from ..rag.citations import normalize_answer_citations
 from ..rag.service import build_mimo_payload
@@ -18,6 +18,26 @@ def _headers() -> dict[str, str]:
     return {"Authorization": f"Bearer {settings.mimo_api_key}", "Content-Type": "application/json"}
 
 
+def _request_body(payload: dict) -> bytes:
+    # Serialized once here so the recorded size is exactly what goes on the wire.
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def _timed_upload(body: bytes) -> AsyncIterator[bytes]:
+    """Request content that records the upload once httpx has written the body."""
+    started = time.perf_counter()
+    yield body
+    # Resumed only after the transport has sent the chunk above, before any response.
+    metrics.record_llm_request(
+        body_bytes=len(body), upload_ms=(time.perf_counter() - started) * 1000
+    )
+
+
+def _upload_headers(body: bytes) -> dict[str, str]:
+    # A fixed length keeps httpx from switching the streamed body to chunked encoding.
+    return {**_headers(), "Content-Length": str(len(body))}
+
+
 async def generate_non_stream(request: ChatCompletionRequest):
     result = await build_mimo_payload(request)
     if isinstance(result, dict) and "error" in result:
@@ -28,33 +48,35 @@ async def generate_non_stream(request: ChatCompletionRequest):
 
     payload, _images, trace = result
     try:
-        async with httpx.AsyncClient(timeout=settings.llm_timeout_seconds) as client:
-            response = await client.post(
-                f"{settings.mimo_base_url}/chat/completions",
-                json=payload,
-                headers=_headers(),
-            )
-            response.raise_for_status()
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            content = normalize_answer_citations(content, trace)
-            output = {
-                "id": data.get("id", ""),
-                "object": "chat.completion",
-                "created": int(time.time()),
-                "model": data.get("model", request.model),
-                "choices": [
-                    {
-                        "index": 0,
-                        "message": {"role": "assistant", "content": content},
-                        "finish_reason": "stop",
-                    }
-                ],
-                "usage": data.get("usage", {}),
-            }
-            if request.include_rag_trace:
-                output["rag_trace"] = trace
-            return output
+        body = _request_body(payload)
+        async with http_clients.llm.stream(
+            "POST",
+            f"{settings.mimo_base_url}/chat/completions",
+            content=_timed_upload(body),
+            headers=_upload_headers(body),
+        ) as response:
+            await response.aread()
+        response.raise_for_status()
+        data = response.json()
+        content = data["choices"][0]["message"]["content"]
+        content = normalize_answer_citations(content, trace)
+        output = {
+            "id": data.get("id", ""),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": data.get("model", request.model),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": data.get("usage", {}),
+        }
+        if request.include_rag_trace:
+            output["rag_trace"] = trace
+        return output
     except Exception as exc:
         logging.error("MiMo 调用失败: %s", exc, exc_info=True)
         metrics.increment_error(ErrorCode.LLM_REQUEST_FAILED, "/v1/chat/completions")
@@ -75,30 +97,30 @@ async def rag_stream(request: ChatCompletionRequest) -> AsyncIterator[str]:
         reasoning_parts: list[str] = []
         response_id = ""
         response_model = request.model
-        async with httpx.AsyncClient(timeout=settings.llm_timeout_seconds) as client:
-            async with client.stream(
-                "POST",
-                f"{settings.mimo_base_url}/chat/completions",
-                json=payload,
-                headers=_headers(),
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    line = line.strip()
-                    if not line or line == "data: [DONE]":
+        body = _request_body(payload)
+        async with http_clients.llm.stream(
+            "POST",
+            f"{settings.mimo_base_url}/chat/completions",
+            content=_timed_upload(body),
+            headers=_upload_headers(body),
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                line = line.strip()
+                if not line or line == "data: [DONE]":
+                    continue
+                if line.startswith("data: "):
+                    chunk = json.loads(line[6:])
+                    response_id = chunk.get("id", response_id)
+                    response_model = chunk.get("model", response_model)
+                    choices = chunk.get("choices", [])
+                    if not choices:
                         continue
-                    if line.startswith("data: "):
-                        chunk = json.loads(line[6:])
-                        response_id = chunk.get("id", response_id)
-                        response_model = chunk.get("model", response_model)
-                        choices = chunk.get("choices", [])
-                        if not choices:
-                            continue
-                        delta = choices[0].get("delta", {})
-                        if delta.get("content"):
-                            content_parts.append(str(delta["content"]))
-                        if delta.get("reasoning_content"):
-                            reasoning_parts.append(str(delta["reasoning_content"]))
+                    delta = choices[0].get("delta", {})
+                    if delta.get("content"):
+                        content_parts.append(str(delta["content"]))
+                    if delta.get("reasoning_content"):
+                        reasoning_parts.append(str(delta["reasoning_content"]))
 
         normalized = normalize_answer_citations("".join(content_parts), trace)
         chunk = {
@@ -9,6 +9,7 @@ from fastapi.staticfiles import StaticFiles
 from .admin.jobs import job_manager
 from .api import admin, chat, health, images, knowledge
 from .core.config import settings
+from .core.http_clients import http_clients
 from .core.logging import configure_logging
 from .core.middleware import ServiceMiddleware
 from .retrieval.hybrid_search import retrieval_state
@@ -21,8 +22,12 @@ async def lifespan(app: FastAPI):
         "job_startup_reconciliation_completed",
         extra={"extra_data": app.state.job_recovery},
     )
+    http_clients.open()
     retrieval_state.initialize()
     yield
+    retrieval_state.persist_embedding_cache()
+    await retrieval_state.aclose()
+    await http_clients.aclose()
 
 
 def create_app() -> FastAPI:
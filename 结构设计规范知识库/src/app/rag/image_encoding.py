@@ -0,0 +1,135 @@
+import base64
+import logging
+import mimetypes
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+from ..core.config import Settings, settings
+from ..core.metrics import metrics
+
+MODEL_IMAGE_MEDIA_TYPES = {"png": "image/png", "jpeg": "image/jpeg"}
+
+
+class ModelImageEncoder:
+    """Encode images as model-facing data URLs behind a byte-bounded LRU cache.
+
+    Entries are keyed by (path, mtime, size), so an image replaced on disk is
+    encoded again on next use. Images wider or taller than ``max_edge`` are
+    downscaled, and ``image_format`` optionally recompresses them first.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        max_edge: int = 0,
+        image_format: str = "original",
+        jpeg_quality: int = 85,
+    ) -> None:
+        if image_format != "original" and image_format not in MODEL_IMAGE_MEDIA_TYPES:
+            raise ValueError(f"不支持的模型图片格式: {image_format}")
+        self.max_bytes = max(0, max_bytes)
+        self.max_edge = max(0, max_edge)
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self._lock = Lock()
+        self._entries: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._size = 0
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> "ModelImageEncoder":
+        return cls(
+            max_bytes=config.model_image_cache_mb * 1024 * 1024,
+            max_edge=config.model_image_max_edge,
+            image_format=config.model_image_format,
+            jpeg_quality=config.model_image_jpeg_quality,
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def data_url(self, image_path: Path) -> str:
+        stat = image_path.stat()
+        key = (str(image_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+        if cached is not None:
+            metrics.record_model_image_encode(hit=True)
+            return cached
+
+        started = time.perf_counter()
+        media_type, payload = self._prepare(image_path)
+        url = f"data:{media_type};base64,{base64.b64encode(payload).decode()}"
+        metrics.record_model_image_encode(
+            hit=False,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            source_bytes=stat.st_size,
+            encoded_bytes=len(payload),
+        )
+        self._store(key, url)
+        return url
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _store(self, key: tuple[str, int, int], url: str) -> None:
+        if len(url) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = url
+            self._size += len(url)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _prepare(self, image_path: Path) -> tuple[str, bytes]:
+        original = image_path.read_bytes()
+        media_type = mimetypes.guess_type(image_path.name)[0] or "application/octet-stream"
+        if self.max_edge == 0 and self.image_format == "original":
+            return media_type, original
+        try:
+            import fitz
+        except ImportError:
+            logging.warning("缺少 PyMuPDF，模型图片按原图发送")
+            return media_type, original
+
+        try:
+            pixmap = fitz.Pixmap(str(image_path))
+            longest = max(pixmap.width, pixmap.height)
+            resized = bool(self.max_edge) and longest > self.max_edge
+            if resized:
+                ratio = self.max_edge / longest
+                pixmap = fitz.Pixmap(
+                    pixmap,
+                    max(1, round(pixmap.width * ratio)),
+                    max(1, round(pixmap.height * ratio)),
+                    None,
+                )
+            output = self.image_format
+            if output == "original":
+                if not resized:
+                    return media_type, original
+                output = "jpeg" if media_type == "image/jpeg" else "png"
+            if output == "jpeg" and pixmap.alpha:
+                pixmap = fitz.Pixmap(pixmap, 0)
+            encoded = pixmap.tobytes(output, jpg_quality=self.jpeg_quality)
+        except Exception as exc:
+            logging.warning("模型图片压缩失败，按原图发送: %s (%s)", image_path.name, exc)
+            return media_type, original
+        # Recompressing an already small image can grow it; keep whichever is smaller.
+        if not resized and len(encoded) >= len(original):
+            return media_type, original
+        return MODEL_IMAGE_MEDIA_TYPES[output], encoded
+
+
+model_image_encoder = ModelImageEncoder.from_settings(settings)
@@ -1,18 +1,19 @@
-import base64
-import mimetypes
+import asyncio
 from pathlib import Path
 
 from src.pipeline.active_db import active_images_dir
-from src.pipeline.audit.multimodal import find_source_pdf, render_pdf_pages
-from src.pipeline.paths import AUDIT_DIR, RAW_DIR
+from src.pipeline.audit.multimodal import find_source_pdf
+from src.pipeline.page_render_cache import default_page_render_cache
+from src.pipeline.paths import RAW_DIR
 
 from ..core.config import settings
+from .image_encoding import model_image_encoder
+
+page_render_cache = default_page_render_cache()
 
 
 def _data_url(image_path: Path) -> str:
-    media_type = mimetypes.guess_type(image_path.name)[0] or "application/octet-stream"
-    encoded = base64.b64encode(image_path.read_bytes()).decode()
-    return f"data:{media_type};base64,{encoded}"
+    return model_image_encoder.data_url(image_path)
 
 
 def load_images_by_name(filenames: list[str]) -> list[str]:
@@ -51,7 +52,7 @@ def load_page_images(source: str, pages: list[int]) -> list[str]:
     images: list[str] = []
     pdf_path = find_source_pdf(source, RAW_DIR)
     if pdf_path:
-        rendered = render_pdf_pages(pdf_path, pages, AUDIT_DIR / "page_images")
+        rendered = page_render_cache.render_pages(pdf_path, pages)
         for page in pages:
             image_path = rendered.get(page)
             if image_path and image_path.exists():
@@ -63,3 +64,12 @@ def load_page_images(source: str, pages: list[int]) -> list[str]:
     for filename in page_image_filenames(source, pages):
         images.append(_data_url(image_dir / filename))
     return images
+
+
+async def load_images_by_name_async(filenames: list[str]) -> list[str]:
+    return await asyncio.to_thread(load_images_by_name, filenames)
+
+
+async def load_page_images_async(source: str, pages: list[int]) -> list[str]:
+    """Render and encode page images off the event loop."""
+    return await asyncio.to_thread(load_page_images, source, pages)
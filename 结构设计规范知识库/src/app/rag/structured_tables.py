@@ -1,11 +1,13 @@
 import json
 import re
+from collections.abc import Iterable
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
+from threading import Lock
 from typing import Any
 
-from ..retrieval.hybrid_search import evidence_contains
+from ..retrieval.hybrid_search import compact_evidence, contains_precompacted, evidence_contains
 from ..retrieval.query import QueryInfo, analyze_query
 
 STRUCTURED_TABLE_DIR = Path(__file__).resolve().parents[3] / "data" / "structured_tables"
@@ -81,14 +83,29 @@ def _normalized_query_terms(text: str) -> list[str]:
     return list(dict.fromkeys(terms))
 
 
+@dataclass(frozen=True)
+class IndexedRow:
+    table: dict[str, Any]
+    row: dict[str, Any]
+    evidence: str
+    compact: str
+
+    def contains(self, piece: str) -> bool:
+        return contains_precompacted(self.evidence, self.compact, piece, compact_evidence(piece))
+
+
 def _score_row(
-    query_info: QueryInfo, table: dict[str, Any], row: dict[str, Any]
+    query_info: QueryInfo,
+    table: dict[str, Any],
+    row: dict[str, Any],
+    indexed: IndexedRow | None = None,
+    normalized_query_terms: list[str] | None = None,
 ) -> tuple[float, list[str]]:
     source = table.get("source", {})
     table_id = str(source.get("table_id") or "")
-    table_evidence = _table_evidence(table)
-    row_evidence = _row_evidence(row)
-    combined_evidence = f"{table_evidence}\n{row_evidence}"
+    if indexed is None:
+        combined_evidence = f"{_table_evidence(table)}\n{_row_evidence(row)}"
+        indexed = IndexedRow(table, row, combined_evidence, compact_evidence(combined_evidence))
     matched_terms: list[str] = []
     score = 0.0
 
@@ -97,15 +114,16 @@ def _score_row(
         matched_terms.append(f"表{table_id}")
 
     for phrase in query_info.content_phrases:
-        if evidence_contains(combined_evidence, phrase):
+        if indexed.contains(phrase):
             score += 2.0
             matched_terms.append(phrase)
 
     for keyword in query_info.content_keywords:
-        if evidence_contains(combined_evidence, keyword):
+        if indexed.contains(keyword):
             score += 0.25
 
-    normalized_query_terms = _normalized_query_terms(query_info.normalized)
+    if normalized_query_terms is None:
+        normalized_query_terms = _normalized_query_terms(query_info.normalized)
 
     for alias in row.get("aliases", []):
         alias_text = str(alias)
@@ -127,6 +145,148 @@ def _score_row(
     return score, list(dict.fromkeys(matched_terms))
 
 
+def _grams(compact: str) -> set[str]:
+    """Index keys of a compacted string: its bigrams, or the string itself when shorter."""
+    if len(compact) < 2:
+        return {compact} if compact else set()
+    return {compact[start : start + 2] for start in range(len(compact) - 1)}
+
+
+def _substrings_up_to_two(compact: str) -> set[str]:
+    return {compact[start : start + size] for size in (1, 2) for start in range(len(compact))}
+
+
+class StructuredTableIndex:
+    """Inverted index over structured-table rows.
+
+    Row evidence (table header plus row values) is compacted once and keyed
+    by character bigrams; row and table aliases are keyed by their leading
+    bigram so they can be probed from the (range-expanded) query terms. A
+    query only scores rows reachable from its table numbers, phrases,
+    keywords and aliases; the ranking is identical to scoring every row.
+    """
+
+    def __init__(self, tables: list[dict[str, Any]]) -> None:
+        self.tables = tables
+        self.rows: list[IndexedRow] = []
+        self.table_rows: list[range] = []
+        self._row_tables: list[int] = []
+        self._grams: dict[str, set[int]] = {}
+        self._table_ids: dict[str, list[int]] = {}
+        self._row_aliases: dict[str, list[tuple[int, str]]] = {}
+        self._table_aliases: dict[str, list[tuple[int, str]]] = {}
+        for table_position, table in enumerate(tables):
+            table_evidence = _table_evidence(table)
+            first_row = len(self.rows)
+            for row in table.get("rows", []):
+                row_position = len(self.rows)
+                evidence = f"{table_evidence}\n{_row_evidence(row)}"
+                compact = compact_evidence(evidence)
+                self.rows.append(IndexedRow(table, row, evidence, compact))
+                self._row_tables.append(table_position)
+                for gram in _grams(compact) | set(compact):
+                    self._grams.setdefault(gram, set()).add(row_position)
+                for alias in row.get("aliases", []):
+                    self._add_alias(self._row_aliases, row_position, str(alias))
+            self.table_rows.append(range(first_row, len(self.rows)))
+            table_id = str(table.get("source", {}).get("table_id") or "")
+            if table_id:
+                self._table_ids.setdefault(table_id, []).append(table_position)
+            for alias in table.get("table_aliases", []):
+                self._add_alias(self._table_aliases, table_position, str(alias))
+
+    @staticmethod
+    def _add_alias(index: dict[str, list[tuple[int, str]]], position: int, alias: str) -> None:
+        compact = compact_evidence(alias)
+        # An alias with nothing left after compaction matches every query term.
+        index.setdefault(compact[:2], []).append((position, alias))
+
+    def rows_containing(self, piece: str) -> set[int]:
+        """Rows whose evidence may contain ``piece``; a superset verified by scoring."""
+        if not piece:
+            return set()
+        compact = compact_evidence(piece)
+        if not compact:
+            return set(range(len(self.rows)))
+        postings = [self._grams.get(gram, set()) for gram in _grams(compact)]
+        return set.intersection(*sorted(postings, key=len)) if postings else set()
+
+    def _alias_hits(
+        self, index: dict[str, list[tuple[int, str]]], query_terms: list[str]
+    ) -> set[int]:
+        keys = {""}
+        for term in query_terms:
+            keys.update(_substrings_up_to_two(compact_evidence(term)))
+        return {
+            position
+            for key in keys
+            for position, alias in index.get(key, [])
+            if any(evidence_contains(term, alias) for term in query_terms)
+        }
+
+    def candidate_rows(self, query_info: QueryInfo, query_terms: list[str]) -> set[int]:
+        candidates: set[int] = set()
+        for table_id in query_info.table_numbers:
+            for table_position in self._table_ids.get(table_id, []):
+                candidates.update(self.table_rows[table_position])
+        for table_position in self._alias_hits(self._table_aliases, query_terms):
+            candidates.update(self.table_rows[table_position])
+        candidates.update(self._alias_hits(self._row_aliases, query_terms))
+        for piece in [*query_info.content_phrases, *query_info.content_keywords]:
+            candidates.update(self.rows_containing(piece))
+        return candidates
+
+    def table_of(self, row_position: int) -> int:
+        return self._row_tables[row_position]
+
+    def rows_in_order(self, table_positions: Iterable[int]) -> Iterable[int]:
+        for table_position in table_positions:
+            yield from self.table_rows[table_position]
+
+
+_index_lock = Lock()
+_index: StructuredTableIndex | None = None
+
+
+def structured_table_index() -> StructuredTableIndex:
+    """Index for the currently loaded tables, rebuilt whenever the load cache is cleared."""
+    global _index
+    tables = load_structured_tables()
+    with _index_lock:
+        if _index is None or _index.tables is not tables:
+            _index = StructuredTableIndex(tables)
+        return _index
+
+
+def clear_structured_table_cache() -> None:
+    global _index
+    load_structured_tables.cache_clear()
+    with _index_lock:
+        _index = None
+
+
+def _base_score(query_info: QueryInfo) -> float:
+    """Score every row receives regardless of its evidence (see ``_score_row``)."""
+    return (1.0 if query_info.intent == "value_lookup" else 0.0) + (
+        0.8 if query_info.wants_table else 0.0
+    )
+
+
+def _structured_match(
+    table: dict[str, Any], row: dict[str, Any], score: float, matched_terms: list[str]
+) -> StructuredTableMatch:
+    reason = "structured table match"
+    if matched_terms:
+        reason += ": " + ", ".join(matched_terms[:6])
+    return StructuredTableMatch(
+        table=table,
+        row=row,
+        score=score,
+        matched_terms=matched_terms,
+        reason=reason,
+    )
+
+
 def find_structured_table_matches(query: str, limit: int = 3) -> list[StructuredTableMatch]:
     query_info = analyze_query(query)
     if not query_info.wants_table and query_info.intent not in {
@@ -136,29 +296,43 @@ def find_structured_table_matches(query: str, limit: int = 3) -> list[Structured
     }:
         return []
 
+    index = structured_table_index()
+    query_terms = _normalized_query_terms(query_info.normalized)
+    source_matches: dict[int, bool] = {}
+
+    def allowed(table_position: int) -> bool:
+        if table_position not in source_matches:
+            source = index.tables[table_position].get("source", {})
+            source_matches[table_position] = _source_matches(query_info, source)
+        return source_matches[table_position]
+
+    base_score = _base_score(query_info)
     matches: list[StructuredTableMatch] = []
-    for table in load_structured_tables():
-        source = table.get("source", {})
-        if not _source_matches(query_info, source):
+    matched_rows: set[int] = set()
+    for position in sorted(index.candidate_rows(query_info, query_terms)):
+        if not allowed(index.table_of(position)):
+            continue
+        indexed = index.rows[position]
+        score, matched_terms = _score_row(
+            query_info, indexed.table, indexed.row, indexed, query_terms
+        )
+        if score <= max(1.0, base_score):
             continue
-        for row in table.get("rows", []):
-            score, matched_terms = _score_row(query_info, table, row)
-            if score <= 1.0:
+        matches.append(_structured_match(indexed.table, indexed.row, score, matched_terms))
+        matched_rows.add(position)
+
+    matches = sorted(matches, key=lambda item: item.score, reverse=True)[:limit]
+    if base_score > 1.0 and len(matches) < limit:
+        # Rows without any evidence still clear the threshold on intent alone;
+        # they rank after every evidenced row, in file order.
+        for position in index.rows_in_order(range(len(index.tables))):
+            if len(matches) >= limit:
+                break
+            if position in matched_rows or not allowed(index.table_of(position)):
                 continue
-            reason = "structured table match"
-            if matched_terms:
-                reason += ": " + ", ".join(matched_terms[:6])
-            matches.append(
-                StructuredTableMatch(
-                    table=table,
-                    row=row,
-                    score=score,
-                    matched_terms=matched_terms,
-                    reason=reason,
-                )
-            )
-
-    return sorted(matches, key=lambda item: item.score, reverse=True)[:limit]
+            indexed = index.rows[position]
+            matches.append(_structured_match(indexed.table, indexed.row, base_score, []))
+    return matches
 
 
 def format_structured_table_context(match: StructuredTableMatch) -> str:
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 from ..retrieval.models import RetrievalResult
@@ -15,3 +16,17 @@ class BaseReranker(ABC):
         top_n: int | None = None,
     ) -> list[RetrievalResult]:
         """Return reranked retrieval results."""
+
+    async def arerank(
+        self,
+        query: str,
+        results: list[RetrievalResult],
+        *,
+        top_n: int | None = None,
+    ) -> list[RetrievalResult]:
+        """Awaitable rerank; providers with an async client override this."""
+        return await asyncio.to_thread(self.rerank, query, results, top_n=top_n)
+
+    def close(self) -> None:
+        """Release worker threads; a later rerank starts them again."""
+        return None
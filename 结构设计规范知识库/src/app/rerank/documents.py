@@ -0,0 +1,19 @@
+from ..retrieval.models import RetrievalResult
+
+MAX_TEXT_CHARS = 4096
+
+
+def candidate_document(result: RetrievalResult) -> str:
+    """Authority header (spec, title, clause, table) followed by the text, within MAX_TEXT_CHARS."""
+    meta = result.meta
+    header = [
+        f"规范：{meta.get('name', '')} {meta.get('code', '')}".strip(),
+        f"标题：{meta.get('title', '')}".strip(),
+        f"条文号：{meta.get('clause_number', '')}".strip(),
+        f"依据类型：{meta.get('section_type', '')}".strip(),
+        f"表号与表名：{meta.get('table_id', '')} {meta.get('table_name', '')}".strip(),
+        "内容：",
+    ]
+    prefix = "\n".join(header)
+    remaining = max(0, MAX_TEXT_CHARS - len(prefix) - 1)
+    return f"{prefix}\n{result.text[:remaining]}"[:MAX_TEXT_CHARS]
@@ -1,14 +1,27 @@
 from ..core.config import Settings, settings
 from .base import BaseReranker
+from .local import LocalCrossEncoderReranker
 from .noop import NoopReranker
 from .safe import FailOpenReranker
+from .score_cache import build_rerank_score_cache
 from .zhipu import ZhipuReranker
 
 
+def _local_reranker(config: Settings) -> LocalCrossEncoderReranker:
+    return LocalCrossEncoderReranker(
+        model_dir=config.local_rerank_model_dir,
+        model_weight=config.rerank_model_weight,
+        batch_size=config.local_rerank_batch_size,
+        max_length=config.local_rerank_max_length,
+        threads=config.local_rerank_threads,
+    )
+
+
 def get_reranker(config: Settings = settings) -> BaseReranker:
     if not config.rerank_enabled:
         return NoopReranker()
     if config.rerank_provider == "zhipu":
+        fallback = _local_reranker(config) if config.rerank_fallback_provider == "local" else None
         return FailOpenReranker(
             ZhipuReranker(
                 api_key=config.zhipuai_api_key,
@@ -16,6 +29,10 @@ def get_reranker(config: Settings = settings) -> BaseReranker:
                 model=config.rerank_model,
                 timeout_seconds=config.rerank_timeout_seconds,
                 model_weight=config.rerank_model_weight,
-            )
+                score_cache=build_rerank_score_cache(config.rerank_score_cache_size),
+            ),
+            fallback=fallback,
         )
+    if config.rerank_provider == "local":
+        return FailOpenReranker(_local_reranker(config))
     raise ValueError(f"不支持的 reranker 提供方：{config.rerank_provider}")
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from math import isfinite
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+from ..core.onnx_models import (
+    OnnxModelUnavailable,
+    configure_tokenizer,
+    encoding_feed,
+    load_onnx_encoder,
+)
+from ..retrieval.models import RetrievalResult
+from .base import BaseReranker
+from .documents import candidate_document
+from .errors import RerankerError
+from .fusion import fuse_rankings
+
+
+class LocalCrossEncoderReranker(BaseReranker):
+    """Cross-encoder scored on CPU with ONNX Runtime.
+
+    ``model_dir`` holds an exported ``model.onnx`` and its Hugging Face
+    ``tokenizer.json``; both are loaded once, on first use. Candidates are
+    scored in fixed-size batches on a single-worker executor, so concurrent
+    queries queue rather than oversubscribe the intra-op threads.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        *,
+        model_dir: Path | None,
+        model_weight: float,
+        batch_size: int = 16,
+        max_length: int = 512,
+        threads: int = 2,
+        session: Any = None,
+        tokenizer: Any = None,
+    ) -> None:
+        self.model_dir = model_dir
+        self.model = model_dir.name if model_dir is not None else ""
+        self._model_weight = model_weight
+        self._batch_size = batch_size
+        self._max_length = max_length
+        self._threads = threads
+        self._session = session
+        self._tokenizer = (
+            configure_tokenizer(tokenizer, max_length) if tokenizer is not None else None
+        )
+        self._load_lock = Lock()
+        self._executor_lock = Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def rerank(
+        self,
+        query: str,
+        results: list[RetrievalResult],
+        *,
+        top_n: int | None = None,
+    ) -> list[RetrievalResult]:
+        requested = len(results) if top_n is None else min(max(top_n, 0), len(results))
+        if requested == 0:
+            return []
+        return fuse_rankings(
+            results,
+            self.score(query, [candidate_document(result) for result in results]),
+            model_weight=self._model_weight,
+            top_n=requested,
+        )
+
+    async def arerank(
+        self,
+        query: str,
+        results: list[RetrievalResult],
+        *,
+        top_n: int | None = None,
+    ) -> list[RetrievalResult]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._rerank_executor(), partial(self.rerank, query, results, top_n=top_n)
+        )
+
+    def _rerank_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="local-rerank"
+                )
+            return self._executor
+
+    def close(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def score(self, query: str, documents: list[str]) -> dict[int, float]:
+        """Relevance logit of every (query, document) pair, keyed by document index."""
+        session, tokenizer = self._load()
+        scores: dict[int, float] = {}
+        for start in range(0, len(documents), self._batch_size):
+            batch = documents[start : start + self._batch_size]
+            encodings = tokenizer.encode_batch([(query, document) for document in batch])
+            try:
+                feed = encoding_feed(session, encodings)
+            except OnnxModelUnavailable as exc:
+                raise RerankerError("invalid_model", str(exc)) from exc
+            logits = np.asarray(session.run(None, feed)[0], dtype=np.float32)
+            # Single-logit models score directly; two-class heads use the positive class.
+            for offset, value in enumerate(logits.reshape(len(batch), -1)[:, -1]):
+                if not isfinite(float(value)):
+                    raise RerankerError("invalid_score", "本地精排相关性分数不是有限数字")
+                scores[start + offset] = float(value)
+        return scores
+
+    def _load(self) -> tuple[Any, Any]:
+        with self._load_lock:
+            if self._session is None or self._tokenizer is None:
+                try:
+                    self._session, self._tokenizer = load_onnx_encoder(
+                        self.model_dir, threads=self._threads, max_length=self._max_length
+                    )
+                except OnnxModelUnavailable as exc:
+                    raise RerankerError("model_unavailable", str(exc)) from exc
+            return self._session, self._tokenizer
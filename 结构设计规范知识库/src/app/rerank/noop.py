@@ -14,3 +14,12 @@ class NoopReranker(BaseReranker):
     ) -> list[RetrievalResult]:
         del query
         return results if top_n is None else results[:top_n]
+
+    async def arerank(
+        self,
+        query: str,
+        results: list[RetrievalResult],
+        *,
+        top_n: int | None = None,
+    ) -> list[RetrievalResult]:
+        return self.rerank(query, results, top_n=top_n)
@@ -1,3 +1,4 @@
+import contextvars
 import logging
 from time import perf_counter
 
@@ -6,12 +7,35 @@ from ..retrieval.models import RetrievalResult
 from .base import BaseReranker
 from .errors import RerankerError
 
+RerankFailure = dict[str, int | str | None]
+
+# Failure of the latest rerank in the current context. ``last_failure`` is shared by
+# every search running on the instance; this is not.
+rerank_failure_var: contextvars.ContextVar[RerankFailure | None] = contextvars.ContextVar(
+    "rerank_failure", default=None
+)
+
+
+def current_rerank_failure() -> RerankFailure | None:
+    return rerank_failure_var.get()
+
 
 class FailOpenReranker(BaseReranker):
-    def __init__(self, delegate: BaseReranker) -> None:
+    """Try the delegate, then the optional fallback reranker, then keep the baseline order."""
+
+    def __init__(self, delegate: BaseReranker, *, fallback: BaseReranker | None = None) -> None:
         self.delegate = delegate
+        self.fallback = fallback
         self.name = delegate.name
-        self.last_failure: dict[str, int | str | None] | None = None
+        self.model = getattr(delegate, "model", "")
+        self.last_failure: RerankFailure | None = None
+
+    def _chain(self) -> list[BaseReranker]:
+        return [self.delegate] if self.fallback is None else [self.delegate, self.fallback]
+
+    def close(self) -> None:
+        for reranker in self._chain():
+            reranker.close()
 
     def rerank(
         self,
@@ -21,29 +45,87 @@ class FailOpenReranker(BaseReranker):
         top_n: int | None = None,
     ) -> list[RetrievalResult]:
         started = perf_counter()
-        requested = len(results) if top_n is None else max(top_n, 0)
         self.last_failure = None
-        try:
-            reranked = self.delegate.rerank(query, results, top_n=top_n)
-        except Exception as exc:
-            duration_ms = int((perf_counter() - started) * 1000)
-            code = exc.code if isinstance(exc, RerankerError) else "unexpected_error"
-            http_status = exc.http_status if isinstance(exc, RerankerError) else None
-            self.last_failure = {"code": code, "http_status": http_status}
-            metrics.record_rerank(success=False, duration_ms=duration_ms)
-            logging.warning(
-                "rerank_fallback",
-                extra={
-                    "extra_data": {
-                        "provider": self.name,
-                        "candidate_count": len(results),
-                        "duration_ms": duration_ms,
-                        "error_code": code,
-                    }
-                },
-            )
-            return results[:requested]
+        rerank_failure_var.set(None)
+        failure: Exception | None = None
+        for reranker in self._chain():
+            try:
+                reranked = reranker.rerank(query, results, top_n=top_n)
+            except Exception as exc:
+                failure = failure or exc
+                continue
+            return self._completed(results, reranked, started, reranker, failure)
+        return self._fall_back(failure, results, top_n, started)
 
+    async def arerank(
+        self,
+        query: str,
+        results: list[RetrievalResult],
+        *,
+        top_n: int | None = None,
+    ) -> list[RetrievalResult]:
+        started = perf_counter()
+        self.last_failure = None
+        rerank_failure_var.set(None)
+        failure: Exception | None = None
+        for reranker in self._chain():
+            try:
+                reranked = await reranker.arerank(query, results, top_n=top_n)
+            except Exception as exc:
+                failure = failure or exc
+                continue
+            return self._completed(results, reranked, started, reranker, failure)
+        return self._fall_back(failure, results, top_n, started)
+
+    def _fall_back(
+        self,
+        exc: Exception,
+        results: list[RetrievalResult],
+        top_n: int | None,
+        started: float,
+    ) -> list[RetrievalResult]:
+        requested = len(results) if top_n is None else max(top_n, 0)
+        self._record_failure(exc, results, started, "baseline")
+        return results[:requested]
+
+    def _record_failure(
+        self,
+        exc: Exception,
+        results: list[RetrievalResult],
+        started: float,
+        served_by: str,
+    ) -> None:
+        duration_ms = int((perf_counter() - started) * 1000)
+        code = exc.code if isinstance(exc, RerankerError) else "unexpected_error"
+        http_status = exc.http_status if isinstance(exc, RerankerError) else None
+        self.last_failure = {"code": code, "http_status": http_status}
+        rerank_failure_var.set(self.last_failure)
+        metrics.record_rerank(success=False, duration_ms=duration_ms)
+        logging.warning(
+            "rerank_fallback",
+            extra={
+                "extra_data": {
+                    "provider": self.name,
+                    "candidate_count": len(results),
+                    "duration_ms": duration_ms,
+                    "error_code": code,
+                    "served_by": served_by,
+                }
+            },
+        )
+
+    def _completed(
+        self,
+        results: list[RetrievalResult],
+        reranked: list[RetrievalResult],
+        started: float,
+        served_by: BaseReranker,
+        failure: Exception | None,
+    ) -> list[RetrievalResult]:
+        if failure is not None:
+            # The primary provider failed and the fallback reranker answered.
+            self._record_failure(failure, results, started, served_by.name)
+            return reranked
         duration_ms = int((perf_counter() - started) * 1000)
         metrics.record_rerank(success=True, duration_ms=duration_ms)
         logging.info(
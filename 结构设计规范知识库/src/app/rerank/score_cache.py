@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import contextvars
+from collections import OrderedDict
+from collections.abc import Iterable
+from threading import Lock
+
+from ..retrieval.embedding_cache import normalize_embedding_query
+
+# Data version of the snapshot the candidates were retrieved from; set by the
+# searcher around each rerank call. Empty means scores must not be cached.
+rerank_data_version_var = contextvars.ContextVar("rerank_data_version", default="")
+
+ScoreKey = tuple[str, str, str, str]
+
+
+def set_rerank_data_version(data_version: str) -> contextvars.Token:
+    return rerank_data_version_var.set(data_version)
+
+
+def reset_rerank_data_version(token: contextvars.Token) -> None:
+    rerank_data_version_var.reset(token)
+
+
+def current_rerank_data_version() -> str:
+    return rerank_data_version_var.get()
+
+
+class RerankScoreCache:
+    """Bounded LRU of model relevance scores keyed by (model, query, chunk_id, data version).
+
+    A score depends only on the query and the candidate document, and a
+    document is fixed for a chunk within one data version, so cached scores
+    stay valid until the knowledge base is rebuilt.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须大于 0")
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._entries: OrderedDict[ScoreKey, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @staticmethod
+    def key(model: str, query: str, chunk_id: str, data_version: str) -> ScoreKey:
+        return (model, normalize_embedding_query(query), chunk_id, data_version)
+
+    def get_many(self, keys: Iterable[ScoreKey]) -> dict[ScoreKey, float]:
+        found: dict[ScoreKey, float] = {}
+        with self._lock:
+            for key in keys:
+                score = self._entries.get(key)
+                if score is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = score
+        return found
+
+    def put_many(self, scores: dict[ScoreKey, float]) -> None:
+        with self._lock:
+            for key, score in scores.items():
+                self._entries[key] = score
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def build_rerank_score_cache(max_entries: int) -> RerankScoreCache | None:
+    return RerankScoreCache(max_entries) if max_entries > 0 else None
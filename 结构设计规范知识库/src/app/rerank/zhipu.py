@@ -1,32 +1,21 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from math import isfinite
 from typing import Any
 
 import httpx
 
+from ..core.http_clients import http_clients
+from ..core.metrics import metrics
 from ..retrieval.models import RetrievalResult
 from .base import BaseReranker
+from .documents import MAX_TEXT_CHARS, candidate_document
 from .errors import RerankerError
 from .fusion import fuse_rankings
+from .score_cache import RerankScoreCache, ScoreKey, current_rerank_data_version
 
 MAX_CANDIDATES = 128
-MAX_TEXT_CHARS = 4096
-
-
-def _candidate_document(result: RetrievalResult) -> str:
-    meta = result.meta
-    header = [
-        f"规范：{meta.get('name', '')} {meta.get('code', '')}".strip(),
-        f"标题：{meta.get('title', '')}".strip(),
-        f"条文号：{meta.get('clause_number', '')}".strip(),
-        f"依据类型：{meta.get('section_type', '')}".strip(),
-        f"表号与表名：{meta.get('table_id', '')} {meta.get('table_name', '')}".strip(),
-        "内容：",
-    ]
-    prefix = "\n".join(header)
-    remaining = max(0, MAX_TEXT_CHARS - len(prefix) - 1)
-    return f"{prefix}\n{result.text[:remaining]}"[:MAX_TEXT_CHARS]
 
 
 def _model_scores(payload: Any, candidate_count: int) -> dict[int, float]:
@@ -60,6 +49,27 @@ def _model_scores(payload: Any, candidate_count: int) -> dict[int, float]:
     return scores
 
 
+def _request_error(exc: httpx.HTTPError) -> RerankerError:
+    if isinstance(exc, httpx.TimeoutException):
+        return RerankerError("timeout", "精排请求超时")
+    if isinstance(exc, httpx.HTTPStatusError):
+        return RerankerError(
+            "http_error",
+            f"精排服务返回 HTTP {exc.response.status_code}",
+            http_status=exc.response.status_code,
+        )
+    return RerankerError("network_error", "精排服务网络请求失败")
+
+
+@dataclass
+class _ScorePlan:
+    """Scores known before the provider call and the distinct documents still to score."""
+
+    scores: dict[int, float]
+    # (positions sharing one chunk, cache key or None), one entry per document sent.
+    pending: list[tuple[list[int], ScoreKey | None]]
+
+
 class ZhipuReranker(BaseReranker):
     name = "zhipu"
 
@@ -72,12 +82,18 @@ class ZhipuReranker(BaseReranker):
         timeout_seconds: float,
         model_weight: float,
         client: httpx.Client | None = None,
+        async_client: httpx.AsyncClient | None = None,
+        score_cache: RerankScoreCache | None = None,
     ) -> None:
         self._api_key = api_key
         self._base_url = base_url.rstrip("/")
-        self._model = model
+        self.model = model
         self._model_weight = model_weight
         self._client = client or httpx.Client(timeout=timeout_seconds)
+        # None means the application-scoped pool, resolved per call so a
+        # client reopened by the lifespan is picked up.
+        self._async_client = async_client
+        self._score_cache = score_cache
 
     def rerank(
         self,
@@ -86,44 +102,119 @@ class ZhipuReranker(BaseReranker):
         *,
         top_n: int | None = None,
     ) -> list[RetrievalResult]:
-        if not results:
+        limited, requested = self._limit(results, top_n)
+        if requested == 0:
             return []
-        limited = results[:MAX_CANDIDATES]
-        requested = len(limited) if top_n is None else min(max(top_n, 0), len(limited))
+        plan = self._plan(query, limited)
+        if plan.pending:
+            try:
+                response = self._client.post(**self._request(query, limited, plan))
+                response.raise_for_status()
+            except httpx.HTTPError as exc:
+                raise _request_error(exc) from exc
+            self._record_scores(response, plan)
+        return self._fuse(limited, plan, requested)
+
+    async def arerank(
+        self,
+        query: str,
+        results: list[RetrievalResult],
+        *,
+        top_n: int | None = None,
+    ) -> list[RetrievalResult]:
+        limited, requested = self._limit(results, top_n)
         if requested == 0:
             return []
-        try:
-            response = self._client.post(
-                f"{self._base_url}/rerank",
-                headers={"Authorization": f"Bearer {self._api_key}"},
-                json={
-                    "model": self._model,
-                    "query": query[:MAX_TEXT_CHARS],
-                    "documents": [_candidate_document(result) for result in limited],
-                    "top_n": len(limited),
-                    "return_documents": False,
-                },
-            )
-            response.raise_for_status()
-        except httpx.TimeoutException as exc:
-            raise RerankerError("timeout", "精排请求超时") from exc
-        except httpx.HTTPStatusError as exc:
-            raise RerankerError(
-                "http_error",
-                f"精排服务返回 HTTP {exc.response.status_code}",
-                http_status=exc.response.status_code,
-            ) from exc
-        except httpx.HTTPError as exc:
-            raise RerankerError("network_error", "精排服务网络请求失败") from exc
+        plan = self._plan(query, limited)
+        if plan.pending:
+            client = self._async_client or http_clients.rerank
+            try:
+                response = await client.post(**self._request(query, limited, plan))
+                response.raise_for_status()
+            except httpx.HTTPError as exc:
+                raise _request_error(exc) from exc
+            self._record_scores(response, plan)
+        return self._fuse(limited, plan, requested)
+
+    @staticmethod
+    def _limit(
+        results: list[RetrievalResult], top_n: int | None
+    ) -> tuple[list[RetrievalResult], int]:
+        limited = results[:MAX_CANDIDATES]
+        requested = len(limited) if top_n is None else min(max(top_n, 0), len(limited))
+        return limited, requested
+
+    def _plan(self, query: str, limited: list[RetrievalResult]) -> _ScorePlan:
+        """Collapse duplicate chunks and take the scores already cached for this data version."""
+        groups: dict[str | int, list[int]] = {}
+        for index, result in enumerate(limited):
+            groups.setdefault(result.doc_id or index, []).append(index)
+        data_version = current_rerank_data_version() if self._score_cache is not None else ""
+        keys: dict[str | int, ScoreKey | None] = {
+            identity: RerankScoreCache.key(self.model, query, identity, data_version)
+            if data_version and isinstance(identity, str)
+            else None
+            for identity in groups
+        }
+        cached = (
+            self._score_cache.get_many(key for key in keys.values() if key is not None)
+            if self._score_cache is not None
+            else {}
+        )
+        plan = _ScorePlan(scores={}, pending=[])
+        for identity, positions in groups.items():
+            key = keys[identity]
+            if key is not None and key in cached:
+                plan.scores.update(dict.fromkeys(positions, cached[key]))
+            else:
+                plan.pending.append((positions, key))
+        cacheable = sum(1 for key in keys.values() if key is not None)
+        metrics.record_rerank_scores(
+            cache_hits=len(cached),
+            cache_misses=cacheable - len(cached),
+            documents_sent=len(plan.pending),
+            duplicates=len(limited) - len(groups),
+        )
+        return plan
 
+    def _request(
+        self, query: str, limited: list[RetrievalResult], plan: _ScorePlan
+    ) -> dict[str, Any]:
+        return {
+            "url": f"{self._base_url}/rerank",
+            "headers": {"Authorization": f"Bearer {self._api_key}"},
+            "json": {
+                "model": self.model,
+                "query": query[:MAX_TEXT_CHARS],
+                "documents": [
+                    candidate_document(limited[positions[0]]) for positions, _ in plan.pending
+                ],
+                "top_n": len(plan.pending),
+                "return_documents": False,
+            },
+        }
+
+    def _record_scores(self, response: httpx.Response, plan: _ScorePlan) -> None:
         try:
             payload = response.json()
         except ValueError as exc:
             raise RerankerError("invalid_json", "精排响应不是有效 JSON") from exc
-        scores = _model_scores(payload, len(limited))
+        fetched = _model_scores(payload, len(plan.pending))
+        to_cache: dict[ScoreKey, float] = {}
+        for sent_index, score in fetched.items():
+            positions, key = plan.pending[sent_index]
+            plan.scores.update(dict.fromkeys(positions, score))
+            if key is not None:
+                to_cache[key] = score
+        if self._score_cache is not None and to_cache:
+            self._score_cache.put_many(to_cache)
+
+    def _fuse(
+        self, limited: list[RetrievalResult], plan: _ScorePlan, requested: int
+    ) -> list[RetrievalResult]:
         return fuse_rankings(
             limited,
-            scores,
+            plan.scores,
             model_weight=self._model_weight,
             top_n=requested,
         )
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+BM25_METADATA_FILE_NAME = "bm25_index.json"
+BM25_ARRAY_NAMES = ("terms", "idf", "offsets", "postings", "frequencies", "doc_lengths", "weights")
+BM25_ARRAY_FILE_NAMES = {name: f"bm25_index.{name}.npy" for name in BM25_ARRAY_NAMES}
+BM25_SCHEMA_VERSION = 2
+# Bump whenever tokenize_chinese changes so persisted indexes are rebuilt.
+BM25_TOKENIZER_VERSION = "tokenize_chinese/1"
+
+
+def tokenize_chinese(text: str) -> list[str]:
+    normalized = re.sub(r"[^一-鿿\w]", " ", text.lower())
+    words = normalized.split()
+    chars = list("".join(words))
+    trigrams = ["".join(chars[i : i + 3]) for i in range(len(chars) - 2)]
+    return words + trigrams
+
+
+@dataclass(frozen=True)
+class InvertedBM25Index:
+    """Okapi BM25 over CSR postings; a query only touches its own terms.
+
+    Scores match ``rank_bm25.BM25Okapi`` (same idf floor and term saturation),
+    so swapping the engine does not move any ranking.
+    """
+
+    vocabulary: dict[str, int]
+    idf: np.ndarray
+    offsets: np.ndarray
+    postings: np.ndarray
+    frequencies: np.ndarray
+    doc_lengths: np.ndarray
+    weights: np.ndarray
+    k1: float = BM25_K1
+    b: float = BM25_B
+
+    @classmethod
+    def build(
+        cls,
+        tokenized_corpus: Iterable[Sequence[str]],
+        *,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        epsilon: float = BM25_EPSILON,
+    ) -> InvertedBM25Index:
+        vocabulary: dict[str, int] = {}
+        term_docs: list[list[int]] = []
+        term_frequencies: list[list[int]] = []
+        doc_lengths: list[int] = []
+        for doc_index, tokens in enumerate(tokenized_corpus):
+            doc_lengths.append(len(tokens))
+            counts: dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_id = vocabulary.get(token)
+                if term_id is None:
+                    term_id = vocabulary[token] = len(term_docs)
+                    term_docs.append([])
+                    term_frequencies.append([])
+                term_docs[term_id].append(doc_index)
+                term_frequencies[term_id].append(count)
+        if not doc_lengths:
+            raise ValueError("BM25 语料不能为空")
+
+        corpus_size = len(doc_lengths)
+        idf_values = [
+            math.log(corpus_size - len(docs) + 0.5) - math.log(len(docs) + 0.5)
+            for docs in term_docs
+        ]
+        if idf_values:
+            floor = epsilon * (sum(idf_values) / len(idf_values))
+            idf_values = [floor if value < 0 else value for value in idf_values]
+
+        offsets = np.zeros(len(term_docs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(docs) for docs in term_docs], dtype=np.int64)
+        postings = np.fromiter(
+            (doc for docs in term_docs for doc in docs), dtype=np.int32, count=int(offsets[-1])
+        )
+        frequencies = np.fromiter(
+            (count for counts in term_frequencies for count in counts),
+            dtype=np.int32,
+            count=int(offsets[-1]),
+        )
+        return cls.from_postings(
+            vocabulary,
+            np.asarray(idf_values, dtype=np.float64),
+            offsets,
+            postings,
+            frequencies,
+            np.asarray(doc_lengths, dtype=np.int32),
+            k1=k1,
+            b=b,
+        )
+
+    @classmethod
+    def from_postings(
+        cls,
+        vocabulary: dict[str, int],
+        idf: np.ndarray,
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        frequencies: np.ndarray,
+        doc_lengths: np.ndarray,
+        *,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ) -> InvertedBM25Index:
+        if len(doc_lengths) == 0:
+            raise ValueError("BM25 语料不能为空")
+        if len(offsets) != len(vocabulary) + 1 or len(idf) != len(vocabulary):
+            raise ValueError("BM25 词表与倒排偏移不一致")
+        if len(postings) != len(frequencies) or int(offsets[-1]) != len(postings):
+            raise ValueError("BM25 倒排表长度不一致")
+        average_length = float(doc_lengths.sum()) / len(doc_lengths)
+        weights = np.zeros(len(postings), dtype=np.float64)
+        if average_length > 0 and len(postings):
+            # Precompute idf * saturated tf per posting with the operand order
+            # rank_bm25 uses, so accumulated scores agree bit for bit.
+            term_ids = np.repeat(np.arange(len(idf)), np.diff(offsets))
+            tf = frequencies.astype(np.float64)
+            lengths = doc_lengths[postings].astype(np.float64)
+            weights = idf[term_ids] * (
+                tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths / average_length))
+            )
+        return cls(
+            vocabulary=vocabulary,
+            idf=idf,
+            offsets=offsets,
+            postings=postings,
+            frequencies=frequencies,
+            doc_lengths=doc_lengths,
+            weights=weights,
+            k1=k1,
+            b=b,
+        )
+
+    @property
+    def corpus_size(self) -> int:
+        return len(self.doc_lengths)
+
+    def scores(self, query_tokens: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Return (doc indices, scores) for documents sharing a term with the query."""
+        return self._accumulate([self._term_slice(token) for token in query_tokens])
+
+    def _term_slice(self, token: str) -> tuple[np.ndarray, np.ndarray] | None:
+        term_id = self.vocabulary.get(token)
+        if term_id is None:
+            return None
+        start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+        return self.postings[start:end], self.weights[start:end]
+
+    @staticmethod
+    def _accumulate(
+        slices: Sequence[tuple[np.ndarray, np.ndarray] | None],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        present = [item for item in slices if item is not None]
+        if not present:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        docs = np.concatenate([item[0] for item in present])
+        weights = np.concatenate([item[1] for item in present])
+        touched, inverse = np.unique(docs, return_inverse=True)
+        return touched, np.bincount(inverse, weights=weights, minlength=len(touched))
+
+    def top_n(self, query_tokens: Sequence[str], limit: int) -> list[tuple[int, float]]:
+        """Return up to ``limit`` positive-scoring docs, best first, ties by doc order."""
+        if limit <= 0:
+            return []
+        return self._top(*self.scores(query_tokens), limit)
+
+    def top_n_batch(
+        self, tokenized_queries: Sequence[Sequence[str]], limit: int
+    ) -> list[list[tuple[int, float]]]:
+        """``top_n`` for many queries; each term and each distinct query is resolved once."""
+        if limit <= 0:
+            return [[] for _ in tokenized_queries]
+        term_slices: dict[str, tuple[np.ndarray, np.ndarray] | None] = {}
+        ranked: dict[tuple[str, ...], list[tuple[int, float]]] = {}
+        results = []
+        for tokens in tokenized_queries:
+            key = tuple(tokens)
+            if key not in ranked:
+                slices = []
+                for token in key:
+                    if token not in term_slices:
+                        term_slices[token] = self._term_slice(token)
+                    slices.append(term_slices[token])
+                ranked[key] = self._top(*self._accumulate(slices), limit)
+            results.append(ranked[key])
+        return results
+
+    @staticmethod
+    def _top(touched: np.ndarray, scores: np.ndarray, limit: int) -> list[tuple[int, float]]:
+        positive = scores > 0
+        touched, scores = touched[positive], scores[positive]
+        if len(scores) > limit:
+            kth = np.argpartition(-scores, limit - 1)[limit - 1]
+            keep = scores >= scores[kth]
+            touched, scores = touched[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(touched[index]), float(scores[index])) for index in order]
+
+
+def _replace_npy(path: Path, array: np.ndarray) -> None:
+    temporary_path = path.with_name(f".{path.name}.tmp")
+    with temporary_path.open("wb") as handle:
+        np.save(handle, array, allow_pickle=False)
+    os.replace(temporary_path, path)
+
+
+def _encode_terms(vocabulary: dict[str, int]) -> np.ndarray:
+    # Tokens never contain whitespace, so one newline-joined UTF-8 blob is
+    # far cheaper to load than a JSON list or a fixed-width string array.
+    terms = sorted(vocabulary, key=vocabulary.__getitem__)
+    return np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8)
+
+
+def _file_sha256(path: Path) -> str:
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+def _decode_terms(blob: np.ndarray) -> list[str]:
+    if not len(blob):
+        return []
+    return bytes(blob).decode("utf-8").split("\n")
+
+
+def build_persisted_bm25_index(
+    db_dir: Path, ids: Sequence[str], documents: Sequence[str]
+) -> InvertedBM25Index:
+    """Tokenize the corpus once at build time and write the postings next to the vectors."""
+    if not ids or len(ids) != len(documents):
+        raise ValueError("BM25 索引的 ID 与文本数量不一致")
+    index = InvertedBM25Index.build(tokenize_chinese(text) for text in documents)
+    arrays = {
+        "terms": _encode_terms(index.vocabulary),
+        "idf": index.idf,
+        "offsets": index.offsets,
+        "postings": index.postings,
+        "frequencies": index.frequencies,
+        "doc_lengths": index.doc_lengths,
+        "weights": index.weights,
+    }
+    db_dir.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        _replace_npy(db_dir / BM25_ARRAY_FILE_NAMES[name], array)
+    metadata_path = db_dir / BM25_METADATA_FILE_NAME
+    temporary_metadata_path = db_dir / f".{BM25_METADATA_FILE_NAME}.tmp"
+    temporary_metadata_path.write_text(
+        json.dumps(
+            {
+                "schema_version": BM25_SCHEMA_VERSION,
+                "tokenizer": BM25_TOKENIZER_VERSION,
+                "k1": index.k1,
+                "b": index.b,
+                "count": len(ids),
+                "ids": list(ids),
+                "vocabulary_size": len(index.vocabulary),
+                "postings_count": len(index.postings),
+                "file_sizes": {
+                    name: (db_dir / file_name).stat().st_size
+                    for name, file_name in BM25_ARRAY_FILE_NAMES.items()
+                },
+                "file_sha256": {
+                    name: _file_sha256(db_dir / file_name)
+                    for name, file_name in BM25_ARRAY_FILE_NAMES.items()
+                },
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(temporary_metadata_path, metadata_path)
+    return index
+
+
+def bm25_index_manifest_entry(db_dir: Path) -> dict[str, Any] | None:
+    """Manifest record that pins the persisted BM25 index of a build."""
+    metadata_path = db_dir / BM25_METADATA_FILE_NAME
+    if not metadata_path.is_file():
+        return None
+    return {
+        "file": BM25_METADATA_FILE_NAME,
+        "schema_version": BM25_SCHEMA_VERSION,
+        "tokenizer": BM25_TOKENIZER_VERSION,
+        "sha256": hashlib.sha256(metadata_path.read_bytes()).hexdigest(),
+    }
+
+
+def load_persisted_bm25_index(
+    db_dir: Path,
+    *,
+    expected_ids: Sequence[str] | None = None,
+    expected_sha256: str | None = None,
+) -> InvertedBM25Index | None:
+    """Memory-map a persisted BM25 index; ``None`` when the build did not write one."""
+    metadata_path = db_dir / BM25_METADATA_FILE_NAME
+    if not metadata_path.exists():
+        return None
+    try:
+        raw_metadata = metadata_path.read_bytes()
+        metadata: dict[str, Any] = json.loads(raw_metadata.decode("utf-8"))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"BM25 索引元数据无法读取: {db_dir}") from exc
+    if expected_sha256 and hashlib.sha256(raw_metadata).hexdigest() != expected_sha256:
+        raise ValueError(f"BM25 索引与 manifest 记录的哈希不一致: {db_dir}")
+    if (
+        metadata.get("schema_version") != BM25_SCHEMA_VERSION
+        or metadata.get("tokenizer") != BM25_TOKENIZER_VERSION
+    ):
+        raise ValueError(f"BM25 索引版本不受支持: {db_dir}")
+    ids = [str(item) for item in metadata.get("ids", [])]
+    if metadata.get("count") != len(ids):
+        raise ValueError(f"BM25 索引元数据无效: {db_dir}")
+    # Postings address documents by position, so the order must match too.
+    if expected_ids is not None and tuple(ids) != tuple(expected_ids):
+        raise ValueError("BM25 索引 ID 顺序与运行数据不一致")
+
+    file_sizes = metadata.get("file_sizes") or {}
+    file_hashes = metadata.get("file_sha256") or {}
+    arrays: dict[str, np.ndarray] = {}
+    try:
+        for name, file_name in BM25_ARRAY_FILE_NAMES.items():
+            path = db_dir / file_name
+            if path.stat().st_size != file_sizes.get(name):
+                raise ValueError(f"BM25 索引文件大小与元数据不一致: {path}")
+            # The manifest hash pins the metadata, and the metadata pins every array.
+            if _file_sha256(path) != file_hashes.get(name):
+                raise ValueError(f"BM25 索引文件哈希与元数据不一致: {path}")
+            arrays[name] = np.load(path, mmap_mode="r", allow_pickle=False)
+        terms = _decode_terms(arrays.pop("terms"))
+    except (OSError, UnicodeDecodeError) as exc:
+        raise ValueError(f"BM25 索引文件无法读取: {db_dir}") from exc
+    vocabulary = dict(zip(terms, range(len(terms)), strict=True))
+    if (
+        len(vocabulary) != metadata.get("vocabulary_size")
+        or len(arrays["doc_lengths"]) != len(ids)
+        or len(arrays["weights"]) != metadata.get("postings_count")
+        or len(arrays["offsets"]) != len(vocabulary) + 1
+        or len(arrays["idf"]) != len(vocabulary)
+        or len(arrays["postings"]) != len(arrays["weights"])
+        or len(arrays["frequencies"]) != len(arrays["weights"])
+        or int(arrays["offsets"][-1]) != len(arrays["postings"])
+    ):
+        raise ValueError(f"BM25 索引数组长度不一致: {db_dir}")
+    return InvertedBM25Index(
+        vocabulary=vocabulary,
+        k1=float(metadata["k1"]),
+        b=float(metadata["b"]),
+        **arrays,
+    )
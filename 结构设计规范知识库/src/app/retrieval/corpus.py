@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+EMPTY_METADATA: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class CorpusView:
+    """Immutable columnar runtime corpus; rows are addressed by int position.
+
+    Built once per load and replaced as a whole on reload, so retrieval never
+    rebuilds per-request id lookups.
+    """
+
+    ids: tuple[str, ...]
+    documents: tuple[str, ...]
+    metadatas: tuple[Mapping[str, Any], ...]
+    positions: Mapping[str, int]
+
+    @classmethod
+    def from_columns(
+        cls,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[Mapping[str, Any]],
+    ) -> CorpusView:
+        if len(ids) != len(documents) or len(ids) != len(metadatas):
+            raise ValueError("运行数据的 ID、文本与元数据数量不一致")
+        positions = {doc_id: position for position, doc_id in enumerate(ids)}
+        if len(positions) != len(ids):
+            raise ValueError("运行数据包含重复 chunk_id")
+        return cls(
+            ids=tuple(ids),
+            documents=tuple(str(text or "") for text in documents),
+            metadatas=tuple(MappingProxyType(dict(meta or {})) for meta in metadatas),
+            positions=MappingProxyType(positions),
+        )
+
+    @classmethod
+    def from_runtime_data(cls, runtime_data: Mapping[str, Sequence[Any]]) -> CorpusView:
+        return cls.from_columns(
+            runtime_data["ids"], runtime_data["documents"], runtime_data["metadatas"]
+        )
+
+    @classmethod
+    def empty(cls) -> CorpusView:
+        return cls(ids=(), documents=(), metadatas=(), positions=MappingProxyType({}))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def position(self, doc_id: str) -> int | None:
+        return self.positions.get(doc_id)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import os
+from collections.abc import Sequence
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -10,21 +11,59 @@ import numpy as np
 
 VECTOR_FILE_NAME = "dense_vectors.npy"
 METADATA_FILE_NAME = "dense_vectors.json"
+QUANTIZED_FILE_NAMES = {"float16": "dense_vectors.f16.npy", "int8": "dense_vectors.i8.npy"}
+INT8_SCALE_FILE_NAME = "dense_vectors.i8_scale.npy"
+IVF_FILE_NAME = "dense_vectors.ivf.npz"
 VECTOR_SCHEMA_VERSION = 1
+VALID_QUANTIZATIONS = {"none", "float16", "int8"}
+# Approximate scores pick limit * RESCORE_FACTOR rows for exact float32 re-scoring.
+RESCORE_FACTOR = 4
+MIN_RESCORE_CANDIDATES = 64
+SCORING_BLOCK_ROWS = 8192
+# Bounds the (queries x corpus) score matrix of query_batch.
+QUERY_BLOCK_ROWS = 64
+KMEANS_ITERATIONS = 20
+KMEANS_SEED = 20240601
+
+
+@dataclass(frozen=True)
+class IvfIndex:
+    """k-means coarse partition; list ``i`` owns ``members[offsets[i]:offsets[i + 1]]``."""
+
+    centroids: np.ndarray
+    offsets: np.ndarray
+    members: np.ndarray
+
+    def probe(self, query: np.ndarray, probes: int) -> np.ndarray:
+        probes = min(probes, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+        rows = [self.members[self.offsets[index] : self.offsets[index + 1]] for index in nearest]
+        return np.sort(np.concatenate(rows))
 
 
 @dataclass(frozen=True)
 class DenseVectorStore:
-    """Portable exact cosine index for the current knowledge-base scale."""
+    """Portable cosine index for the current knowledge-base scale.
+
+    ``vectors`` stays the float32 source of truth and is usually memory-mapped.
+    An optional quantized copy and IVF partition narrow the candidate set; the
+    survivors are always re-scored against ``vectors``.
+    """
 
     ids: tuple[str, ...]
     vectors: np.ndarray
     embedding_model: str
     dimensions: int
+    quantized: np.ndarray | None = None
+    scales: np.ndarray | None = None
+    ivf: IvfIndex | None = None
+    ivf_probes: int = 8
 
-    def query(self, embedding: list[float], limit: int) -> list[tuple[str, float]]:
-        if not 1 <= limit <= len(self.ids):
-            raise ValueError("limit 必须在 1 到向量数量之间")
+    @property
+    def quantization(self) -> str:
+        return "none" if self.quantized is None else str(self.quantized.dtype)
+
+    def _normalized_query(self, embedding: Sequence[float]) -> np.ndarray:
         query = np.asarray(embedding, dtype=np.float32)
         if query.ndim != 1 or query.shape[0] != self.dimensions:
             raise ValueError(
@@ -35,11 +74,107 @@ class DenseVectorStore:
         query_norm = float(np.linalg.norm(query))
         if query_norm == 0:
             raise ValueError("查询向量不能是零向量")
-        scores = self.vectors @ (query / query_norm)
+        return query / query_norm
+
+    def query(self, embedding: Sequence[float], limit: int) -> list[tuple[str, float]]:
+        if not 1 <= limit <= len(self.ids):
+            raise ValueError("limit 必须在 1 到向量数量之间")
+        query = self._normalized_query(embedding)
+        rows = self.ivf.probe(query, self.ivf_probes) if self.ivf is not None else None
+        if rows is not None and len(rows) < limit:
+            rows = None
+        if self.quantized is None:
+            # Float32 rows are already exact; rank them without a second scoring pass.
+            candidates = np.arange(len(self.ids)) if rows is None else rows
+            scores = self.vectors @ query if rows is None else self.vectors[rows] @ query
+            return self._ranked(candidates, scores, limit)
+
+        approximate = self._approximate_scores(query, rows)
+        candidates = np.arange(len(self.ids)) if rows is None else rows
+        keep = min(len(candidates), max(limit * RESCORE_FACTOR, MIN_RESCORE_CANDIDATES))
+        if keep < len(candidates):
+            top = np.argpartition(-approximate, keep - 1)[:keep]
+            candidates = np.sort(candidates[top])
+        return self._ranked(candidates, self.vectors[candidates] @ query, limit)
+
+    def query_batch(
+        self, embeddings: Sequence[Sequence[float]], limit: int
+    ) -> list[list[tuple[str, float]]]:
+        """Exact scans share one matrix-matrix product; approximate stores query row by row."""
+        if not 1 <= limit <= len(self.ids):
+            raise ValueError("limit 必须在 1 到向量数量之间")
+        if self.quantized is not None or self.ivf is not None:
+            return [self.query(embedding, limit) for embedding in embeddings]
+        if not embeddings:
+            return []
+        queries = np.stack([self._normalized_query(embedding) for embedding in embeddings])
+        rows = np.arange(len(self.ids))
+        results = []
+        for start in range(0, len(queries), QUERY_BLOCK_ROWS):
+            scores = queries[start : start + QUERY_BLOCK_ROWS] @ self.vectors.T
+            results.extend(self._ranked(rows, row_scores, limit) for row_scores in scores)
+        return results
+
+    def _approximate_scores(self, query: np.ndarray, rows: np.ndarray | None) -> np.ndarray:
+        matrix = self.vectors if self.quantized is None else self.quantized
+        if rows is not None:
+            scores = matrix[rows].astype(np.float32, copy=False) @ query
+            return scores if self.scales is None else scores * self.scales[rows]
+        # Score quantized rows block by block so no full float32 copy is materialized.
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCORING_BLOCK_ROWS):
+            block = matrix[start : start + SCORING_BLOCK_ROWS]
+            scores[start : start + len(block)] = block.astype(np.float32, copy=False) @ query
+        return scores if self.scales is None else scores * self.scales
+
+    def _ranked(self, rows: np.ndarray, scores: np.ndarray, limit: int) -> list[tuple[str, float]]:
         candidate_count = min(limit, len(scores))
         candidate_indices = np.argpartition(-scores, candidate_count - 1)[:candidate_count]
         ordered = candidate_indices[np.argsort(-scores[candidate_indices], kind="stable")]
-        return [(self.ids[int(index)], 1.0 - float(scores[index])) for index in ordered]
+        return [(self.ids[int(rows[index])], 1.0 - float(scores[index])) for index in ordered]
+
+
+def quantize_vectors(
+    vectors: np.ndarray, quantization: str
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """Return the quantized rows and, for int8, the per-row dequantization scale."""
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    if quantization == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    raise ValueError(f"不支持的向量量化方式: {quantization}")
+
+
+def build_ivf_index(vectors: np.ndarray, lists: int) -> IvfIndex:
+    """Spherical k-means with a fixed seed so rebuilds are reproducible."""
+    if not 2 <= lists <= len(vectors):
+        raise ValueError("IVF 分区数必须在 2 到向量数量之间")
+    rng = np.random.default_rng(KMEANS_SEED)
+    centroids = np.array(vectors[rng.choice(len(vectors), size=lists, replace=False)])
+    assignments = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(KMEANS_ITERATIONS):
+        for start in range(0, len(vectors), SCORING_BLOCK_ROWS):
+            block = vectors[start : start + SCORING_BLOCK_ROWS]
+            assignments[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        norms = np.linalg.norm(sums, axis=1)
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    members = np.argsort(assignments, kind="stable").astype(np.int32)
+    offsets = np.zeros(lists + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assignments, minlength=lists))
+    return IvfIndex(centroids.astype(np.float32), offsets, members)
+
+
+def _replace_npy(path: Path, array: np.ndarray) -> None:
+    temporary_path = path.with_name(f".{path.name}.tmp")
+    with temporary_path.open("wb") as handle:
+        np.save(handle, array, allow_pickle=False)
+    os.replace(temporary_path, path)
 
 
 def build_dense_vector_store(
@@ -49,11 +184,15 @@ def build_dense_vector_store(
     *,
     embedding_model: str,
     dimensions: int,
+    quantization: str = "none",
+    ivf_lists: int = 0,
 ) -> DenseVectorStore:
     if not ids or len(ids) != len(embeddings):
         raise ValueError("向量索引的 ID 与向量数量不一致")
     if len(ids) != len(set(ids)) or any(not item for item in ids):
         raise ValueError("向量索引包含空 ID 或重复 ID")
+    if quantization not in VALID_QUANTIZATIONS:
+        raise ValueError(f"不支持的向量量化方式: {quantization}")
     vectors = np.asarray(embeddings, dtype=np.float32)
     if vectors.shape != (len(ids), dimensions):
         raise ValueError(
@@ -65,15 +204,35 @@ def build_dense_vector_store(
     if np.any(norms == 0):
         raise ValueError("向量索引包含零向量")
     normalized = vectors / norms[:, None]
-    store = DenseVectorStore(tuple(ids), normalized, embedding_model, dimensions)
+    quantized, scales = (
+        quantize_vectors(normalized, quantization) if quantization != "none" else (None, None)
+    )
+    # Tiny corpora cannot be partitioned; they fall back to the exact scan.
+    ivf = build_ivf_index(normalized, ivf_lists) if 2 <= ivf_lists <= len(ids) else None
+    store = DenseVectorStore(
+        tuple(ids), normalized, embedding_model, dimensions, quantized, scales, ivf
+    )
 
     db_dir.mkdir(parents=True, exist_ok=True)
-    vector_path = db_dir / VECTOR_FILE_NAME
     metadata_path = db_dir / METADATA_FILE_NAME
-    temporary_vector_path = db_dir / f".{VECTOR_FILE_NAME}.tmp"
     temporary_metadata_path = db_dir / f".{METADATA_FILE_NAME}.tmp"
-    with temporary_vector_path.open("wb") as handle:
-        np.save(handle, normalized, allow_pickle=False)
+    _replace_npy(db_dir / VECTOR_FILE_NAME, normalized)
+    for name, file_name in QUANTIZED_FILE_NAMES.items():
+        if name == quantization:
+            _replace_npy(db_dir / file_name, quantized)
+        else:
+            (db_dir / file_name).unlink(missing_ok=True)
+    if scales is not None:
+        _replace_npy(db_dir / INT8_SCALE_FILE_NAME, scales)
+    else:
+        (db_dir / INT8_SCALE_FILE_NAME).unlink(missing_ok=True)
+    if ivf is not None:
+        temporary_ivf_path = db_dir / f".{IVF_FILE_NAME}.tmp"
+        with temporary_ivf_path.open("wb") as handle:
+            np.savez(handle, centroids=ivf.centroids, offsets=ivf.offsets, members=ivf.members)
+        os.replace(temporary_ivf_path, db_dir / IVF_FILE_NAME)
+    else:
+        (db_dir / IVF_FILE_NAME).unlink(missing_ok=True)
     temporary_metadata_path.write_text(
         json.dumps(
             {
@@ -83,30 +242,70 @@ def build_dense_vector_store(
                 "count": len(ids),
                 "ids": ids,
                 "dtype": "float32",
+                "quantization": quantization,
+                "ivf_lists": len(ivf.centroids) if ivf is not None else 0,
             },
             ensure_ascii=False,
             indent=2,
         ),
         encoding="utf-8",
     )
-    os.replace(temporary_vector_path, vector_path)
     os.replace(temporary_metadata_path, metadata_path)
     return store
 
 
+def _load_companions(
+    db_dir: Path,
+    metadata: dict[str, Any],
+    shape: tuple[int, int],
+    *,
+    quantization: str,
+    use_ivf: bool,
+) -> tuple[np.ndarray | None, np.ndarray | None, IvfIndex | None]:
+    quantized = scales = None
+    ivf = None
+    if quantization != "none" and metadata.get("quantization") == quantization:
+        quantized = np.load(
+            db_dir / QUANTIZED_FILE_NAMES[quantization], mmap_mode="r", allow_pickle=False
+        )
+        if quantized.shape != shape or quantized.dtype != np.dtype(quantization):
+            raise ValueError(f"量化向量与原始向量不一致: {db_dir}")
+        if quantization == "int8":
+            scales = np.load(db_dir / INT8_SCALE_FILE_NAME, allow_pickle=False)
+            if scales.shape != (shape[0],):
+                raise ValueError(f"量化缩放系数与向量数量不一致: {db_dir}")
+    if use_ivf and int(metadata.get("ivf_lists") or 0) > 0:
+        with np.load(db_dir / IVF_FILE_NAME, allow_pickle=False) as payload:
+            ivf = IvfIndex(payload["centroids"], payload["offsets"], payload["members"])
+        if (
+            ivf.centroids.shape != (int(metadata["ivf_lists"]), shape[1])
+            or len(ivf.offsets) != len(ivf.centroids) + 1
+            or len(ivf.members) != shape[0]
+            or int(ivf.offsets[-1]) != shape[0]
+        ):
+            raise ValueError(f"IVF 分区与向量数量不一致: {db_dir}")
+    return quantized, scales, ivf
+
+
 def load_dense_vector_store(
     db_dir: Path,
     *,
     expected_ids: list[str] | None = None,
     embedding_model: str | None = None,
     dimensions: int | None = None,
+    quantization: str = "none",
+    use_ivf: bool = False,
+    ivf_probes: int = 8,
 ) -> DenseVectorStore | None:
+    """Memory-map the vectors; requested companions are used only if they were built."""
     vector_path = db_dir / VECTOR_FILE_NAME
     metadata_path = db_dir / METADATA_FILE_NAME
     if not vector_path.exists() and not metadata_path.exists():
         return None
     if not vector_path.is_file() or not metadata_path.is_file():
         raise ValueError(f"向量索引产物不完整: {db_dir}")
+    if quantization not in VALID_QUANTIZATIONS:
+        raise ValueError(f"不支持的向量量化方式: {quantization}")
     try:
         metadata: dict[str, Any] = json.loads(metadata_path.read_text(encoding="utf-8"))
         vectors = np.load(vector_path, mmap_mode="r", allow_pickle=False)
@@ -128,11 +327,15 @@ def load_dense_vector_store(
     if expected_ids is not None and set(ids) != set(expected_ids):
         raise ValueError("向量索引 ID 集合与运行数据不一致")
     if embedding_model is not None and model != embedding_model:
-        raise ValueError(
-            f"向量索引模型不一致: expected={embedding_model}, actual={model}"
-        )
+        raise ValueError(f"向量索引模型不一致: expected={embedding_model}, actual={model}")
     if dimensions is not None and stored_dimensions != dimensions:
-        raise ValueError(
-            f"向量索引维度不一致: expected={dimensions}, actual={stored_dimensions}"
+        raise ValueError(f"向量索引维度不一致: expected={dimensions}, actual={stored_dimensions}")
+    try:
+        quantized, scales, ivf = _load_companions(
+            db_dir, metadata, vectors.shape, quantization=quantization, use_ivf=use_ivf
         )
-    return DenseVectorStore(ids, vectors, model, stored_dimensions)
+    except (OSError, KeyError, ValueError) as exc:
+        raise ValueError(f"向量索引附属产物无法读取: {db_dir}") from exc
+    return DenseVectorStore(
+        ids, vectors, model, stored_dimensions, quantized, scales, ivf, ivf_probes
+    )
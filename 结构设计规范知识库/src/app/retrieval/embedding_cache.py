@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+QUERY_EMBEDDING_CACHE_FILE_NAME = "query_embeddings.npz"
+QUERY_EMBEDDING_CACHE_SCHEMA_VERSION = 1
+
+CacheKey = tuple[str, int, str]
+
+
+def normalize_embedding_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings share one embedding."""
+    return " ".join(query.split())
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of query embeddings keyed by (model, dimensions, query).
+
+    Entries expire ``ttl_seconds`` after they were fetched; the wall clock is
+    used so that expiry also holds for entries restored from disk.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须大于 0")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds 必须大于 0")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[CacheKey, tuple[float, tuple[float, ...]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, model: str, dimensions: int, query: str) -> list[float] | None:
+        key = (model, dimensions, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, embedding = entry
+            if self._clock() - stored_at >= self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return list(embedding)
+
+    def put(self, model: str, dimensions: int, query: str, embedding: Sequence[float]) -> None:
+        self._insert((model, dimensions, query), self._clock(), tuple(float(v) for v in embedding))
+
+    def _insert(self, key: CacheKey, stored_at: float, embedding: tuple[float, ...]) -> None:
+        with self._lock:
+            self._entries[key] = (stored_at, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self, path: Path) -> int:
+        """Atomically write the unexpired entries; returns how many were written."""
+        now = self._clock()
+        with self._lock:
+            entries = [
+                (key, stored_at, embedding)
+                for key, (stored_at, embedding) in self._entries.items()
+                if now - stored_at < self.ttl_seconds
+            ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f".{path.name}.tmp")
+        with temporary_path.open("wb") as handle:
+            np.savez(
+                handle,
+                schema_version=np.asarray(QUERY_EMBEDDING_CACHE_SCHEMA_VERSION),
+                keys=np.asarray(
+                    [json.dumps(list(key), ensure_ascii=False) for key, _, _ in entries],
+                    dtype=np.str_,
+                ),
+                stored_at=np.asarray([stored_at for _, stored_at, _ in entries], dtype=np.float64),
+                lengths=np.asarray([len(embedding) for _, _, embedding in entries], dtype=np.int64),
+                values=np.asarray(
+                    [value for _, _, embedding in entries for value in embedding],
+                    dtype=np.float64,
+                ),
+            )
+        os.replace(temporary_path, path)
+        return len(entries)
+
+    def load(self, path: Path) -> int:
+        """Merge unexpired entries from ``path``; unreadable files are ignored."""
+        if not path.is_file():
+            return 0
+        try:
+            with np.load(path, allow_pickle=False) as payload:
+                if int(payload["schema_version"]) != QUERY_EMBEDDING_CACHE_SCHEMA_VERSION:
+                    raise ValueError("schema_version 不匹配")
+                keys = [tuple(json.loads(str(item))) for item in payload["keys"]]
+                stored_at = payload["stored_at"].tolist()
+                lengths = payload["lengths"].tolist()
+                values = payload["values"].tolist()
+            if not len(keys) == len(stored_at) == len(lengths) or sum(lengths) != len(values):
+                raise ValueError("条目数量不一致")
+        except (OSError, KeyError, TypeError, ValueError) as exc:
+            logging.warning("查询向量缓存无法读取，已忽略: %s (%s)", path, exc)
+            return 0
+
+        now = self._clock()
+        loaded = 0
+        offset = 0
+        for (model, dimensions, query), timestamp, length in zip(
+            keys, stored_at, lengths, strict=True
+        ):
+            embedding = tuple(values[offset : offset + length])
+            offset += length
+            if now - timestamp < self.ttl_seconds:
+                self._insert((str(model), int(dimensions), str(query)), timestamp, embedding)
+                loaded += 1
+        return loaded
+
+
+def build_query_embedding_cache(max_entries: int, ttl_seconds: int) -> QueryEmbeddingCache | None:
+    if max_entries <= 0:
+        return None
+    return QueryEmbeddingCache(max_entries, ttl_seconds)
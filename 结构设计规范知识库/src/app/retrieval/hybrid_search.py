@@ -1,8 +1,15 @@
+import asyncio
+import hashlib
 import json
 import logging
 import re
+from collections.abc import Awaitable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from threading import RLock
+from threading import Lock
+from time import perf_counter
 from typing import Any
 
 try:
@@ -10,27 +17,40 @@ try:
 except ImportError:
     chromadb = None
 
-try:
-    from rank_bm25 import BM25Okapi
-except ImportError:
-    BM25Okapi = None
-
 try:
     from zai import ZhipuAiClient
 except ImportError:
     ZhipuAiClient = None
 
-from src.pipeline.active_db import active_db_dir, active_processed_dir
+from src.pipeline.active_db import active_db_dir, active_processed_dir, read_active_manifest
 from src.pipeline.chunks import extract_table_info
 from src.pipeline.load_to_db import _metadata_for_chroma
+from src.pipeline.manifest import read_manifest
 
 from ..core.config import Settings, settings
-from ..core.embeddings import embedding_request_kwargs
+from ..core.embeddings import (
+    AsyncEmbeddingClient,
+    EmbeddingProvider,
+    LocalEmbeddingProvider,
+    ZhipuEmbeddingProvider,
+    embedding_model_id,
+)
+from ..core.metrics import metrics
 from ..rerank.base import BaseReranker
 from ..rerank.factory import get_reranker
-from .dense_vector_store import load_dense_vector_store
+from ..rerank.safe import current_rerank_failure, rerank_failure_var
+from ..rerank.score_cache import reset_rerank_data_version, set_rerank_data_version
+from .bm25_index import InvertedBM25Index, load_persisted_bm25_index, tokenize_chinese
+from .corpus import CorpusView
+from .dense_vector_store import DenseVectorStore, load_dense_vector_store
+from .embedding_cache import (
+    QUERY_EMBEDDING_CACHE_FILE_NAME,
+    build_query_embedding_cache,
+    normalize_embedding_query,
+)
 from .models import RetrievalCandidate, RetrievalResult
 from .query import QueryInfo, analyze_query
+from .result_cache import build_search_result_cache, search_cache_key
 
 GENERIC_CONTENT_KEYWORDS = {
     "建筑",
@@ -65,14 +85,13 @@ DEFINITION_RELATION_MARKERS = ("除以", "所得", "分项系数", "分位值")
 DEFINITION_HEADING_RE = re.compile(
     r"(?:^|\n)\s*(?:[A-Z]\.)?\d+(?:\.\d+){1,3}\s*[^\n]{0,40}(?:标准值|设计值)"
 )
-
-
-def tokenize_chinese(text: str) -> list[str]:
-    normalized = re.sub(r"[^一-鿿\w]", " ", text.lower())
-    words = normalized.split()
-    chars = list("".join(words))
-    trigrams = ["".join(chars[i : i + 3]) for i in range(len(chars) - 2)]
-    return words + trigrams
+NUMBER_RUN_RE = re.compile(r"\d+(?:[.\-]\d+)*")
+NUMBER_RUN_SEPARATOR_RE = re.compile(r"([.\-])")
+LEADING_NUMBER_RE = re.compile(r"[\d.\-]+")
+BM25_CANDIDATE_MULTIPLIER = 10
+QUERY_EMBEDDING_BATCH_SIZE = 32
+# CLAUSE_RE in query.py matches at most four numeric groups, e.g. 5.1.2-1.
+MAX_CLAUSE_GROUPS = 4
 
 
 def _runtime_data_from_collection(collection: Any) -> dict[str, list[Any]]:
@@ -121,10 +140,17 @@ def text_mentions_clause(text: str, clause_num: str) -> bool:
     return re.search(pattern, text) is not None
 
 
+def _spec_text(meta: dict[str, Any]) -> str:
+    return " ".join(str(meta.get(key, "")) for key in ("code", "name", "source_file"))
+
+
 def matches_requested_spec(query_info: QueryInfo, meta: dict[str, Any]) -> bool:
+    return spec_text_matches(query_info, _spec_text(meta))
+
+
+def spec_text_matches(query_info: QueryInfo, spec_text: str) -> bool:
     if not query_info.spec_codes and not query_info.spec_names:
         return True
-    spec_text = " ".join(str(meta.get(key, "")) for key in ("code", "name", "source_file"))
     if query_info.spec_codes and any(code in spec_text for code in query_info.spec_codes):
         return True
     if query_info.spec_names and any(name in spec_text for name in query_info.spec_names):
@@ -186,7 +212,264 @@ def asks_for_table_identifier(query_info: QueryInfo) -> bool:
     return any(term in query_info.normalized for term in EXPLICIT_TABLE_QUESTION_TERMS)
 
 
+def _clause_keys(text: str) -> set[str]:
+    """Every clause-shaped token that ``text_mentions_clause`` could match in ``text``."""
+    keys: set[str] = set()
+    for match in NUMBER_RUN_RE.finditer(text):
+        parts = NUMBER_RUN_SEPARATOR_RE.split(match.group())
+        groups, separators = parts[0::2], parts[1::2]
+        for start in range(len(groups)):
+            key = groups[start]
+            for end in range(start + 1, min(len(groups), start + MAX_CLAUSE_GROUPS)):
+                key += separators[end - 1] + groups[end]
+                keys.add(key)
+    return keys
+
+
+def _evidence_text(meta: dict[str, Any], text: str, keys: tuple[str, ...]) -> str:
+    return " ".join(str(meta.get(key, "")) for key in keys) + f"\n{text}"
+
+
+def contains_precompacted(evidence: str, compact: str, piece: str, compact_piece: str) -> bool:
+    """``evidence_contains`` against evidence that was compacted at load time."""
+    if not piece:
+        return False
+    return piece in evidence or compact_piece in compact
+
+
+@dataclass(frozen=True)
+class TableEvidence:
+    index: int
+    table_id: str
+    explanation: bool
+    evidence: str
+    compact_evidence: str
+    value_evidence: str
+
+
+@dataclass(frozen=True)
+class MetadataIndex:
+    """Load-time lookups so clause and table candidates skip non-matching chunks."""
+
+    clauses: dict[str, tuple[int, ...]]
+    specs: dict[str, tuple[int, ...]]
+    tables: tuple[TableEvidence, ...]
+
+    @classmethod
+    def build(
+        cls, documents: Sequence[str], metadatas: Sequence[dict[str, Any]]
+    ) -> "MetadataIndex":
+        clauses: dict[str, list[int]] = {}
+        specs: dict[str, list[int]] = {}
+        tables: list[TableEvidence] = []
+        for index, (text, meta) in enumerate(zip(documents, metadatas, strict=True)):
+            text = text or ""
+            title = str(meta.get("title") or "")
+            keys = _clause_keys(title) | _clause_keys(text)
+            leading = LEADING_NUMBER_RE.match(title)
+            if leading:
+                run = leading.group()
+                keys.update(run[:end] for end in range(1, len(run) + 1))
+            clause_number = meta.get("clause_number", "")
+            if clause_number:
+                keys.add(str(clause_number))
+            for key in keys:
+                clauses.setdefault(key, []).append(index)
+            specs.setdefault(_spec_text(meta), []).append(index)
+            if infer_is_table(meta, text):
+                evidence = _evidence_text(
+                    meta,
+                    text,
+                    ("name", "code", "title", "table_id", "table_name", "clause_number"),
+                )
+                tables.append(
+                    TableEvidence(
+                        index=index,
+                        table_id=str(meta.get("table_id") or ""),
+                        explanation=infer_section_type(meta, text) == "explanation",
+                        evidence=evidence,
+                        compact_evidence=compact_evidence(evidence),
+                        value_evidence=_evidence_text(
+                            meta, text, ("name", "code", "title", "table_id", "table_name")
+                        ),
+                    )
+                )
+        return cls(
+            clauses={key: tuple(indices) for key, indices in clauses.items()},
+            specs={key: tuple(indices) for key, indices in specs.items()},
+            tables=tuple(tables),
+        )
+
+    @classmethod
+    def empty(cls) -> "MetadataIndex":
+        return cls(clauses={}, specs={}, tables=())
+
+    def clause_candidates(self, clause_numbers: Sequence[str]) -> list[int]:
+        indices: set[int] = set()
+        for clause_number in clause_numbers:
+            indices.update(self.clauses.get(clause_number, ()))
+        return sorted(indices)
+
+    def spec_candidates(self, query_info: QueryInfo) -> set[int] | None:
+        """Chunk indices of the requested specs, or None when the query names no spec."""
+        if not query_info.spec_codes and not query_info.spec_names:
+            return None
+        indices: set[int] = set()
+        for spec_text, spec_indices in self.specs.items():
+            if spec_text_matches(query_info, spec_text):
+                indices.update(spec_indices)
+        return indices
+
+    def table_candidates(self, query_info: QueryInfo) -> list[TableEvidence]:
+        allowed = self.spec_candidates(query_info)
+        if allowed is None:
+            return list(self.tables)
+        return [table for table in self.tables if table.index in allowed]
+
+
+@dataclass(frozen=True)
+class RetrievalSnapshot:
+    """One immutable generation of the loaded knowledge base.
+
+    Readers capture the current snapshot once and use it for the whole search;
+    reload/adopt publish a new snapshot with a single reference assignment.
+    """
+
+    chroma_client: Any = None
+    chroma_collection: Any = None
+    dense_vector_store: DenseVectorStore | None = None
+    bm25_index: InvertedBM25Index | None = None
+    bm25_texts: Sequence[str] = ()
+    metadata_index: MetadataIndex = field(default_factory=MetadataIndex.empty)
+    corpus: CorpusView = field(default_factory=CorpusView.empty)
+    db_dir: Path | None = None
+    data_version: str = ""
+
+
+@dataclass(frozen=True)
+class LexicalMatches:
+    """Clause, BM25 and table candidate scores; none of them need the query embedding."""
+
+    clause: list[tuple[int, str, bool]]
+    bm25: list[tuple[int, float]]
+    table_intent: list[tuple[float, int]]
+    value_table: list[tuple[int, int]]
+
+
+async def _timed(timings: dict[str, float], stage: str, awaitable: Awaitable[Any]) -> Any:
+    started = perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = round((perf_counter() - started) * 1000, 2)
+
+
+@contextmanager
+def _rerank_scope(snapshot: RetrievalSnapshot) -> Iterator[None]:
+    """Let the reranker key cached scores by the data version the candidates came from.
+
+    Also clears the rerank failure of the current context, so that
+    ``current_rerank_failure`` afterwards describes this rerank only.
+    """
+    rerank_failure_var.set(None)
+    token = set_rerank_data_version(snapshot.data_version)
+    try:
+        yield
+    finally:
+        reset_rerank_data_version(token)
+
+
+def _manifest_for(db_dir: Path) -> dict[str, Any]:
+    """Return the build manifest of a loaded db directory, or {} when unknown."""
+    try:
+        if db_dir.resolve() == active_db_dir().resolve():
+            return read_active_manifest()
+        # Versioned builds keep manifest.json next to their db directory.
+        return read_manifest(db_dir.parent / "manifest.json") or {}
+    except (OSError, ValueError) as exc:
+        logging.warning("无法读取知识库 manifest，检索结果缓存与 BM25 产物校验停用: %s", exc)
+        return {}
+
+
+def _load_bm25_index(
+    db_dir: Path, corpus: CorpusView, manifest: dict[str, Any]
+) -> InvertedBM25Index:
+    """Prefer the BM25 index persisted by load_to_db; re-tokenize only as a fallback."""
+    expected_sha256 = (manifest.get("lexical_index") or {}).get("sha256")
+    try:
+        bm25_index = load_persisted_bm25_index(
+            db_dir, expected_ids=corpus.ids, expected_sha256=expected_sha256
+        )
+    except ValueError as exc:
+        logging.warning("BM25 索引产物不可用，改为重新分词构建: %s", exc)
+        bm25_index = None
+    if bm25_index is not None:
+        logging.info(
+            "BM25 倒排索引加载完成: %s 条, %s 词项", len(corpus), len(bm25_index.vocabulary)
+        )
+        return bm25_index
+    bm25_index = InvertedBM25Index.build(tokenize_chinese(text) for text in corpus.documents)
+    logging.info("BM25 倒排索引构建完成: %s 条, %s 词项", len(corpus), len(bm25_index.vocabulary))
+    return bm25_index
+
+
+def _ranking_scope(config: Settings, reranker: BaseReranker) -> str:
+    """Fingerprint every setting that changes hybrid_search output for a fixed corpus."""
+    payload = {
+        "embedding": [
+            config.embedding_provider,
+            config.embedding_model,
+            config.embedding_dimensions,
+            str(config.local_embedding_model_dir or ""),
+            config.local_embedding_pooling,
+        ],
+        "dense": [
+            config.dense_vector_quantization,
+            config.dense_vector_ivf_lists,
+            config.dense_vector_ivf_probes,
+        ],
+        "weights": [
+            config.retrieval_dense_weight,
+            config.retrieval_bm25_weight,
+            config.retrieval_clause_boost,
+        ],
+        "rerank": [
+            type(reranker).__name__,
+            reranker.name,
+            config.rerank_enabled,
+            config.rerank_provider,
+            config.rerank_model,
+            config.rerank_model_weight,
+            config.rerank_candidate_multiplier,
+            config.rerank_fallback_provider,
+            str(config.local_rerank_model_dir or ""),
+            config.local_rerank_max_length,
+        ],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _snapshot_attribute(name: str) -> property:
+    def getter(self: "RetrievalState") -> Any:
+        return getattr(self._snapshot, name)
+
+    def setter(self: "RetrievalState", value: Any) -> None:
+        with self._state_lock:
+            self._snapshot = replace(self._snapshot, **{name: value})
+
+    return property(getter, setter)
+
+
 class RetrievalState:
+    chroma_client = _snapshot_attribute("chroma_client")
+    chroma_collection = _snapshot_attribute("chroma_collection")
+    dense_vector_store = _snapshot_attribute("dense_vector_store")
+    bm25_index = _snapshot_attribute("bm25_index")
+    bm25_texts = _snapshot_attribute("bm25_texts")
+    metadata_index = _snapshot_attribute("metadata_index")
+    corpus = _snapshot_attribute("corpus")
+    db_dir = _snapshot_attribute("db_dir")
+
     def __init__(
         self,
         config: Settings = settings,
@@ -195,25 +478,82 @@ class RetrievalState:
     ) -> None:
         self.config = config
         self.reranker = reranker or get_reranker(config)
-        self._state_lock = RLock()
-        self.zhipu_client: Any = None
-        self.chroma_client: Any = None
-        self.chroma_collection: Any = None
-        self.dense_vector_store: Any = None
-        self.bm25_index: Any = None
-        self.bm25_texts: list[str] = []
-        self.runtime_data: dict[str, list[Any]] = {
-            "ids": [],
-            "documents": [],
-            "metadatas": [],
-        }
-        self.db_dir: Path | None = None
+        # Serializes writers only; searches read self._snapshot without locking.
+        self._state_lock = Lock()
+        self._snapshot = RetrievalSnapshot()
+        self.embedding_provider: EmbeddingProvider | None = None
+        self.embedding_cache = build_query_embedding_cache(
+            config.query_embedding_cache_size, config.query_embedding_cache_ttl_seconds
+        )
+        self.result_cache = build_search_result_cache(
+            config.search_result_cache_size, config.search_result_cache_shared_path
+        )
+        self._result_cache_scope = _ranking_scope(config, self.reranker)
+        # Bounds the CPU-bound part of hybrid_search_async; created on first use.
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def snapshot(self) -> RetrievalSnapshot:
+        return self._snapshot
+
+    def _publish(self, snapshot: RetrievalSnapshot) -> None:
+        with self._state_lock:
+            self._snapshot = snapshot
+            if self.result_cache is not None:
+                self.result_cache.clear()
+
+    def _search_executor(self) -> ThreadPoolExecutor:
+        with self._state_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.config.retrieval_worker_threads,
+                    thread_name_prefix="retrieval",
+                )
+            return self._executor
+
+    def shutdown_executor(self) -> None:
+        """Stop the retrieval threads; a later async search starts a fresh pool."""
+        with self._state_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def initialize(self) -> None:
         self._initialize_embedding_client()
         self._initialize_chroma_and_bm25()
 
+    @property
+    def zhipu_client(self) -> Any:
+        """SDK client behind the remote provider; assigning one selects that provider."""
+        provider = self.embedding_provider
+        return provider.client if isinstance(provider, ZhipuEmbeddingProvider) else None
+
+    @zhipu_client.setter
+    def zhipu_client(self, client: Any) -> None:
+        self.embedding_provider = (
+            ZhipuEmbeddingProvider(self.config, client, async_client=self.async_embedding_client)
+            if client is not None
+            else None
+        )
+
+    @property
+    def async_embedding_client(self) -> AsyncEmbeddingClient | None:
+        provider = self.embedding_provider
+        return provider.async_client if isinstance(provider, ZhipuEmbeddingProvider) else None
+
+    @async_embedding_client.setter
+    def async_embedding_client(self, client: AsyncEmbeddingClient | None) -> None:
+        if isinstance(self.embedding_provider, ZhipuEmbeddingProvider):
+            self.embedding_provider.async_client = client
+
     def _initialize_embedding_client(self) -> None:
+        if self.config.embedding_provider == "local":
+            try:
+                self.embedding_provider = LocalEmbeddingProvider.from_settings(self.config)
+                logging.info("本地 embedding 已配置: %s", self.embedding_provider.model_id)
+            except Exception as exc:
+                logging.error("本地 embedding 初始化失败: %s", exc)
+            return
         if not self.config.zhipuai_api_key:
             return
         if ZhipuAiClient is None:
@@ -243,7 +583,6 @@ class RetrievalState:
         chroma_client = chromadb.PersistentClient(path=str(db_dir))
         chroma_collection = chroma_client.get_or_create_collection(name=self.config.collection_name)
         bm25_index = None
-        bm25_texts: list[str] = []
         runtime_data = {"ids": [], "documents": [], "metadatas": []}
         runtime_path = processed_dir or active_processed_dir()
         processed_files = (
@@ -264,31 +603,45 @@ class RetrievalState:
                     f"runtime={len(runtime_data['ids'])}, chroma={count}"
                 )
         logging.info("知识库: %s 条 (%s)", count, db_dir)
+        corpus = CorpusView.from_runtime_data(runtime_data)
+        manifest = _manifest_for(db_dir)
         if count > 0:
-            if BM25Okapi is None:
-                logging.error("rank-bm25 未安装，跳过 BM25 索引构建")
-            else:
-                bm25_texts = [doc or "" for doc in runtime_data["documents"]]
-                tokenized = [tokenize_chinese(text) for text in bm25_texts]
-                bm25_index = BM25Okapi(tokenized)
-                logging.info("BM25 索引构建完成: %s 条", len(bm25_texts))
+            bm25_index = _load_bm25_index(db_dir, corpus, manifest)
         dense_vector_store = load_dense_vector_store(
             db_dir,
-            expected_ids=runtime_data["ids"] if runtime_data["ids"] else None,
-            embedding_model=self.config.embedding_model,
+            expected_ids=list(corpus.ids) if corpus.ids else None,
+            embedding_model=embedding_model_id(self.config),
             dimensions=self.config.embedding_dimensions,
+            quantization=self.config.dense_vector_quantization,
+            use_ivf=self.config.dense_vector_ivf_lists > 0,
+            ivf_probes=self.config.dense_vector_ivf_probes,
         )
         if dense_vector_store is not None:
-            logging.info("精确向量索引加载完成: %s 条 (%s)", len(dense_vector_store.ids), db_dir)
-
-        with self._state_lock:
-            self.chroma_client = chroma_client
-            self.chroma_collection = chroma_collection
-            self.dense_vector_store = dense_vector_store
-            self.bm25_index = bm25_index
-            self.bm25_texts = bm25_texts
-            self.runtime_data = runtime_data
-            self.db_dir = db_dir
+            logging.info(
+                "向量索引加载完成: %s 条, 量化=%s, IVF=%s (%s)",
+                len(dense_vector_store.ids),
+                dense_vector_store.quantization,
+                len(dense_vector_store.ivf.centroids) if dense_vector_store.ivf else 0,
+                db_dir,
+            )
+        if self.embedding_cache is not None and self.config.query_embedding_cache_persist:
+            restored = self.embedding_cache.load(db_dir / QUERY_EMBEDDING_CACHE_FILE_NAME)
+            if restored:
+                logging.info("查询向量缓存恢复: %s 条 (%s)", restored, db_dir)
+
+        self._publish(
+            RetrievalSnapshot(
+                chroma_client=chroma_client,
+                chroma_collection=chroma_collection,
+                dense_vector_store=dense_vector_store,
+                bm25_index=bm25_index,
+                bm25_texts=corpus.documents if bm25_index is not None else (),
+                metadata_index=MetadataIndex.build(corpus.documents, corpus.metadatas),
+                corpus=corpus,
+                db_dir=db_dir,
+                data_version=str(manifest.get("data_version_hash") or ""),
+            )
+        )
 
     def reload(self, db_dir: Path | None = None, processed_dir: Path | None = None) -> None:
         target = db_dir or active_db_dir()
@@ -314,68 +667,223 @@ class RetrievalState:
     def adopt(self, candidate: "RetrievalState") -> None:
         if candidate.config.collection_name != self.config.collection_name:
             raise ValueError("候选检索状态的 collection_name 与运行配置不一致")
-        if not candidate.chroma_collection:
+        snapshot = candidate.snapshot
+        if not snapshot.chroma_collection:
             raise ValueError("候选检索状态没有可用的 Chroma collection")
         with self._state_lock:
-            self.zhipu_client = candidate.zhipu_client
-            self.chroma_client = candidate.chroma_client
-            self.chroma_collection = candidate.chroma_collection
-            self.dense_vector_store = candidate.dense_vector_store
-            self.bm25_index = candidate.bm25_index
-            self.bm25_texts = candidate.bm25_texts
-            self.runtime_data = candidate.runtime_data
-            self.db_dir = candidate.db_dir
+            self.embedding_provider = candidate.embedding_provider
+            self._snapshot = snapshot
+            if self.result_cache is not None:
+                self.result_cache.clear()
+        # Only the snapshot and provider are taken over; the candidate's threads are not.
+        candidate.shutdown_executor()
+
+    def persist_embedding_cache(self) -> None:
+        """Write the query-embedding cache next to the active dense vectors."""
+        db_dir = self._snapshot.db_dir
+        if not (self.embedding_cache and self.config.query_embedding_cache_persist and db_dir):
+            return
+        try:
+            saved = self.embedding_cache.save(db_dir / QUERY_EMBEDDING_CACHE_FILE_NAME)
+            logging.info("查询向量缓存已保存: %s 条 (%s)", saved, db_dir)
+        except OSError as exc:
+            logging.error("查询向量缓存保存失败: %s", exc)
+
+    @property
+    def runtime_data(self) -> dict[str, tuple[Any, ...]]:
+        corpus = self._snapshot.corpus
+        return {"ids": corpus.ids, "documents": corpus.documents, "metadatas": corpus.metadatas}
 
     @property
     def ready(self) -> bool:
-        with self._state_lock:
-            return bool(self.chroma_collection and self.zhipu_client)
+        return bool(self._snapshot.chroma_collection and self.embedding_provider)
 
     def chroma_count(self) -> int:
-        with self._state_lock:
-            if self.dense_vector_store is not None:
-                return len(self.dense_vector_store.ids)
-            if not self.chroma_collection:
-                return -1
-            try:
-                return self.chroma_collection.count()
-            except Exception:
-                return -1
+        snapshot = self._snapshot
+        if snapshot.dense_vector_store is not None:
+            return len(snapshot.dense_vector_store.ids)
+        if not snapshot.chroma_collection:
+            return -1
+        try:
+            return snapshot.chroma_collection.count()
+        except Exception:
+            return -1
 
     def vector_query(self, embedding: list[float], n_results: int) -> list[tuple[str, float]]:
-        with self._state_lock:
-            return self._vector_query_unlocked(embedding, n_results)
+        return self._vector_query(self._snapshot, embedding, n_results)
 
-    def _vector_query_unlocked(
-        self, embedding: list[float], n_results: int
+    def _vector_query(
+        self, snapshot: RetrievalSnapshot, embedding: list[float], n_results: int
     ) -> list[tuple[str, float]]:
-        if self.dense_vector_store is not None:
-            return self.dense_vector_store.query(embedding, n_results)
-        if not self.chroma_collection:
+        if snapshot.dense_vector_store is not None:
+            return snapshot.dense_vector_store.query(embedding, n_results)
+        if not snapshot.chroma_collection:
             return []
-        result = self.chroma_collection.query(
-            query_embeddings=[embedding], n_results=n_results
+        result = snapshot.chroma_collection.query(query_embeddings=[embedding], n_results=n_results)
+        return list(zip(result["ids"][0], result["distances"][0], strict=True))
+
+    def hybrid_search(self, query: str, top_k: int) -> list[RetrievalResult]:
+        snapshot = self._snapshot
+        if not snapshot.chroma_collection:
+            return []
+        key = self._result_cache_key(snapshot, query, top_k)
+        cached = self._cached_search(snapshot, key)
+        if cached is not None:
+            return cached
+        started = perf_counter()
+        embedding = self._fetch_query_embedding(snapshot, query)
+        results = self._search(snapshot, query, top_k, embedding)
+        self._store_search(
+            snapshot, key, results, embedding, started, reranked=current_rerank_failure() is None
         )
-        return list(
-            zip(result["ids"][0], result["distances"][0], strict=True)
+        return results
+
+    async def hybrid_search_async(
+        self, query: str, top_k: int, *, timings: dict[str, float] | None = None
+    ) -> list[RetrievalResult]:
+        """Event-loop friendly hybrid_search.
+
+        The embedding request is in flight while the lexical stages score on
+        the bounded retrieval executor; dense hits are merged in once it
+        returns, then the rerank request is awaited. Stage durations in
+        milliseconds are written to ``timings`` when given.
+        """
+        stage_timings = {} if timings is None else timings
+        snapshot = self._snapshot
+        if not snapshot.chroma_collection:
+            return []
+        key = self._result_cache_key(snapshot, query, top_k)
+        cached = self._cached_search(snapshot, key)
+        if cached is not None:
+            stage_timings["result_cache"] = 0.0
+            return cached
+        started = perf_counter()
+        loop = asyncio.get_running_loop()
+        executor = self._search_executor()
+        query_info = analyze_query(query)
+        candidate_limit = self._candidate_limit(top_k)
+        embedding, lexical = await asyncio.gather(
+            _timed(stage_timings, "embedding", self._fetch_query_embedding_async(snapshot, query)),
+            _timed(
+                stage_timings,
+                "lexical",
+                loop.run_in_executor(
+                    executor, self._score_lexical, snapshot, query_info, candidate_limit
+                ),
+            ),
+        )
+        normalized_query, candidates = await loop.run_in_executor(
+            executor,
+            self._merge_candidates,
+            snapshot,
+            query_info,
+            candidate_limit,
+            embedding,
+            lexical,
+            stage_timings,
+        )
+        with _rerank_scope(snapshot):
+            results = await _timed(
+                stage_timings,
+                "rerank",
+                self.reranker.arerank(normalized_query, candidates, top_n=top_k),
+            )
+        self._store_search(
+            snapshot, key, results, embedding, started, reranked=current_rerank_failure() is None
+        )
+        return results
+
+    def _result_cache_key(self, snapshot: RetrievalSnapshot, query: str, top_k: int) -> str | None:
+        # Without a data version there is no safe way to tell generations apart.
+        if self.result_cache is None or not snapshot.data_version:
+            return None
+        return search_cache_key(
+            snapshot.data_version,
+            normalize_embedding_query(query),
+            top_k,
+            self._result_cache_scope,
         )
 
-    def hybrid_search(self, query: str, top_k: int) -> list[RetrievalResult]:
-        with self._state_lock:
-            return self._hybrid_search_unlocked(query, top_k)
+    def _cached_search(
+        self, snapshot: RetrievalSnapshot, key: str | None
+    ) -> list[RetrievalResult] | None:
+        if key is None:
+            return None
+        cached = self.result_cache.get(key, snapshot.data_version)
+        if cached is None:
+            metrics.record_search_result_cache(hit=False)
+            return None
+        results, cost_ms = cached
+        metrics.record_search_result_cache(hit=True, saved_ms=cost_ms)
+        return list(results)
+
+    def _store_search(
+        self,
+        snapshot: RetrievalSnapshot,
+        key: str | None,
+        results: list[RetrievalResult],
+        embedding: list[float] | None,
+        started: float,
+        *,
+        reranked: bool,
+    ) -> None:
+        # Degraded answers (no dense leg, reranker fallback) are not worth pinning.
+        if key is None or embedding is None or not reranked:
+            return
+        cost_ms = (perf_counter() - started) * 1000
+        self.result_cache.put(key, snapshot.data_version, results, cost_ms)
 
-    def _hybrid_search_unlocked(self, query: str, top_k: int) -> list[RetrievalResult]:
-        if not self.chroma_collection:
-            return []
+    def _candidate_limit(self, top_k: int) -> int:
+        if not self.config.rerank_enabled:
+            return top_k
+        return min(128, max(top_k, top_k * self.config.rerank_candidate_multiplier))
 
-        candidate_limit = top_k
-        if self.config.rerank_enabled:
-            candidate_limit = min(
-                128,
-                max(top_k, top_k * self.config.rerank_candidate_multiplier),
+    def _search(
+        self,
+        snapshot: RetrievalSnapshot,
+        query: str,
+        top_k: int,
+        embedding: list[float] | None,
+    ) -> list[RetrievalResult]:
+        normalized_query, results = self._retrieve_candidates(
+            snapshot, query, self._candidate_limit(top_k), embedding
+        )
+        with _rerank_scope(snapshot):
+            return self.reranker.rerank(normalized_query, results, top_n=top_k)
+
+    def hybrid_search_batch(
+        self, queries: Sequence[str], top_k: int
+    ) -> list[list[RetrievalResult]]:
+        """Run hybrid_search for many queries against one snapshot.
+
+        Query embeddings are requested in batches, exact dense scoring is one
+        matrix-matrix product and BM25 resolves each term once; per-query
+        ranking and reranking are unchanged.
+        """
+        snapshot = self._snapshot
+        if not snapshot.chroma_collection:
+            return [[] for _ in queries]
+        candidate_limit = self._candidate_limit(top_k)
+        query_infos = [analyze_query(query) for query in queries]
+        embeddings = self._fetch_query_embeddings(snapshot, queries)
+        dense_hits = self._dense_hits_batch(snapshot, embeddings, candidate_limit)
+        bm25_matches: list[list[tuple[int, float]] | None] = [None] * len(queries)
+        if snapshot.bm25_index:
+            bm25_matches = list(
+                snapshot.bm25_index.top_n_batch(
+                    [tokenize_chinese(info.normalized) for info in query_infos],
+                    candidate_limit * BM25_CANDIDATE_MULTIPLIER,
+                )
+            )
+        results = []
+        for query_info, hits, matches in zip(query_infos, dense_hits, bm25_matches, strict=True):
+            lexical = self._score_lexical(snapshot, query_info, candidate_limit, matches)
+            normalized_query, candidates = self._rank_candidates(
+                snapshot, query_info, candidate_limit, hits, lexical
             )
-        normalized_query, results = self._retrieve_candidates_unlocked(query, candidate_limit)
-        return self.reranker.rerank(normalized_query, results, top_n=top_k)
+            with _rerank_scope(snapshot):
+                results.append(self.reranker.rerank(normalized_query, candidates, top_n=top_k))
+        return results
 
     def retrieve_candidates(
         self, query: str, candidate_limit: int
@@ -383,50 +891,121 @@ class RetrievalState:
         """Return one deterministic candidate pool before optional learned reranking."""
         if not 1 <= candidate_limit <= 128:
             raise ValueError("candidate_limit 必须在 1 到 128 之间")
-        with self._state_lock:
-            if not self.chroma_collection:
-                return query.strip(), []
-            return self._retrieve_candidates_unlocked(query, candidate_limit)
+        snapshot = self._snapshot
+        if not snapshot.chroma_collection:
+            return query.strip(), []
+        embedding = self._fetch_query_embedding(snapshot, query)
+        return self._retrieve_candidates(snapshot, query, candidate_limit, embedding)
 
-    def _retrieve_candidates_unlocked(
-        self, query: str, candidate_limit: int
+    def _retrieve_candidates(
+        self,
+        snapshot: RetrievalSnapshot,
+        query: str,
+        candidate_limit: int,
+        embedding: list[float] | None,
     ) -> tuple[str, list[RetrievalResult]]:
-        query_info = analyze_query(query)
-        all_data = self.runtime_data
-        id_to_doc = dict(zip(all_data["ids"], all_data["documents"], strict=True))
-        id_to_meta = dict(zip(all_data["ids"], all_data["metadatas"], strict=True))
-        results_pool: dict[str, RetrievalCandidate] = {}
+        dense_hits = self._dense_hits_batch(snapshot, [embedding], candidate_limit)[0]
+        return self._rank_candidates(snapshot, analyze_query(query), candidate_limit, dense_hits)
 
-        if self.zhipu_client and all_data["ids"]:
-            try:
-                response = self.zhipu_client.embeddings.create(
-                    **embedding_request_kwargs(self.config, [query])
+    def _merge_candidates(
+        self,
+        snapshot: RetrievalSnapshot,
+        query_info: QueryInfo,
+        candidate_limit: int,
+        embedding: list[float] | None,
+        lexical: LexicalMatches,
+        timings: dict[str, float],
+    ) -> tuple[str, list[RetrievalResult]]:
+        started = perf_counter()
+        dense_hits = self._dense_hits_batch(snapshot, [embedding], candidate_limit)[0]
+        timings["dense"] = round((perf_counter() - started) * 1000, 2)
+        started = perf_counter()
+        ranked = self._rank_candidates(snapshot, query_info, candidate_limit, dense_hits, lexical)
+        timings["merge"] = round((perf_counter() - started) * 1000, 2)
+        return ranked
+
+    def _score_lexical(
+        self,
+        snapshot: RetrievalSnapshot,
+        query_info: QueryInfo,
+        candidate_limit: int,
+        bm25_matches: list[tuple[int, float]] | None = None,
+    ) -> LexicalMatches:
+        if bm25_matches is None and snapshot.bm25_index:
+            bm25_matches = snapshot.bm25_index.top_n(
+                tokenize_chinese(query_info.normalized),
+                candidate_limit * BM25_CANDIDATE_MULTIPLIER,
+            )
+        return LexicalMatches(
+            clause=self._clause_hits(query_info, snapshot),
+            bm25=bm25_matches or [],
+            table_intent=self._table_intent_scores(query_info, snapshot),
+            value_table=self._value_table_scores(query_info, snapshot),
+        )
+
+    def _dense_hits_batch(
+        self,
+        snapshot: RetrievalSnapshot,
+        embeddings: Sequence[list[float] | None],
+        candidate_limit: int,
+    ) -> list[list[tuple[str, float]]]:
+        hits: list[list[tuple[str, float]]] = [[] for _ in embeddings]
+        present = [index for index, embedding in enumerate(embeddings) if embedding is not None]
+        if not present:
+            return hits
+        dense_limit = min(candidate_limit * 5, len(snapshot.corpus))
+        vectors = [embeddings[index] for index in present]
+        try:
+            if len(vectors) == 1:
+                batch = [self._vector_query(snapshot, vectors[0], dense_limit)]
+            elif snapshot.dense_vector_store is not None:
+                batch = snapshot.dense_vector_store.query_batch(vectors, dense_limit)
+            else:
+                result = snapshot.chroma_collection.query(
+                    query_embeddings=vectors, n_results=dense_limit
                 )
-                embedding = response.data[0].embedding
-                dense_limit = min(candidate_limit * 5, len(all_data["ids"]))
-                results = self._vector_query_unlocked(embedding, dense_limit)
-                for doc_id, distance in results:
-                    if doc_id in id_to_doc:
-                        candidate = self._candidate_for(doc_id, id_to_doc, id_to_meta, results_pool)
-                        candidate.dense_score = 1 / (1 + float(distance))
-                        candidate.meta["_distance"] = float(distance)
-                        candidate.score += (
-                            candidate.dense_score * self.config.retrieval_dense_weight
-                        )
-                        candidate.add_source("dense")
-                        candidate.add_reason("dense semantic match")
-            except Exception as exc:
-                logging.error("向量检索失败: %s", exc)
+                batch = [
+                    list(zip(ids, distances, strict=True))
+                    for ids, distances in zip(result["ids"], result["distances"], strict=True)
+                ]
+        except Exception as exc:
+            logging.error("向量检索失败: %s", exc)
+            return hits
+        for index, rows in zip(present, batch, strict=True):
+            hits[index] = rows
+        return hits
 
-        self._add_clause_matches(query_info, all_data, id_to_doc, id_to_meta, results_pool)
-        self._add_bm25_matches(
-            query_info, candidate_limit, all_data, id_to_doc, id_to_meta, results_pool
-        )
+    def _rank_candidates(
+        self,
+        snapshot: RetrievalSnapshot,
+        query_info: QueryInfo,
+        candidate_limit: int,
+        dense_hits: list[tuple[str, float]],
+        lexical: LexicalMatches | None = None,
+    ) -> tuple[str, list[RetrievalResult]]:
+        if lexical is None:
+            lexical = self._score_lexical(snapshot, query_info, candidate_limit)
+        corpus = snapshot.corpus
+        results_pool: dict[int, RetrievalCandidate] = {}
+        for doc_id, distance in dense_hits:
+            position = corpus.position(doc_id)
+            if position is not None:
+                candidate = self._candidate_for(position, corpus, results_pool)
+                candidate.dense_score = 1 / (1 + float(distance))
+                candidate.meta["_distance"] = float(distance)
+                candidate.score += candidate.dense_score * self.config.retrieval_dense_weight
+                candidate.add_source("dense")
+                candidate.add_reason("dense semantic match")
+
+        # Lexical scores were computed up front (possibly while the embedding
+        # was in flight); applying them in a fixed order keeps ranking stable.
+        self._add_clause_matches(query_info, snapshot, results_pool, lexical.clause)
+        self._add_bm25_matches(query_info, candidate_limit, snapshot, results_pool, lexical.bm25)
         self._add_table_intent_matches(
-            query_info, candidate_limit, all_data, id_to_doc, id_to_meta, results_pool
+            query_info, candidate_limit, snapshot, results_pool, lexical.table_intent
         )
         self._add_value_table_matches(
-            query_info, candidate_limit, all_data, id_to_doc, id_to_meta, results_pool
+            query_info, candidate_limit, snapshot, results_pool, lexical.value_table
         )
         self._apply_domain_ranking(query_info, results_pool)
 
@@ -434,6 +1013,87 @@ class RetrievalState:
         results = sorted(results, key=lambda item: item.score, reverse=True)[:candidate_limit]
         return query_info.normalized, results
 
+    def _cached_query_embedding(self, provider: EmbeddingProvider, text: str) -> list[float] | None:
+        cache = self.embedding_cache
+        if cache is None:
+            return None
+        cached = cache.get(provider.model_id, provider.dimensions, text)
+        metrics.record_query_embedding_cache(hit=cached is not None)
+        return cached
+
+    def _store_query_embedding(
+        self, provider: EmbeddingProvider, text: str, embedding: list[float]
+    ) -> None:
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(provider.model_id, provider.dimensions, text, embedding)
+
+    def _fetch_query_embedding(self, snapshot: RetrievalSnapshot, query: str) -> list[float] | None:
+        provider = self.embedding_provider
+        if not provider or not snapshot.corpus.ids:
+            return None
+        text = normalize_embedding_query(query)
+        embedding = self._cached_query_embedding(provider, text)
+        if embedding is not None:
+            return embedding
+        try:
+            embedding = provider.embed([text])[0]
+        except Exception as exc:
+            logging.error("向量检索失败: %s", exc)
+            return None
+        self._store_query_embedding(provider, text, embedding)
+        return embedding
+
+    def _fetch_query_embeddings(
+        self, snapshot: RetrievalSnapshot, queries: Sequence[str]
+    ) -> list[list[float] | None]:
+        provider = self.embedding_provider
+        if not provider or not snapshot.corpus.ids:
+            return [None] * len(queries)
+        texts = [normalize_embedding_query(query) for query in queries]
+        embeddings: dict[str, list[float]] = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            cached = self._cached_query_embedding(provider, text)
+            if cached is None:
+                missing.append(text)
+            else:
+                embeddings[text] = cached
+        for start in range(0, len(missing), QUERY_EMBEDDING_BATCH_SIZE):
+            batch = missing[start : start + QUERY_EMBEDDING_BATCH_SIZE]
+            try:
+                vectors = provider.embed(batch)
+            except Exception as exc:
+                logging.error("向量检索失败: %s", exc)
+                continue
+            for text, embedding in zip(batch, vectors, strict=True):
+                self._store_query_embedding(provider, text, embedding)
+                embeddings[text] = embedding
+        return [embeddings.get(text) for text in texts]
+
+    async def _fetch_query_embedding_async(
+        self, snapshot: RetrievalSnapshot, query: str
+    ) -> list[float] | None:
+        provider = self.embedding_provider
+        if not provider or not snapshot.corpus.ids:
+            return None
+        text = normalize_embedding_query(query)
+        embedding = self._cached_query_embedding(provider, text)
+        if embedding is not None:
+            return embedding
+        try:
+            embedding = (await provider.aembed([text]))[0]
+        except Exception as exc:
+            logging.error("向量检索失败: %s", exc)
+            return None
+        self._store_query_embedding(provider, text, embedding)
+        return embedding
+
+    async def aclose(self) -> None:
+        self.shutdown_executor()
+        self.reranker.close()
+        if self.embedding_provider is not None:
+            await self.embedding_provider.aclose()
+
     def hybrid_search_legacy(
         self, query: str, top_k: int
     ) -> list[tuple[str, dict[str, Any], float]]:
@@ -447,38 +1107,60 @@ class RetrievalState:
 
     def _candidate_for(
         self,
-        doc_id: str,
-        id_to_doc: dict[str, str],
-        id_to_meta: dict[str, dict[str, Any]],
-        results_pool: dict[str, RetrievalCandidate],
+        position: int,
+        corpus: CorpusView,
+        results_pool: dict[int, RetrievalCandidate],
     ) -> RetrievalCandidate:
-        if doc_id not in results_pool:
-            results_pool[doc_id] = RetrievalCandidate(
-                doc_id=doc_id,
-                text=id_to_doc[doc_id],
-                meta=dict(id_to_meta.get(doc_id, {})),
+        if position not in results_pool:
+            results_pool[position] = RetrievalCandidate(
+                doc_id=corpus.ids[position],
+                text=corpus.documents[position],
+                meta=dict(corpus.metadatas[position]),
             )
-        return results_pool[doc_id]
+        return results_pool[position]
 
     def _add_clause_matches(
         self,
         query_info: QueryInfo,
-        all_data: dict[str, Any],
-        id_to_doc: dict[str, str],
-        id_to_meta: dict[str, dict[str, Any]],
-        results_pool: dict[str, RetrievalCandidate],
+        snapshot: RetrievalSnapshot,
+        results_pool: dict[int, RetrievalCandidate],
+        hits: list[tuple[int, str, bool]] | None = None,
     ) -> None:
+        if hits is None:
+            hits = self._clause_hits(query_info, snapshot)
+        for index, clause_num, has_clause_heading in hits:
+            candidate = self._candidate_for(index, snapshot.corpus, results_pool)
+            candidate.clause_match = True
+            candidate.meta["matched_clause_number"] = clause_num
+            candidate.meta["clause_match_kind"] = "heading" if has_clause_heading else "reference"
+            boost = (
+                self.config.retrieval_clause_boost
+                if has_clause_heading
+                else self.config.retrieval_clause_boost * 0.45
+            )
+            candidate.score += boost
+            candidate.add_source("clause")
+            reason = "clause exact match" if has_clause_heading else "clause reference match"
+            candidate.add_reason(f"{reason} {clause_num}")
+            logging.info("条文号精准匹配: %s -> 块%s", clause_num, index)
+
+    def _clause_hits(
+        self, query_info: QueryInfo, snapshot: RetrievalSnapshot
+    ) -> list[tuple[int, str, bool]]:
+        """(position, clause number, is heading) for chunks citing a requested clause."""
         if not query_info.clause_numbers:
-            return
+            return []
 
-        for index, meta in enumerate(all_data["metadatas"]):
+        hits: list[tuple[int, str, bool]] = []
+        corpus = snapshot.corpus
+        for index in snapshot.metadata_index.clause_candidates(query_info.clause_numbers):
+            meta = corpus.metadatas[index]
             title = meta.get("title", "")
             clause_number = meta.get("clause_number", "")
             if not matches_requested_spec(query_info, meta):
                 continue
             for clause_num in query_info.clause_numbers:
-                doc_id = all_data["ids"][index]
-                text = id_to_doc.get(doc_id, "")
+                text = corpus.documents[index]
                 title_text = str(title or "")
                 section_type = infer_section_type(meta, text)
                 has_clause_heading = (
@@ -492,89 +1174,79 @@ class RetrievalState:
                     title_text, clause_num
                 ) or text_mentions_clause(text, clause_num)
                 if has_clause_heading or has_clause_reference:
-                    candidate = self._candidate_for(doc_id, id_to_doc, id_to_meta, results_pool)
-                    candidate.clause_match = True
-                    candidate.meta["matched_clause_number"] = clause_num
-                    candidate.meta["clause_match_kind"] = (
-                        "heading" if has_clause_heading else "reference"
-                    )
-                    boost = (
-                        self.config.retrieval_clause_boost
-                        if has_clause_heading
-                        else self.config.retrieval_clause_boost * 0.45
-                    )
-                    candidate.score += boost
-                    candidate.add_source("clause")
-                    reason = (
-                        "clause exact match" if has_clause_heading else "clause reference match"
-                    )
-                    candidate.add_reason(f"{reason} {clause_num}")
-                    logging.info("条文号精准匹配: %s -> 块%s", clause_num, index)
+                    hits.append((index, clause_num, has_clause_heading))
                     break
+        return hits
 
     def _add_bm25_matches(
         self,
         query_info: QueryInfo,
         top_k: int,
-        all_data: dict[str, Any],
-        id_to_doc: dict[str, str],
-        id_to_meta: dict[str, dict[str, Any]],
-        results_pool: dict[str, RetrievalCandidate],
+        snapshot: RetrievalSnapshot,
+        results_pool: dict[int, RetrievalCandidate],
+        matches: list[tuple[int, float]] | None = None,
     ) -> None:
-        if not self.bm25_index:
+        if not snapshot.bm25_index:
             return
 
-        bm25_scores = self.bm25_index.get_scores(tokenize_chinese(query_info.normalized))
-        top_indices = sorted(
-            range(len(bm25_scores)), key=lambda index: bm25_scores[index], reverse=True
-        )[: top_k * 10]
-        for index in top_indices:
-            doc_id = all_data["ids"][index]
-            score = float(bm25_scores[index])
-            if score > 0:
-                candidate = self._candidate_for(doc_id, id_to_doc, id_to_meta, results_pool)
-                candidate.bm25_score = score
-                candidate.score += score * self.config.retrieval_bm25_weight
-                candidate.add_source("bm25")
-                reason = "bm25 strong keyword match" if score > 5 else "bm25 keyword match"
-                candidate.add_reason(reason)
+        if matches is None:
+            matches = snapshot.bm25_index.top_n(
+                tokenize_chinese(query_info.normalized), top_k * BM25_CANDIDATE_MULTIPLIER
+            )
+        for index, score in matches:
+            candidate = self._candidate_for(index, snapshot.corpus, results_pool)
+            candidate.bm25_score = score
+            candidate.score += score * self.config.retrieval_bm25_weight
+            candidate.add_source("bm25")
+            reason = "bm25 strong keyword match" if score > 5 else "bm25 keyword match"
+            candidate.add_reason(reason)
 
     def _add_table_intent_matches(
         self,
         query_info: QueryInfo,
         top_k: int,
-        all_data: dict[str, Any],
-        id_to_doc: dict[str, str],
-        id_to_meta: dict[str, dict[str, Any]],
-        results_pool: dict[str, RetrievalCandidate],
+        snapshot: RetrievalSnapshot,
+        results_pool: dict[int, RetrievalCandidate],
+        scored: list[tuple[float, int]] | None = None,
     ) -> None:
+        if scored is None:
+            scored = self._table_intent_scores(query_info, snapshot)
+        for score, index in sorted(scored, reverse=True)[: top_k * 5]:
+            candidate = self._candidate_for(index, snapshot.corpus, results_pool)
+            candidate.score += min(score, 12.0) * 0.35
+            candidate.add_source("table")
+            candidate.add_reason("table intent supplemental match")
+
+    def _table_intent_scores(
+        self, query_info: QueryInfo, snapshot: RetrievalSnapshot
+    ) -> list[tuple[float, int]]:
         if not query_info.wants_table:
-            return
+            return []
 
+        phrases = [(phrase, compact_evidence(phrase)) for phrase in query_info.content_phrases]
+        keywords = [
+            (keyword, compact_evidence(keyword)) for keyword in set(query_info.content_keywords)
+        ]
         scored: list[tuple[float, int]] = []
-        for index, doc_id in enumerate(all_data["ids"]):
-            text = id_to_doc.get(doc_id, "")
-            meta = id_to_meta.get(doc_id, {})
-            if not matches_requested_spec(query_info, meta) or not infer_is_table(meta, text):
-                continue
-            meta_text = " ".join(
-                str(meta.get(key, ""))
-                for key in ("name", "code", "title", "table_id", "table_name", "clause_number")
-            )
-            evidence = f"{meta_text}\n{text}"
+        for table in snapshot.metadata_index.table_candidates(query_info):
             score = 0.0
-            table_id = str(meta.get("table_id") or "")
-            if table_id and table_id in query_info.table_numbers:
+            if table.table_id and table.table_id in query_info.table_numbers:
                 score += 10.0
             score += sum(
-                2.0 for phrase in query_info.content_phrases if evidence_contains(evidence, phrase)
+                2.0
+                for phrase, compact_phrase in phrases
+                if contains_precompacted(
+                    table.evidence, table.compact_evidence, phrase, compact_phrase
+                )
             )
             score += (
                 min(
                     sum(
                         1
-                        for keyword in set(query_info.content_keywords)
-                        if evidence_contains(evidence, keyword)
+                        for keyword, compact_keyword in keywords
+                        if contains_precompacted(
+                            table.evidence, table.compact_evidence, keyword, compact_keyword
+                        )
                     ),
                     12,
                 )
@@ -583,63 +1255,49 @@ class RetrievalState:
             if query_info.intent == "classification":
                 score += 0.8
             if score > 0:
-                scored.append((score, index))
-
-        for score, index in sorted(scored, reverse=True)[: top_k * 5]:
-            doc_id = all_data["ids"][index]
-            candidate = self._candidate_for(doc_id, id_to_doc, id_to_meta, results_pool)
-            candidate.score += min(score, 12.0) * 0.35
-            candidate.add_source("table")
-            candidate.add_reason("table intent supplemental match")
+                scored.append((score, table.index))
+        return scored
 
     def _add_value_table_matches(
         self,
         query_info: QueryInfo,
         top_k: int,
-        all_data: dict[str, Any],
-        id_to_doc: dict[str, str],
-        id_to_meta: dict[str, dict[str, Any]],
-        results_pool: dict[str, RetrievalCandidate],
+        snapshot: RetrievalSnapshot,
+        results_pool: dict[int, RetrievalCandidate],
+        scored: list[tuple[int, int]] | None = None,
     ) -> None:
+        if scored is None:
+            scored = self._value_table_scores(query_info, snapshot)
+        for hit_count, index in sorted(scored, reverse=True)[: top_k * 3]:
+            candidate = self._candidate_for(index, snapshot.corpus, results_pool)
+            candidate.score += min(hit_count, 8) * 0.35
+            candidate.add_source("table")
+            candidate.add_reason("value lookup table keyword match")
+
+    def _value_table_scores(
+        self, query_info: QueryInfo, snapshot: RetrievalSnapshot
+    ) -> list[tuple[int, int]]:
         if query_info.intent != "value_lookup":
-            return
+            return []
 
-        query_tokens = [
+        query_tokens = {
             token for token in tokenize_chinese(query_info.normalized) if len(token) >= 2
-        ]
+        }
         scored: list[tuple[int, int]] = []
-        for index, doc_id in enumerate(all_data["ids"]):
-            text = id_to_doc.get(doc_id, "")
-            meta = id_to_meta.get(doc_id, {})
-            if not matches_requested_spec(query_info, meta):
-                continue
-            if infer_section_type(meta, text) == "explanation" or not infer_is_table(meta, text):
+        for table in snapshot.metadata_index.table_candidates(query_info):
+            if table.explanation:
                 continue
-            evidence = " ".join(
-                str(meta.get(key, ""))
-                for key in ("name", "code", "title", "table_id", "table_name")
-            )
-            evidence = f"{evidence}\n{text}"
-            hit_count = sum(1 for token in set(query_tokens) if token in evidence)
-            if (
-                query_info.table_numbers
-                and str(meta.get("table_id") or "") in query_info.table_numbers
-            ):
+            hit_count = sum(1 for token in query_tokens if token in table.value_evidence)
+            if query_info.table_numbers and table.table_id in query_info.table_numbers:
                 hit_count += 10
             if hit_count:
-                scored.append((hit_count, index))
-
-        for hit_count, index in sorted(scored, reverse=True)[: top_k * 3]:
-            doc_id = all_data["ids"][index]
-            candidate = self._candidate_for(doc_id, id_to_doc, id_to_meta, results_pool)
-            candidate.score += min(hit_count, 8) * 0.35
-            candidate.add_source("table")
-            candidate.add_reason("value lookup table keyword match")
+                scored.append((hit_count, table.index))
+        return scored
 
     def _apply_domain_ranking(
         self,
         query_info: QueryInfo,
-        results_pool: dict[str, RetrievalCandidate],
+        results_pool: dict[int, RetrievalCandidate],
     ) -> None:
         for candidate in results_pool.values():
             meta = candidate.meta
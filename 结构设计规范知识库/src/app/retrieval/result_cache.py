@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import closing, contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from threading import Lock
+
+from .models import RetrievalResult
+
+SEARCH_RESULT_CACHE_SCHEMA_VERSION = 1
+
+CachedSearch = tuple[tuple[RetrievalResult, ...], float]
+
+
+def search_cache_key(data_version: str, query: str, top_k: int, scope: str) -> str:
+    """Stable key for one hybrid_search call; ``scope`` fingerprints ranking config."""
+    payload = json.dumps(
+        [SEARCH_RESULT_CACHE_SCHEMA_VERSION, data_version, scope, top_k, query],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SharedSearchResultStore:
+    """SQLite-backed result store shared by API workers on one host.
+
+    Rows carry the data version they were computed for, so a promoted rebuild
+    never serves results from the previous knowledge base. Failures degrade
+    to cache misses.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._clock = clock
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS search_results ("
+                "key TEXT PRIMARY KEY, data_version TEXT NOT NULL, payload TEXT NOT NULL, "
+                "cost_ms REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS search_results_accessed_at "
+                "ON search_results (accessed_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a connection that is closed afterwards."""
+        with closing(sqlite3.connect(self.path, timeout=1)) as connection, connection:
+            yield connection
+
+    def get(self, key: str, data_version: str) -> CachedSearch | None:
+        try:
+            with self._connect() as connection:
+                row = connection.execute(
+                    "SELECT payload, cost_ms FROM search_results "
+                    "WHERE key = ? AND data_version = ?",
+                    (key, data_version),
+                ).fetchone()
+                if row is None:
+                    return None
+                connection.execute(
+                    "UPDATE search_results SET accessed_at = ? WHERE key = ?",
+                    (self._clock(), key),
+                )
+            results = tuple(RetrievalResult(**item) for item in json.loads(row[0]))
+        except (sqlite3.Error, TypeError, ValueError) as exc:
+            logging.warning("共享检索结果缓存读取失败，按未命中处理: %s", exc)
+            return None
+        return results, float(row[1])
+
+    def put(
+        self,
+        key: str,
+        data_version: str,
+        results: Sequence[RetrievalResult],
+        cost_ms: float,
+    ) -> None:
+        try:
+            payload = json.dumps([asdict(item) for item in results], ensure_ascii=False)
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?)",
+                    (key, data_version, payload, cost_ms, self._clock()),
+                )
+                connection.execute(
+                    "DELETE FROM search_results WHERE key IN ("
+                    "SELECT key FROM search_results ORDER BY accessed_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except (sqlite3.Error, TypeError, ValueError) as exc:
+            logging.warning("共享检索结果缓存写入失败，已跳过: %s", exc)
+
+
+class SearchResultCache:
+    """Bounded LRU of final hybrid_search results.
+
+    Each entry remembers how long the original search took so that hits can
+    be reported as saved time. An optional shared store lets several worker
+    processes reuse each other's results.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        *,
+        shared: SharedSearchResultStore | None = None,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须大于 0")
+        self.max_entries = max_entries
+        self.shared = shared
+        self._lock = Lock()
+        self._entries: OrderedDict[str, CachedSearch] = OrderedDict()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str, data_version: str) -> CachedSearch | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.shared is None:
+            return None
+        entry = self.shared.get(key, data_version)
+        if entry is not None:
+            self._insert(key, entry)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        data_version: str,
+        results: Sequence[RetrievalResult],
+        cost_ms: float,
+    ) -> None:
+        entry = (tuple(results), cost_ms)
+        self._insert(key, entry)
+        if self.shared is not None:
+            self.shared.put(key, data_version, entry[0], cost_ms)
+
+    def _insert(self, key: str, entry: CachedSearch) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def build_search_result_cache(
+    max_entries: int, shared_path: Path | None = None
+) -> SearchResultCache | None:
+    if max_entries <= 0:
+        return None
+    shared = None
+    if shared_path is not None:
+        try:
+            shared = SharedSearchResultStore(shared_path, max_entries)
+        except (OSError, sqlite3.Error) as exc:
+            logging.error("共享检索结果缓存初始化失败，仅使用进程内缓存: %s", exc)
+    return SearchResultCache(max_entries, shared=shared)
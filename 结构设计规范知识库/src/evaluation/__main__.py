@@ -1,7 +1,11 @@
 import argparse
 import json
+from dataclasses import replace
 from pathlib import Path
 
+from src.app.core.config import VALID_RERANK_PROVIDERS, settings
+from src.app.rerank.factory import get_reranker
+
 from .rerank_comparison import render_rerank_comparison_markdown, run_rerank_comparison
 from .runner import DEFAULT_EVAL_PATH, run_evaluation
 
@@ -17,6 +21,11 @@ def main() -> None:
     compare_parser.add_argument("--top-k", type=int, default=5)
     compare_parser.add_argument("--json-output", type=Path)
     compare_parser.add_argument("--markdown-output", type=Path)
+    compare_parser.add_argument(
+        "--provider",
+        choices=sorted(VALID_RERANK_PROVIDERS - {"none"}),
+        help="覆盖 RERANK_PROVIDER；local 使用 LOCAL_RERANK_MODEL_DIR 离线精排",
+    )
     args = parser.parse_args()
 
     if args.command == "run":
@@ -25,7 +34,12 @@ def main() -> None:
         if not result.get("ok", False):
             raise SystemExit(1)
     elif args.command == "compare-rerank":
-        result = run_rerank_comparison(Path(args.file), top_k=args.top_k)
+        reranker = None
+        if args.provider:
+            reranker = get_reranker(
+                replace(settings, rerank_enabled=True, rerank_provider=args.provider)
+            )
+        result = run_rerank_comparison(Path(args.file), top_k=args.top_k, reranker=reranker)
         serialized = json.dumps(result, ensure_ascii=False, indent=2)
         if args.json_output:
             args.json_output.parent.mkdir(parents=True, exist_ok=True)
@@ -106,7 +106,8 @@ def run_rerank_comparison(
                 "evaluation_set_hash": hashlib.sha256(path.read_bytes()).hexdigest(),
                 "data_version_hash": str(manifest.get("data_version_hash") or ""),
                 "provider": selected_reranker.name,
-                "model": evaluation_state.config.rerank_model,
+                "model": getattr(selected_reranker, "model", "")
+                or evaluation_state.config.rerank_model,
                 "top_k": top_k,
                 "candidate_limit": candidate_limit,
                 "case_count": len(comparable_cases),
@@ -160,7 +161,7 @@ def run_rerank_comparison(
         "evaluation_set_hash": hashlib.sha256(path.read_bytes()).hexdigest(),
         "data_version_hash": str(manifest.get("data_version_hash") or ""),
         "provider": selected_reranker.name,
-        "model": evaluation_state.config.rerank_model,
+        "model": getattr(selected_reranker, "model", "") or evaluation_state.config.rerank_model,
         "top_k": top_k,
         "candidate_limit": candidate_limit,
         "case_count": len(comparable_cases),
@@ -464,12 +464,16 @@ def run_evaluation(
             "error": "知识库检索服务未就绪，请先启动并完成 ChromaDB/ZhipuAI 初始化",
         }
 
-    results_by_id = {
-        case.id: evaluation_state.hybrid_search(case.query, top_k)
-        if case.type != "structured_table"
+    hybrid_cases = [case for case in cases if case.type != "structured_table"]
+    hybrid_results = (
+        evaluation_state.hybrid_search_batch([case.query for case in hybrid_cases], top_k)
+        if hybrid_cases
         else []
-        for case in cases
-    }
+    )
+    results_by_id = {case.id: [] for case in cases}
+    results_by_id.update(
+        (case.id, results) for case, results in zip(hybrid_cases, hybrid_results, strict=True)
+    )
     structured_by_id = {
         case.id: find_structured_table_matches(case.query, limit=top_k)
         for case in cases
@@ -4,6 +4,8 @@ from datetime import timedelta
 from math import isfinite
 from pathlib import Path
 
+from src.app.core.config import settings
+
 from .builder import (
     BuildPreflightError,
     audit,
@@ -70,6 +72,22 @@ def main() -> None:
             choices=["mineru", "pymupdf"],
             help="PDF 解析后端，默认 mineru",
         )
+        command_parser.add_argument(
+            "--prerender-pages",
+            action="store_true",
+            help="构建后预渲染 chunk 引用的 PDF 页图到页图缓存",
+        )
+        command_parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="复用活动版本中未变化 chunk 的向量，只向量化新增或变化的 chunk",
+        )
+        command_parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="并行解析的 PDF 数；pymupdf 使用进程池，mineru 限制同时运行的子进程数，默认 1",
+        )
 
     subparsers.add_parser("status")
     parser_status_parser = subparsers.add_parser(
@@ -81,6 +99,24 @@ def main() -> None:
         choices=["mineru", "pymupdf"],
         help="PDF 解析后端，默认 mineru",
     )
+    service_parser = subparsers.add_parser(
+        "parse-service", help="启动常驻 OCR 解析服务，模型只加载一次"
+    )
+    service_parser.add_argument(
+        "--socket", default="", help="Unix socket 路径，默认读取 PARSE_SERVICE_SOCKET"
+    )
+    service_parser.add_argument(
+        "--workers", type=int, default=settings.parse_service_workers, help="常驻模型进程数"
+    )
+    service_parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=settings.parse_service_queue_size,
+        help="同时接受的批次上限，超出时返回 busy",
+    )
+    service_parser.add_argument(
+        "--preheat", action="store_true", help="等全部进程完成预热后再接受请求"
+    )
     audit_parser = subparsers.add_parser("audit")
     audit_parser.add_argument(
         "--processed-dir", default="data/processed", help="已生成 processed 目录"
@@ -118,6 +154,12 @@ def main() -> None:
     )
     validate_parser = subparsers.add_parser("package-validate", help="校验知识包格式和文件哈希")
     validate_parser.add_argument("--package", required=True, help="知识包 ZIP 文件")
+    validate_parser.add_argument(
+        "--sample",
+        type=int,
+        default=None,
+        help="快速校验：只校验清单、全部文件大小和随机抽取的 N 个文件哈希；导入仍做全量校验",
+    )
     probe_parser = subparsers.add_parser(
         "package-probe", help="隔离导入并打开 Chroma 验证运行兼容性"
     )
@@ -197,6 +239,9 @@ def main() -> None:
                     dry_run_only=args.dry_run,
                     parser_backend=args.parser_backend,
                     apply_corrections=not args.no_corrections,
+                    prerender_pages=args.prerender_pages,
+                    incremental=args.incremental,
+                    parse_workers=args.workers,
                 )
             )
         elif args.command == "rebuild":
@@ -206,8 +251,23 @@ def main() -> None:
                     dry_run_only=args.dry_run,
                     parser_backend=args.parser_backend,
                     apply_corrections=not args.no_corrections,
+                    prerender_pages=args.prerender_pages,
+                    incremental=args.incremental,
+                    parse_workers=args.workers,
                 )
             )
+        elif args.command == "parse-service":
+            socket_path = Path(args.socket) if args.socket else settings.parse_service_socket
+            if socket_path is None:
+                raise BuildPreflightError("未设置 PARSE_SERVICE_SOCKET，也未指定 --socket")
+            from .parse_service import run_parse_service
+
+            run_parse_service(
+                socket_path,
+                workers=args.workers,
+                queue_size=args.queue_size,
+                preheat=args.preheat,
+            )
         elif args.command == "audit":
             print_json(audit(Path(args.processed_dir)))
         elif args.command == "review":
@@ -227,7 +287,7 @@ def main() -> None:
                 )
             )
         elif args.command == "package-validate":
-            print_json(validate_runtime_package(Path(args.package)))
+            print_json(validate_runtime_package(Path(args.package), sample_size=args.sample))
         elif args.command == "package-probe":
             print_json(
                 probe_runtime_package(
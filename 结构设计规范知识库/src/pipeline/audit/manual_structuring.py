@@ -120,9 +120,9 @@ def _version_path(doc: str, item_id: str, version_id: str, out_dir: Path) -> Pat
 
 def _invalidate_structured_table_cache() -> None:
     try:
-        from src.app.rag.structured_tables import load_structured_tables
+        from src.app.rag.structured_tables import clear_structured_table_cache
 
-        load_structured_tables.cache_clear()
+        clear_structured_table_cache()
     except ImportError:
         pass
 
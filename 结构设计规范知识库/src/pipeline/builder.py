@@ -6,8 +6,10 @@ from pathlib import Path
 from typing import Any
 
 from src.app.core.config import settings
+from src.app.core.embeddings import embedding_model_id
+from src.app.retrieval.bm25_index import bm25_index_manifest_entry
 
-from .active_db import read_active_manifest
+from .active_db import active_db_dir, active_processed_dir, read_active_manifest
 from .manifest import build_manifest, write_manifest
 from .metadata import load_spec_metadata
 from .parsers.base import ParserUnavailableError
@@ -132,7 +134,16 @@ def rebuild(
     images_dir: Path = IMAGES_DIR,
     mineru_output_dir: Path = MINERU_DIR,
     audit_dir: Path = AUDIT_DIR,
+    prerender_pages: bool = False,
+    incremental: bool = False,
+    parse_workers: int = 1,
 ) -> dict[str, Any]:
+    """Parse, chunk and index ``source_dir``.
+
+    With ``incremental`` the previous active version's vectors are reused for
+    unchanged chunks and only new or changed chunks are embedded.
+    ``parse_workers`` documents are parsed concurrently.
+    """
     configure_pipeline_logging()
     source_dir = source_dir.resolve()
     pdf_files = list_pdf_files(source_dir)
@@ -146,9 +157,21 @@ def rebuild(
         return dry_run(source_dir, parser_backend=parser_backend)
 
     parser_environment = validate_parser_backend(parser_backend)
-    if not os.environ.get("ZHIPUAI_API_KEY"):
+    if settings.embedding_provider != "local" and not os.environ.get("ZHIPUAI_API_KEY"):
         raise BuildPreflightError("ZHIPUAI_API_KEY 未设置，无法执行全量构建和向量化入库")
 
+    reuse = None
+    if incremental:
+        from .incremental import load_reusable_vectors
+
+        # Read before cleaning: the previous version may live in the same directories.
+        reuse = load_reusable_vectors(
+            active_db_dir(),
+            active_processed_dir(),
+            embedding_model=embedding_model_id(settings),
+            dimensions=settings.embedding_dimensions,
+        )
+
     clean_generated_outputs(
         db_dir=db_dir,
         manifest_path=manifest_path,
@@ -159,6 +182,7 @@ def rebuild(
     )
 
     from .load_to_db import load_chunks_to_db
+    from .parse_cache import default_parse_cache
     from .process_documents import process_pdfs
 
     processed_by_file = process_pdfs(
@@ -169,11 +193,13 @@ def rebuild(
         parser_backend=parser_backend,
         mineru_output_dir=mineru_output_dir,
         apply_corrections=apply_corrections,
+        workers=parse_workers,
+        parse_cache=default_parse_cache(),
     )
     chunks_by_file = {
         source_file: result["chunks"] for source_file, result in processed_by_file.items()
     }
-    total_loaded = load_chunks_to_db(chunks_by_file, db_dir)
+    total_loaded = load_chunks_to_db(chunks_by_file, db_dir, reuse=reuse)
     chunk_counts = {source_file: len(chunks) for source_file, chunks in chunks_by_file.items()}
     image_count = len([path for path in images_dir.glob("*") if path.is_file()])
     manifest = build_manifest(
@@ -181,7 +207,7 @@ def rebuild(
         metadata=metadata,
         chunk_counts=chunk_counts,
         image_count=image_count,
-        embedding_model=settings.embedding_model,
+        embedding_model=embedding_model_id(settings),
         collection_name=settings.collection_name,
         embedding_dimensions=settings.embedding_dimensions,
         artifacts_by_file={
@@ -204,6 +230,7 @@ def rebuild(
             source_file: [chunk["chunk_id"] for chunk in result.get("chunks", [])]
             for source_file, result in processed_by_file.items()
         },
+        lexical_index=bm25_index_manifest_entry(db_dir),
         build_params={
             "source_dir": str(source_dir),
             "mode": "rebuild",
@@ -221,7 +248,15 @@ def rebuild(
             "excluded_test_sources": excluded_test_sources,
         },
     )
+    if incremental:
+        from .incremental import reuse_summary
+
+        manifest["embedding_reuse"] = reuse_summary(reuse, total_loaded)
     write_manifest(manifest_path, manifest)
+    if prerender_pages:
+        from .page_render_cache import default_page_render_cache, prerender_cited_pages
+
+        prerender_cited_pages(default_page_render_cache(), processed_dir, source_dir)
     return manifest
 
 
@@ -231,12 +266,18 @@ def build(
     dry_run_only: bool = False,
     parser_backend: str = DEFAULT_PARSER_BACKEND,
     apply_corrections: bool = True,
+    prerender_pages: bool = False,
+    incremental: bool = False,
+    parse_workers: int = 1,
 ) -> dict[str, Any]:
     return rebuild(
         source_dir=source_dir,
         dry_run_only=dry_run_only,
         parser_backend=parser_backend,
         apply_corrections=apply_corrections,
+        prerender_pages=prerender_pages,
+        incremental=incremental,
+        parse_workers=parse_workers,
     )
 
 
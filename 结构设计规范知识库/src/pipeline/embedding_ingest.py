@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any
+
+from src.app.core.config import Settings
+from src.app.core.embeddings import EmbeddingDiskCache, EmbeddingProvider, is_valid_embedding
+
+
+class EmbeddingBatchError(RuntimeError):
+    def __init__(self, texts: list[str], cause: Exception) -> None:
+        super().__init__(str(cause))
+        self.texts = texts
+        self.cause = cause
+
+
+class TokenBucket:
+    """Thread-safe limiter handing out ``rate`` permits per second, bursting to ``capacity``."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._rate = rate
+        self._capacity = max(capacity if capacity is not None else rate, 1.0)
+        self._tokens = self._capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        if self._rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                elapsed = max(now - self._updated, 0.0)
+                self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            self._sleep(wait)
+
+
+class EmbeddingIngestor:
+    """Embed texts on a worker pool within a request rate, checkpointing every batch.
+
+    Workers take the next batch of pending texts from a shared cursor. A
+    failed request is retried with exponential backoff and halves the batch
+    size used for later requests; each success grows it back by one, up to
+    ``batch_size``. A batch that still fails is split, so one rejected text
+    cannot sink its neighbours. Each successful request goes to the
+    checkpoint at once, and a rerun after a failure embeds only what is
+    missing.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        *,
+        workers: int = 4,
+        batch_size: int = 10,
+        limiter: TokenBucket | None = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        checkpoint: EmbeddingDiskCache | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._provider = provider
+        self._workers = workers
+        self._max_batch_size = batch_size
+        self._batch_size = batch_size
+        self._limiter = limiter or TokenBucket(0)
+        self._max_retries = max_retries
+        self._backoff_seconds = backoff_seconds
+        self._checkpoint = checkpoint
+        self._sleep = sleep
+        self._lock = Lock()
+        self._pending: list[str] = []
+        self._cursor = 0
+        self._failure: EmbeddingBatchError | None = None
+        self.stats = {"embedded": 0, "resumed": 0, "requests": 0, "retries": 0, "splits": 0}
+
+    @classmethod
+    def from_settings(
+        cls,
+        provider: EmbeddingProvider,
+        config: Settings,
+        *,
+        checkpoint: EmbeddingDiskCache | None = None,
+    ) -> EmbeddingIngestor:
+        return cls(
+            provider,
+            workers=config.embedding_ingest_workers,
+            batch_size=config.embedding_ingest_batch_size,
+            limiter=TokenBucket(config.embedding_ingest_requests_per_second),
+            max_retries=config.embedding_ingest_max_retries,
+            backoff_seconds=config.embedding_ingest_backoff_seconds,
+            checkpoint=checkpoint,
+        )
+
+    def embed(self, texts: list[str]) -> dict[str, list[float]]:
+        """Vectors keyed by text; raises EmbeddingBatchError once any text cannot be embedded."""
+        unique = list(dict.fromkeys(texts))
+        model_id, dimensions = self._provider.model_id, self._provider.dimensions
+        resumed = (
+            self._checkpoint.get_many(model_id, dimensions, unique) if self._checkpoint else {}
+        )
+        # Resumed vectors pass the same check as fresh ones; failures are embedded again.
+        vectors = {text: vector for text, vector in resumed.items() if self._is_valid(vector)}
+        self.stats["resumed"] = len(vectors)
+        self._pending = [text for text in unique if text not in vectors]
+        self._cursor = 0
+        self._failure = None
+        if self._pending:
+            workers = min(self._workers, math.ceil(len(self._pending) / self._max_batch_size))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as executor:
+                futures = [executor.submit(self._work, vectors) for _ in range(workers)]
+                for future in futures:
+                    future.result()
+        if self._failure is not None:
+            raise self._failure
+        return vectors
+
+    def _work(self, vectors: dict[str, list[float]]) -> None:
+        while True:
+            with self._lock:
+                if self._failure is not None or self._cursor >= len(self._pending):
+                    return
+                batch = self._pending[self._cursor : self._cursor + self._batch_size]
+                self._cursor += len(batch)
+            try:
+                embedded = self._embed_batch(batch)
+            except EmbeddingBatchError as exc:
+                with self._lock:
+                    self._failure = self._failure or exc
+                return
+            with self._lock:
+                vectors.update(embedded)
+                self.stats["embedded"] += len(embedded)
+
+    def _embed_batch(self, batch: list[str]) -> dict[str, list[float]]:
+        failure: Exception | None = None
+        for attempt in range(self._max_retries + 1):
+            if attempt:
+                self._sleep(self._backoff_seconds * 2 ** (attempt - 1))
+            self._limiter.acquire()
+            try:
+                embeddings = self._provider.embed(batch)
+                self._validate(batch, embeddings)
+            except Exception as exc:
+                failure = exc
+                self._resize(success=False, retried=attempt < self._max_retries)
+                continue
+            self._resize(success=True)
+            embedded = dict(zip(batch, embeddings, strict=True))
+            if self._checkpoint is not None:
+                self._checkpoint.put_many(
+                    self._provider.model_id, self._provider.dimensions, embedded
+                )
+            return embedded
+        if len(batch) > 1:
+            with self._lock:
+                self.stats["splits"] += 1
+            middle = len(batch) // 2
+            return {**self._embed_batch(batch[:middle]), **self._embed_batch(batch[middle:])}
+        raise EmbeddingBatchError(batch, failure or RuntimeError("embedding 请求失败"))
+
+    def _is_valid(self, vector: Any) -> bool:
+        return is_valid_embedding(vector, self._provider.dimensions)
+
+    def _validate(self, batch: list[str], embeddings: list[Any]) -> None:
+        if len(embeddings) != len(batch) or not all(map(self._is_valid, embeddings)):
+            raise ValueError("返回了无效 embedding")
+
+    def _resize(self, *, success: bool, retried: bool = False) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            if success:
+                self._batch_size = min(self._batch_size + 1, self._max_batch_size)
+                return
+            self.stats["retries"] += int(retried)
+            self._batch_size = max(self._batch_size // 2, 1)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.app.retrieval.dense_vector_store import load_dense_vector_store
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ReusableVectors:
+    """Vectors of a previous build, found by ``stable_chunk_id`` or by chunk text hash.
+
+    The chunk id already hashes source file, position and text, so an id hit
+    is an unchanged chunk. The text hash also covers chunks that only moved,
+    e.g. after an earlier chunk of the same file was corrected.
+    """
+
+    def __init__(
+        self,
+        *,
+        source: str,
+        embedding_model: str,
+        by_chunk_id: dict[str, list[float]],
+        by_text_hash: dict[str, list[float]],
+    ) -> None:
+        self.source = source
+        self.embedding_model = embedding_model
+        self._by_chunk_id = by_chunk_id
+        self._by_text_hash = by_text_hash
+        self.reused_by_id = 0
+        self.reused_by_text = 0
+
+    def __len__(self) -> int:
+        return len(self._by_chunk_id)
+
+    def take(self, chunk: dict[str, Any]) -> list[float] | None:
+        vector = self._by_chunk_id.get(str(chunk["chunk_id"]))
+        if vector is not None:
+            self.reused_by_id += 1
+            return vector
+        vector = self._by_text_hash.get(text_sha256(str(chunk["text"])))
+        if vector is not None:
+            self.reused_by_text += 1
+        return vector
+
+
+def load_reusable_vectors(
+    db_dir: Path,
+    processed_dir: Path,
+    *,
+    embedding_model: str,
+    dimensions: int,
+) -> ReusableVectors | None:
+    """Read a previous version's dense store into memory; ``None`` if it cannot be reused.
+
+    Called before the build cleans its outputs, which may be the same
+    directories.
+    """
+    try:
+        store = load_dense_vector_store(
+            db_dir, embedding_model=embedding_model, dimensions=dimensions
+        )
+    except ValueError as exc:
+        logging.info("上一版本向量不可复用，将全量向量化: %s", exc)
+        return None
+    if store is None:
+        logging.info("上一版本没有稠密向量索引，将全量向量化: %s", db_dir)
+        return None
+    texts: dict[str, str] = {}
+    for path in sorted(processed_dir.glob("*_chunks.json")):
+        try:
+            chunks = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logging.warning("读取上一版本 chunk 失败，跳过按文本复用: %s: %s", path, exc)
+            continue
+        for chunk in chunks if isinstance(chunks, list) else []:
+            if isinstance(chunk, dict) and chunk.get("chunk_id"):
+                texts[str(chunk["chunk_id"])] = str(chunk.get("text") or "")
+    by_chunk_id: dict[str, list[float]] = {}
+    by_text_hash: dict[str, list[float]] = {}
+    for chunk_id, row in zip(store.ids, np.asarray(store.vectors, dtype=np.float32), strict=True):
+        vector = row.tolist()
+        by_chunk_id[chunk_id] = vector
+        if chunk_id in texts:
+            by_text_hash.setdefault(text_sha256(texts[chunk_id]), vector)
+    return ReusableVectors(
+        source=str(db_dir),
+        embedding_model=embedding_model,
+        by_chunk_id=by_chunk_id,
+        by_text_hash=by_text_hash,
+    )
+
+
+def reuse_summary(reuse: ReusableVectors | None, chunk_count: int) -> dict[str, Any]:
+    """Manifest block describing how much of an incremental build was embedded afresh."""
+    reused = reuse.reused_by_id + reuse.reused_by_text if reuse else 0
+    return {
+        "mode": "incremental",
+        "previous_db_dir": reuse.source if reuse else "",
+        "previous_vector_count": len(reuse) if reuse else 0,
+        "reused_by_chunk_id": reuse.reused_by_id if reuse else 0,
+        "reused_by_text_hash": reuse.reused_by_text if reuse else 0,
+        "embedded_count": chunk_count - reused,
+        "reuse_ratio": round(reused / chunk_count, 4) if chunk_count else 0.0,
+    }
@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import hashlib
 import json
+import os
 import platform
+import random
 import re
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import zipfile
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from getpass import getuser
 from importlib import metadata as importlib_metadata
@@ -17,6 +21,8 @@ from pathlib import Path, PurePosixPath
 from typing import Any
 
 from src.app.core.config import settings
+from src.app.core.embeddings import embedding_model_id
+from src.app.retrieval.embedding_cache import QUERY_EMBEDDING_CACHE_FILE_NAME
 from src.quality import DEFAULT_REPORT_MAX_AGE, evaluate_quality_gate
 
 from .active_db import active_images_dir, read_active_db, write_active_db
@@ -42,6 +48,10 @@ PACKAGE_MANIFEST_NAME = "knowledge-package.json"
 DEFAULT_MAX_UNCOMPRESSED_BYTES = 20 * 1024 * 1024 * 1024
 PACKAGE_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
 MIN_WAIVER_REASON_LENGTH = 8
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)
+ALWAYS_HASHED_MEMBERS = ("runtime/manifest.json", "runtime/metadata/specs.json")
+# Already compressed; deflating them again costs time and saves next to nothing.
+STORED_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".webp"})
 MACHINE_ALIASES = {
     "amd64": "x86_64",
     "x64": "x86_64",
@@ -92,14 +102,18 @@ def _resolve_pointer_path(value: str | None, pointer_path: Path, default: Path)
 
 
 def _payload_files(
-    directory: Path, archive_prefix: str, role: str
+    directory: Path,
+    archive_prefix: str,
+    role: str,
+    *,
+    excluded_names: frozenset[str] = frozenset(),
 ) -> Iterable[tuple[str, Path, str]]:
     if not directory.exists():
         return
     for path in sorted(directory.rglob("*")):
         if path.is_symlink():
             raise KnowledgePackageError(f"知识包不允许包含符号链接: {path}")
-        if path.is_file():
+        if path.is_file() and path.name not in excluded_names:
             relative = path.relative_to(directory).as_posix()
             yield f"{archive_prefix}/{relative}", path, role
 
@@ -113,6 +127,63 @@ def _file_entry(archive_path: str, source: Path, role: str) -> dict[str, Any]:
     }
 
 
+def _compress_type(archive_path: str) -> int:
+    if PurePosixPath(archive_path).suffix.lower() in STORED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _write_payloads(
+    archive: zipfile.ZipFile,
+    payloads: list[tuple[str, Path, str]],
+    *,
+    workers: int = DEFAULT_HASH_WORKERS,
+) -> list[dict[str, Any]]:
+    """Write ``payloads`` while a thread pool hashes them; entries keep payload order."""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="package-hash") as executor:
+        futures = [
+            executor.submit(_file_entry, archive_path, source, role)
+            for archive_path, source, role in payloads
+        ]
+        try:
+            for archive_path, source, _ in payloads:
+                archive.write(source, archive_path, compress_type=_compress_type(archive_path))
+            return [future.result() for future in futures]
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
+def _verify_member_hashes(
+    package_path: Path,
+    expected: dict[str, str],
+    *,
+    workers: int = DEFAULT_HASH_WORKERS,
+) -> None:
+    """Stream each member through SHA-256, one ZIP handle per worker thread."""
+    local = threading.local()
+    handles: list[zipfile.ZipFile] = []
+    lock = threading.Lock()
+
+    def member_hash(path: str) -> tuple[str, str]:
+        archive = getattr(local, "archive", None)
+        if archive is None:
+            archive = local.archive = zipfile.ZipFile(package_path)
+            with lock:
+                handles.append(archive)
+        return path, _zip_member_sha256(archive, path)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="package-verify")
+    try:
+        for path, actual in executor.map(member_hash, sorted(expected)):
+            if actual != expected[path]:
+                raise KnowledgePackageError(f"文件 SHA-256 不匹配: {path}")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for archive in handles:
+            archive.close()
+
+
 def _payload_hash(entries: Iterable[dict[str, Any]]) -> str:
     canonical = [
         {
@@ -269,6 +340,58 @@ def _test_only_sources(manifest: dict[str, Any]) -> list[str]:
     )
 
 
+def _runtime_package_manifest(
+    manifest: dict[str, Any],
+    entries: list[dict[str, Any]],
+    *,
+    created_at: str,
+    data_version_hash: str,
+    quality: dict[str, Any],
+) -> dict[str, Any]:
+    roles = {entry["role"] for entry in entries}
+    payload_hash = _payload_hash(entries)
+    package_manifest = {
+        "format": PACKAGE_FORMAT,
+        "schema_version": PACKAGE_SCHEMA_VERSION,
+        "profile": "runtime",
+        "created_at": created_at,
+        "data_version_hash": data_version_hash,
+        "payload_hash": payload_hash,
+        "document_count": int(manifest.get("document_count", 0)),
+        "chunk_count": int(manifest.get("chunk_count", 0)),
+        "compatibility": {
+            "app_version": settings.app_version,
+            "python_version": platform.python_version(),
+            "python_implementation": platform.python_implementation().lower(),
+            "platform": platform.system().lower(),
+            "machine": _normalize_machine(platform.machine()),
+            "chromadb_version": _dependency_version("chromadb"),
+            "embedding_model": str(manifest.get("embedding_model") or embedding_model_id(settings)),
+            "embedding_dimensions": int(
+                manifest.get("embedding_dimensions", settings.embedding_dimensions)
+            ),
+            "collection_name": str(manifest.get("collection_name") or settings.collection_name),
+        },
+        "capabilities": {
+            "prebuilt_vector_index": True,
+            "structured_tables": "structured_table" in roles,
+            "extracted_images": "image" in roles,
+            "source_pdfs": "source_pdf" in roles,
+            "page_images": "source_pdf" in roles,
+            "source_access_policy": "source_metadata" in roles,
+        },
+        "quality": quality,
+        "files": entries,
+    }
+    package_id = _expected_package_id(
+        package_manifest,
+        data_version_hash=data_version_hash,
+        payload_hash=payload_hash,
+    )
+    package_manifest["package_id"] = package_id
+    return package_manifest
+
+
 def export_runtime_package(
     output_path: Path,
     *,
@@ -285,6 +408,7 @@ def export_runtime_package(
     quality_waiver_reason: str = "",
     export_actor: str = "",
     export_audit_dir: Path = AUDIT_DIR / "package_exports",
+    hash_workers: int = DEFAULT_HASH_WORKERS,
 ) -> dict[str, Any]:
     if quality_max_age <= timedelta(0):
         raise KnowledgePackageError("质量报告最大有效期必须大于 0")
@@ -375,7 +499,15 @@ def export_runtime_package(
         )
 
     payloads: list[tuple[str, Path, str]] = [("runtime/manifest.json", manifest_path, "manifest")]
-    database_files = list(_payload_files(db_dir, "runtime/db", "vector_index"))
+    # The query-embedding cache holds user queries and is rebuilt on demand.
+    database_files = list(
+        _payload_files(
+            db_dir,
+            "runtime/db",
+            "vector_index",
+            excluded_names=frozenset({QUERY_EMBEDDING_CACHE_FILE_NAME}),
+        )
+    )
     if not database_files:
         raise KnowledgePackageError(f"活动数据库目录没有可导出的文件: {db_dir}")
     payloads.extend(database_files)
@@ -417,76 +549,42 @@ def export_runtime_package(
     if len(archive_paths) != len(set(archive_paths)):
         raise KnowledgePackageError("导出内容存在重复路径")
 
-    entries = [_file_entry(archive_path, source, role) for archive_path, source, role in payloads]
-    roles = {entry["role"] for entry in entries}
-    payload_hash = _payload_hash(entries)
-    package_manifest = {
-        "format": PACKAGE_FORMAT,
-        "schema_version": PACKAGE_SCHEMA_VERSION,
-        "profile": "runtime",
-        "created_at": created_at,
-        "data_version_hash": data_version_hash,
-        "payload_hash": payload_hash,
-        "document_count": int(manifest.get("document_count", 0)),
-        "chunk_count": int(manifest.get("chunk_count", 0)),
-        "compatibility": {
-            "app_version": settings.app_version,
-            "python_version": platform.python_version(),
-            "python_implementation": platform.python_implementation().lower(),
-            "platform": platform.system().lower(),
-            "machine": _normalize_machine(platform.machine()),
-            "chromadb_version": _dependency_version("chromadb"),
-            "embedding_model": str(manifest.get("embedding_model") or settings.embedding_model),
-            "embedding_dimensions": int(
-                manifest.get("embedding_dimensions", settings.embedding_dimensions)
-            ),
-            "collection_name": str(manifest.get("collection_name") or settings.collection_name),
-        },
-        "capabilities": {
-            "prebuilt_vector_index": True,
-            "structured_tables": "structured_table" in roles,
-            "extracted_images": "image" in roles,
-            "source_pdfs": "source_pdf" in roles,
-            "page_images": "source_pdf" in roles,
-            "source_access_policy": "source_metadata" in roles,
-        },
-        "quality": quality,
-        "files": entries,
-    }
-    package_id = _expected_package_id(
-        package_manifest,
-        data_version_hash=data_version_hash,
-        payload_hash=payload_hash,
-    )
-    package_manifest["package_id"] = package_id
-
     output_path.parent.mkdir(parents=True, exist_ok=True)
     temporary_path = output_path.with_name(f".{output_path.name}.tmp")
     temporary_path.unlink(missing_ok=True)
-    audit_event = {
-        "schema_version": 1,
-        "event_id": event_id,
-        "event_type": "knowledge_package_export",
-        "created_at": created_at,
-        "outcome": "authorized",
-        "actor": _export_actor(export_actor),
-        "output": str(output_path),
-        "package_id": package_id,
-        "data_version_hash": data_version_hash,
-        "include_source_pdfs": include_source_pdfs,
-        "quality_gate": gate_result,
-        "waiver": quality["waiver"],
-    }
     try:
+        # Hashing runs alongside compression; the manifest is the last member, so
+        # it can still carry every hash.
         with zipfile.ZipFile(
             temporary_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6
         ) as archive:
-            for archive_path, source, _ in payloads:
-                archive.write(source, archive_path)
+            entries = _write_payloads(archive, payloads, workers=hash_workers)
+            package_manifest = _runtime_package_manifest(
+                manifest,
+                entries,
+                created_at=created_at,
+                data_version_hash=data_version_hash,
+                quality=quality,
+            )
             archive.writestr(
                 PACKAGE_MANIFEST_NAME,
                 json.dumps(package_manifest, ensure_ascii=False, indent=2).encode("utf-8"),
             )
+        package_id = package_manifest["package_id"]
+        audit_event = {
+            "schema_version": 1,
+            "event_id": event_id,
+            "event_type": "knowledge_package_export",
+            "created_at": created_at,
+            "outcome": "authorized",
+            "actor": _export_actor(export_actor),
+            "output": str(output_path),
+            "package_id": package_id,
+            "data_version_hash": data_version_hash,
+            "include_source_pdfs": include_source_pdfs,
+            "quality_gate": gate_result,
+            "waiver": quality["waiver"],
+        }
         audit_path = _write_export_audit(export_audit_dir, audit_event)
         temporary_path.replace(output_path)
         audit_event["outcome"] = "exported"
@@ -513,7 +611,18 @@ def validate_runtime_package(
     package_path: Path,
     *,
     max_uncompressed_bytes: int = DEFAULT_MAX_UNCOMPRESSED_BYTES,
+    sample_size: int | None = None,
+    hash_workers: int = DEFAULT_HASH_WORKERS,
 ) -> dict[str, Any]:
+    """Check a package's manifest, declarations and file hashes.
+
+    Every member's size is checked against the central directory. With
+    ``sample_size`` only the manifest files and a random sample of that many
+    other payloads are hashed, which catches a damaged transfer quickly but
+    is no substitute for the full check that import always runs.
+    """
+    if sample_size is not None and sample_size < 0:
+        raise KnowledgePackageError("抽样文件数不能为负数")
     package_path = package_path.resolve()
     if not package_path.is_file():
         raise KnowledgePackageError(f"知识包不存在: {package_path}")
@@ -607,9 +716,21 @@ def validate_runtime_package(
             expected_size = entry.get("size_bytes")
             if info.file_size != expected_size:
                 raise KnowledgePackageError(f"文件大小不匹配: {path}")
-            expected_hash = str(entry.get("sha256") or "").lower()
-            if _zip_member_sha256(archive, path) != expected_hash:
-                raise KnowledgePackageError(f"文件 SHA-256 不匹配: {path}")
+        hashed_paths = sorted(declared_by_path)
+        if sample_size is not None:
+            # These are parsed below, so they are always hashed.
+            required = [path for path in ALWAYS_HASHED_MEMBERS if path in declared_by_path]
+            others = [path for path in hashed_paths if path not in required]
+            sampled = random.SystemRandom().sample(others, min(sample_size, len(others)))
+            hashed_paths = sorted([*required, *sampled])
+        _verify_member_hashes(
+            package_path,
+            {
+                path: str(declared_by_path[path].get("sha256") or "").lower()
+                for path in hashed_paths
+            },
+            workers=hash_workers,
+        )
 
         if "runtime/manifest.json" not in declared_by_path:
             raise KnowledgePackageError("知识包缺少 runtime/manifest.json")
@@ -748,9 +869,10 @@ def validate_runtime_package(
             warnings.append(
                 f"集合名称不同: package={compatibility.get('collection_name')}, local={settings.collection_name}"
             )
-        if compatibility.get("embedding_model") != settings.embedding_model:
+        local_embedding_model = embedding_model_id(settings)
+        if compatibility.get("embedding_model") != local_embedding_model:
             warnings.append(
-                f"Embedding 模型不同: package={compatibility.get('embedding_model')}, local={settings.embedding_model}"
+                f"Embedding 模型不同: package={compatibility.get('embedding_model')}, local={local_embedding_model}"
             )
         package_embedding_dimensions = int(
             compatibility.get("embedding_dimensions", 1024)
@@ -781,6 +903,10 @@ def validate_runtime_package(
         "chunk_count": package_manifest.get("chunk_count", 0),
         "file_count": len(package_manifest["files"]),
         "uncompressed_size_bytes": total_size,
+        "verification": {
+            "mode": "full" if sample_size is None else "sampled",
+            "hashed_file_count": len(hashed_paths),
+        },
         "capabilities": package_manifest["capabilities"],
         "compatibility": package_manifest.get("compatibility", {}),
         "quality": package_manifest.get("quality"),
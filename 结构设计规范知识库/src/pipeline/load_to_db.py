@@ -1,5 +1,4 @@
 import logging
-import math
 import os
 import sqlite3
 import time
@@ -15,8 +14,17 @@ except ImportError:
 
 
 from src.app.core.config import settings
-from src.app.core.embeddings import embedding_request_kwargs
+from src.app.core.embeddings import (
+    EmbeddingDiskCache,
+    EmbeddingProvider,
+    LocalEmbeddingProvider,
+    ZhipuEmbeddingProvider,
+)
+from src.app.retrieval.bm25_index import build_persisted_bm25_index
 from src.app.retrieval.dense_vector_store import build_dense_vector_store
+from src.pipeline.embedding_ingest import EmbeddingBatchError, EmbeddingIngestor
+from src.pipeline.incremental import ReusableVectors
+from src.pipeline.paths import EMBEDDING_CHECKPOINT_PATH
 
 load_dotenv()
 
@@ -56,18 +64,33 @@ def _metadata_for_chroma(chunk: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-def load_chunks_to_db(chunks_by_file: dict[str, list[dict[str, Any]]], db_dir: Path) -> int:
+def _embedding_provider(action: str) -> EmbeddingProvider:
+    """Provider for a pipeline run; the local one needs neither network nor an API key."""
+    if settings.embedding_provider == "local":
+        return LocalEmbeddingProvider.from_settings(settings)
     try:
-        import chromadb
         from zai import ZhipuAiClient
     except ImportError as exc:
         raise PipelineError(f"缺少入库依赖: {exc}") from exc
-
     api_key = os.environ.get("ZHIPUAI_API_KEY")
     if not api_key:
-        raise PipelineError("ZHIPUAI_API_KEY 未设置，无法执行向量化入库")
+        raise PipelineError(f"ZHIPUAI_API_KEY 未设置，无法执行{action}")
+    return ZhipuEmbeddingProvider(settings, ZhipuAiClient(api_key=api_key))
+
+
+def load_chunks_to_db(
+    chunks_by_file: dict[str, list[dict[str, Any]]],
+    db_dir: Path,
+    *,
+    checkpoint_path: Path | None = None,
+    reuse: ReusableVectors | None = None,
+) -> int:
+    try:
+        import chromadb
+    except ImportError as exc:
+        raise PipelineError(f"缺少入库依赖: {exc}") from exc
 
-    zhipu = ZhipuAiClient(api_key=api_key)
+    provider = _embedding_provider("向量化入库")
     db = chromadb.PersistentClient(path=str(db_dir))
     try:
         db.delete_collection(settings.collection_name)
@@ -79,7 +102,10 @@ def load_chunks_to_db(chunks_by_file: dict[str, list[dict[str, Any]]], db_dir: P
         metadata=CHROMA_HNSW_METADATA,
     )
 
-    pending_additions = _embed_chunks(zhipu, chunks_by_file)
+    checkpoint_path = checkpoint_path or EMBEDDING_CHECKPOINT_PATH
+    pending_additions = _embed_chunks(
+        provider, chunks_by_file, checkpoint=EmbeddingDiskCache(checkpoint_path), reuse=reuse
+    )
     total = sum(len(item[0]) for item in pending_additions)
     ids = [item for batch in pending_additions for item in batch[0]]
     documents = [item for batch in pending_additions for item in batch[1]]
@@ -95,9 +121,12 @@ def load_chunks_to_db(chunks_by_file: dict[str, list[dict[str, Any]]], db_dir: P
         db_dir,
         ids,
         embeddings,
-        embedding_model=settings.embedding_model,
-        dimensions=settings.embedding_dimensions,
+        embedding_model=provider.model_id,
+        dimensions=provider.dimensions,
+        quantization=settings.dense_vector_quantization,
+        ivf_lists=settings.dense_vector_ivf_lists,
     )
+    build_persisted_bm25_index(db_dir, ids, documents)
     logging.info("入库完成: %s 条, 集合总条目: %s", total, collection.count())
     _wait_for_hnsw_sync(db_dir)
     try:
@@ -109,6 +138,7 @@ def load_chunks_to_db(chunks_by_file: dict[str, list[dict[str, Any]]], db_dir: P
         db_dir,
         expected_count=total,
     )
+    _discard_checkpoint(checkpoint_path)
     return total
 
 
@@ -116,30 +146,31 @@ def migrate_collection_embeddings(
     chunks_by_file: dict[str, list[dict[str, Any]]],
     source_db_dir: Path,
     target_db_dir: Path,
+    *,
+    checkpoint_path: Path | None = None,
 ) -> int:
     """Build a fresh target collection instead of mutating the source HNSW graph."""
     try:
         import chromadb
-        from zai import ZhipuAiClient
     except ImportError as exc:
         raise PipelineError(f"缺少入库依赖: {exc}") from exc
 
-    api_key = os.environ.get("ZHIPUAI_API_KEY")
-    if not api_key:
-        raise PipelineError("ZHIPUAI_API_KEY 未设置，无法执行向量迁移")
+    provider = _embedding_provider("向量迁移")
     if target_db_dir.exists():
         raise PipelineError(f"迁移目标目录已存在: {target_db_dir}")
     if not source_db_dir.is_dir() or not (source_db_dir / "chroma.sqlite3").is_file():
         raise PipelineError(f"迁移源数据库不存在: {source_db_dir}")
 
     target_db_dir.mkdir(parents=True, exist_ok=False)
-    zhipu = ZhipuAiClient(api_key=api_key)
     db = chromadb.PersistentClient(path=str(target_db_dir))
     collection = db.get_or_create_collection(
         name=settings.collection_name,
         metadata=CHROMA_HNSW_METADATA,
     )
-    pending_updates = _embed_chunks(zhipu, chunks_by_file)
+    checkpoint_path = checkpoint_path or EMBEDDING_CHECKPOINT_PATH
+    pending_updates = _embed_chunks(
+        provider, chunks_by_file, checkpoint=EmbeddingDiskCache(checkpoint_path)
+    )
     ids = [item for batch in pending_updates for item in batch[0]]
     documents = [item for batch in pending_updates for item in batch[1]]
     metadatas = [item for batch in pending_updates for item in batch[2]]
@@ -157,9 +188,12 @@ def migrate_collection_embeddings(
         target_db_dir,
         ids,
         embeddings,
-        embedding_model=settings.embedding_model,
-        dimensions=settings.embedding_dimensions,
+        embedding_model=provider.model_id,
+        dimensions=provider.dimensions,
+        quantization=settings.dense_vector_quantization,
+        ivf_lists=settings.dense_vector_ivf_lists,
     )
+    build_persisted_bm25_index(target_db_dir, ids, documents)
     logging.info("向量迁移完成: %s 条, 集合总条目: %s", len(ids), collection.count())
     _wait_for_hnsw_sync(target_db_dir)
     try:
@@ -171,40 +205,79 @@ def migrate_collection_embeddings(
         target_db_dir,
         expected_count=len(ids),
     )
+    _discard_checkpoint(checkpoint_path)
     return len(ids)
 
 
 def _embed_chunks(
-    zhipu: Any,
+    provider: EmbeddingProvider,
     chunks_by_file: dict[str, list[dict[str, Any]]],
+    *,
+    checkpoint: EmbeddingDiskCache | None = None,
+    reuse: ReusableVectors | None = None,
 ) -> list[tuple[list[str], list[str], list[dict[str, Any]], list[list[float]]]]:
-    pending_additions: list[tuple[list[str], list[str], list[dict[str, Any]], list[list[float]]]] = []
+    """Embed every chunk concurrently; a failed run resumes from ``checkpoint``.
+
+    Chunks found in ``reuse`` keep the vector of the previous build and are
+    not sent to the provider.
+    """
+    reused: dict[str, list[float]] = {}
     for source_file, chunks in chunks_by_file.items():
         logging.info("入库 %s: %s 个 chunk", source_file, len(chunks))
-        for index in range(0, len(chunks), 10):
-            batch = chunks[index : index + 10]
-            texts = [chunk["text"] for chunk in batch]
-            try:
-                response = zhipu.embeddings.create(
-                    **embedding_request_kwargs(settings, texts)
-                )
-                embeddings = [item.embedding for item in response.data]
-                if len(embeddings) != len(batch) or any(
-                    len(vector) != settings.embedding_dimensions
-                    or any(not math.isfinite(float(value)) for value in vector)
-                    for vector in embeddings
-                ):
-                    raise PipelineError(
-                        f"{source_file} 批次 {index // 10 + 1} 返回了无效 embedding"
-                    )
-                ids = [chunk["chunk_id"] for chunk in batch]
-                metadatas = [_metadata_for_chroma(chunk) for chunk in batch]
-                pending_additions.append((ids, texts, metadatas, embeddings))
-            except Exception as exc:
-                raise PipelineError(
-                    f"{source_file} 批次 {index // 10 + 1} 入库失败: {exc}"
-                ) from exc
-    return pending_additions
+        if reuse is not None:
+            for chunk in chunks:
+                vector = reuse.take(chunk)
+                if vector is not None:
+                    reused[chunk["chunk_id"]] = vector
+    ingestor = EmbeddingIngestor.from_settings(provider, settings, checkpoint=checkpoint)
+    started = time.perf_counter()
+    try:
+        vectors = ingestor.embed(
+            [
+                chunk["text"]
+                for chunks in chunks_by_file.values()
+                for chunk in chunks
+                if chunk["chunk_id"] not in reused
+            ]
+        )
+    except EmbeddingBatchError as exc:
+        failed = set(exc.texts)
+        source_file = next(
+            (
+                name
+                for name, chunks in chunks_by_file.items()
+                if any(chunk["text"] in failed for chunk in chunks)
+            ),
+            "",
+        )
+        raise PipelineError(f"{source_file} 向量化入库失败: {exc.cause}") from exc.cause
+    logging.info(
+        "向量化完成: 复用 %s 条，新增 %s 条，断点恢复 %s 条，请求 %s 次，重试 %s 次，拆分 %s 次，"
+        "耗时 %.1fs",
+        len(reused),
+        ingestor.stats["embedded"],
+        ingestor.stats["resumed"],
+        ingestor.stats["requests"],
+        ingestor.stats["retries"],
+        ingestor.stats["splits"],
+        time.perf_counter() - started,
+    )
+    return [
+        (
+            [chunk["chunk_id"] for chunk in chunks],
+            [chunk["text"] for chunk in chunks],
+            [_metadata_for_chroma(chunk) for chunk in chunks],
+            [reused.get(chunk["chunk_id"]) or vectors[chunk["text"]] for chunk in chunks],
+        )
+        for chunks in chunks_by_file.values()
+        if chunks
+    ]
+
+
+def _discard_checkpoint(path: Path) -> None:
+    """Drop the resume checkpoint once its vectors are durable in the built index."""
+    for candidate in (path, path.with_name(f"{path.name}-wal"), path.with_name(f"{path.name}-shm")):
+        candidate.unlink(missing_ok=True)
 
 
 def _verify_persisted_chroma_index(
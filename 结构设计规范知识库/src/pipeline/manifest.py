@@ -34,6 +34,7 @@ def build_manifest(
     audit_by_file: dict[str, dict[str, Any]] | None = None,
     corrections_by_file: dict[str, dict[str, Any]] | None = None,
     chunk_hashes_by_file: dict[str, list[str]] | None = None,
+    lexical_index: dict[str, Any] | None = None,
     build_params: dict[str, Any],
 ) -> dict[str, Any]:
     artifacts_by_file = artifacts_by_file or {}
@@ -95,7 +96,9 @@ def build_manifest(
         "collection_name": collection_name,
         "build_params": build_params,
     }
-    return {
+    if lexical_index is not None:
+        version_payload["lexical_index"] = lexical_index
+    manifest = {
         "schema_version": 1,
         "built_at": datetime.now(UTC).isoformat(),
         "documents": documents,
@@ -118,6 +121,9 @@ def build_manifest(
         },
         "data_version_hash": compute_data_version_hash(version_payload),
     }
+    if lexical_index is not None:
+        manifest["lexical_index"] = lexical_index
+    return manifest
 
 
 def write_manifest(path: Path, manifest: dict[str, Any]) -> None:
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from src.app.core.config import settings
+
+from .manifest import file_sha256
+from .paths import PAGE_RENDER_CACHE_DIR
+
+DEFAULT_RENDER_SCALE = 2.0
+VALID_RENDER_FORMATS = {"png", "jpg"}
+
+
+class PageRenderCache:
+    """Content-addressed cache of rasterized PDF pages.
+
+    Renders are keyed by (PDF sha256, page, scale, format), so replacing a
+    source PDF never serves a stale page. Concurrent requests for the same
+    page share one render; the directory is trimmed to a byte budget by
+    least-recent use.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes 必须大于 0")
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._inflight: dict[tuple[str, int, float, str], Lock] = {}
+        self._digests: dict[tuple[str, int, int], str] = {}
+
+    def source_digest(self, pdf_path: Path) -> str:
+        """sha256 of a source PDF, memoized on (path, mtime, size)."""
+        stat = pdf_path.stat()
+        identity = (str(pdf_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(identity)
+        if digest is None:
+            digest = file_sha256(pdf_path)
+            with self._lock:
+                self._digests[identity] = digest
+        return digest
+
+    def path_for(self, digest: str, page: int, scale: float, image_format: str) -> Path:
+        return self.root / digest[:2] / f"{digest}_p{page:04d}_x{scale:g}.{image_format}"
+
+    def render_pages(
+        self,
+        pdf_path: Path,
+        pages: Iterable[int],
+        *,
+        scale: float = DEFAULT_RENDER_SCALE,
+        image_format: str = "png",
+    ) -> dict[int, Path]:
+        """Return cached renders for ``pages``; pages outside the PDF are omitted."""
+        if image_format not in VALID_RENDER_FORMATS:
+            raise ValueError(f"不支持的页图格式: {image_format}")
+        digest = self.source_digest(pdf_path)
+        rendered: dict[int, Path] = {}
+        missing: list[int] = []
+        for page in dict.fromkeys(pages):
+            target = self.path_for(digest, page, scale, image_format)
+            if _touch(target):
+                rendered[page] = target
+            else:
+                missing.append(page)
+        if not missing:
+            return dict(sorted(rendered.items()))
+
+        keys = [(digest, page, scale, image_format) for page in missing]
+        locks = self._acquire(keys)
+        try:
+            # Another request may have finished these pages while we waited.
+            pending: list[int] = []
+            for page in missing:
+                target = self.path_for(digest, page, scale, image_format)
+                if _touch(target):
+                    rendered[page] = target
+                else:
+                    pending.append(page)
+            if pending:
+                rendered.update(self._render(pdf_path, digest, pending, scale, image_format))
+        finally:
+            self._release(keys, locks)
+        self._evict()
+        return dict(sorted(rendered.items()))
+
+    def _acquire(self, keys: list[tuple[str, int, float, str]]) -> list[Lock]:
+        with self._lock:
+            locks = [self._inflight.setdefault(key, Lock()) for key in keys]
+        # A fixed order keeps overlapping multi-page requests deadlock free.
+        for lock in sorted(locks, key=id):
+            lock.acquire()
+        return locks
+
+    def _release(self, keys: list[tuple[str, int, float, str]], locks: list[Lock]) -> None:
+        with self._lock:
+            for key, lock in zip(keys, locks, strict=True):
+                lock.release()
+                if self._inflight.get(key) is lock and not lock.locked():
+                    del self._inflight[key]
+
+    def _render(
+        self,
+        pdf_path: Path,
+        digest: str,
+        pages: list[int],
+        scale: float,
+        image_format: str,
+    ) -> dict[int, Path]:
+        try:
+            import fitz
+        except ImportError as exc:
+            raise RuntimeError("缺少 PyMuPDF，无法渲染 PDF 页图") from exc
+
+        rendered: dict[int, Path] = {}
+        document = fitz.open(pdf_path)
+        try:
+            for page in pages:
+                if page < 1 or page > len(document):
+                    continue
+                target = self.path_for(digest, page, scale, image_format)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+                pixmap = document[page - 1].get_pixmap(matrix=fitz.Matrix(scale, scale))
+                pixmap.save(temporary, output=image_format)
+                # Atomic publish: other workers either see nothing or the full file.
+                os.replace(temporary, target)
+                rendered[page] = target
+        finally:
+            document.close()
+        return rendered
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*"):
+            if path.name.startswith(".") or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def default_page_render_cache() -> PageRenderCache:
+    return PageRenderCache(PAGE_RENDER_CACHE_DIR, settings.page_render_cache_max_mb * 1024 * 1024)
+
+
+def _touch(path: Path) -> bool:
+    """Mark a cached render as recently used; False when it does not exist."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def cited_pages(processed_dir: Path) -> dict[str, list[int]]:
+    """Pages referenced by processed chunks, grouped by source file."""
+    pages_by_source: dict[str, set[int]] = {}
+    for path in sorted(processed_dir.glob("*_chunks.json")):
+        payload: list[dict[str, Any]] = json.loads(path.read_text(encoding="utf-8"))
+        for chunk in payload:
+            source = str(chunk.get("source_file") or "")
+            pages = [int(page) for page in chunk.get("pages", []) if str(page).isdigit()]
+            if source and pages:
+                pages_by_source.setdefault(source, set()).update(pages)
+    return {source: sorted(pages) for source, pages in sorted(pages_by_source.items())}
+
+
+def prerender_cited_pages(
+    cache: PageRenderCache,
+    processed_dir: Path,
+    source_dir: Path,
+    *,
+    scale: float = DEFAULT_RENDER_SCALE,
+    image_format: str = "png",
+) -> dict[str, Any]:
+    """Warm the cache with every page a chunk can cite."""
+    rendered = 0
+    missing_sources: list[str] = []
+    for source, pages in cited_pages(processed_dir).items():
+        pdf_path = source_dir / source
+        if not pdf_path.is_file():
+            missing_sources.append(source)
+            continue
+        rendered += len(cache.render_pages(pdf_path, pages, scale=scale, image_format=image_format))
+    logging.info("页图预渲染完成: %s 页, 缺少源 PDF: %s", rendered, len(missing_sources))
+    return {"rendered_pages": rendered, "missing_sources": missing_sources}
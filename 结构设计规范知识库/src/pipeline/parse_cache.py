@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+from src.app.core.config import settings
+
+from .manifest import compute_data_version_hash, file_sha256
+from .parsers.base import ParseResult, PdfParser
+from .paths import PARSE_CACHE_DIR
+
+# Bump when the stored layout or the meaning of a cached ParseResult changes.
+PARSE_CACHE_FORMAT = 2
+# Stands in for the artifact directory in cached paths until a hit restores it.
+ARTIFACT_DIR_TOKEN = "{artifact_dir}"
+
+
+def _relocate(value: Any, old: str, new: str) -> Any:
+    """Rewrite every string path under ``old`` to the same path under ``new``."""
+    if isinstance(value, str):
+        if value == old or value.startswith(old + os.sep):
+            return new + value[len(old) :]
+        return value
+    if isinstance(value, list):
+        return [_relocate(item, old, new) for item in value]
+    if isinstance(value, dict):
+        return {key: _relocate(item, old, new) for key, item in value.items()}
+    return value
+
+
+class ParseCache:
+    """Content-addressed store of parser output, keyed by PDF sha256 and parser identity.
+
+    An entry keeps the raw ParseResult (before audit and corrections), the
+    media files the parse wrote to the image directory, and a copy of the
+    parser's artifact directory stored relative to the parser's ``output_dir``.
+    A hit restores the artifacts under the current parser's ``output_dir`` and
+    rewrites the cached paths to match, so later stages cannot tell a
+    restored parse from a fresh one.
+    Entries older than ``max_age_seconds`` are dropped, then the least
+    recently used until the store fits ``max_bytes``.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_age_seconds: float) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes 必须大于 0")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def key_for(self, pdf_path: Path, parser: PdfParser) -> str | None:
+        """Cache key of a parse, or ``None`` for parsers without a cache identity."""
+        cache_identity = getattr(parser, "cache_identity", None)
+        if cache_identity is None:
+            return None
+        return compute_data_version_hash(
+            {
+                "format": PARSE_CACHE_FORMAT,
+                "pdf_sha256": file_sha256(pdf_path),
+                "parser": cache_identity(),
+            }
+        )
+
+    def load(self, key: str, image_dir: Path, output_dir: Path | None = None) -> ParseResult | None:
+        entry = self.root / key
+        try:
+            payload = json.loads((entry / "result.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        artifact_dir = None
+        if payload["artifact_dir"]:
+            if output_dir is None:
+                return None
+            artifact_dir = output_dir / payload["artifact_dir"]
+            payload = _relocate(payload, ARTIFACT_DIR_TOKEN, str(artifact_dir))
+        try:
+            os.utime(entry)
+            image_dir.mkdir(parents=True, exist_ok=True)
+            for name in payload["stored_media"]:
+                shutil.copy2(entry / "media" / name, image_dir / name)
+            if artifact_dir is not None:
+                if artifact_dir.exists():
+                    shutil.rmtree(artifact_dir)
+                shutil.copytree(entry / "artifacts", artifact_dir)
+        except OSError as exc:
+            logging.warning("解析缓存项损坏，重新解析: %s: %s", entry, exc)
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        return ParseResult(
+            elements=payload["elements"],
+            artifact_dir=artifact_dir,
+            artifacts=payload["artifacts"],
+            media_files=payload["media_files"],
+            metadata=payload["metadata"],
+        )
+
+    def store(
+        self, key: str, result: ParseResult, image_dir: Path, output_dir: Path | None = None
+    ) -> None:
+        entry = self.root / key
+        if entry.exists():
+            return
+        relative_artifact_dir = ""
+        if result.artifact_dir is not None:
+            if output_dir is None or not result.artifact_dir.is_relative_to(output_dir):
+                logging.warning("解析产物不在输出目录下，跳过缓存: %s", result.artifact_dir)
+                return
+            relative_artifact_dir = result.artifact_dir.relative_to(output_dir).as_posix()
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{key}.{os.getpid()}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        try:
+            (staging / "media").mkdir(parents=True)
+            names = dict.fromkeys(
+                [*result.media_files, *(str(e.get("img") or "") for e in result.elements)]
+            )
+            stored_media = []
+            for name in names:
+                source = image_dir / Path(name).name
+                if name and source.is_file():
+                    shutil.copy2(source, staging / "media" / source.name)
+                    stored_media.append(source.name)
+            if result.artifact_dir is not None:
+                shutil.copytree(result.artifact_dir, staging / "artifacts")
+            payload = {
+                "elements": result.elements,
+                "artifacts": result.artifacts,
+                "media_files": result.media_files,
+                "metadata": result.metadata,
+                "stored_media": stored_media,
+            }
+            if result.artifact_dir is not None:
+                payload = _relocate(payload, str(result.artifact_dir), ARTIFACT_DIR_TOKEN)
+            payload["artifact_dir"] = relative_artifact_dir
+            (staging / "result.json").write_text(
+                json.dumps(payload, ensure_ascii=False), encoding="utf-8"
+            )
+            # Atomic publish; a concurrent parse of an identical PDF may have won.
+            os.rename(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not entry.exists():
+                raise
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used over budget; returns the count."""
+        if not self.root.is_dir():
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.root.iterdir():
+            if path.name.startswith(".") or not path.is_dir():
+                continue
+            mtime = path.stat().st_mtime
+            if self.max_age_seconds and now - mtime > self.max_age_seconds:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                continue
+            size = sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+            entries.append((mtime, size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        if removed:
+            logging.info("解析缓存淘汰 %s 项", removed)
+        return removed
+
+
+def default_parse_cache() -> ParseCache | None:
+    """The configured cache under ``data/``; ``None`` when PARSE_CACHE_MAX_MB is 0."""
+    if not settings.parse_cache_max_mb:
+        return None
+    return ParseCache(
+        PARSE_CACHE_DIR,
+        settings.parse_cache_max_mb * 1024 * 1024,
+        settings.parse_cache_max_age_days * 86400,
+    )
+
+
+def parse_with_cache(
+    parser: PdfParser, pdf_path: Path, image_dir: Path, cache: ParseCache | None
+) -> tuple[ParseResult, str]:
+    """Parse ``pdf_path`` or restore an earlier parse; the second item is hit, miss or off."""
+    key = cache.key_for(pdf_path, parser) if cache is not None else None
+    if cache is None or key is None:
+        return parser.parse(pdf_path, image_dir), "off"
+    output_dir = getattr(parser, "output_dir", None)
+    cached = cache.load(key, image_dir, output_dir)
+    if cached is not None:
+        logging.info("  解析缓存命中: %s", pdf_path.name)
+        return cached, "hit"
+    result = parser.parse(pdf_path, image_dir)
+    cache.store(key, result, image_dir, output_dir)
+    return result, "miss"
+
+
+def parse_cache_summary(statuses: list[str]) -> dict[str, int]:
+    return {
+        "hit_count": statuses.count("hit"),
+        "miss_count": statuses.count("miss"),
+        "disabled_count": statuses.count("off"),
+    }
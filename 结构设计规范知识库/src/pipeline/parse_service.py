@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Protocol
+
+from src.app.core.config import Settings
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+PREHEAT_IMAGE_EDGE = 64
+PREHEAT_TIMEOUT_SECONDS = 600.0
+
+
+class ParseServiceError(RuntimeError):
+    pass
+
+
+class ParseServiceBusyError(ParseServiceError):
+    pass
+
+
+class OcrEngine(Protocol):
+    name: str
+
+    def recognize(self, image_path: Path) -> list[str]: ...
+
+
+def send_frame(sock: socket.socket, payload: dict[str, Any]) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    if len(body) > MAX_FRAME_BYTES:
+        raise ParseServiceError(f"消息超过 {MAX_FRAME_BYTES} 字节")
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def recv_frame(sock: socket.socket) -> dict[str, Any] | None:
+    """Read one length-prefixed JSON frame; ``None`` on a clean end of stream."""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ParseServiceError(f"消息长度 {length} 超过上限 {MAX_FRAME_BYTES}")
+    body = _recv_exactly(sock, length)
+    if body is None:
+        raise ParseServiceError("连接在消息中途关闭")
+    payload = json.loads(body.decode("utf-8"))
+    if not isinstance(payload, dict):
+        raise ParseServiceError("消息必须是 JSON 对象")
+    return payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes | None:
+    chunks: list[bytes] = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1024 * 1024))
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ParseServiceError("连接在消息中途关闭")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+class PaddleOcrEngine:
+    name = "paddleocr"
+
+    def __init__(self) -> None:
+        from paddleocr import PaddleOCR
+
+        self._model = PaddleOCR(use_textline_orientation=True, lang="ch")
+
+    def recognize(self, image_path: Path) -> list[str]:
+        import numpy as np
+        from PIL import Image
+
+        with Image.open(image_path) as image:
+            pixels = np.array(image.convert("RGB"))
+        result = self._model.ocr(pixels)
+        if not result or result[0] is None:
+            return []
+        return [line[1][0] for line in result[0]]
+
+
+# Engine of a worker process, loaded once by _load_engine.
+_worker_engine: OcrEngine | None = None
+
+
+def _load_engine(
+    engine_factory: Callable[[], OcrEngine], scratch_dir: str, warm_workers: Any
+) -> None:
+    global _worker_engine
+    # Model libraries print progress to stdout; silence the worker once, not per call.
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    _worker_engine = engine_factory()
+    # A blank page finishes lazy model downloads before the first real batch.
+    _preheat(scratch_dir)
+    with warm_workers.get_lock():
+        warm_workers.value += 1
+
+
+def _recognize(image_path: str) -> list[str]:
+    if _worker_engine is None:
+        raise RuntimeError("解析服务工作进程未初始化")
+    return _worker_engine.recognize(Path(image_path))
+
+
+def _blank_png(edge: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    header = struct.pack(">IIBBBBB", edge, edge, 8, 2, 0, 0, 0)
+    rows = b"".join(b"\x00" + b"\xff" * 3 * edge for _ in range(edge))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _preheat(scratch_dir: str) -> None:
+    path = Path(scratch_dir) / f"preheat-{os.getpid()}.png"
+    path.write_bytes(_blank_png(PREHEAT_IMAGE_EDGE))
+    try:
+        _recognize(str(path))
+    finally:
+        path.unlink(missing_ok=True)
+
+
+class ParseService:
+    """Warm OCR workers behind a Unix socket, so model load is paid once per service.
+
+    Requests are length-prefixed JSON frames (a 4-byte big-endian length,
+    then UTF-8 JSON), several per connection. ``ocr`` takes a batch of page
+    image paths and answers the recognized lines per image in order; the
+    pages of a batch are spread over ``workers`` processes, each holding
+    one engine loaded at start. Each worker runs a blank page through its
+    engine right after loading, which finishes lazy model downloads. At
+    most ``queue_size`` batches are accepted at a time; further batches are
+    answered ``busy`` at once instead of piling up. ``health`` reports the
+    pool, the queue and how many workers are warm; ``preheat`` waits until
+    every worker is.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        engine_factory: Callable[[], OcrEngine],
+        *,
+        workers: int = 2,
+        queue_size: int = 8,
+    ) -> None:
+        self.socket_path = socket_path
+        self.workers = workers
+        self.queue_size = queue_size
+        self._engine_factory = engine_factory
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._warm_workers: Any = None
+        self._pool: Any = None
+        self._server: socketserver.ThreadingUnixStreamServer | None = None
+
+    def start(self) -> None:
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        context = multiprocessing.get_context("fork")
+        self._warm_workers = context.Value("i", 0)
+        self._pool = context.Pool(
+            self.workers,
+            initializer=_load_engine,
+            initargs=(self._engine_factory, str(self.socket_path.parent), self._warm_workers),
+        )
+        service = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                service._serve_connection(self.request)
+
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        finally:
+            os.umask(previous_umask)
+        self._server.daemon_threads = True
+        logging.info("解析服务已启动: %s workers=%s", self.socket_path, self.workers)
+
+    def serve_forever(self) -> None:
+        """Serve until ``shutdown`` is called from another thread, then release everything."""
+        if self._server is None:
+            self.start()
+        assert self._server is not None
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def warm_workers(self) -> int:
+        """Workers whose engine has loaded and recognized the blank page."""
+        if self._warm_workers is None:
+            return 0
+        # A replaced worker warms up again, so the count may pass the pool size.
+        return min(self._warm_workers.value, self.workers)
+
+    def wait_until_warm(self, timeout: float = PREHEAT_TIMEOUT_SECONDS) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.warm_workers() < self.workers:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self) -> None:
+        server = self._server
+        if server is not None:
+            server.shutdown()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self.socket_path.unlink(missing_ok=True)
+
+    def _serve_connection(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                request = recv_frame(sock)
+            except (OSError, ValueError, ParseServiceError) as exc:
+                logging.warning("解析服务请求无效: %s", exc)
+                return
+            if request is None:
+                return
+            try:
+                response = self._dispatch(request)
+            except ParseServiceBusyError as exc:
+                response = {"ok": False, "busy": True, "error": str(exc)}
+            except Exception as exc:
+                logging.exception("解析服务处理失败")
+                response = {"ok": False, "error": str(exc)}
+            try:
+                send_frame(sock, response)
+            except OSError:
+                return
+
+    def _dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        command = request.get("cmd")
+        if command == "health":
+            with self._lock:
+                queued = self._queued
+            return {
+                "ok": True,
+                "engine": getattr(self._engine_factory, "name", ""),
+                "workers": self.workers,
+                "queued": queued,
+                "queue_size": self.queue_size,
+                "warm_workers": self.warm_workers(),
+                "preheated": self.warm_workers() == self.workers,
+            }
+        if command == "preheat":
+            if not self.wait_until_warm():
+                return {
+                    "ok": False,
+                    "error": f"预热超时，已就绪 {self.warm_workers()}/{self.workers}",
+                }
+            return {"ok": True, "warm_workers": self.warm_workers()}
+        if command == "ocr":
+            images = request.get("images")
+            if not isinstance(images, list) or not all(isinstance(item, str) for item in images):
+                return {"ok": False, "error": "images 必须是路径字符串列表"}
+            missing = [item for item in images if not Path(item).is_file()]
+            if missing:
+                return {"ok": False, "error": f"图片不存在: {', '.join(missing[:5])}"}
+            lines = self._run(lambda: self._pool.map(_recognize, images, 1))
+            return {"ok": True, "lines": lines}
+        return {"ok": False, "error": f"未知命令: {command}"}
+
+    def _run(self, work: Callable[[], Any]) -> Any:
+        if not self._slots.acquire(blocking=False):
+            raise ParseServiceBusyError(f"解析服务队列已满（{self.queue_size}）")
+        with self._lock:
+            self._queued += 1
+        try:
+            return work()
+        finally:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+
+
+class ParseServiceClient:
+    """Blocking client of ParseService; a ``busy`` answer is retried until ``busy_timeout``."""
+
+    def __init__(
+        self,
+        socket_path: Path,
+        *,
+        timeout: float = 600.0,
+        busy_timeout: float = 60.0,
+        busy_retry_seconds: float = 0.5,
+    ) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.busy_timeout = busy_timeout
+        self.busy_retry_seconds = busy_retry_seconds
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> ParseServiceClient | None:
+        if config.parse_service_socket is None:
+            return None
+        return cls(config.parse_service_socket)
+
+    def health(self) -> dict[str, Any]:
+        return self._request({"cmd": "health"})
+
+    def preheat(self) -> dict[str, Any]:
+        return self._request({"cmd": "preheat"})
+
+    def ocr(self, images: list[Path]) -> list[list[str]]:
+        """Recognized lines of each image, in input order."""
+        if not images:
+            return []
+        response = self._request({"cmd": "ocr", "images": [str(path) for path in images]})
+        return [[str(line) for line in lines] for lines in response["lines"]]
+
+    def _request(self, payload: dict[str, Any]) -> dict[str, Any]:
+        deadline = time.monotonic() + self.busy_timeout
+        while True:
+            response = self._exchange(payload)
+            if response.get("ok"):
+                return response
+            if response.get("busy") and time.monotonic() < deadline:
+                time.sleep(self.busy_retry_seconds)
+                continue
+            error_type = ParseServiceBusyError if response.get("busy") else ParseServiceError
+            raise error_type(f"解析服务请求失败: {response.get('error', '未知错误')}")
+
+    def _exchange(self, payload: dict[str, Any]) -> dict[str, Any]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(str(self.socket_path))
+                send_frame(sock, payload)
+                response = recv_frame(sock)
+        except OSError as exc:
+            raise ParseServiceError(f"无法连接解析服务 {self.socket_path}: {exc}") from exc
+        if response is None:
+            raise ParseServiceError("解析服务未返回结果")
+        return response
+
+
+def run_parse_service(
+    socket_path: Path, *, workers: int, queue_size: int, preheat: bool = False
+) -> None:
+    """Serve PaddleOCR until SIGTERM or Ctrl-C."""
+    service = ParseService(socket_path, PaddleOcrEngine, workers=workers, queue_size=queue_size)
+    service.start()
+
+    def stop(_signum: int, _frame: object) -> None:
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        if preheat and not service.wait_until_warm():
+            logging.warning("解析服务预热超时，未就绪的进程将在首个请求前完成加载")
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -1,5 +1,6 @@
 from pathlib import Path
 
+from src.app.core.config import settings
 from src.pipeline.paths import MINERU_DIR
 
 from .mineru import MineruParser
@@ -13,7 +14,7 @@ def create_parser(backend: str, *, mineru_output_dir: Path = MINERU_DIR):
     if normalized == "mineru":
         return MineruParser(mineru_output_dir)
     if normalized == "pymupdf":
-        return PyMuPdfParser()
+        return PyMuPdfParser.from_settings(settings)
     raise ValueError(
         f"不支持的 PDF 解析后端：{backend}，可选值：{', '.join(sorted(SUPPORTED_BACKENDS))}"
     )
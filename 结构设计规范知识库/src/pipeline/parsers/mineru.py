@@ -279,6 +279,14 @@ class MineruParser:
             self._cli_probe = probe_mineru_cli(self.binary, policy=self.compatibility_policy)
         return self._cli_probe
 
+    def cache_identity(self) -> dict[str, Any]:
+        """What a cached parse must match; a hit restores artifacts under ``output_dir``."""
+        return {
+            "parser": self.name,
+            "version": self.probe().raw_version,
+            "args": self.extra_args,
+        }
+
     def parse(self, pdf_path: Path, image_dir: Path) -> ParseResult:
         cli_probe = self.probe()
 
@@ -1,6 +1,14 @@
+from __future__ import annotations
+
 import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from src.app.core.config import Settings
+from src.pipeline.parse_service import ParseServiceClient, ParseServiceError
+
 from .base import ParseResult, ParserUnavailableError
 
 CLAUSE_RE = re.compile(r"^(\d+\.\d+[\d\.\-]*(\s+[A-Z]|\s+[一-鿿])?)")
@@ -31,28 +39,120 @@ def is_title_block(text: str, lines_in_block: int, font_size: float) -> bool:
     return lines_in_block == 1 and font_size >= 10 and len(stripped) >= 6
 
 
+def _import_fitz():
+    try:
+        import fitz
+    except ImportError as exc:
+        raise ParserUnavailableError(
+            "缺少 PyMuPDF 依赖，请先安装 requirements-runtime.txt"
+        ) from exc
+    return fitz
+
+
+def page_image_name(basename: str, page: int, image_format: str) -> str:
+    return f"{basename}_p{page:04d}.{image_format}"
+
+
+def page_ranges(page_count: int, parts: int) -> list[tuple[int, int]]:
+    """Split pages ``1..page_count`` into at most ``parts`` contiguous, even ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges: list[tuple[int, int]] = []
+    start = 1
+    for index in range(parts):
+        stop = start + size + (1 if index < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def render_page_range(
+    pdf_path: Path,
+    image_dir: Path,
+    pages: tuple[int, int],
+    dpi: int,
+    image_format: str,
+) -> int:
+    """Render pages ``[start, stop)`` with a document handle of their own; returns bytes written."""
+    fitz = _import_fitz()
+    scale = dpi / 72
+    written = 0
+    document = fitz.open(pdf_path)
+    try:
+        for page in range(*pages):
+            target = image_dir / page_image_name(pdf_path.stem, page, image_format)
+            pixmap = document[page - 1].get_pixmap(matrix=fitz.Matrix(scale, scale))
+            pixmap.save(target, output=image_format)
+            written += target.stat().st_size
+    finally:
+        document.close()
+    return written
+
+
 class PyMuPdfParser:
+    """Text from PyMuPDF; page images rendered afterwards, or not at all in ``lazy`` mode.
+
+    Text extraction needs no raster, so it runs first over the whole
+    document. ``eager`` then renders every page at ``dpi``, splitting the
+    pages into contiguous ranges over ``render_workers`` processes, each with
+    its own document handle. ``lazy`` skips rendering: elements carry no
+    ``img``, and page images come from the page render cache when a chunk is
+    cited. With an ``ocr_client``, pages without a text layer are sent as one
+    batch to the warm OCR parse service.
+    """
+
     name = "pymupdf"
 
-    def parse(self, pdf_path: Path, image_dir: Path) -> ParseResult:
-        try:
-            import fitz
-        except ImportError as exc:
-            raise ParserUnavailableError(
-                "缺少 PyMuPDF 依赖，请先安装 requirements-runtime.txt"
-            ) from exc
+    def __init__(
+        self,
+        *,
+        render_mode: str = "eager",
+        dpi: int = 216,
+        image_format: str = "png",
+        render_workers: int = 1,
+        ocr_client: ParseServiceClient | None = None,
+    ) -> None:
+        self.render_mode = render_mode
+        self.dpi = dpi
+        self.image_format = image_format
+        self.render_workers = render_workers
+        self.ocr_client = ocr_client
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> PyMuPdfParser:
+        return cls(
+            render_mode=config.pdf_render_mode,
+            dpi=config.pdf_render_dpi,
+            image_format=config.pdf_render_format,
+            render_workers=config.pdf_render_workers,
+            ocr_client=ParseServiceClient.from_settings(config),
+        )
 
+    def cache_identity(self) -> dict[str, object]:
+        """Everything that changes this parser's output; render workers do not."""
+        return {
+            "parser": self.name,
+            "version": _import_fitz().VersionBind,
+            "render_mode": self.render_mode,
+            "dpi": self.dpi,
+            "image_format": self.image_format,
+            "ocr": self.ocr_client is not None,
+        }
+
+    def parse(self, pdf_path: Path, image_dir: Path) -> ParseResult:
+        fitz = _import_fitz()
         image_dir.mkdir(parents=True, exist_ok=True)
+        eager = self.render_mode == "eager"
+        started = time.perf_counter()
         doc = fitz.open(pdf_path)
         elements: list[dict] = []
         basename = pdf_path.stem
 
         try:
-            for page_index in range(len(doc)):
+            page_count = len(doc)
+            for page_index in range(page_count):
                 page = doc[page_index]
-                image_name = f"{basename}_p{page_index + 1:04d}.png"
-                pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))
-                pix.save(image_dir / image_name)
+                image_name = page_image_name(basename, page_index + 1, self.image_format)
 
                 for block in page.get_text("dict")["blocks"]:
                     if block["type"] != 0:
@@ -66,18 +166,90 @@ class PyMuPdfParser:
                         continue
                     text = " ".join(lines)
                     font_size = block["lines"][0]["spans"][0]["size"]
-                    elements.append(
-                        {
-                            "type": "Title"
-                            if is_title_block(text, len(lines), font_size)
-                            else "Text",
-                            "text": text,
-                            "page": page_index + 1,
-                            "img": image_name,
-                            "parser": self.name,
-                        }
-                    )
+                    element = {
+                        "type": "Title" if is_title_block(text, len(lines), font_size) else "Text",
+                        "text": text,
+                        "page": page_index + 1,
+                        "parser": self.name,
+                    }
+                    if eager:
+                        element["img"] = image_name
+                    elements.append(element)
         finally:
             doc.close()
 
-        return ParseResult(elements=elements, metadata={"parser_backend": self.name})
+        text_seconds = time.perf_counter() - started
+        image_bytes = self._render(pdf_path, image_dir, page_count) if eager else 0
+        render_seconds = time.perf_counter() - started - text_seconds
+        text_pages = {element["page"] for element in elements}
+        ocr_pages = [page for page in range(1, page_count + 1) if page not in text_pages]
+        if self.ocr_client is not None and ocr_pages:
+            elements.extend(self._ocr(pdf_path, image_dir, ocr_pages))
+            elements.sort(key=lambda element: element["page"])
+        return ParseResult(
+            elements=elements,
+            media_files=[
+                page_image_name(basename, page, self.image_format)
+                for page in range(1, page_count + 1)
+            ]
+            if eager
+            else [],
+            metadata={
+                "parser_backend": self.name,
+                "page_count": page_count,
+                "render_mode": self.render_mode,
+                "render_dpi": self.dpi,
+                "render_format": self.image_format,
+                "text_seconds": round(text_seconds, 3),
+                "render_seconds": round(render_seconds, 3),
+                "image_bytes": image_bytes,
+                "ocr_pages": len(ocr_pages) if self.ocr_client is not None else 0,
+            },
+        )
+
+    def _ocr(self, pdf_path: Path, image_dir: Path, pages: list[int]) -> list[dict]:
+        """Elements of pages without a text layer, recognized in one service batch."""
+        assert self.ocr_client is not None
+        eager = self.render_mode == "eager"
+        with tempfile.TemporaryDirectory(prefix="pymupdf-ocr-") as scratch:
+            if eager:
+                source_dir = image_dir
+            else:
+                source_dir = Path(scratch)
+                for page in pages:
+                    render_page_range(pdf_path, source_dir, (page, page + 1), self.dpi, "png")
+            image_format = self.image_format if eager else "png"
+            names = [page_image_name(pdf_path.stem, page, image_format) for page in pages]
+            try:
+                recognized = self.ocr_client.ocr([source_dir / name for name in names])
+            except ParseServiceError as exc:
+                raise ParserUnavailableError(f"OCR 解析服务不可用：{exc}") from exc
+        elements: list[dict] = []
+        for page, name, lines in zip(pages, names, recognized, strict=True):
+            for text in lines:
+                element = {
+                    "type": "Title" if is_title_block(text, 1, 0.0) else "Text",
+                    "text": text,
+                    "page": page,
+                    "parser": self.name,
+                    "ocr": True,
+                }
+                if eager:
+                    element["img"] = name
+                elements.append(element)
+        return elements
+
+    def _render(self, pdf_path: Path, image_dir: Path, page_count: int) -> int:
+        if not page_count:
+            return 0
+        ranges = page_ranges(page_count, self.render_workers)
+        if len(ranges) == 1:
+            return render_page_range(pdf_path, image_dir, ranges[0], self.dpi, self.image_format)
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(
+                    render_page_range, pdf_path, image_dir, pages, self.dpi, self.image_format
+                )
+                for pages in ranges
+            ]
+            return sum(future.result() for future in futures)
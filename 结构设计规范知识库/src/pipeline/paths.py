@@ -28,10 +28,13 @@ PROCESSED_DIR = DATA_DIR / "processed"
 IMAGES_DIR = DATA_DIR / "images"
 MINERU_DIR = DATA_DIR / "mineru"
 AUDIT_DIR = DATA_DIR / "audit"
+PAGE_RENDER_CACHE_DIR = AUDIT_DIR / "page_render_cache"
 CORRECTIONS_DIR = DATA_DIR / "corrections"
 MANUAL_STRUCTURING_DIR = DATA_DIR / "manual_structuring"
 STRUCTURED_TABLES_DIR = DATA_DIR / "structured_tables"
 MANIFEST_PATH = DATA_DIR / "manifest.json"
+EMBEDDING_CHECKPOINT_PATH = DATA_DIR / "embedding_checkpoint.sqlite3"
+PARSE_CACHE_DIR = DATA_DIR / "parse_cache"
 DB_VERSIONS_DIR = DATA_DIR / "db_versions"
 ACTIVE_DB_PATH = DATA_DIR / "active_db.json"
 DB_DIR = configured_project_path("DB_DIR", "db")
@@ -2,8 +2,11 @@
 
 import json
 import logging
+import multiprocessing
 import os
 import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
 if __package__ in (None, ""):
@@ -12,7 +15,14 @@ if __package__ in (None, ""):
 from src.pipeline.audit import apply_approved_corrections, audit_elements
 from src.pipeline.chunks import normalize_chunks
 from src.pipeline.metadata import SpecMetadata, load_spec_metadata
-from src.pipeline.parsers import PdfParser, create_parser
+from src.pipeline.parse_cache import (
+    ParseCache,
+    default_parse_cache,
+    parse_cache_summary,
+    parse_with_cache,
+)
+from src.pipeline.parsers import ParseResult, PdfParser, create_parser
+from src.pipeline.parsers.pymupdf import PyMuPdfParser
 from src.pipeline.paths import (
     CORRECTIONS_DIR,
     IMAGES_DIR,
@@ -24,6 +34,9 @@ from src.pipeline.paths import (
 
 DEFAULT_PARSER_BACKEND = os.environ.get("PDF_PARSER_BACKEND", "mineru")
 
+# Parser of a process-pool worker, created once by _initialize_worker.
+_worker_parser: PdfParser | None = None
+
 
 def chunk_to_paragraphs(elements: list[dict]) -> list[dict]:
     chunks = []
@@ -132,6 +145,14 @@ def build_quality_entry(
     }
 
 
+def _image_bytes(parse_result: ParseResult, image_dir: Path) -> int:
+    """Bytes of images a parse wrote; parsers that render pages report it themselves."""
+    if "image_bytes" in parse_result.metadata:
+        return int(parse_result.metadata["image_bytes"])
+    paths = (image_dir / name for name in parse_result.media_files)
+    return sum(path.stat().st_size for path in paths if path.is_file())
+
+
 def process_pdf(
     pdf_path: Path,
     spec: SpecMetadata,
@@ -140,12 +161,15 @@ def process_pdf(
     parser: PdfParser,
     *,
     apply_corrections: bool = True,
+    parse_cache: ParseCache | None = None,
 ) -> dict:
     out_dir.mkdir(parents=True, exist_ok=True)
     image_dir.mkdir(parents=True, exist_ok=True)
     logging.info("处理: %s parser=%s", pdf_path.name, parser.name)
 
-    parse_result = parser.parse(pdf_path, image_dir)
+    started = time.perf_counter()
+    parse_result, cache_status = parse_with_cache(parser, pdf_path, image_dir, parse_cache)
+    parse_seconds = time.perf_counter() - started
     audit_report = audit_elements(pdf_path.name, parse_result.elements, parse_result.artifacts)
     elements = parse_result.elements
     correction_summary = {
@@ -164,6 +188,9 @@ def process_pdf(
     raw_chunks = chunk_to_paragraphs(elements)
     chunks = normalize_chunks(raw_chunks, spec)
     quality = build_quality_entry(pdf_path, elements, chunks, parse_result.artifacts)
+    quality["parse_seconds"] = round(parse_seconds, 3)
+    quality["image_bytes"] = _image_bytes(parse_result, image_dir)
+    quality["parse_cache"] = cache_status
     quality["audit"] = {
         "finding_count": audit_report["finding_count"],
         "high_risk_count": audit_report["high_risk_count"],
@@ -202,6 +229,104 @@ def process_pdf(
     }
 
 
+def _initialize_worker(parser_backend: str, mineru_output_dir: Path) -> None:
+    global _worker_parser
+    _worker_parser = create_parser(parser_backend, mineru_output_dir=mineru_output_dir)
+    # Documents are already spread over processes; a render pool in every worker
+    # would multiply the process count by PDF_RENDER_WORKERS.
+    if isinstance(_worker_parser, PyMuPdfParser):
+        _worker_parser.render_workers = 1
+
+
+def _process_in_worker(
+    pdf_path: Path,
+    spec: SpecMetadata,
+    out_dir: Path,
+    image_dir: Path,
+    apply_corrections: bool,
+    parse_cache: ParseCache | None,
+) -> dict:
+    if _worker_parser is None:
+        raise RuntimeError("解析进程未初始化")
+    return process_pdf(
+        pdf_path,
+        spec,
+        out_dir,
+        image_dir,
+        _worker_parser,
+        apply_corrections=apply_corrections,
+        parse_cache=parse_cache,
+    )
+
+
+def _parallel_executor(
+    parser: PdfParser, workers: int, parser_backend: str, mineru_output_dir: Path
+) -> Executor:
+    """Processes for in-process parsers; threads for parsers that already run a subprocess."""
+    if parser.name == "mineru":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    # The admin rebuild runs this on a thread of the API server; forking a process with
+    # live threads can deadlock the children, and the initializer rebuilds the parser anyway.
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_initialize_worker,
+        initargs=(parser_backend, mineru_output_dir),
+    )
+
+
+def _process_in_parallel(
+    pdf_files: list[Path],
+    metadata: dict[str, SpecMetadata],
+    out_dir: Path,
+    image_dir: Path,
+    parser: PdfParser,
+    executor: Executor,
+    *,
+    apply_corrections: bool,
+    parse_cache: ParseCache | None,
+) -> dict[str, dict]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    image_dir.mkdir(parents=True, exist_ok=True)
+    with executor:
+        if isinstance(executor, ProcessPoolExecutor):
+            futures = [
+                executor.submit(
+                    _process_in_worker,
+                    pdf_file,
+                    metadata[pdf_file.name],
+                    out_dir,
+                    image_dir,
+                    apply_corrections,
+                    parse_cache,
+                )
+                for pdf_file in pdf_files
+            ]
+        else:
+            futures = [
+                executor.submit(
+                    process_pdf,
+                    pdf_file,
+                    metadata[pdf_file.name],
+                    out_dir,
+                    image_dir,
+                    parser,
+                    apply_corrections=apply_corrections,
+                    parse_cache=parse_cache,
+                )
+                for pdf_file in pdf_files
+            ]
+        try:
+            # Collected in input order, so the merged report does not depend on timing.
+            return {
+                pdf_file.name: future.result()
+                for pdf_file, future in zip(pdf_files, futures, strict=True)
+            }
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
 def process_pdfs(
     pdf_files: list[Path],
     metadata: dict[str, SpecMetadata],
@@ -211,18 +336,44 @@ def process_pdfs(
     parser_backend: str = DEFAULT_PARSER_BACKEND,
     mineru_output_dir: Path = MINERU_DIR,
     apply_corrections: bool = True,
+    workers: int = 1,
+    parse_cache: ParseCache | None = None,
 ) -> dict[str, dict]:
+    """Process every PDF; with ``workers`` > 1 documents are parsed concurrently.
+
+    PyMuPDF parsing runs in a process pool whose workers each create one
+    parser. MinerU already runs as a subprocess per document, so a thread pool
+    only bounds how many of those run at once. With a ``parse_cache``, PDFs
+    parsed before by the same parser version are restored instead of parsed.
+    """
     parser = create_parser(parser_backend, mineru_output_dir=mineru_output_dir)
-    results_by_file: dict[str, dict] = {}
-    for pdf_file in pdf_files:
-        results_by_file[pdf_file.name] = process_pdf(
-            pdf_file,
-            metadata[pdf_file.name],
+    workers = max(1, min(workers, len(pdf_files)))
+    if workers > 1:
+        if parser.name == "mineru":
+            parser.probe()
+        logging.info("并行解析 %s 个 PDF, workers=%s", len(pdf_files), workers)
+        results_by_file = _process_in_parallel(
+            pdf_files,
+            metadata,
             out_dir,
             image_dir,
             parser,
+            _parallel_executor(parser, workers, parser_backend, mineru_output_dir),
             apply_corrections=apply_corrections,
+            parse_cache=parse_cache,
         )
+    else:
+        results_by_file = {}
+        for pdf_file in pdf_files:
+            results_by_file[pdf_file.name] = process_pdf(
+                pdf_file,
+                metadata[pdf_file.name],
+                out_dir,
+                image_dir,
+                parser,
+                apply_corrections=apply_corrections,
+                parse_cache=parse_cache,
+            )
 
     images = list(image_dir.glob("*"))
     size = sum(image.stat().st_size for image in images if image.is_file())
@@ -231,6 +382,9 @@ def process_pdfs(
         "parser_backend": parser_backend,
         "corrections_applied": apply_corrections,
         "documents": [result["quality"] for result in results_by_file.values()],
+        "parse_cache": parse_cache_summary(
+            [result["quality"]["parse_cache"] for result in results_by_file.values()]
+        ),
         "totals": {
             "document_count": len(results_by_file),
             "chunk_count": sum(len(result["chunks"]) for result in results_by_file.values()),
@@ -262,7 +416,7 @@ def process_all() -> None:
     )
     metadata = load_spec_metadata(pdfs, METADATA_DIR / "specs.json")
     logging.info("发现 %s 个 PDF", len(pdfs))
-    process_pdfs(pdfs, metadata, PROCESSED_DIR, IMAGES_DIR)
+    process_pdfs(pdfs, metadata, PROCESSED_DIR, IMAGES_DIR, parse_cache=default_parse_cache())
 
 
 if __name__ == "__main__":
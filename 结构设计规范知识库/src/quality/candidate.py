@@ -8,7 +8,7 @@ from pathlib import Path
 from typing import Any
 
 from src.app.core.config import Settings, settings
-from src.app.core.embeddings import embedding_request_kwargs
+from src.app.core.embeddings import embedding_model_id
 from src.app.retrieval.hybrid_search import RetrievalState
 from src.evaluation.runner import DEFAULT_EVAL_PATH, STRUCTURED_EVAL_PATH, run_evaluation
 from src.pipeline.manifest import read_manifest
@@ -86,11 +86,11 @@ def assess_candidate_activation(
     )
     check(
         "embedding_contract",
-        manifest.get("embedding_model") == config.embedding_model
+        manifest.get("embedding_model") == embedding_model_id(config)
         and manifest.get("embedding_dimensions", 1024) == config.embedding_dimensions,
         "候选向量模型与维度和运行配置一致",
         manifest_embedding=manifest.get("embedding_model"),
-        runtime_embedding=config.embedding_model,
+        runtime_embedding=embedding_model_id(config),
         manifest_embedding_dimensions=manifest.get("embedding_dimensions", 1024),
         runtime_embedding_dimensions=config.embedding_dimensions,
     )
@@ -150,17 +150,14 @@ def assess_candidate_activation(
         candidate_state
         and candidate_state.ready
         and getattr(candidate_state, "chroma_collection", None)
-        and getattr(candidate_state, "zhipu_client", None)
+        and getattr(candidate_state, "embedding_provider", None)
         and getattr(candidate_state, "runtime_data", {}).get("documents")
     ):
         try:
             probe_text = next(
                 text for text in candidate_state.runtime_data["documents"] if str(text).strip()
             )
-            response = candidate_state.zhipu_client.embeddings.create(
-                **embedding_request_kwargs(config, [probe_text])
-            )
-            probe_vector = response.data[0].embedding
+            probe_vector = candidate_state.embedding_provider.embed([probe_text])[0]
             probe_result = candidate_state.vector_query(probe_vector, 1)
             probe_ids = [item[0] for item in probe_result]
             check(
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pytest
+from src.app.core.config import Settings
+from src.app.core.embeddings import AsyncEmbeddingClient
+from src.app.rerank.noop import NoopReranker
+from src.app.rerank.score_cache import current_rerank_data_version
+from src.app.retrieval.bm25_index import InvertedBM25Index
+from src.app.retrieval.corpus import CorpusView
+from src.app.retrieval.dense_vector_store import DenseVectorStore
+from src.app.retrieval.hybrid_search import (
+    MetadataIndex,
+    RetrievalSnapshot,
+    RetrievalState,
+    tokenize_chinese,
+)
+
+DIMENSIONS = 256
+EMBEDDING = [0.2, 1.0, 0.0, 0.3] + [0.0] * (DIMENSIONS - 4)
+EMBEDDING_LATENCY_SECONDS = 0.2
+
+
+class _SyncEmbeddings:
+    def create(self, **_kwargs):
+        return SimpleNamespace(data=[SimpleNamespace(embedding=list(EMBEDDING))])
+
+
+class _AsyncEmbeddings:
+    def __init__(self, latency_seconds: float = 0.0, error: Exception | None = None) -> None:
+        self.latency_seconds = latency_seconds
+        self.error = error
+        self.calls = 0
+
+    async def embed(self, inputs: list[str]) -> list[list[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+        if self.error is not None:
+            raise self.error
+        return [list(EMBEDDING) for _ in inputs]
+
+
+def _state(async_embeddings: _AsyncEmbeddings) -> RetrievalState:
+    ids = [f"doc-{index}" for index in range(30)]
+    documents = [f"楼面活荷载标准值 第{index}条 雪荷载" for index in range(30)]
+    corpus = CorpusView.from_columns(ids, documents, [{}] * len(ids))
+    vectors = np.random.default_rng(9).normal(size=(len(ids), DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+    state = RetrievalState(
+        Settings(
+            zhipuai_api_key="test", embedding_dimensions=DIMENSIONS, query_embedding_cache_size=0
+        )
+    )
+    state.zhipu_client = SimpleNamespace(embeddings=_SyncEmbeddings())
+    state.async_embedding_client = async_embeddings
+    state._publish(
+        RetrievalSnapshot(
+            chroma_collection=SimpleNamespace(count=lambda: len(ids)),
+            dense_vector_store=DenseVectorStore(tuple(ids), vectors, "embedding-3", DIMENSIONS),
+            bm25_index=InvertedBM25Index.build(tokenize_chinese(text) for text in documents),
+            metadata_index=MetadataIndex.build(corpus.documents, corpus.metadatas),
+            corpus=corpus,
+        )
+    )
+    return state
+
+
+def test_async_search_matches_sync_search():
+    state = _state(_AsyncEmbeddings())
+
+    expected = state.hybrid_search("楼面活荷载 雪荷载", 5)
+    actual = asyncio.run(state.hybrid_search_async("楼面活荷载 雪荷载", 5))
+
+    assert [(item.doc_id, item.score) for item in actual] == [
+        (item.doc_id, item.score) for item in expected
+    ]
+    assert all("dense" in item.source for item in actual)
+
+
+def test_async_search_falls_back_to_lexical_matches_when_embedding_fails():
+    state = _state(_AsyncEmbeddings(error=httpx.ConnectError("offline")))
+
+    results = asyncio.run(state.hybrid_search_async("楼面活荷载", 5))
+
+    assert results
+    assert all("dense" not in item.source for item in results)
+
+
+def test_concurrent_async_searches_keep_event_loop_responsive():
+    embeddings = _AsyncEmbeddings(latency_seconds=EMBEDDING_LATENCY_SECONDS)
+    state = _state(embeddings)
+    gaps: list[float] = []
+
+    async def ticker(stop: asyncio.Event) -> None:
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def scenario() -> None:
+        stop = asyncio.Event()
+        tick = asyncio.create_task(ticker(stop))
+        await asyncio.gather(
+            *(state.hybrid_search_async(f"楼面活荷载 第{index}条", 5) for index in range(8))
+        )
+        stop.set()
+        await tick
+
+    asyncio.run(scenario())
+
+    assert embeddings.calls == 8
+    # A blocking embedding call would stall the loop for the full latency.
+    assert max(gaps) < EMBEDDING_LATENCY_SECONDS / 2
+
+
+def test_async_embedding_client_posts_provider_request():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={
+                "data": [{"index": 1, "embedding": [0.0, 1.0]}, {"index": 0, "embedding": [1.0]}]
+            },
+        )
+
+    config = Settings(zhipuai_api_key="secret", embedding_base_url="https://embed.example/v4/")
+
+    async def scenario() -> list[list[float]]:
+        client = AsyncEmbeddingClient(
+            config, client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        try:
+            return await client.embed(["甲", "乙"])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(scenario()) == [[1.0], [0.0, 1.0]]
+    assert str(requests[0].url) == "https://embed.example/v4/embeddings"
+    assert requests[0].headers["Authorization"] == "Bearer secret"
+    assert json.loads(requests[0].content) == {
+        "model": "embedding-3",
+        "input": ["甲", "乙"],
+        "dimensions": 1024,
+    }
+
+
+def test_async_search_awaits_the_async_rerank_path():
+    state = _state(_AsyncEmbeddings())
+
+    class AsyncOnlyReranker(NoopReranker):
+        def rerank(self, query, results, *, top_n=None):
+            raise AssertionError("sync rerank must not run on the async path")
+
+        async def arerank(self, query, results, *, top_n=None):
+            data_versions.append(current_rerank_data_version())
+            return list(reversed(results[:top_n]))
+
+    data_versions: list[str] = []
+    expected = state.hybrid_search("楼面活荷载 雪荷载", 5)
+    state.reranker = AsyncOnlyReranker()
+    state._publish(replace(state.snapshot, data_version="data-v7"))
+    actual = asyncio.run(state.hybrid_search_async("楼面活荷载 雪荷载", 5))
+
+    assert [item.doc_id for item in actual] == [item.doc_id for item in reversed(expected)]
+    assert data_versions == ["data-v7"]
+    assert current_rerank_data_version() == ""
+
+
+def test_lexical_stages_run_while_the_embedding_is_in_flight():
+    embedding_started = threading.Event()
+    lexical_started = threading.Event()
+
+    class OverlapEmbeddings(_AsyncEmbeddings):
+        async def embed(self, inputs: list[str]) -> list[list[float]]:
+            embedding_started.set()
+            # Only returns once the lexical stage is running at the same time.
+            assert await asyncio.to_thread(lexical_started.wait, 5)
+            return await super().embed(inputs)
+
+    state = _state(OverlapEmbeddings())
+    score_lexical = state._score_lexical
+
+    def overlapping_lexical(*args, **kwargs):
+        lexical_started.set()
+        assert embedding_started.wait(5)
+        return score_lexical(*args, **kwargs)
+
+    expected = state.hybrid_search("楼面活荷载 雪荷载", 5)
+    state._score_lexical = overlapping_lexical
+    timings: dict[str, float] = {}
+    actual = asyncio.run(state.hybrid_search_async("楼面活荷载 雪荷载", 5, timings=timings))
+
+    assert [(item.doc_id, item.score) for item in actual] == [
+        (item.doc_id, item.score) for item in expected
+    ]
+    assert set(timings) == {"embedding", "lexical", "dense", "merge", "rerank"}
+
+
+def test_retrieval_threads_are_shut_down_and_restarted_on_demand():
+    state = _state(_AsyncEmbeddings())
+    asyncio.run(state.hybrid_search_async("雪荷载", 5))
+    executor = state._executor
+
+    state.shutdown_executor()
+
+    with pytest.raises(RuntimeError, match="shutdown"):
+        executor.submit(int)
+    assert asyncio.run(state.hybrid_search_async("雪荷载", 5))
+    candidate = _state(_AsyncEmbeddings())
+    asyncio.run(candidate.hybrid_search_async("雪荷载", 5))
+    state.adopt(candidate)
+    assert candidate._executor is None
+    assert state._executor is not None
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import random
+
+import numpy as np
+import pytest
+from src.app.retrieval.bm25_index import (
+    BM25_ARRAY_FILE_NAMES,
+    BM25_METADATA_FILE_NAME,
+    InvertedBM25Index,
+    bm25_index_manifest_entry,
+    build_persisted_bm25_index,
+    load_persisted_bm25_index,
+)
+from src.app.retrieval.corpus import CorpusView
+from src.app.retrieval.hybrid_search import (
+    RetrievalSnapshot,
+    RetrievalState,
+    tokenize_chinese,
+)
+from src.app.retrieval.models import RetrievalCandidate
+from src.app.retrieval.query import analyze_query
+
+BM25Okapi = pytest.importorskip("rank_bm25").BM25Okapi
+
+TERMS = (
+    "楼面活荷载",
+    "标准值",
+    "办公楼",
+    "折减系数",
+    "抗震设防类别",
+    "混凝土强度",
+    "雪荷载",
+    "风荷载",
+    "基本风压",
+    "检验批",
+    "分项工程",
+    "钢筋锚固",
+    "设计使用年限",
+    "GB 50009",
+    "5.1.1",
+    "kN/m2",
+)
+
+
+def _synthetic_corpus(size: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        "".join(f"{rng.choice(TERMS)}{rng.choice('，。 、')}" for _ in range(rng.randint(4, 40)))
+        for _ in range(size)
+    ]
+
+
+def _reference_top_n(index: BM25Okapi, tokens: list[str], limit: int) -> list[tuple[int, float]]:
+    scores = index.get_scores(tokens)
+    ordered = sorted(range(len(scores)), key=lambda item: scores[item], reverse=True)[:limit]
+    return [(item, float(scores[item])) for item in ordered if scores[item] > 0]
+
+
+def test_inverted_bm25_scores_match_rank_bm25_exactly():
+    tokenized = [tokenize_chinese(text) for text in _synthetic_corpus(300)]
+    reference = BM25Okapi(tokenized)
+    index = InvertedBM25Index.build(tokenized)
+
+    for query in ("办公楼楼面活荷载标准值", "雪荷载 雪荷载", "GB 50009 表5.1.1", "无关内容"):
+        tokens = tokenize_chinese(query)
+        expected = reference.get_scores(tokens)
+        docs, scores = index.scores(tokens)
+        actual = np.zeros(len(expected))
+        actual[docs] = scores
+        assert np.array_equal(actual, expected)
+
+
+def test_inverted_bm25_top_n_keeps_document_order_for_ties():
+    tokenized = [tokenize_chinese(text) for text in ["雪荷载", "风荷载", "雪荷载", "雪荷载", ""]]
+    reference = BM25Okapi(tokenized)
+    index = InvertedBM25Index.build(tokenized)
+    tokens = tokenize_chinese("雪荷载")
+
+    assert index.top_n(tokens, 2) == _reference_top_n(reference, tokens, 2)
+    assert [doc for doc, _score in index.top_n(tokens, 10)] == [0, 2, 3]
+    assert index.top_n(tokenize_chinese("不存在"), 10) == []
+    assert index.top_n(tokens, 0) == []
+
+
+def test_inverted_bm25_rejects_empty_corpus():
+    with pytest.raises(ValueError, match="不能为空"):
+        InvertedBM25Index.build([])
+
+
+def test_bm25_matches_use_inverted_index_candidates():
+    state = RetrievalState()
+    documents = ["办公楼楼面活荷载标准值 2.0", "雪荷载标准值", "风荷载"]
+    snapshot = RetrievalSnapshot(
+        bm25_index=InvertedBM25Index.build(tokenize_chinese(text) for text in documents),
+        corpus=CorpusView.from_columns(["a", "b", "c"], documents, [{}, {}, {}]),
+    )
+    pool: dict[int, RetrievalCandidate] = {}
+
+    state._add_bm25_matches(analyze_query("办公楼楼面活荷载"), 5, snapshot, pool)
+
+    assert list(pool) == [0]
+    assert pool[0].doc_id == "a"
+    assert pool[0].bm25_score and pool[0].bm25_score > 0
+    assert "bm25" in pool[0].sources
+
+
+def test_inverted_bm25_matches_rank_bm25_on_a_large_corpus():
+    corpus = _synthetic_corpus(3000, seed=11)
+    queries = [
+        "办公楼的楼面活荷载标准值取多少",
+        "雪荷载 基本风压",
+        "抗震设防类别 检验批 分项工程",
+        "GB 50009 表5.1.1 折减系数",
+        "钢筋锚固 设计使用年限",
+    ]
+    tokenized = [tokenize_chinese(text) for text in corpus]
+    reference = BM25Okapi(tokenized)
+    index = InvertedBM25Index.build(tokenized)
+
+    for query in queries:
+        tokens = tokenize_chinese(query)
+        assert index.top_n(tokens, 120) == _reference_top_n(reference, tokens, 120)
+
+
+def test_persisted_bm25_index_round_trips_with_identical_scores(tmp_path):
+    documents = _synthetic_corpus(200) + [""]
+    ids = [f"chunk-{index}" for index in range(len(documents))]
+    built = build_persisted_bm25_index(tmp_path, ids, documents)
+    entry = bm25_index_manifest_entry(tmp_path)
+
+    loaded = load_persisted_bm25_index(tmp_path, expected_ids=ids, expected_sha256=entry["sha256"])
+
+    assert isinstance(loaded.postings, np.memmap)
+    assert loaded.vocabulary == built.vocabulary
+    for query in ("办公楼楼面活荷载标准值", "GB 50009 表5.1.1", "无关内容"):
+        tokens = tokenize_chinese(query)
+        assert loaded.top_n(tokens, 50) == built.top_n(tokens, 50)
+
+
+def test_persisted_bm25_index_rejects_mismatched_builds(tmp_path):
+    ids = ["a", "b", "c"]
+    build_persisted_bm25_index(tmp_path, ids, ["雪荷载", "风荷载", "基本风压"])
+
+    assert load_persisted_bm25_index(tmp_path / "missing") is None
+    with pytest.raises(ValueError, match="ID 顺序"):
+        load_persisted_bm25_index(tmp_path, expected_ids=["b", "a", "c"])
+    with pytest.raises(ValueError, match="manifest"):
+        load_persisted_bm25_index(tmp_path, expected_sha256="0" * 64)
+    weights_path = tmp_path / BM25_ARRAY_FILE_NAMES["weights"]
+    original = weights_path.read_bytes()
+    weights_path.write_bytes(original[:-1] + bytes([original[-1] ^ 1]))
+    with pytest.raises(ValueError, match="哈希"):
+        load_persisted_bm25_index(tmp_path)
+    weights_path.write_bytes(original)
+    with (tmp_path / BM25_ARRAY_FILE_NAMES["postings"]).open("ab") as handle:
+        handle.write(b"\0")
+    with pytest.raises(ValueError, match="文件大小"):
+        load_persisted_bm25_index(tmp_path)
+
+
+def test_runtime_load_prefers_persisted_index_and_falls_back_to_tokenizing(tmp_path, monkeypatch):
+    from src.app.retrieval import hybrid_search as hybrid_search_module
+
+    documents = ["雪荷载标准值", "风荷载", "基本风压"]
+    corpus = CorpusView.from_columns(["a", "b", "c"], documents, [{}, {}, {}])
+    build_persisted_bm25_index(tmp_path, corpus.ids, documents)
+    manifest = {"lexical_index": bm25_index_manifest_entry(tmp_path)}
+    tokenized: list[str] = []
+    monkeypatch.setattr(
+        hybrid_search_module,
+        "tokenize_chinese",
+        lambda text: tokenized.append(text) or tokenize_chinese(text),
+    )
+
+    loaded = hybrid_search_module._load_bm25_index(tmp_path, corpus, manifest)
+    assert isinstance(loaded.postings, np.memmap)
+    assert tokenized == []
+
+    metadata_path = tmp_path / BM25_METADATA_FILE_NAME
+    metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+    metadata["tokenizer"] = "tokenize_chinese/0"
+    metadata_path.write_text(json.dumps(metadata), encoding="utf-8")
+    rebuilt = hybrid_search_module._load_bm25_index(tmp_path, corpus, {})
+    assert tokenized == documents
+    assert rebuilt.top_n(tokenize_chinese("雪荷载"), 3) == loaded.top_n(
+        tokenize_chinese("雪荷载"), 3
+    )
+
+
+def test_large_persisted_index_loads_without_tokenizing(tmp_path, monkeypatch):
+    from src.app.retrieval import hybrid_search as hybrid_search_module
+
+    documents = _synthetic_corpus(5000, seed=13)
+    corpus = CorpusView.from_columns(
+        [f"chunk-{index}" for index in range(len(documents))], documents, [{}] * len(documents)
+    )
+    build_persisted_bm25_index(tmp_path, corpus.ids, documents)
+    rebuilt = InvertedBM25Index.build(tokenize_chinese(text) for text in documents)
+
+    def fail(text: str) -> list[str]:
+        raise AssertionError("持久化索引不应重新分词")
+
+    monkeypatch.setattr(hybrid_search_module, "tokenize_chinese", fail)
+    loaded = hybrid_search_module._load_bm25_index(
+        tmp_path, corpus, {"lexical_index": bm25_index_manifest_entry(tmp_path)}
+    )
+
+    assert isinstance(loaded.postings, np.memmap)
+    tokens = tokenize_chinese("办公楼楼面活荷载标准值")
+    assert loaded.top_n(tokens, 20) == rebuilt.top_n(tokens, 20)
@@ -118,16 +118,10 @@ def test_candidate_gate_blocks_empty_vector_query(tmp_path: Path, monkeypatch):
     regular_path.write_text("regular", encoding="utf-8")
     structured_path.write_text("structured", encoding="utf-8")
 
-    class FakeEmbeddingClient:
-        class embeddings:
-            @staticmethod
-            def create(**_kwargs):
-                return SimpleNamespace(data=[SimpleNamespace(embedding=[0.1, 0.2])])
-
     fake_state = SimpleNamespace(
         ready=True,
         chroma_count=lambda: 3,
-        zhipu_client=FakeEmbeddingClient(),
+        embedding_provider=SimpleNamespace(embed=lambda texts: [[0.1, 0.2] for _ in texts]),
         chroma_collection=SimpleNamespace(query=lambda **_kwargs: {"ids": [[]]}),
         runtime_data={"documents": ["probe text"]},
     )
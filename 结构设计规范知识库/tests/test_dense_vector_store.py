@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from src.app.retrieval.dense_vector_store import (
+    INT8_SCALE_FILE_NAME,
+    IVF_FILE_NAME,
+    QUANTIZED_FILE_NAMES,
+    build_dense_vector_store,
+    load_dense_vector_store,
+)
+
+
+def _clustered_vectors(count: int, dimensions: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions))
+    labels = rng.integers(0, clusters, size=count)
+    return (centers[labels] + 0.35 * rng.normal(size=(count, dimensions))).astype(np.float32)
+
+
+def _build(tmp_path, vectors: np.ndarray, **kwargs):
+    ids = [f"chunk-{index}" for index in range(len(vectors))]
+    build_dense_vector_store(
+        tmp_path,
+        ids,
+        vectors.tolist(),
+        embedding_model="embedding-3",
+        dimensions=vectors.shape[1],
+        **kwargs,
+    )
+    return ids
+
+
+def test_default_store_is_memory_mapped_exact_scan(tmp_path):
+    vectors = _clustered_vectors(200, 16, 8, seed=1)
+    _build(tmp_path, vectors)
+
+    store = load_dense_vector_store(tmp_path, quantization="int8", use_ivf=True)
+
+    assert isinstance(store.vectors, np.memmap)
+    assert store.quantization == "none"
+    assert store.ivf is None
+    assert not (tmp_path / QUANTIZED_FILE_NAMES["int8"]).exists()
+    assert not (tmp_path / IVF_FILE_NAME).exists()
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_store_rescores_with_float32_vectors(tmp_path, quantization):
+    vectors = _clustered_vectors(500, 32, 10, seed=2)
+    _build(tmp_path, vectors, quantization=quantization)
+    exact = load_dense_vector_store(tmp_path)
+    quantized = load_dense_vector_store(tmp_path, quantization=quantization)
+    query = vectors[17].tolist()
+
+    assert isinstance(quantized.quantized, np.memmap)
+    assert quantized.quantization == quantization
+    assert quantized.query(query, 10) == exact.query(query, 10)
+
+
+def test_rebuild_removes_companions_that_are_no_longer_configured(tmp_path):
+    vectors = _clustered_vectors(100, 8, 4, seed=3)
+    _build(tmp_path, vectors, quantization="int8", ivf_lists=4)
+    assert (tmp_path / INT8_SCALE_FILE_NAME).exists()
+    assert (tmp_path / IVF_FILE_NAME).exists()
+
+    _build(tmp_path, vectors, quantization="float16")
+
+    assert not (tmp_path / QUANTIZED_FILE_NAMES["int8"]).exists()
+    assert not (tmp_path / INT8_SCALE_FILE_NAME).exists()
+    assert not (tmp_path / IVF_FILE_NAME).exists()
+    assert load_dense_vector_store(tmp_path, quantization="int8").quantization == "none"
+
+
+def test_float32_ivf_ranks_probed_rows_in_one_scoring_pass(tmp_path, monkeypatch):
+    vectors = _clustered_vectors(400, 16, 8, seed=7)
+    _build(tmp_path, vectors, ivf_lists=8)
+    exact = load_dense_vector_store(tmp_path)
+    ivf = load_dense_vector_store(tmp_path, use_ivf=True, ivf_probes=8)
+
+    def second_pass(*_args):
+        raise AssertionError("float32 rows must not be scored twice")
+
+    monkeypatch.setattr(type(ivf), "_approximate_scores", second_pass)
+
+    assert ivf.ivf is not None and ivf.quantization == "none"
+    for query in vectors[::50].tolist():
+        actual, expected = ivf.query(query, 10), exact.query(query, 10)
+        assert [doc_id for doc_id, _ in actual] == [doc_id for doc_id, _ in expected]
+        assert [score for _, score in actual] == pytest.approx([score for _, score in expected])
+
+
+def test_ivf_is_skipped_for_corpora_smaller_than_the_partition_count(tmp_path):
+    vectors = _clustered_vectors(6, 8, 2, seed=4)
+    _build(tmp_path, vectors, ivf_lists=16)
+
+    assert load_dense_vector_store(tmp_path, use_ivf=True).ivf is None
+
+
+def test_quantized_ivf_recall_against_exact_scan(tmp_path):
+    """Recall@10 of int8 and int8 + IVF against the float32 exact scan."""
+    vectors = _clustered_vectors(20000, 64, 64, seed=5)
+    _build(tmp_path, vectors, quantization="int8", ivf_lists=128)
+    exact = load_dense_vector_store(tmp_path)
+    int8 = load_dense_vector_store(tmp_path, quantization="int8")
+    ivf = load_dense_vector_store(tmp_path, quantization="int8", use_ivf=True, ivf_probes=16)
+    noise = np.random.default_rng(6).normal(size=(40, 64)).astype(np.float32)
+    queries = (vectors[::500] + 0.5 * noise).tolist()
+
+    def run(store):
+        return [[doc_id for doc_id, _ in store.query(query, 10)] for query in queries]
+
+    expected = run(exact)
+    recalls = {
+        name: np.mean(
+            [
+                len(set(hit) & set(ref)) / len(ref)
+                for hit, ref in zip(run(store), expected, strict=True)
+            ]
+        )
+        for name, store in (("int8", int8), ("int8+ivf", ivf))
+    }
+
+    assert recalls["int8"] >= 0.99
+    assert recalls["int8+ivf"] >= 0.9
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+from src.app.core.config import Settings
+from src.app.core.embeddings import EmbeddingDiskCache, EmbeddingProvider
+from src.pipeline import load_to_db
+from src.pipeline.embedding_ingest import EmbeddingBatchError, EmbeddingIngestor, TokenBucket
+
+
+class _Provider(EmbeddingProvider):
+    name = "fake"
+    model_id = "fake-model"
+    dimensions = 2
+
+    def __init__(self, *, rejected: set[str] | None = None, failures: int = 0) -> None:
+        self.rejected = rejected or set()
+        self.failures = failures
+        self.calls: list[list[str]] = []
+        self.threads: set[str] = set()
+        self._lock = threading.Lock()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        with self._lock:
+            self.calls.append(list(texts))
+            self.threads.add(threading.current_thread().name)
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("429 rate limited")
+        if self.rejected.intersection(texts):
+            raise RuntimeError("400 input rejected")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def _ingestor(provider: _Provider, sleeps: list[float] | None = None, **kwargs):
+    kwargs.setdefault("workers", 1)
+    kwargs.setdefault("batch_size", 4)
+    return EmbeddingIngestor(
+        provider, sleep=(sleeps.append if sleeps is not None else lambda _: None), **kwargs
+    )
+
+
+def test_workers_embed_batches_in_parallel():
+    barrier = threading.Barrier(3, timeout=5)
+
+    class Blocking(_Provider):
+        def embed(self, texts):
+            barrier.wait()
+            return super().embed(texts)
+
+    provider = Blocking()
+    texts = [f"text-{index}" for index in range(6)]
+
+    vectors = _ingestor(provider, workers=3, batch_size=2).embed(texts)
+
+    assert sorted(vectors) == sorted(texts)
+    assert len(provider.threads) == 3
+    assert all(len(call) == 2 for call in provider.calls)
+
+
+def test_token_bucket_spaces_requests_at_the_configured_rate():
+    now = [0.0]
+    sleeps: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(2, capacity=1, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        bucket.acquire()
+
+    assert sleeps == pytest.approx([0.5, 0.5])
+    TokenBucket(0).acquire()
+
+
+def test_failed_requests_back_off_and_shrink_later_batches():
+    sleeps: list[float] = []
+    provider = _Provider(failures=2)
+    ingestor = _ingestor(provider, sleeps, backoff_seconds=0.5)
+
+    vectors = ingestor.embed([f"t{index}" for index in range(8)])
+
+    assert len(vectors) == 8
+    assert sleeps == [0.5, 1.0]
+    assert [len(call) for call in provider.calls] == [4, 4, 4, 2, 2]
+    assert ingestor.stats["retries"] == 2
+    assert ingestor.stats["requests"] == 5
+
+
+def test_rejected_text_is_isolated_and_the_rerun_resumes_from_the_checkpoint(tmp_path):
+    checkpoint = EmbeddingDiskCache(tmp_path / "checkpoint.sqlite3")
+    texts = ["a", "bb", "bad", "dddd", "a"]
+    broken = _Provider(rejected={"bad"})
+
+    with pytest.raises(EmbeddingBatchError) as error:
+        _ingestor(broken, max_retries=0, checkpoint=checkpoint).embed(texts)
+
+    assert error.value.texts == ["bad"]
+    assert checkpoint.get_many("fake-model", 2, ["a", "bb", "dddd"]).keys() == {"a", "bb"}
+
+    fixed = _Provider()
+    ingestor = _ingestor(fixed, max_retries=0, checkpoint=checkpoint)
+    vectors = ingestor.embed(texts)
+
+    assert fixed.calls == [["bad", "dddd"]]
+    assert vectors["bad"] == [3.0, 1.0]
+    assert ingestor.stats["resumed"] == 2
+
+
+def test_checkpoint_is_keyed_by_dimensions_and_resumed_vectors_are_validated(tmp_path):
+    checkpoint = EmbeddingDiskCache(tmp_path / "checkpoint.sqlite3")
+    checkpoint.put_many("fake-model", 2, {"a": [1.0, 1.0], "bb": [float("nan"), 1.0], "ccc": [1.0]})
+
+    class Wide(_Provider):
+        dimensions = 3
+
+        def embed(self, texts):
+            return [[*vector, 0.0] for vector in super().embed(texts)]
+
+    wide = Wide()
+    assert _ingestor(wide, checkpoint=checkpoint).embed(["a"]) == {"a": [1.0, 1.0, 0.0]}
+    assert wide.calls == [["a"]]
+
+    narrow = _Provider()
+    ingestor = _ingestor(narrow, checkpoint=checkpoint)
+    vectors = ingestor.embed(["a", "bb", "ccc"])
+
+    assert narrow.calls == [["bb", "ccc"]]
+    assert vectors == {"a": [1.0, 1.0], "bb": [2.0, 1.0], "ccc": [3.0, 1.0]}
+    assert ingestor.stats["resumed"] == 1
+
+
+def test_embed_chunks_names_the_source_file_of_a_failed_text(monkeypatch):
+    monkeypatch.setattr(load_to_db, "settings", Settings(embedding_ingest_max_retries=0))
+    chunks = {
+        "a.pdf": [{"chunk_id": "a-1", "text": "fine"}],
+        "b.pdf": [{"chunk_id": "b-1", "text": "bad"}],
+    }
+
+    with pytest.raises(load_to_db.PipelineError, match="b.pdf 向量化入库失败: 400"):
+        load_to_db._embed_chunks(_Provider(rejected={"bad"}), chunks)
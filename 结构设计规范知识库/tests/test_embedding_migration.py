@@ -93,10 +93,14 @@ def test_embedding_migration_builds_a_fresh_persisted_vector_index(
     _create_source_db(source_db, chunks)
 
     migrated = load_to_db.migrate_collection_embeddings(
-        {"migration-test.pdf": chunks}, source_db, target_db
+        {"migration-test.pdf": chunks},
+        source_db,
+        target_db,
+        checkpoint_path=tmp_path / "checkpoint.sqlite3",
     )
 
     assert migrated == len(chunks)
+    assert not (tmp_path / "checkpoint.sqlite3").exists()
     vector_store = load_dense_vector_store(
         target_db,
         expected_ids=[str(chunk["chunk_id"]) for chunk in chunks],
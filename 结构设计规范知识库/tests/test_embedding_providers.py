@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from src.app.core.config import ConfigurationError, Settings
+from src.app.core.embeddings import (
+    EmbeddingDiskCache,
+    LocalEmbeddingProvider,
+    ZhipuEmbeddingProvider,
+    embedding_model_id,
+    local_model_id,
+)
+from src.app.retrieval.dense_vector_store import build_dense_vector_store, load_dense_vector_store
+from src.pipeline import load_to_db
+
+tokenizers = pytest.importorskip("tokenizers")
+
+DIMENSIONS = 4
+VOCAB = {"[UNK]": 0, "[PAD]": 1, "alpha": 2, "beta": 3, "gamma": 4}
+
+
+def _tokenizer():
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+
+    tokenizer = tokenizers.Tokenizer(WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    return tokenizer
+
+
+class _TokenStateSession:
+    """Outputs a one-hot token state per position, so pooling is observable."""
+
+    def __init__(self, dimensions: int = DIMENSIONS) -> None:
+        self.dimensions = dimensions
+        self.batch_sizes: list[int] = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in ("input_ids", "attention_mask")]
+
+    def run(self, _outputs, feed):
+        ids = feed["input_ids"]
+        self.batch_sizes.append(len(ids))
+        states = np.zeros((*ids.shape, self.dimensions), dtype=np.float32)
+        for row, column in np.ndindex(ids.shape):
+            states[row, column, int(ids[row, column]) % self.dimensions] = 1.0
+        return [states]
+
+
+def _chunk(index: int, text: str) -> dict[str, object]:
+    fields = ("source", "code", "name", "version", "effective_date", "status", "title")
+    return {
+        **dict.fromkeys(fields, "test"),
+        "source_file": "a.pdf",
+        "clause_number": str(index),
+        "chunk_type": "text",
+        "pages": [1],
+        "images": [],
+        "chunk_id": f"chunk-{index}",
+        "metadata_status": "complete",
+        "text": text,
+    }
+
+
+def local_provider(session: _TokenStateSession, **kwargs) -> LocalEmbeddingProvider:
+    kwargs.setdefault("dimensions", DIMENSIONS)
+    return LocalEmbeddingProvider(model_dir=None, session=session, tokenizer=_tokenizer(), **kwargs)
+
+
+def test_local_provider_pools_batches_and_normalizes():
+    session = _TokenStateSession()
+    texts = ["alpha", "beta beta", "alpha gamma", "beta"]
+
+    cls_vectors = local_provider(session, batch_size=3).embed(texts)
+    mean_vectors = local_provider(_TokenStateSession(), pooling="mean").embed(["alpha beta"])
+
+    assert session.batch_sizes == [3, 1]
+    assert cls_vectors[0] == [0.0, 0.0, 1.0, 0.0]
+    assert cls_vectors[1] == [0.0, 0.0, 0.0, 1.0]
+    assert cls_vectors[2] == cls_vectors[0]
+    assert np.allclose(mean_vectors[0], [0.0, 0.0, 2**-0.5, 2**-0.5])
+    assert all(np.isclose(np.linalg.norm(vector), 1.0) for vector in cls_vectors)
+
+
+def test_local_provider_embeds_duplicates_once_and_reuses_the_disk_cache(tmp_path):
+    cache = EmbeddingDiskCache(tmp_path / "embeddings.sqlite3")
+    first_session = _TokenStateSession()
+    first = local_provider(first_session, cache=cache).embed(["alpha", "beta", "alpha"])
+
+    second_session = _TokenStateSession()
+    second = local_provider(second_session, cache=cache).embed(["beta", "gamma", "alpha"])
+
+    assert first_session.batch_sizes == [2]
+    assert second_session.batch_sizes == [1]
+    assert second[0] == first[1]
+    assert second[2] == first[0]
+    assert asyncio.run(local_provider(_TokenStateSession(), cache=cache).aembed(["beta"])) == [
+        first[1]
+    ]
+
+
+def test_local_provider_rejects_vectors_of_the_wrong_width():
+    provider = local_provider(_TokenStateSession(dimensions=3))
+
+    with pytest.raises(ValueError, match="维度不一致"):
+        provider.embed(["alpha"])
+
+
+@pytest.mark.parametrize("vector", [[1.0] * 255, [float("nan")] + [0.0] * 255])
+def test_zhipu_provider_rejects_malformed_query_embeddings(vector):
+    class Embeddings:
+        def create(self, **_kwargs):
+            return SimpleNamespace(data=[SimpleNamespace(embedding=vector)])
+
+    class AsyncClient:
+        async def embed(self, inputs):
+            return [vector for _ in inputs]
+
+    config = Settings(zhipuai_api_key="test", embedding_dimensions=256)
+    provider = ZhipuEmbeddingProvider(
+        config, SimpleNamespace(embeddings=Embeddings()), async_client=AsyncClient()
+    )
+
+    with pytest.raises(ValueError, match="维度不是 256 或包含非有限数值"):
+        provider.embed(["雪荷载"])
+    with pytest.raises(ValueError, match="维度不是 256"):
+        asyncio.run(provider.aembed(["雪荷载"]))
+
+
+def test_local_model_id_tracks_the_model_file(tmp_path):
+    (tmp_path / "model.onnx").write_bytes(b"weights-v1")
+    first = local_model_id(tmp_path)
+    (tmp_path / "model.onnx").write_bytes(b"weights-v2-longer")
+
+    assert first.startswith(f"local/{tmp_path.name}@")
+    assert local_model_id(tmp_path) != first
+    assert embedding_model_id(
+        Settings(
+            embedding_provider="local",
+            local_embedding_model_dir=tmp_path,
+            embedding_dimensions=DIMENSIONS,
+        )
+    ) == local_model_id(tmp_path)
+    assert embedding_model_id(Settings()) == Settings().embedding_model
+
+
+def test_offline_pipeline_embeds_locally_and_records_the_model_id(tmp_path, monkeypatch):
+    local_settings = Settings(
+        embedding_provider="local",
+        local_embedding_model_dir=tmp_path / "model",
+        embedding_dimensions=DIMENSIONS,
+    )
+    monkeypatch.setattr(load_to_db, "settings", local_settings)
+    monkeypatch.delenv("ZHIPUAI_API_KEY", raising=False)
+    assert isinstance(load_to_db._embedding_provider("向量化入库"), LocalEmbeddingProvider)
+
+    provider = local_provider(_TokenStateSession())
+    chunks = [_chunk(index, text) for index, text in enumerate(["alpha", "beta", "gamma"])]
+    pending = load_to_db._embed_chunks(provider, {"a.pdf": chunks})
+    ids = [item for batch in pending for item in batch[0]]
+    vectors = [item for batch in pending for item in batch[3]]
+    build_dense_vector_store(
+        tmp_path, ids, vectors, embedding_model=provider.model_id, dimensions=DIMENSIONS
+    )
+
+    store = load_dense_vector_store(
+        tmp_path, expected_ids=ids, embedding_model=provider.model_id, dimensions=DIMENSIONS
+    )
+    assert store is not None
+    assert store.query([0.0, 0.0, 0.0, 1.0], limit=1)[0][0] == "chunk-1"
+    with pytest.raises(ValueError, match="向量索引模型不一致"):
+        load_dense_vector_store(
+            tmp_path, expected_ids=ids, embedding_model="embedding-3", dimensions=DIMENSIONS
+        )
+
+
+def test_local_embedding_settings_are_validated(tmp_path):
+    with pytest.raises(ConfigurationError, match="LOCAL_EMBEDDING_MODEL_DIR"):
+        Settings(embedding_provider="local", local_embedding_model_dir=None)
+    with pytest.raises(ConfigurationError, match="LOCAL_EMBEDDING_POOLING"):
+        Settings(
+            embedding_provider="local",
+            local_embedding_model_dir=tmp_path,
+            local_embedding_pooling="max",
+        )
+    with pytest.raises(ConfigurationError, match="EMBEDDING_DIMENSIONS"):
+        Settings(embedding_dimensions=384)
+
+    assert (
+        Settings(
+            embedding_provider="local", local_embedding_model_dir=tmp_path, embedding_dimensions=384
+        ).embedding_dimensions
+        == 384
+    )
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from src.app.core.config import ConfigurationError, Settings
+from src.app.core.http_clients import InstrumentedTransport, SharedHttpClients
+
+
+def test_shared_clients_are_reused_until_closed():
+    clients = SharedHttpClients(
+        Settings(http_pool_max_connections=8, http_pool_max_keepalive=4, http2_enabled=False)
+    )
+
+    clients.open()
+    llm = clients.llm
+
+    assert clients.llm is llm
+    assert clients.rerank is not llm
+    assert not clients.http2
+    assert clients.snapshot()["llm"]["max_connections"] == 8
+    assert set(clients.snapshot()) == {"llm", "rerank"}
+
+    asyncio.run(clients.aclose())
+    assert llm.is_closed
+    assert clients.snapshot() == {}
+    assert clients.llm is not llm
+
+
+def test_transport_tracks_requests_until_the_body_is_closed():
+    transport = InstrumentedTransport(
+        httpx.MockTransport(lambda _request: httpx.Response(200, text="data: [DONE]")), 4
+    )
+
+    async def exercise() -> list[dict]:
+        snapshots = []
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream("POST", "https://llm.test/chat/completions") as response:
+                snapshots.append(transport.snapshot())
+                await response.aread()
+            snapshots.append(transport.snapshot())
+            await client.get("https://llm.test/models")
+        return snapshots
+
+    during, after = asyncio.run(exercise())
+
+    assert during["in_flight"] == 1
+    assert during["utilization"] == 0.25
+    assert after["in_flight"] == 0
+    snapshot = transport.snapshot()
+    assert snapshot["requests_total"] == 2
+    assert snapshot["peak_in_flight"] == 1
+
+
+def test_pool_settings_are_validated():
+    with pytest.raises(ConfigurationError, match="HTTP_POOL_MAX_KEEPALIVE"):
+        Settings(http_pool_max_connections=2, http_pool_max_keepalive=3)
+    with pytest.raises(ConfigurationError, match="HTTP_POOL_KEEPALIVE_SECONDS"):
+        Settings(http_pool_keepalive_seconds=0)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from src.app.core.config import Settings
+from src.app.retrieval.bm25_index import InvertedBM25Index
+from src.app.retrieval.corpus import CorpusView
+from src.app.retrieval.dense_vector_store import DenseVectorStore
+from src.app.retrieval.embedding_cache import normalize_embedding_query
+from src.app.retrieval.hybrid_search import (
+    MetadataIndex,
+    RetrievalSnapshot,
+    RetrievalState,
+    tokenize_chinese,
+)
+from src.evaluation.runner import run_evaluation
+
+TERMS = ("楼面活荷载", "标准值", "雪荷载", "基本风压", "抗震设防", "混凝土", "检验批", "锚固")
+DIMENSIONS = 256
+
+
+class _Embeddings:
+    """Deterministic per-text vectors; counts provider round trips."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.calls: list[list[str]] = []
+
+    def create(self, **kwargs):
+        inputs = list(kwargs["input"])
+        self.calls.append(inputs)
+        if self.fail:
+            raise ConnectionError("offline")
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=_vector(text).tolist()) for text in inputs]
+        )
+
+
+def _vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(text.encode("utf-8")[:8].ljust(8, b"\0"), "little") + len(text)
+    return np.random.default_rng(seed).normal(size=DIMENSIONS)
+
+
+def _state(embeddings: _Embeddings, size: int = 300) -> RetrievalState:
+    rng = np.random.default_rng(1)
+    ids = [f"doc-{index}" for index in range(size)]
+    documents = [
+        "".join(rng.choice(TERMS, size=rng.integers(2, 6))) + f" 第{index % 40}条"
+        for index in range(size)
+    ]
+    corpus = CorpusView.from_columns(ids, documents, [{}] * size)
+    vectors = rng.normal(size=(size, DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+    state = RetrievalState(
+        Settings(
+            zhipuai_api_key="test", embedding_dimensions=DIMENSIONS, query_embedding_cache_size=0
+        )
+    )
+    state.zhipu_client = SimpleNamespace(embeddings=embeddings)
+    state._publish(
+        RetrievalSnapshot(
+            chroma_collection=SimpleNamespace(count=lambda: size),
+            dense_vector_store=DenseVectorStore(tuple(ids), vectors, "embedding-3", DIMENSIONS),
+            bm25_index=InvertedBM25Index.build(tokenize_chinese(text) for text in documents),
+            metadata_index=MetadataIndex.build(corpus.documents, corpus.metadatas),
+            corpus=corpus,
+        )
+    )
+    return state
+
+
+def _queries(count: int) -> list[str]:
+    return [
+        f"{TERMS[index % len(TERMS)]}{TERMS[(index * 3) % len(TERMS)]} 第{index}条"
+        for index in range(count)
+    ]
+
+
+def _ranked(results) -> list[list[str]]:
+    return [[item.doc_id for item in batch] for batch in results]
+
+
+def test_batch_search_matches_per_query_search():
+    queries = _queries(12) + ["雪荷载标准值", "雪荷载标准值"]
+    state = _state(_Embeddings())
+
+    expected = [state.hybrid_search(query, 5) for query in queries]
+    actual = state.hybrid_search_batch(queries, 5)
+
+    assert _ranked(actual) == _ranked(expected)
+    for batch, reference in zip(actual, expected, strict=True):
+        assert [item.score for item in batch] == pytest.approx([item.score for item in reference])
+
+
+def test_batch_search_embeds_distinct_queries_in_batches():
+    embeddings = _Embeddings()
+    state = _state(embeddings)
+    queries = _queries(40) + _queries(5)
+
+    results = state.hybrid_search_batch(queries, 5)
+
+    assert len(results) == len(queries)
+    assert [len(call) for call in embeddings.calls] == [32, 8]
+    assert all(results)
+
+
+def test_batch_search_falls_back_to_lexical_matches_when_embedding_fails():
+    state = _state(_Embeddings(fail=True))
+
+    results = state.hybrid_search_batch(["雪荷载标准值", "基本风压"], 5)
+
+    assert all(results)
+    assert all("dense" not in item.source for batch in results for item in batch)
+
+
+def test_bm25_top_n_batch_and_dense_query_batch_match_single_queries():
+    state = _state(_Embeddings())
+    snapshot = state.snapshot
+    tokenized = [tokenize_chinese(query) for query in _queries(10) + ["不存在"]]
+    embeddings = [_vector(query).tolist() for query in _queries(70)]
+
+    assert snapshot.bm25_index.top_n_batch(tokenized, 20) == [
+        snapshot.bm25_index.top_n(tokens, 20) for tokens in tokenized
+    ]
+    batch = snapshot.dense_vector_store.query_batch(embeddings, 25)
+    single = [snapshot.dense_vector_store.query(embedding, 25) for embedding in embeddings]
+    assert [[doc_id for doc_id, _ in rows] for rows in batch] == [
+        [doc_id for doc_id, _ in rows] for rows in single
+    ]
+
+
+def test_run_evaluation_searches_all_hybrid_cases_in_one_batch(tmp_path):
+    cases = tmp_path / "cases.jsonl"
+    cases.write_text(
+        "\n".join(
+            json.dumps({"id": f"case-{index}", "query": query, "expected_sources": ["x.pdf"]})
+            for index, query in enumerate(["雪荷载", "基本风压", "混凝土"])
+        ),
+        encoding="utf-8",
+    )
+
+    class BatchOnlyState:
+        ready = True
+
+        def __init__(self) -> None:
+            self.batches: list[list[str]] = []
+
+        def hybrid_search_batch(self, queries, top_k):
+            self.batches.append(list(queries))
+            return [[] for _ in queries]
+
+    state = BatchOnlyState()
+    result = run_evaluation(cases, top_k=5, state=state, manifest_path=tmp_path / "manifest.json")
+
+    assert result["ok"] is True
+    assert result["case_count"] == 3
+    assert state.batches == [["雪荷载", "基本风压", "混凝土"]]
+
+
+def test_batch_search_makes_one_embedding_call_and_one_dense_scan(monkeypatch):
+    queries = _queries(32)
+    sequential_embeddings = _Embeddings()
+    batch_embeddings = _Embeddings()
+    expected = [_state(sequential_embeddings).hybrid_search(query, 5) for query in queries]
+    batch_state = _state(batch_embeddings)
+    scans: list[int] = []
+    query_batch = DenseVectorStore.query_batch
+
+    def counted_query_batch(store, embeddings, limit):
+        scans.append(len(embeddings))
+        return query_batch(store, embeddings, limit)
+
+    def single_query(*_args):
+        raise AssertionError("batch search must not scan query by query")
+
+    monkeypatch.setattr(DenseVectorStore, "query_batch", counted_query_batch)
+    monkeypatch.setattr(DenseVectorStore, "query", single_query)
+    actual = batch_state.hybrid_search_batch(queries, 5)
+
+    assert _ranked(actual) == _ranked(expected)
+    assert len(sequential_embeddings.calls) == len(queries)
+    assert batch_embeddings.calls == [[normalize_embedding_query(query) for query in queries]]
+    assert scans == [len(queries)]
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from src.app.core.embeddings import EmbeddingProvider
+from src.app.retrieval.dense_vector_store import build_dense_vector_store
+from src.pipeline import builder, load_to_db
+from src.pipeline.incremental import load_reusable_vectors, reuse_summary
+
+MODEL = "embedding-3"
+
+
+class _Provider(EmbeddingProvider):
+    name = "fake"
+    model_id = MODEL
+    dimensions = 2
+
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.texts.extend(texts)
+        return [[0.0, 1.0] for _ in texts]
+
+
+def _chunk(chunk_id: str, text: str) -> dict[str, object]:
+    fields = ("source", "code", "name", "version", "effective_date", "status", "title")
+    return {
+        **dict.fromkeys(fields, "test"),
+        "source_file": "spec.pdf",
+        "clause_number": "",
+        "chunk_type": "text",
+        "pages": [1],
+        "images": [],
+        "chunk_id": chunk_id,
+        "metadata_status": "complete",
+        "text": text,
+    }
+
+
+def _previous_version(root: Path) -> tuple[Path, Path]:
+    db_dir = root / "db"
+    processed_dir = root / "processed"
+    processed_dir.mkdir(parents=True)
+    chunks = [
+        {"chunk_id": "old-a", "text": "荷载组合"},
+        {"chunk_id": "old-b", "text": "风荷载标准值"},
+        {"chunk_id": "old-c", "text": "已删除条文"},
+    ]
+    (processed_dir / "spec_chunks.json").write_text(
+        json.dumps(chunks, ensure_ascii=False), encoding="utf-8"
+    )
+    build_dense_vector_store(
+        db_dir,
+        [chunk["chunk_id"] for chunk in chunks],
+        [[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]],
+        embedding_model=MODEL,
+        dimensions=2,
+    )
+    return db_dir, processed_dir
+
+
+def test_unchanged_and_moved_chunks_reuse_previous_vectors(tmp_path):
+    db_dir, processed_dir = _previous_version(tmp_path)
+    reuse = load_reusable_vectors(db_dir, processed_dir, embedding_model=MODEL, dimensions=2)
+    provider = _Provider()
+    chunks = {
+        "spec.pdf": [
+            _chunk("old-a", "荷载组合"),
+            _chunk("moved-b", "风荷载标准值"),
+            _chunk("new-d", "新增条文"),
+        ]
+    }
+
+    pending = load_to_db._embed_chunks(provider, chunks, reuse=reuse)
+
+    assert provider.texts == ["新增条文"]
+    assert pending[0][0] == ["old-a", "moved-b", "new-d"]
+    assert pending[0][3][0] == pytest.approx([1.0, 0.0])
+    assert pending[0][3][1] == pytest.approx([0.6, 0.8])
+    assert reuse_summary(reuse, 3) == {
+        "mode": "incremental",
+        "previous_db_dir": str(db_dir),
+        "previous_vector_count": 3,
+        "reused_by_chunk_id": 1,
+        "reused_by_text_hash": 1,
+        "embedded_count": 1,
+        "reuse_ratio": 0.6667,
+    }
+
+
+def test_vectors_of_another_model_are_not_reused(tmp_path):
+    db_dir, processed_dir = _previous_version(tmp_path)
+
+    assert (
+        load_reusable_vectors(db_dir, processed_dir, embedding_model="embedding-2", dimensions=2)
+        is None
+    )
+    assert (
+        load_reusable_vectors(
+            tmp_path / "missing", processed_dir, embedding_model=MODEL, dimensions=2
+        )
+        is None
+    )
+
+
+def test_incremental_rebuild_records_reuse_in_the_manifest(tmp_path, monkeypatch):
+    db_dir, processed_dir = _previous_version(tmp_path / "previous")
+    source = tmp_path / "raw"
+    source.mkdir()
+    received = {}
+
+    def load_chunks(_chunks_by_file, _db_dir, *, reuse=None):
+        received["reuse"] = reuse
+        return 0
+
+    monkeypatch.setattr(builder, "validate_parser_backend", lambda _backend: {})
+    monkeypatch.setattr(builder, "active_db_dir", lambda: db_dir)
+    monkeypatch.setattr(builder, "active_processed_dir", lambda: processed_dir)
+    monkeypatch.setattr(builder, "embedding_model_id", lambda _config: MODEL)
+    monkeypatch.setattr(
+        builder,
+        "settings",
+        replace(
+            builder.settings,
+            embedding_provider="local",
+            local_embedding_model_dir=tmp_path,
+            embedding_dimensions=2,
+        ),
+    )
+    monkeypatch.setattr("src.pipeline.load_to_db.load_chunks_to_db", load_chunks)
+
+    manifest = builder.rebuild(
+        source,
+        db_dir=tmp_path / "db",
+        manifest_path=tmp_path / "manifest.json",
+        processed_dir=tmp_path / "processed",
+        images_dir=tmp_path / "images",
+        mineru_output_dir=tmp_path / "mineru",
+        audit_dir=tmp_path / "audit",
+        incremental=True,
+    )
+
+    assert len(received["reuse"]) == 3
+    assert manifest["embedding_reuse"]["previous_vector_count"] == 3
+    assert manifest["embedding_reuse"]["embedded_count"] == 0
+    assert "incremental" not in manifest["build_params"]
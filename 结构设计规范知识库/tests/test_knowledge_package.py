@@ -227,6 +227,43 @@ def test_runtime_package_rejects_hash_tampering(tmp_path: Path):
         validate_runtime_package(tampered)
 
 
+def test_runtime_package_stores_media_uncompressed_and_hashes_in_parallel(tmp_path: Path):
+    package = _export(tmp_path)
+
+    with zipfile.ZipFile(package) as archive:
+        compression = {info.filename: info.compress_type for info in archive.infolist()}
+        declared = json.loads(archive.read("knowledge-package.json"))["files"]
+        assert all(
+            entry["sha256"] == hashlib.sha256(archive.read(entry["path"])).hexdigest()
+            for entry in declared
+        )
+    assert compression["runtime/images/preview.png"] == zipfile.ZIP_STORED
+    assert compression["runtime/db/chroma.sqlite3"] == zipfile.ZIP_DEFLATED
+    assert validate_runtime_package(package, hash_workers=3)["verification"] == {
+        "mode": "full",
+        "hashed_file_count": len(declared),
+    }
+
+
+def test_sampled_validation_hashes_manifests_and_a_subset(tmp_path: Path):
+    package = _export(tmp_path)
+    tampered = tmp_path / "tampered.zip"
+    with zipfile.ZipFile(package) as source, zipfile.ZipFile(tampered, "w") as target:
+        for info in source.infolist():
+            content = source.read(info.filename)
+            if info.filename == "runtime/db/segment/header.bin":
+                content = bytes([content[0] ^ 0xFF]) + content[1:]
+            target.writestr(info.filename, content)
+
+    quick = validate_runtime_package(tampered, sample_size=0)
+
+    assert quick["verification"] == {"mode": "sampled", "hashed_file_count": 2}
+    with pytest.raises(KnowledgePackageError, match="SHA-256 不匹配: runtime/db/segment"):
+        validate_runtime_package(tampered, sample_size=10)
+    with pytest.raises(KnowledgePackageError, match="抽样文件数"):
+        validate_runtime_package(tampered, sample_size=-1)
+
+
 def test_runtime_package_rejects_invalid_file_metadata_cleanly(tmp_path: Path):
     package = _export(tmp_path)
     malformed = tmp_path / "malformed.zip"
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from src.app.core import config as config_module
+from src.app.core.config import ConfigurationError, Settings
+from src.app.core.onnx_models import configure_tokenizer
+from src.app.rerank.errors import RerankerError
+from src.app.rerank.factory import get_reranker
+from src.app.rerank.local import LocalCrossEncoderReranker
+from src.app.rerank.noop import NoopReranker
+from src.app.rerank.safe import FailOpenReranker
+from src.app.retrieval.models import RetrievalResult
+
+tokenizers = pytest.importorskip("tokenizers")
+
+HIT_TOKEN_ID = 2
+
+
+def _tokenizer():
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+
+    tokenizer = tokenizers.Tokenizer(
+        WordLevel({"[UNK]": 0, "[PAD]": 1, "alpha": HIT_TOKEN_ID}, unk_token="[UNK]")
+    )
+    tokenizer.pre_tokenizer = Whitespace()
+    return tokenizer
+
+
+class _CountingSession:
+    """Scores a pair by how often the hit token occurs in it."""
+
+    def __init__(self) -> None:
+        self.batches: list[dict[str, np.ndarray]] = []
+        self.threads: list[str] = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in ("input_ids", "attention_mask")]
+
+    def run(self, _outputs, feed):
+        self.batches.append(feed)
+        self.threads.append(threading.current_thread().name)
+        hits = (feed["input_ids"] == HIT_TOKEN_ID) & (feed["attention_mask"] == 1)
+        return [hits.sum(axis=1, keepdims=True).astype(np.float32)]
+
+
+def result(index: int, text: str) -> RetrievalResult:
+    return RetrievalResult(
+        doc_id=f"doc-{index}",
+        text=text,
+        meta={"name": "建筑结构荷载规范", "code": "GB 50009-2012"},
+        score=float(10 - index),
+        source="bm25",
+        reason="baseline",
+    )
+
+
+def local_reranker(session: _CountingSession, **kwargs) -> LocalCrossEncoderReranker:
+    return LocalCrossEncoderReranker(
+        model_dir=None,
+        model_weight=1.0,
+        session=session,
+        tokenizer=_tokenizer(),
+        **kwargs,
+    )
+
+
+def test_local_reranker_scores_candidates_in_batches():
+    session = _CountingSession()
+    inputs = [
+        result(0, "beta"),
+        result(1, "alpha alpha alpha"),
+        result(2, "alpha"),
+        result(3, "alpha alpha"),
+        result(4, "gamma"),
+    ]
+
+    outputs = local_reranker(session, batch_size=2).rerank("alpha", inputs, top_n=3)
+
+    assert [item.doc_id for item in outputs] == ["doc-1", "doc-3", "doc-2"]
+    assert outputs[0].meta["_rerank_score"] == 4.0
+    assert "rerank" in outputs[0].source
+    assert [len(batch["input_ids"]) for batch in session.batches] == [2, 2, 1]
+    assert all(batch["input_ids"].dtype == np.int64 for batch in session.batches)
+
+
+def test_local_reranker_truncates_pairs_to_max_length():
+    session = _CountingSession()
+
+    local_reranker(session, max_length=32).rerank("alpha", [result(0, "alpha " * 200)])
+
+    assert session.batches[0]["input_ids"].shape == (1, 32)
+
+
+def test_async_rerank_runs_on_the_dedicated_executor():
+    session = _CountingSession()
+    reranker = local_reranker(session)
+
+    outputs = asyncio.run(reranker.arerank("alpha", [result(0, "beta"), result(1, "alpha")]))
+
+    assert [item.doc_id for item in outputs] == ["doc-1", "doc-0"]
+    assert session.threads[0].startswith("local-rerank")
+
+
+def test_closing_the_reranker_stops_its_thread_until_the_next_async_rerank():
+    session = _CountingSession()
+    reranker = FailOpenReranker(local_reranker(session))
+    inputs = [result(0, "alpha")]
+
+    asyncio.run(reranker.arerank("alpha", inputs))
+    executor = reranker.delegate._executor
+    reranker.close()
+
+    assert executor is not None and executor._shutdown
+    assert reranker.delegate._executor is None
+    asyncio.run(reranker.arerank("alpha", inputs))
+    assert session.threads[-1].startswith("local-rerank")
+    reranker.close()
+
+
+def test_tokenizer_padding_shipped_with_the_model_is_kept():
+    shipped = _tokenizer()
+    shipped.enable_padding(pad_id=0, pad_token="[UNK]")
+
+    assert configure_tokenizer(shipped, 16).padding["pad_id"] == 0
+    assert configure_tokenizer(_tokenizer(), 16).padding["pad_token"] == "[PAD]"
+    assert configure_tokenizer(_tokenizer(), 16).padding["pad_id"] == 1
+
+
+def test_missing_model_directory_is_a_reranker_error(tmp_path):
+    reranker = LocalCrossEncoderReranker(model_dir=tmp_path, model_weight=1.0)
+
+    with pytest.raises(RerankerError) as error:
+        reranker.rerank("alpha", [result(0, "alpha")])
+
+    assert error.value.code == "model_unavailable"
+    assert reranker.model == tmp_path.name
+
+
+def test_fail_open_chain_tries_the_local_fallback_before_the_baseline(caplog):
+    class Down(NoopReranker):
+        name = "zhipu"
+
+        def rerank(self, query, results, *, top_n=None):
+            raise RerankerError("timeout", "精排请求超时")
+
+    inputs = [result(0, "beta"), result(1, "alpha")]
+    reranker = FailOpenReranker(Down(), fallback=local_reranker(_CountingSession()))
+
+    with caplog.at_level(logging.WARNING):
+        outputs = reranker.rerank("alpha", inputs, top_n=2)
+
+    assert [item.doc_id for item in outputs] == ["doc-1", "doc-0"]
+    assert reranker.last_failure == {"code": "timeout", "http_status": None}
+    assert caplog.records[-1].extra_data["served_by"] == "local"
+
+    broken = FailOpenReranker(Down(), fallback=Down())
+    assert broken.rerank("alpha", inputs, top_n=1) == inputs[:1]
+    assert caplog.records[-1].extra_data["served_by"] == "baseline"
+
+
+def test_factory_builds_local_provider_and_fallback(tmp_path):
+    local = get_reranker(
+        Settings(rerank_enabled=True, rerank_provider="local", local_rerank_model_dir=tmp_path)
+    )
+    assert isinstance(local.delegate, LocalCrossEncoderReranker)
+    assert local.fallback is None
+    assert local.model == tmp_path.name
+
+    chained = get_reranker(
+        Settings(
+            rerank_enabled=True,
+            rerank_provider="zhipu",
+            zhipuai_api_key="real-looking-key",
+            rerank_fallback_provider="local",
+            local_rerank_model_dir=tmp_path,
+        )
+    )
+    assert chained.name == "zhipu"
+    assert isinstance(chained.fallback, LocalCrossEncoderReranker)
+
+    with pytest.raises(ConfigurationError, match="LOCAL_RERANK_MODEL_DIR"):
+        Settings(rerank_enabled=True, rerank_provider="local", local_rerank_model_dir=None)
+
+
+def test_local_rerank_requires_the_onnx_packages_at_startup(monkeypatch, tmp_path):
+    monkeypatch.setattr(config_module, "find_spec", lambda name: None)
+
+    with pytest.raises(ConfigurationError, match="onnxruntime、tokenizers"):
+        Settings(
+            rerank_enabled=True,
+            rerank_provider="zhipu",
+            zhipuai_api_key="real-looking-key",
+            rerank_fallback_provider="local",
+            local_rerank_model_dir=tmp_path,
+        )
+    assert Settings(rerank_enabled=False, rerank_fallback_provider="local")
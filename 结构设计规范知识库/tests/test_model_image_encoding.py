@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from src.app.core.metrics import Metrics
+from src.app.llm import client as llm_client
+from src.app.rag import image_encoding
+from src.app.rag.image_encoding import ModelImageEncoder
+from src.app.schemas.chat import ChatCompletionRequest
+
+fitz = pytest.importorskip("fitz")
+
+
+@pytest.fixture
+def recorder(monkeypatch) -> Metrics:
+    recorder = Metrics()
+    monkeypatch.setattr(image_encoding, "metrics", recorder)
+    return recorder
+
+
+def _png(path, width: int, height: int):
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), 0)
+    pixmap.clear_with(180)
+    pixmap.save(path)
+    return path
+
+
+def _decoded(url: str):
+    header, encoded = url.split(",", 1)
+    return header, fitz.Pixmap(base64.b64decode(encoded))
+
+
+def test_encoded_images_are_cached_until_the_file_changes(tmp_path, recorder):
+    image = _png(tmp_path / "page.png", 40, 30)
+    encoder = ModelImageEncoder(max_bytes=1024 * 1024)
+
+    first = encoder.data_url(image)
+    second = encoder.data_url(image)
+    assert second == first
+    assert first == f"data:image/png;base64,{base64.b64encode(image.read_bytes()).decode()}"
+
+    _png(image, 50, 30)
+    os.utime(image, ns=(1, 1))
+    third = encoder.data_url(image)
+
+    assert third != first
+    assert _decoded(third)[1].width == 50
+    snapshot = recorder.snapshot()
+    assert snapshot["model_image_cache_hits_total"] == 1
+    assert snapshot["model_image_cache_misses_total"] == 2
+    assert snapshot["model_image_encode_ms"]["count"] == 2
+
+
+def test_large_images_are_downscaled_and_recompressed(tmp_path, recorder):
+    image = _png(tmp_path / "page.png", 3000, 1200)
+
+    header, resized = _decoded(ModelImageEncoder(max_bytes=0, max_edge=1000).data_url(image))
+    assert header == "data:image/png;base64"
+    assert (resized.width, resized.height) == (1000, 400)
+
+    encoder = ModelImageEncoder(max_bytes=0, max_edge=1000, image_format="jpeg", jpeg_quality=60)
+    header, recompressed = _decoded(encoder.data_url(image))
+    assert header == "data:image/jpeg;base64"
+    assert (recompressed.width, recompressed.height) == (1000, 400)
+
+    snapshot = recorder.snapshot()
+    assert snapshot["model_image_encoded_bytes_total"] < snapshot["model_image_source_bytes_total"]
+
+
+def test_recompression_never_grows_an_image_that_was_not_resized(tmp_path, recorder):
+    image = _png(tmp_path / "tiny.png", 8, 8)
+    encoder = ModelImageEncoder(max_bytes=0, max_edge=1000, image_format="jpeg", jpeg_quality=100)
+
+    assert encoder.data_url(image).startswith("data:image/png;base64,")
+
+
+def test_cache_is_bounded_by_encoded_size(tmp_path, recorder):
+    images = [_png(tmp_path / f"page{index}.png", 64, 64) for index in range(3)]
+    entry_bytes = len(ModelImageEncoder(max_bytes=0).data_url(images[0]))
+    encoder = ModelImageEncoder(max_bytes=entry_bytes * 2)
+
+    for image in images:
+        encoder.data_url(image)
+    encoder.data_url(images[2])
+    encoder.data_url(images[0])
+
+    assert len(encoder) == 2
+    assert recorder.snapshot()["model_image_cache_misses_total"] == 5
+
+    with pytest.raises(ValueError, match="不支持"):
+        ModelImageEncoder(max_bytes=0, image_format="webp")
+
+
+def test_llm_request_size_and_upload_time_are_recorded(monkeypatch):
+    recorder = Metrics()
+    monkeypatch.setattr(llm_client, "metrics", recorder)
+    payload = {"model": "mimo", "messages": [{"role": "user", "content": "楼面活荷载"}]}
+    trace = {"sources": [], "image_urls": []}
+
+    async def build(_request):
+        return payload, [], trace
+
+    received: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request.content)
+        # The upload is recorded before the model starts answering.
+        assert recorder.snapshot()["llm_upload_duration_ms"]["count"] == 1
+        assert request.headers["Content-Length"] == str(len(request.content))
+        assert "Transfer-Encoding" not in request.headers
+        return httpx.Response(200, json={"choices": [{"message": {"content": "2.0 kN/m²"}}]})
+
+    monkeypatch.setattr(llm_client, "build_mimo_payload", build)
+    monkeypatch.setattr(
+        llm_client,
+        "http_clients",
+        SimpleNamespace(llm=httpx.AsyncClient(transport=httpx.MockTransport(handler))),
+    )
+    request = ChatCompletionRequest(messages=[{"role": "user", "content": "楼面活荷载"}])
+
+    output = asyncio.run(llm_client.generate_non_stream(request))
+
+    assert output["choices"][0]["message"]["content"] == "2.0 kN/m²"
+    assert json.loads(received[0]) == payload
+    snapshot = recorder.snapshot()
+    assert snapshot["llm_request_body_bytes"] == {
+        "count": 1,
+        "average": len(received[0]),
+        "max": len(received[0]),
+    }
+    assert snapshot["llm_upload_duration_ms"]["count"] == 1
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+from src.app.rag import images
+from src.pipeline.page_render_cache import PageRenderCache, prerender_cited_pages
+
+fitz = pytest.importorskip("fitz")
+
+
+def _pdf(path, pages: int = 3):
+    document = fitz.open()
+    for index in range(pages):
+        document.new_page(width=200, height=200).insert_text((40, 80), f"page {index + 1}")
+    document.save(path)
+    document.close()
+    return path
+
+
+def _counting(cache: PageRenderCache, delay_seconds: float = 0.0) -> list[list[int]]:
+    calls: list[list[int]] = []
+    render = cache._render
+
+    def counted(pdf_path, digest, pages, scale, image_format):
+        calls.append(list(pages))
+        time.sleep(delay_seconds)
+        return render(pdf_path, digest, pages, scale, image_format)
+
+    cache._render = counted
+    return calls
+
+
+def test_renders_are_content_addressed_and_reused(tmp_path):
+    cache = PageRenderCache(tmp_path / "cache", 64 * 1024 * 1024)
+    calls = _counting(cache)
+    pdf = _pdf(tmp_path / "spec.pdf")
+    renamed = shutil.copy(pdf, tmp_path / "renamed.pdf")
+
+    first = cache.render_pages(pdf, [2, 1, 2, 9])
+    second = cache.render_pages(renamed, [1, 2])
+
+    assert list(first) == [1, 2]
+    assert second == first
+    assert calls == [[2, 1, 9]]
+    assert first[1].read_bytes().startswith(b"\x89PNG")
+    assert cache.render_pages(pdf, [1], scale=1.0)[1] != first[1]
+    assert cache.render_pages(pdf, [1], image_format="jpg")[1].suffix == ".jpg"
+
+
+def test_concurrent_requests_for_a_page_render_once(tmp_path):
+    cache = PageRenderCache(tmp_path / "cache", 64 * 1024 * 1024)
+    calls = _counting(cache, delay_seconds=0.1)
+    pdf = _pdf(tmp_path / "spec.pdf")
+    results: list[dict] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.render_pages(pdf, [1])))
+        for _ in range(8)
+    ]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [[1]]
+    assert len({str(result[1]) for result in results}) == 1
+
+
+def test_cache_evicts_least_recently_used_renders(tmp_path):
+    pdf = _pdf(tmp_path / "spec.pdf")
+    probe = PageRenderCache(tmp_path / "probe", 64 * 1024 * 1024)
+    page_bytes = probe.render_pages(pdf, [1])[1].stat().st_size
+    cache = PageRenderCache(tmp_path / "cache", int(page_bytes * 2.5))
+
+    first = cache.render_pages(pdf, [1])[1]
+    second = cache.render_pages(pdf, [2])[2]
+    os.utime(first, ns=(1, 1))
+    os.utime(second, ns=(2, 2))
+    cache.render_pages(pdf, [1])
+    third = cache.render_pages(pdf, [3])[3]
+
+    assert first.exists()
+    assert not second.exists()
+    assert third.exists()
+
+
+def test_prerender_warms_every_cited_page(tmp_path):
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    pdf = _pdf(raw / "spec.pdf")
+    (processed / "spec_chunks.json").write_text(
+        json.dumps(
+            [
+                {"source_file": "spec.pdf", "pages": [1, 3]},
+                {"source_file": "spec.pdf", "pages": [3]},
+                {"source_file": "missing.pdf", "pages": [1]},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    cache = PageRenderCache(tmp_path / "cache", 64 * 1024 * 1024)
+
+    summary = prerender_cited_pages(cache, processed, raw)
+    calls = _counting(cache)
+
+    assert summary == {"rendered_pages": 2, "missing_sources": ["missing.pdf"]}
+    assert list(cache.render_pages(pdf, [3, 1])) == [1, 3]
+    assert calls == []
+
+
+def test_load_page_images_serves_cached_renders(tmp_path, monkeypatch):
+    pdf = _pdf(tmp_path / "spec.pdf")
+    cache = PageRenderCache(tmp_path / "cache", 64 * 1024 * 1024)
+    calls = _counting(cache)
+    monkeypatch.setattr(images, "page_render_cache", cache)
+    monkeypatch.setattr(images, "find_source_pdf", lambda source, raw_dir: pdf)
+
+    first = images.load_page_images("spec.pdf", [1, 2])
+    second = images.load_page_images("spec.pdf", [1, 2])
+
+    assert second == first
+    assert all(url.startswith("data:image/png;base64,") for url in first)
+    assert calls == [[1, 2]]
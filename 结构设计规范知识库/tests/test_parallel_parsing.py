@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from src.app.core.config import Settings
+from src.pipeline import process_documents
+from src.pipeline.metadata import parse_spec_filename
+from src.pipeline.parsers import factory
+from src.pipeline.parsers.base import ParseResult
+from src.pipeline.parsers.pymupdf import PyMuPdfParser, page_ranges
+
+
+def _write_pdf(path: Path, pages: list[str]) -> None:
+    fitz = pytest.importorskip("fitz")
+    document = fitz.open()
+    for text in pages:
+        document.new_page(width=200, height=200).insert_text((20, 40), text)
+    document.save(path)
+    document.close()
+
+
+def _specs(pdf_files: list[Path]):
+    return {pdf.name: parse_spec_filename(pdf.name) for pdf in pdf_files}
+
+
+def test_process_pool_output_matches_serial_processing(tmp_path):
+    source = tmp_path / "raw"
+    source.mkdir()
+    pdf_files = []
+    for index in range(3):
+        pdf = source / f"GB 5000{index}-2012_spec{index}.pdf"
+        _write_pdf(pdf, [f"Clause {index}.{page}" for page in range(1, 3)])
+        pdf_files.append(pdf)
+
+    outputs = {}
+    for workers in (1, 3):
+        out_dir = tmp_path / f"processed-{workers}"
+        results = process_documents.process_pdfs(
+            pdf_files,
+            _specs(pdf_files),
+            out_dir,
+            tmp_path / f"images-{workers}",
+            parser_backend="pymupdf",
+            apply_corrections=False,
+            workers=workers,
+        )
+        assert list(results) == [pdf.name for pdf in pdf_files]
+        report = json.loads((out_dir / "build_quality.json").read_text(encoding="utf-8"))
+        for document in report["documents"]:
+            assert document.pop("parse_seconds") >= 0
+        outputs[workers] = (
+            report,
+            {name: result["chunks"] for name, result in results.items()},
+        )
+
+    assert outputs[3] == outputs[1]
+    assert len(list((tmp_path / "images-3").glob("*.png"))) == 6
+
+
+def test_mineru_documents_run_in_bounded_threads(tmp_path, monkeypatch):
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    class FakeMineru:
+        name = "mineru"
+        probes = 0
+
+        def probe(self):
+            FakeMineru.probes += 1
+
+        def parse(self, pdf_path: Path, image_dir: Path) -> ParseResult:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return ParseResult(elements=[{"type": "Text", "text": pdf_path.stem, "page": 1}])
+
+    monkeypatch.setattr(process_documents, "create_parser", lambda *_args, **_kwargs: FakeMineru())
+    pdf_files = [tmp_path / f"GB 5000{index}-2012_spec.pdf" for index in range(5)]
+    for pdf in pdf_files:
+        pdf.write_bytes(b"pdf")
+
+    results = process_documents.process_pdfs(
+        pdf_files,
+        _specs(pdf_files),
+        tmp_path / "processed",
+        tmp_path / "images",
+        parser_backend="mineru",
+        apply_corrections=False,
+        workers=2,
+    )
+
+    assert peak == 2
+    assert FakeMineru.probes == 1
+    assert list(results) == [pdf.name for pdf in pdf_files]
+
+
+def test_page_ranges_split_pages_evenly():
+    assert page_ranges(7, 3) == [(1, 4), (4, 6), (6, 8)]
+    assert page_ranges(2, 4) == [(1, 2), (2, 3)]
+
+
+def test_render_pool_matches_inline_rendering(tmp_path):
+    pdf = tmp_path / "spec.pdf"
+    _write_pdf(pdf, [f"Clause {page}" for page in range(1, 6)])
+
+    results = {}
+    for workers in (1, 3):
+        parser = PyMuPdfParser(dpi=72, image_format="jpg", render_workers=workers)
+        results[workers] = parser.parse(pdf, tmp_path / f"images-{workers}")
+
+    serial, pooled = results[1], results[3]
+    pooled_dir = tmp_path / "images-3"
+    assert pooled.elements == serial.elements
+    assert serial.elements[0]["img"] == "spec_p0001.jpg"
+    images = sorted(path.name for path in pooled_dir.iterdir())
+    assert images == [f"spec_p{page:04d}.jpg" for page in range(1, 6)]
+    assert pooled.metadata["image_bytes"] == sum(
+        path.stat().st_size for path in pooled_dir.iterdir()
+    )
+    assert pooled.metadata["image_bytes"] == serial.metadata["image_bytes"]
+
+
+def test_lazy_mode_skips_rendering_and_reports_it(tmp_path, monkeypatch):
+    pdf = tmp_path / "GB 50009-2012_spec.pdf"
+    _write_pdf(pdf, ["Clause 1", "Clause 2"])
+    monkeypatch.setattr(
+        process_documents,
+        "create_parser",
+        lambda *_args, **_kwargs: PyMuPdfParser(render_mode="lazy"),
+    )
+
+    results = process_documents.process_pdfs(
+        [pdf],
+        _specs([pdf]),
+        tmp_path / "processed",
+        tmp_path / "images",
+        parser_backend="pymupdf",
+        apply_corrections=False,
+    )
+
+    quality = results[pdf.name]["quality"]
+    assert quality["image_bytes"] == 0
+    assert quality["parse_seconds"] >= 0
+    assert results[pdf.name]["parser_metadata"]["page_count"] == 2
+    assert all(not chunk["images"] for chunk in results[pdf.name]["chunks"])
+    assert not list((tmp_path / "images").iterdir())
+
+
+def test_document_workers_render_inline(tmp_path, monkeypatch):
+    pytest.importorskip("fitz")
+    monkeypatch.setattr(factory, "settings", Settings(pdf_render_workers=4))
+    monkeypatch.setattr(process_documents, "_worker_parser", None)
+
+    process_documents._initialize_worker("pymupdf", tmp_path)
+
+    assert factory.create_parser("pymupdf").render_workers == 4
+    assert process_documents._worker_parser.render_workers == 1
+
+
+def test_parse_pool_spawns_instead_of_forking(tmp_path):
+    parser = PyMuPdfParser()
+
+    with process_documents._parallel_executor(parser, 2, "pymupdf", tmp_path) as executor:
+        assert executor._mp_context.get_start_method() == "spawn"
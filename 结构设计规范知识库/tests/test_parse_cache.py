@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from src.pipeline import process_documents
+from src.pipeline.metadata import parse_spec_filename
+from src.pipeline.parse_cache import ParseCache, parse_with_cache
+from src.pipeline.parsers.base import ParseResult
+from src.pipeline.parsers.mineru import MineruParser
+from src.pipeline.parsers.pymupdf import PyMuPdfParser
+
+
+class _ArtifactParser:
+    name = "fake"
+
+    def __init__(self, output_dir: Path, version: str = "1.0") -> None:
+        self.output_dir = output_dir
+        self.version = version
+        self.calls = 0
+
+    def cache_identity(self) -> dict[str, str]:
+        return {"parser": self.name, "version": self.version}
+
+    def parse(self, pdf_path: Path, image_dir: Path) -> ParseResult:
+        self.calls += 1
+        doc_dir = self.output_dir / pdf_path.stem
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        (doc_dir / "content_list.json").write_text("[]", encoding="utf-8")
+        image_dir.mkdir(parents=True, exist_ok=True)
+        (image_dir / f"{pdf_path.stem}_fig.jpg").write_bytes(b"jpg")
+        return ParseResult(
+            elements=[{"type": "Text", "text": "1.0.1 总则", "page": 1}],
+            artifact_dir=doc_dir,
+            artifacts=[{"kind": "content_list", "path": str(doc_dir / "content_list.json")}],
+            media_files=[f"{pdf_path.stem}_fig.jpg"],
+            metadata={"parser_backend": self.name},
+        )
+
+
+def _cache(tmp_path: Path, max_bytes: int = 1024 * 1024, max_age: float = 0) -> ParseCache:
+    return ParseCache(tmp_path / "parse_cache", max_bytes, max_age)
+
+
+def test_rebuild_restores_cached_parse_and_reports_hits(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    pdf = tmp_path / "GB 50009-2012_spec.pdf"
+    document = fitz.open()
+    document.new_page(width=200, height=200).insert_text((20, 40), "3.1.1 Load")
+    document.save(pdf)
+    document.close()
+    cache = _cache(tmp_path, max_bytes=64 * 1024 * 1024)
+    out_dir = tmp_path / "processed"
+    image_dir = tmp_path / "images"
+
+    def run() -> tuple[dict, dict]:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        shutil.rmtree(image_dir, ignore_errors=True)
+        results = process_documents.process_pdfs(
+            [pdf],
+            {pdf.name: parse_spec_filename(pdf.name)},
+            out_dir,
+            image_dir,
+            parser_backend="pymupdf",
+            apply_corrections=False,
+            parse_cache=cache,
+        )
+        return results, json.loads((out_dir / "build_quality.json").read_text(encoding="utf-8"))
+
+    first, first_report = run()
+    second, second_report = run()
+
+    assert first_report["parse_cache"] == {"hit_count": 0, "miss_count": 1, "disabled_count": 0}
+    assert second_report["parse_cache"] == {"hit_count": 1, "miss_count": 0, "disabled_count": 0}
+    assert second[pdf.name]["chunks"] == first[pdf.name]["chunks"]
+    assert (image_dir / "GB 50009-2012_spec_p0001.png").is_file()
+
+
+def test_hit_restores_artifacts_and_a_new_parser_version_misses(tmp_path):
+    pdf = tmp_path / "spec.pdf"
+    pdf.write_bytes(b"%PDF-1.4 spec")
+    cache = _cache(tmp_path)
+    parser = _ArtifactParser(tmp_path / "mineru")
+    image_dir = tmp_path / "images"
+
+    _, status = parse_with_cache(parser, pdf, image_dir, cache)
+    shutil.rmtree(tmp_path / "mineru")
+    shutil.rmtree(image_dir)
+    result, hit = parse_with_cache(parser, pdf, image_dir, cache)
+
+    assert (status, hit, parser.calls) == ("miss", "hit", 1)
+    assert result.artifact_dir == tmp_path / "mineru" / "spec"
+    assert (tmp_path / "mineru" / "spec" / "content_list.json").is_file()
+    assert (image_dir / "spec_fig.jpg").read_bytes() == b"jpg"
+
+    upgraded = _ArtifactParser(tmp_path / "mineru", version="2.0")
+    assert parse_with_cache(upgraded, pdf, image_dir, cache)[1] == "miss"
+    pdf.write_bytes(b"%PDF-1.4 revised")
+    assert parse_with_cache(upgraded, pdf, image_dir, cache)[1] == "miss"
+
+    class Uncacheable:
+        name = "plain"
+
+        def parse(self, pdf_path: Path, image_dir: Path) -> ParseResult:
+            return ParseResult(elements=[])
+
+    assert parse_with_cache(Uncacheable(), pdf, image_dir, cache)[1] == "off"
+
+
+def test_hit_restores_artifacts_under_the_current_output_dir(tmp_path):
+    pdf = tmp_path / "spec.pdf"
+    pdf.write_bytes(b"%PDF-1.4 spec")
+    cache = _cache(tmp_path)
+    first = _ArtifactParser(tmp_path / "v1" / "mineru")
+    second = _ArtifactParser(tmp_path / "v2" / "mineru")
+    parse_with_cache(first, pdf, tmp_path / "v1" / "images", cache)
+    (tmp_path / "v1" / "mineru" / "spec" / "notes.txt").write_text("v1", encoding="utf-8")
+
+    result, status = parse_with_cache(second, pdf, tmp_path / "v2" / "images", cache)
+
+    doc_dir = tmp_path / "v2" / "mineru" / "spec"
+    assert (status, first.calls, second.calls) == ("hit", 1, 0)
+    assert result.artifact_dir == doc_dir
+    assert result.artifacts[0]["path"] == str(doc_dir / "content_list.json")
+    assert (doc_dir / "content_list.json").is_file()
+    assert (tmp_path / "v1" / "mineru" / "spec" / "notes.txt").read_text(encoding="utf-8") == "v1"
+
+
+def test_mineru_identity_does_not_depend_on_the_output_dir(tmp_path):
+    parsers = [MineruParser(tmp_path / job / "mineru", extra_args=[]) for job in ("a", "b")]
+    for parser in parsers:
+        parser._cli_probe = SimpleNamespace(raw_version="magic-pdf, version 1.3.12")
+
+    assert parsers[0].cache_identity() == parsers[1].cache_identity()
+
+
+def test_eviction_drops_expired_then_least_recently_used_entries(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10, max_age=3600)
+    for name, age in (("expired", 7200), ("old", 60), ("new", 0)):
+        entry = cache.root / name
+        entry.mkdir(parents=True)
+        (entry / "result.json").write_bytes(b"123456")
+        stamp = time.time() - age
+        os.utime(entry, (stamp, stamp))
+
+    assert cache.evict() == 2
+    assert [path.name for path in cache.root.iterdir()] == ["new"]
+
+
+def test_pymupdf_identity_tracks_render_options():
+    pytest.importorskip("fitz")
+
+    assert (
+        PyMuPdfParser(render_workers=1).cache_identity()
+        == PyMuPdfParser(render_workers=4).cache_identity()
+    )
+    assert PyMuPdfParser(dpi=144).cache_identity() != PyMuPdfParser().cache_identity()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+from src.pipeline.parse_service import (
+    ParseService,
+    ParseServiceBusyError,
+    ParseServiceClient,
+    ParseServiceError,
+    recv_frame,
+    send_frame,
+)
+from src.pipeline.parsers.pymupdf import PyMuPdfParser
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要 Unix socket")
+
+
+# Created before any pool forks, so the workers share them with the test.
+_BATCH_STARTED = multiprocessing.Event()
+_RELEASE_BATCH = multiprocessing.Event()
+
+
+class _Engine:
+    name = "fake-ocr"
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.recognized = 0
+
+    def recognize(self, image_path: Path) -> list[str]:
+        self.recognized += 1
+        return [image_path.stem, str(self.pid), str(self.recognized)]
+
+
+class _BlockingEngine(_Engine):
+    def recognize(self, image_path: Path) -> list[str]:
+        if not image_path.name.startswith("preheat-"):
+            _BATCH_STARTED.set()
+            _RELEASE_BATCH.wait(5)
+        return super().recognize(image_path)
+
+
+@pytest.fixture
+def serve(tmp_path):
+    services = []
+
+    def start(engine=_Engine, **kwargs) -> ParseServiceClient:
+        service = ParseService(tmp_path / f"parse-{len(services)}.sock", engine, **kwargs)
+        service.start()
+        threading.Thread(target=service.serve_forever, daemon=True).start()
+        services.append(service)
+        return ParseServiceClient(service.socket_path, busy_timeout=0)
+
+    yield start
+    for service in services:
+        service.shutdown()
+
+
+def test_frames_round_trip_and_reject_oversized_lengths():
+    left, right = socket.socketpair()
+    with left, right:
+        send_frame(left, {"cmd": "health", "text": "荷载"})
+        assert recv_frame(right) == {"cmd": "health", "text": "荷载"}
+        left.sendall((1 << 31).to_bytes(4, "big"))
+        with pytest.raises(ParseServiceError, match="超过上限"):
+            recv_frame(right)
+        left.close()
+        assert recv_frame(right) is None
+
+
+def test_batch_is_recognized_in_order_by_warm_workers(serve, tmp_path):
+    client = serve(workers=2)
+    images = []
+    for index in range(6):
+        image = tmp_path / f"page-{index}.png"
+        image.write_bytes(b"png")
+        images.append(image)
+
+    first = client.ocr(images)
+    second = client.ocr(images)
+
+    assert [lines[0] for lines in first] == [f"page-{index}" for index in range(6)]
+    worker_pids = {lines[1] for lines in first + second}
+    assert len(worker_pids) <= 2
+    assert str(os.getpid()) not in worker_pids
+    # Every engine recognized the blank page while loading, before any real page.
+    assert min(int(lines[2]) for lines in first + second) >= 2
+    assert client.preheat() == {"ok": True, "warm_workers": 2}
+    health = client.health()
+    assert health["engine"] == "fake-ocr"
+    assert (health["workers"], health["queued"], health["warm_workers"]) == (2, 0, 2)
+    assert health["preheated"] is True
+
+
+def test_full_queue_answers_busy_and_bad_requests_fail(serve, tmp_path):
+    _BATCH_STARTED.clear()
+    _RELEASE_BATCH.clear()
+    client = serve(engine=_BlockingEngine, workers=1, queue_size=1)
+    image = tmp_path / "page.png"
+    image.write_bytes(b"png")
+    blocked = threading.Thread(target=client.ocr, args=([image],))
+    blocked.start()
+    assert _BATCH_STARTED.wait(5)
+
+    with pytest.raises(ParseServiceBusyError, match="队列已满"):
+        client.ocr([image])
+    _RELEASE_BATCH.set()
+    blocked.join()
+    with pytest.raises(ParseServiceError, match="图片不存在"):
+        client.ocr([tmp_path / "missing.png"])
+    with pytest.raises(ParseServiceError, match="无法连接"):
+        ParseServiceClient(tmp_path / "absent.sock").health()
+
+
+def test_pymupdf_sends_pages_without_text_layer_in_one_batch(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    pdf = tmp_path / "scan.pdf"
+    document = fitz.open()
+    document.new_page(width=200, height=200).insert_text((20, 40), "3.1.1 Load")
+    document.new_page(width=200, height=200)
+    document.new_page(width=200, height=200)
+    document.save(pdf)
+    document.close()
+
+    class Client:
+        batches: list[list[Path]] = []
+
+        def ocr(self, images: list[Path]) -> list[list[str]]:
+            assert all(path.is_file() for path in images)
+            self.batches.append(images)
+            return [[f"{path.stem} 识别"] for path in images]
+
+    parser = PyMuPdfParser(render_mode="lazy", dpi=72, ocr_client=Client())
+    result = parser.parse(pdf, tmp_path / "images")
+
+    assert [[path.name for path in batch] for batch in Client.batches] == [
+        ["scan_p0002.png", "scan_p0003.png"]
+    ]
+    assert [(element["page"], element.get("ocr", False)) for element in result.elements] == [
+        (1, False),
+        (2, True),
+        (3, True),
+    ]
+    assert result.metadata["ocr_pages"] == 2
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+from src.app.core.config import Settings
+from src.app.core.metrics import metrics
+from src.app.retrieval.bm25_index import InvertedBM25Index
+from src.app.retrieval.corpus import CorpusView
+from src.app.retrieval.dense_vector_store import DenseVectorStore
+from src.app.retrieval.embedding_cache import (
+    QUERY_EMBEDDING_CACHE_FILE_NAME,
+    QueryEmbeddingCache,
+    normalize_embedding_query,
+)
+from src.app.retrieval.hybrid_search import (
+    MetadataIndex,
+    RetrievalSnapshot,
+    RetrievalState,
+    tokenize_chinese,
+)
+
+DIMENSIONS = 256
+EMBEDDING = [1.0, 0.5] + [0.0] * (DIMENSIONS - 2)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _CountingEmbeddings:
+    def __init__(self) -> None:
+        self.inputs: list[list[str]] = []
+
+    def create(self, **kwargs):
+        self.inputs.append(list(kwargs["input"]))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=list(EMBEDDING))])
+
+
+def _state(tmp_path, embeddings: _CountingEmbeddings, **overrides) -> RetrievalState:
+    ids = [f"doc-{index}" for index in range(12)]
+    documents = [f"楼面活荷载标准值 第{index}条" for index in range(12)]
+    corpus = CorpusView.from_columns(ids, documents, [{}] * len(ids))
+    vectors = np.random.default_rng(5).normal(size=(len(ids), DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+    state = RetrievalState(
+        Settings(zhipuai_api_key="test", embedding_dimensions=DIMENSIONS, **overrides)
+    )
+    state.zhipu_client = SimpleNamespace(embeddings=embeddings)
+    state._publish(
+        RetrievalSnapshot(
+            chroma_collection=SimpleNamespace(count=lambda: len(ids)),
+            dense_vector_store=DenseVectorStore(tuple(ids), vectors, "embedding-3", DIMENSIONS),
+            bm25_index=InvertedBM25Index.build(tokenize_chinese(text) for text in documents),
+            metadata_index=MetadataIndex.build(corpus.documents, corpus.metadatas),
+            corpus=corpus,
+            db_dir=tmp_path,
+        )
+    )
+    return state
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = QueryEmbeddingCache(2, 60)
+    cache.put("embedding-3", 1024, "a", [1.0])
+    cache.put("embedding-3", 1024, "b", [2.0])
+    assert cache.get("embedding-3", 1024, "a") == [1.0]
+
+    cache.put("embedding-3", 1024, "c", [3.0])
+
+    assert cache.get("embedding-3", 1024, "b") is None
+    assert cache.get("embedding-3", 1024, "a") == [1.0]
+    assert cache.get("embedding-3", 1024, "c") == [3.0]
+    assert len(cache) == 2
+
+
+def test_cache_key_includes_model_and_dimensions_and_entries_expire():
+    clock = _Clock()
+    cache = QueryEmbeddingCache(8, 60, clock=clock)
+    cache.put("embedding-3", 1024, "雪荷载", [1.0])
+
+    assert cache.get("embedding-3", 512, "雪荷载") is None
+    assert cache.get("embedding-2", 1024, "雪荷载") is None
+    clock.now += 59
+    assert cache.get("embedding-3", 1024, "雪荷载") == [1.0]
+    clock.now += 1
+    assert cache.get("embedding-3", 1024, "雪荷载") is None
+    assert len(cache) == 0
+
+
+def test_cache_round_trips_through_disk_and_drops_expired_entries(tmp_path):
+    clock = _Clock()
+    path = tmp_path / QUERY_EMBEDDING_CACHE_FILE_NAME
+    cache = QueryEmbeddingCache(8, 60, clock=clock)
+    cache.put("embedding-3", 1024, "旧查询", [0.5, 0.25])
+    clock.now += 30
+    cache.put("embedding-3", 1024, "新查询", [0.1, 0.2, 0.3])
+
+    assert cache.save(path) == 2
+    clock.now += 40
+    restored = QueryEmbeddingCache(8, 60, clock=clock)
+
+    assert restored.load(path) == 1
+    assert restored.get("embedding-3", 1024, "新查询") == [0.1, 0.2, 0.3]
+    assert restored.get("embedding-3", 1024, "旧查询") is None
+
+
+def test_cache_ignores_unreadable_file(tmp_path):
+    path = tmp_path / QUERY_EMBEDDING_CACHE_FILE_NAME
+    path.write_bytes(b"not an archive")
+
+    assert QueryEmbeddingCache(8, 60).load(path) == 0
+
+
+def test_repeated_query_reuses_embedding_and_reports_metrics(tmp_path):
+    embeddings = _CountingEmbeddings()
+    state = _state(tmp_path, embeddings)
+    before = metrics.snapshot()
+
+    first = state.hybrid_search("楼面活荷载  标准值", 5)
+    second = state.hybrid_search(" 楼面活荷载 标准值", 5)
+    after = metrics.snapshot()
+
+    assert embeddings.inputs == [[normalize_embedding_query("楼面活荷载 标准值")]]
+    assert [item.doc_id for item in first] == [item.doc_id for item in second]
+    assert (
+        after["query_embedding_cache_hits_total"] == before["query_embedding_cache_hits_total"] + 1
+    )
+    assert (
+        after["query_embedding_cache_misses_total"]
+        == before["query_embedding_cache_misses_total"] + 1
+    )
+
+
+def test_cache_can_be_disabled(tmp_path):
+    embeddings = _CountingEmbeddings()
+    state = _state(tmp_path, embeddings, query_embedding_cache_size=0)
+
+    state.hybrid_search("楼面活荷载", 5)
+    state.hybrid_search("楼面活荷载", 5)
+
+    assert state.embedding_cache is None
+    assert len(embeddings.inputs) == 2
+
+
+def test_persisted_cache_is_restored_next_to_dense_vectors(tmp_path):
+    state = _state(tmp_path, _CountingEmbeddings(), query_embedding_cache_persist=True)
+    state.hybrid_search("楼面活荷载", 5)
+    state.persist_embedding_cache()
+
+    restored = QueryEmbeddingCache(8, 60)
+    assert restored.load(tmp_path / QUERY_EMBEDDING_CACHE_FILE_NAME) == 1
+    assert restored.get("embedding-3", DIMENSIONS, "楼面活荷载") == EMBEDDING
+
+
+def test_repeated_queries_call_the_provider_once_per_distinct_query(tmp_path):
+    embeddings = _CountingEmbeddings()
+    state = _state(tmp_path, embeddings)
+    queries = ["楼面活荷载", "标准值", "第3条"] * 4
+
+    results = [state.hybrid_search(query, 5) for query in queries]
+
+    assert embeddings.inputs == [["楼面活荷载"], ["标准值"], ["第3条"]]
+    assert results[3:] == results[:3] * 3
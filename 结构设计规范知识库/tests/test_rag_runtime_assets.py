@@ -20,13 +20,21 @@ def _result() -> RetrievalResult:
     )
 
 
+async def _no_images(*_args) -> list[str]:
+    return []
+
+
+async def _search(*_args, **_kwargs) -> list[RetrievalResult]:
+    return [_result()]
+
+
 def _prepare_retrieval(monkeypatch) -> None:
     monkeypatch.setattr(service.retrieval_state, "chroma_collection", object())
     monkeypatch.setattr(service.retrieval_state, "zhipu_client", object())
-    monkeypatch.setattr(service.retrieval_state, "hybrid_search", lambda *_: [_result()])
+    monkeypatch.setattr(service.retrieval_state, "hybrid_search_async", _search)
     monkeypatch.setattr(service, "find_structured_table_matches", lambda *_args, **_kwargs: [])
-    monkeypatch.setattr(service, "load_images_by_name", lambda *_: [])
-    monkeypatch.setattr(service, "load_page_images", lambda *_: [])
+    monkeypatch.setattr(service, "load_images_by_name_async", _no_images)
+    monkeypatch.setattr(service, "load_page_images_async", _no_images)
     monkeypatch.setattr(service, "page_image_filenames", lambda *_: [])
 
 
@@ -54,6 +62,22 @@ def test_payload_offers_page_images_when_source_pdf_exists(monkeypatch):
     assert "![第30页](/page-images/test.pdf/30)" in user_text
 
 
+def test_trace_records_retrieval_stage_timings(monkeypatch):
+    _prepare_retrieval(monkeypatch)
+    monkeypatch.setattr(service, "source_pdf_available", lambda *_: False)
+
+    async def search(_query, _top_k, *, timings):
+        timings["embedding"] = 12.5
+        return [_result()]
+
+    monkeypatch.setattr(service.retrieval_state, "hybrid_search_async", search)
+
+    _payload, _images, trace = asyncio.run(service.build_mimo_payload(_request()))
+
+    assert trace["stage_timings_ms"]["embedding"] == 12.5
+    assert {"structured_table", "retrieval_total"} <= set(trace["stage_timings_ms"])
+
+
 def test_authenticated_page_image_url_is_signed(monkeypatch):
     configured = type(
         "Configured",
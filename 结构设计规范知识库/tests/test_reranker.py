@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from typing import Any
@@ -7,11 +8,19 @@ from typing import Any
 import httpx
 import pytest
 from src.app.core.config import Settings
-from src.app.core.metrics import metrics
+from src.app.core.metrics import Metrics, metrics
+from src.app.rerank import zhipu
+from src.app.rerank.documents import MAX_TEXT_CHARS, candidate_document
 from src.app.rerank.errors import RerankerError
 from src.app.rerank.fusion import fuse_rankings
 from src.app.rerank.safe import FailOpenReranker
-from src.app.rerank.zhipu import MAX_TEXT_CHARS, ZhipuReranker, _candidate_document
+from src.app.rerank.score_cache import (
+    RerankScoreCache,
+    build_rerank_score_cache,
+    reset_rerank_data_version,
+    set_rerank_data_version,
+)
+from src.app.rerank.zhipu import ZhipuReranker
 from src.app.retrieval.hybrid_search import RetrievalState
 from src.app.retrieval.models import RetrievalCandidate, RetrievalResult
 
@@ -195,7 +204,7 @@ def test_fail_open_reranker_records_success():
 
 
 def test_candidate_document_includes_authority_context_and_stays_bounded():
-    document = _candidate_document(result(0, text="正文" * 5000))
+    document = candidate_document(result(0, text="正文" * 5000))
 
     assert "规范：建筑结构荷载规范 GB 50009-2012" in document
     assert "依据类型：body_table" in document
@@ -237,10 +246,10 @@ def test_retrieval_expands_candidate_pool_before_reranking():
 
     state._add_clause_matches = lambda *_args: None
 
-    def add_candidates(_query_info, limit, _all_data, _docs, _metas, pool):
+    def add_candidates(_query_info, limit, _corpus, pool, _matches=None):
         observed_limits.append(limit)
         for index in range(limit):
-            pool[str(index)] = RetrievalCandidate(
+            pool[index] = RetrievalCandidate(
                 doc_id=str(index),
                 text=f"candidate {index}",
                 meta={"section_type": "body"},
@@ -266,3 +275,153 @@ def test_retrieval_candidate_pool_rejects_provider_limit_violations(candidate_li
 
     with pytest.raises(ValueError, match="1 到 128"):
         state.retrieve_candidates("query", candidate_limit)
+
+
+def test_async_zhipu_reranker_matches_sync_contract():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer secret-test-key"
+        return httpx.Response(
+            200,
+            json={
+                "results": [
+                    {"index": 1, "relevance_score": 0.9},
+                    {"index": 0, "relevance_score": 0.1},
+                ]
+            },
+        )
+
+    inputs = [result(0), result(1)]
+    reranker = ZhipuReranker(
+        api_key="secret-test-key",
+        base_url="https://example.test/api/paas/v4",
+        model="rerank",
+        timeout_seconds=3,
+        model_weight=1.0,
+        client=client_for(handler),
+        async_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    expected = reranker.rerank("query", inputs, top_n=2)
+    actual = asyncio.run(reranker.arerank("query", inputs, top_n=2))
+
+    assert (
+        [item.doc_id for item in actual]
+        == [item.doc_id for item in expected]
+        == [
+            "doc-1",
+            "doc-0",
+        ]
+    )
+
+
+def test_async_fail_open_reranker_falls_back_on_provider_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("private timeout body", request=request)
+
+    reranker = FailOpenReranker(
+        ZhipuReranker(
+            api_key="secret-test-key",
+            base_url="https://example.test/api/paas/v4",
+            model="rerank",
+            timeout_seconds=3,
+            model_weight=1.0,
+            async_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+    )
+    inputs = [result(0), result(1), result(2)]
+
+    outputs = asyncio.run(reranker.arerank("query", inputs, top_n=2))
+
+    assert outputs == inputs[:2]
+    assert reranker.last_failure == {"code": "timeout", "http_status": None}
+
+
+def test_cached_scores_skip_the_provider_and_duplicates_are_sent_once(monkeypatch):
+    recorder = Metrics()
+    monkeypatch.setattr(zhipu, "metrics", recorder)
+    sent: list[list[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        documents = json.loads(request.content)["documents"]
+        sent.append(documents)
+        return httpx.Response(
+            200,
+            json={
+                "results": [
+                    {"index": index, "relevance_score": 1.0 - index / 10}
+                    for index in range(len(documents))
+                ]
+            },
+        )
+
+    reranker = ZhipuReranker(
+        api_key="secret-test-key",
+        base_url="https://example.test/api/paas/v4",
+        model="rerank",
+        timeout_seconds=3,
+        model_weight=1.0,
+        client=client_for(handler),
+        score_cache=RerankScoreCache(16),
+    )
+    token = set_rerank_data_version("v1")
+    try:
+        first = reranker.rerank("问题", [result(0), result(1), result(0)])
+        second = reranker.rerank(" 问题 ", [result(2), result(1), result(0)])
+    finally:
+        reset_rerank_data_version(token)
+    token = set_rerank_data_version("v2")
+    try:
+        reranker.rerank("问题", [result(0)])
+    finally:
+        reset_rerank_data_version(token)
+
+    assert [len(documents) for documents in sent] == [2, 1, 1]
+    assert sent[1] == [candidate_document(result(2))]
+    assert first[0].meta["_rerank_score"] == first[1].meta["_rerank_score"] == 1.0
+    assert {item.doc_id: item.meta["_rerank_score"] for item in second} == {
+        "doc-0": 1.0,
+        "doc-1": 0.9,
+        "doc-2": 1.0,
+    }
+    snapshot = recorder.snapshot()
+    assert snapshot["rerank_score_cache_hits_total"] == 2
+    assert snapshot["rerank_score_cache_misses_total"] == 4
+    assert snapshot["rerank_documents_sent_total"] == 4
+    assert snapshot["rerank_duplicate_candidates_total"] == 1
+
+
+def test_scores_are_not_cached_without_a_data_version():
+    calls = 0
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"results": [{"index": 0, "relevance_score": 0.5}]})
+
+    cache = RerankScoreCache(16)
+    reranker = ZhipuReranker(
+        api_key="secret-test-key",
+        base_url="https://example.test/api/paas/v4",
+        model="rerank",
+        timeout_seconds=3,
+        model_weight=1.0,
+        client=client_for(handler),
+        score_cache=cache,
+    )
+
+    reranker.rerank("问题", [result(0)])
+    reranker.rerank("问题", [result(0)])
+
+    assert calls == 2
+    assert len(cache) == 0
+
+
+def test_rerank_score_cache_evicts_least_recently_used():
+    cache = RerankScoreCache(2)
+    keys = [RerankScoreCache.key("rerank", "问题", f"doc-{index}", "v1") for index in range(3)]
+    cache.put_many({keys[0]: 0.1, keys[1]: 0.2})
+    assert cache.get_many([keys[0]]) == {keys[0]: 0.1}
+    cache.put_many({keys[2]: 0.3})
+
+    assert cache.get_many(keys) == {keys[0]: 0.1, keys[2]: 0.3}
+    assert build_rerank_score_cache(0) is None
@@ -1,10 +1,14 @@
 import json
 from pathlib import Path
 
+import pytest
 from src.app.rag.context import format_result_context
 from src.app.rag.service import _image_url
 from src.app.rerank.noop import NoopReranker
+from src.app.retrieval.corpus import CorpusView
 from src.app.retrieval.hybrid_search import (
+    MetadataIndex,
+    RetrievalSnapshot,
     RetrievalState,
     infer_is_table,
     infer_section_type,
@@ -17,6 +21,18 @@ from src.app.retrieval.query import analyze_query, extract_content_keywords, ext
 from src.evaluation.runner import EvaluationCase, summarize_results
 
 
+def _snapshot(all_data: dict, id_to_doc: dict[str, str]) -> RetrievalSnapshot:
+    documents = [id_to_doc[doc_id] for doc_id in all_data["ids"]]
+    corpus = CorpusView.from_columns(all_data["ids"], documents, all_data["metadatas"])
+    return RetrievalSnapshot(
+        metadata_index=MetadataIndex.build(corpus.documents, corpus.metadatas), corpus=corpus
+    )
+
+
+def _by_doc_id(pool: dict[int, RetrievalCandidate]) -> dict[str, RetrievalCandidate]:
+    return {candidate.doc_id: candidate for candidate in pool.values()}
+
+
 def test_query_analysis_extracts_clause_code_and_alias():
     info = analyze_query("GB50011 第 8.2.1 条，抗规怎么要求？")
     assert "8.2.1" in info.clause_numbers
@@ -316,12 +332,13 @@ def test_value_table_match_adds_relevant_body_table_candidate():
         "table": "表5.1.1 民用建筑楼面均布活荷载标准值 办公楼 2.0",
         "explanation": "办公室 楼面活荷载 标准值 2.0",
     }
-    id_to_meta = dict(zip(all_data["ids"], all_data["metadatas"], strict=True))
-    pool: dict[str, RetrievalCandidate] = {}
-    state._add_value_table_matches(query_info, 5, all_data, id_to_doc, id_to_meta, pool)
-    assert "table" in pool
-    assert "explanation" not in pool
-    assert "value lookup table keyword match" in pool["table"].reasons
+    snapshot = _snapshot(all_data, id_to_doc)
+    pool: dict[int, RetrievalCandidate] = {}
+    state._add_value_table_matches(query_info, 5, snapshot, pool)
+    matches = _by_doc_id(pool)
+    assert "table" in matches
+    assert "explanation" not in matches
+    assert "value lookup table keyword match" in matches["table"].reasons
 
 
 def test_table_intent_match_adds_classification_table_candidate():
@@ -348,12 +365,13 @@ def test_table_intent_match_adds_classification_table_candidate():
         "clause": "4.0.1 建筑工程施工质量验收应划分为单位工程、分部工程、分项工程和检验批。",
         "table": "表B建筑工程的分部工程、分项工程划分 <table><tr><td>分部工程</td><td>分项工程</td></tr></table>",
     }
-    id_to_meta = dict(zip(all_data["ids"], all_data["metadatas"], strict=True))
-    pool: dict[str, RetrievalCandidate] = {}
-    state._add_table_intent_matches(query_info, 5, all_data, id_to_doc, id_to_meta, pool)
-    assert "table" in pool
-    assert "clause" not in pool
-    assert "table intent supplemental match" in pool["table"].reasons
+    snapshot = _snapshot(all_data, id_to_doc)
+    pool: dict[int, RetrievalCandidate] = {}
+    state._add_table_intent_matches(query_info, 5, snapshot, pool)
+    matches = _by_doc_id(pool)
+    assert "table" in matches
+    assert "clause" not in matches
+    assert "table intent supplemental match" in matches["table"].reasons
 
 
 def test_domain_ranking_prefers_table_when_query_asks_which_table():
@@ -397,11 +415,12 @@ def test_value_table_match_uses_table_title_as_evidence():
         ],
     }
     id_to_doc = {"table": "<table><tr><td>1</td><td>0.9</td></tr></table>"}
-    id_to_meta = dict(zip(all_data["ids"], all_data["metadatas"], strict=True))
-    pool: dict[str, RetrievalCandidate] = {}
-    state._add_value_table_matches(query_info, 5, all_data, id_to_doc, id_to_meta, pool)
-    assert "table" in pool
-    assert "value lookup table keyword match" in pool["table"].reasons
+    snapshot = _snapshot(all_data, id_to_doc)
+    pool: dict[int, RetrievalCandidate] = {}
+    state._add_value_table_matches(query_info, 5, snapshot, pool)
+    matches = _by_doc_id(pool)
+    assert "table" in matches
+    assert "value lookup table keyword match" in matches["table"].reasons
 
 
 def test_value_table_match_prioritizes_explicit_table_id():
@@ -427,10 +446,11 @@ def test_value_table_match_prioritizes_explicit_table_id():
         ],
     }
     id_to_doc = {"table-a": "折减系数", "table-b": "折减系数"}
-    id_to_meta = dict(zip(all_data["ids"], all_data["metadatas"], strict=True))
-    pool: dict[str, RetrievalCandidate] = {}
-    state._add_value_table_matches(query_info, 5, all_data, id_to_doc, id_to_meta, pool)
-    assert pool["table-b"].score > pool["table-a"].score
+    snapshot = _snapshot(all_data, id_to_doc)
+    pool: dict[int, RetrievalCandidate] = {}
+    state._add_value_table_matches(query_info, 5, snapshot, pool)
+    matches = _by_doc_id(pool)
+    assert matches["table-b"].score > matches["table-a"].score
 
 
 def test_value_lookup_evidence_ranking_prefers_content_keyword_match():
@@ -520,12 +540,13 @@ def test_clause_reference_match_gets_weaker_boost_than_heading_match():
         "heading": "8.2.1 钢结构应按本节规定调整地震作用效应。",
         "reference": "本条可参照第8.2.1条执行。",
     }
-    id_to_meta = dict(zip(all_data["ids"], all_data["metadatas"], strict=True))
-    pool: dict[str, RetrievalCandidate] = {}
-    state._add_clause_matches(query_info, all_data, id_to_doc, id_to_meta, pool)
-    assert pool["heading"].score > pool["reference"].score
-    assert "clause exact match 8.2.1" in pool["heading"].reasons
-    assert "clause reference match 8.2.1" in pool["reference"].reasons
+    snapshot = _snapshot(all_data, id_to_doc)
+    pool: dict[int, RetrievalCandidate] = {}
+    state._add_clause_matches(query_info, snapshot, pool)
+    matches = _by_doc_id(pool)
+    assert matches["heading"].score > matches["reference"].score
+    assert "clause exact match 8.2.1" in matches["heading"].reasons
+    assert "clause reference match 8.2.1" in matches["reference"].reasons
 
 
 def test_clause_heading_does_not_treat_explanation_reference_as_exact_match():
@@ -552,12 +573,13 @@ def test_clause_heading_does_not_treat_explanation_reference_as_exact_match():
         "explanation": "本次修订单独列为第5.1.3条。5.1.3消防车荷载标准值很大。",
         "body": "5.1.2 活荷载折减。\n5.1.3 消防车活荷载折减应根据经验确定。",
     }
-    id_to_meta = dict(zip(all_data["ids"], all_data["metadatas"], strict=True))
-    pool: dict[str, RetrievalCandidate] = {}
-    state._add_clause_matches(query_info, all_data, id_to_doc, id_to_meta, pool)
-    assert pool["body"].score > pool["explanation"].score
-    assert pool["body"].meta["clause_match_kind"] == "heading"
-    assert pool["explanation"].meta["clause_match_kind"] == "reference"
+    snapshot = _snapshot(all_data, id_to_doc)
+    pool: dict[int, RetrievalCandidate] = {}
+    state._add_clause_matches(query_info, snapshot, pool)
+    matches = _by_doc_id(pool)
+    assert matches["body"].score > matches["explanation"].score
+    assert matches["body"].meta["clause_match_kind"] == "heading"
+    assert matches["explanation"].meta["clause_match_kind"] == "reference"
 
 
 def test_rag_context_includes_source_header():
@@ -800,3 +822,74 @@ def test_structured_table_5_1_1_sample_contains_key_live_load_rows():
     assert find_by_alias("教室")[0]["standard_value"] == 2.5
     assert find_by_alias("可能出现人员密集情况的阳台")[0]["standard_value"] == 3.5
     assert find_by_alias("其他阳台")[0]["standard_value"] == 2.5
+
+
+def test_metadata_index_clause_candidates_cover_linear_scan():
+    documents = [
+        "8.2计算要点\n8.2.1钢结构应按本节规定调整地震作用效应。",
+        "本条可参照第8.2.1条执行。",
+        "见第 18.2.1 条和 8.2.10 条。",
+        "表1.8.2.1.3 中的数值",
+        "按3.2-1式计算",
+        "无条文号",
+        "",
+    ]
+    metadatas = [
+        {"title": "8.2计算要点", "clause_number": "8.2"},
+        {"title": "8.3其他要求"},
+        {"title": ""},
+        {"title": "表"},
+        {"title": "3.2-1"},
+        {"title": "8.2.10 其他", "clause_number": "8.2.1"},
+        {"title": "8.2.1"},
+    ]
+    index = MetadataIndex.build(documents, metadatas)
+
+    for clause_num in ("8.2", "8.2.1", "8.2.10", "18.2.1", "3.2-1", "2.1"):
+        expected = [
+            position
+            for position, (text, meta) in enumerate(zip(documents, metadatas, strict=True))
+            if meta.get("clause_number") == clause_num
+            or meta["title"].startswith(clause_num)
+            or text_mentions_clause(meta["title"], clause_num)
+            or text_mentions_clause(text, clause_num)
+        ]
+        assert index.clause_candidates([clause_num]) == expected, clause_num
+    assert index.clause_candidates(["8.2.1"]) == [0, 1, 3, 5, 6]
+
+
+def test_metadata_index_limits_table_candidates_to_requested_specs():
+    index = MetadataIndex.build(
+        ["雪荷载 0.5", "风荷载", "表5.1.1 楼面活荷载"],
+        [
+            {"chunk_type": "table", "code": "GB 50009-2012", "name": "建筑结构荷载规范"},
+            {"chunk_type": "text", "code": "GB 50009-2012", "name": "建筑结构荷载规范"},
+            {"chunk_type": "table", "code": "GB 50011-2010", "name": "建筑抗震设计规范"},
+        ],
+    )
+
+    assert [table.index for table in index.table_candidates(analyze_query("雪荷载"))] == [0, 2]
+    requested = index.table_candidates(analyze_query("GB50009 雪荷载"))
+    assert [table.index for table in requested] == [0]
+    assert requested[0].compact_evidence.endswith("雪荷载05")
+    assert index.spec_candidates(analyze_query("荷载规范 雪荷载")) == {0, 1}
+    assert index.spec_candidates(analyze_query("雪荷载")) is None
+
+
+def test_corpus_view_is_positional_and_read_only():
+    corpus = CorpusView.from_columns(["a", "b"], ["正文A", None], [{"title": "A"}, None])
+
+    assert corpus.position("b") == 1
+    assert corpus.position("missing") is None
+    assert corpus.documents == ("正文A", "")
+    with pytest.raises(TypeError):
+        corpus.metadatas[0]["title"] = "changed"  # type: ignore[index]
+    with pytest.raises(ValueError, match="重复"):
+        CorpusView.from_columns(["a", "a"], ["", ""], [{}, {}])
+
+    state = RetrievalState()
+    pool: dict[int, RetrievalCandidate] = {}
+    candidate = state._candidate_for(0, corpus, pool)
+    candidate.meta["_distance"] = 0.1
+    assert pool == {0: candidate}
+    assert "_distance" not in corpus.metadatas[0]
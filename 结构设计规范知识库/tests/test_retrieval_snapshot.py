@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+from src.app.core.config import Settings
+from src.app.retrieval.bm25_index import InvertedBM25Index
+from src.app.retrieval.corpus import CorpusView
+from src.app.retrieval.dense_vector_store import DenseVectorStore
+from src.app.retrieval.hybrid_search import (
+    MetadataIndex,
+    RetrievalSnapshot,
+    RetrievalState,
+    tokenize_chinese,
+)
+
+DIMENSIONS = 256
+EMBEDDING_LATENCY_SECONDS = 0.05
+
+
+class _SlowEmbeddings:
+    """Stands in for the remote embedding HTTP call."""
+
+    def __init__(self, on_call=None) -> None:
+        self.on_call = on_call
+
+    def create(self, **_kwargs):
+        time.sleep(EMBEDDING_LATENCY_SECONDS)
+        if self.on_call is not None:
+            self.on_call()
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0] + [0.0] * (DIMENSIONS - 1))])
+
+
+def _snapshot(prefix: str, size: int = 40) -> RetrievalSnapshot:
+    ids = [f"{prefix}-{index}" for index in range(size)]
+    documents = [f"楼面活荷载标准值 第{index}条" for index in range(size)]
+    corpus = CorpusView.from_columns(ids, documents, [{"section_type": "body"}] * size)
+    vectors = np.random.default_rng(3).normal(size=(size, DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+    return RetrievalSnapshot(
+        chroma_collection=SimpleNamespace(count=lambda: size),
+        dense_vector_store=DenseVectorStore(tuple(ids), vectors, "embedding-3", DIMENSIONS),
+        bm25_index=InvertedBM25Index.build(tokenize_chinese(text) for text in documents),
+        metadata_index=MetadataIndex.build(corpus.documents, corpus.metadatas),
+        corpus=corpus,
+    )
+
+
+def _state(snapshot: RetrievalSnapshot) -> RetrievalState:
+    state = RetrievalState(
+        Settings(
+            zhipuai_api_key="test", embedding_dimensions=DIMENSIONS, query_embedding_cache_size=0
+        )
+    )
+    state.zhipu_client = SimpleNamespace(embeddings=_SlowEmbeddings())
+    state._publish(snapshot)
+    return state
+
+
+def test_concurrent_searches_never_see_a_half_published_snapshot():
+    queries = [f"楼面活荷载 第{index}条" for index in range(8)]
+    expected = [
+        [item.doc_id for item in _state(_snapshot("old")).hybrid_search(query, 5)]
+        for query in queries
+    ]
+    state = _state(_snapshot("old"))
+    replacements = [_snapshot("new"), _snapshot("old")]
+    # Every search must be waiting on its embedding at once, or the barrier times out.
+    in_flight = threading.Barrier(len(queries), timeout=5)
+
+    def publish_while_all_in_flight() -> None:
+        state._publish(replacements[in_flight.wait() % 2])
+
+    state.zhipu_client = SimpleNamespace(
+        embeddings=_SlowEmbeddings(on_call=publish_while_all_in_flight)
+    )
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        concurrent = list(pool.map(lambda query: state.hybrid_search(query, 5), queries))
+
+    assert [[item.doc_id for item in results] for results in concurrent] == expected
+    assert state.snapshot in replacements
+
+
+def test_search_keeps_its_snapshot_when_reload_publishes_mid_flight():
+    state = _state(_snapshot("old"))
+    replacement = _snapshot("new")
+    state.zhipu_client = SimpleNamespace(
+        embeddings=_SlowEmbeddings(on_call=lambda: state._publish(replacement))
+    )
+
+    results = state.hybrid_search("楼面活荷载", 5)
+
+    assert results
+    assert all(item.doc_id.startswith("old-") for item in results)
+    assert state.snapshot is replacement
+    assert state.corpus is replacement.corpus
+
+
+def test_adopt_publishes_candidate_snapshot_as_one_reference():
+    state = _state(_snapshot("old"))
+    candidate = _state(_snapshot("new"))
+
+    state.adopt(candidate)
+
+    assert state.snapshot is candidate.snapshot
+    assert state.chroma_count() == 40
+    assert state.runtime_data["ids"][0] == "new-0"
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from src.app.core.config import Settings
+from src.app.core.metrics import Metrics
+from src.app.rerank.base import BaseReranker
+from src.app.rerank.errors import RerankerError
+from src.app.rerank.safe import FailOpenReranker
+from src.app.retrieval import hybrid_search as hybrid_search_module
+from src.app.retrieval.bm25_index import InvertedBM25Index
+from src.app.retrieval.corpus import CorpusView
+from src.app.retrieval.dense_vector_store import DenseVectorStore
+from src.app.retrieval.hybrid_search import (
+    MetadataIndex,
+    RetrievalSnapshot,
+    RetrievalState,
+    _manifest_for,
+    tokenize_chinese,
+)
+from src.app.retrieval.result_cache import SearchResultCache, SharedSearchResultStore
+
+DIMENSIONS = 256
+
+
+class _Embeddings:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(embedding=[1.0, 0.2, 0.0, 0.1] + [0.0] * (DIMENSIONS - 4))
+                for _ in kwargs["input"]
+            ]
+        )
+
+
+def _snapshot(data_version: str, suffix: str = "") -> RetrievalSnapshot:
+    ids = [f"doc-{index}{suffix}" for index in range(20)]
+    documents = [f"楼面活荷载标准值 第{index}条 雪荷载" for index in range(20)]
+    corpus = CorpusView.from_columns(ids, documents, [{"source": "GB 50009"}] * len(ids))
+    vectors = np.random.default_rng(3).normal(size=(len(ids), DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+    return RetrievalSnapshot(
+        chroma_collection=SimpleNamespace(count=lambda: len(ids)),
+        dense_vector_store=DenseVectorStore(tuple(ids), vectors, "embedding-3", DIMENSIONS),
+        bm25_index=InvertedBM25Index.build(tokenize_chinese(text) for text in documents),
+        metadata_index=MetadataIndex.build(corpus.documents, corpus.metadatas),
+        corpus=corpus,
+        data_version=data_version,
+    )
+
+
+def _state(monkeypatch, data_version: str = "v1", **overrides) -> tuple[RetrievalState, Metrics]:
+    recorder = Metrics()
+    monkeypatch.setattr(hybrid_search_module, "metrics", recorder)
+    config = Settings(
+        zhipuai_api_key="test",
+        embedding_dimensions=DIMENSIONS,
+        query_embedding_cache_size=0,
+        **overrides,
+    )
+    state = RetrievalState(config)
+    state.zhipu_client = SimpleNamespace(embeddings=_Embeddings())
+    state._publish(_snapshot(data_version))
+    return state, recorder
+
+
+def test_repeated_search_is_served_from_cache(monkeypatch):
+    state, recorder = _state(monkeypatch)
+
+    first = state.hybrid_search("楼面活荷载  标准值", 5)
+    second = state.hybrid_search(" 楼面活荷载 标准值", 5)
+    other_top_k = state.hybrid_search("楼面活荷载 标准值", 3)
+
+    assert second == first
+    assert other_top_k == first[:3]
+    assert state.zhipu_client.embeddings.calls == 2
+    snapshot = recorder.snapshot()
+    assert snapshot["search_result_cache_hits_total"] == 1
+    assert snapshot["search_result_cache_misses_total"] == 2
+    assert snapshot["search_result_cache_hit_ratio"] == round(1 / 3, 4)
+    assert snapshot["search_result_cache_saved_ms_total"] >= 0
+
+
+def test_async_search_shares_the_result_cache(monkeypatch):
+    state, recorder = _state(monkeypatch)
+    state.async_embedding_client = SimpleNamespace(embed=None)
+
+    expected = state.hybrid_search("雪荷载", 5)
+    actual = asyncio.run(state.hybrid_search_async("雪荷载", 5))
+
+    assert actual == expected
+    assert recorder.snapshot()["search_result_cache_hits_total"] == 1
+
+
+def test_publishing_a_new_generation_invalidates_cached_results(monkeypatch):
+    state, _ = _state(monkeypatch)
+    before = state.hybrid_search("雪荷载", 5)
+
+    candidate = RetrievalState(state.config)
+    candidate.zhipu_client = state.zhipu_client
+    candidate._publish(_snapshot("v2", suffix="-new"))
+    state.adopt(candidate)
+    after = state.hybrid_search("雪荷载", 5)
+
+    assert len(state.result_cache) == 1
+    assert {item.doc_id for item in before}.isdisjoint(item.doc_id for item in after)
+    assert all(item.doc_id.endswith("-new") for item in after)
+
+
+def test_degraded_or_unversioned_results_are_not_cached(monkeypatch):
+    state, recorder = _state(monkeypatch)
+    state.zhipu_client = None
+    state.hybrid_search("雪荷载", 5)
+    assert len(state.result_cache) == 0
+
+    unversioned, _ = _state(monkeypatch, data_version="")
+    unversioned.hybrid_search("雪荷载", 5)
+    unversioned.hybrid_search("雪荷载", 5)
+    assert len(unversioned.result_cache) == 0
+    assert recorder.snapshot()["search_result_cache_hits_total"] == 0
+
+
+def test_concurrent_rerank_fallback_only_skips_its_own_result(monkeypatch):
+    in_rerank = threading.Event()
+    failed = threading.Event()
+
+    class Reranker(BaseReranker):
+        name = "flaky"
+
+        def rerank(self, query, results, *, top_n=None):
+            if "雪" in query:
+                raise RerankerError("timeout", "rerank timed out")
+            in_rerank.set()
+            failed.wait(5)
+            return results[:top_n]
+
+    state, _ = _state(monkeypatch)
+    state.reranker = FailOpenReranker(Reranker())
+    healthy = threading.Thread(target=state.hybrid_search, args=("楼面活荷载", 5))
+    healthy.start()
+    assert in_rerank.wait(5)
+    state.hybrid_search("雪荷载", 5)
+    failed.set()
+    healthy.join()
+
+    assert len(state.result_cache) == 1
+    assert state.hybrid_search("楼面活荷载", 5)
+    assert state.zhipu_client.embeddings.calls == 2
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    state, recorder = _state(monkeypatch, search_result_cache_size=0)
+
+    state.hybrid_search("雪荷载", 5)
+    state.hybrid_search("雪荷载", 5)
+
+    assert state.result_cache is None
+    assert state.zhipu_client.embeddings.calls == 2
+    assert recorder.snapshot()["search_result_cache_misses_total"] == 0
+
+
+def test_shared_store_lets_workers_reuse_results(monkeypatch, tmp_path):
+    shared_path = tmp_path / "cache" / "search_results.sqlite3"
+    writer, _ = _state(monkeypatch, search_result_cache_shared_path=shared_path)
+    reader, recorder = _state(monkeypatch, search_result_cache_shared_path=shared_path)
+
+    expected = writer.hybrid_search("楼面活荷载", 5)
+    actual = reader.hybrid_search("楼面活荷载", 5)
+
+    assert actual == expected
+    assert reader.zhipu_client.embeddings.calls == 0
+    assert recorder.snapshot()["search_result_cache_hits_total"] == 1
+
+    upgraded, _ = _state(monkeypatch, "v2", search_result_cache_shared_path=shared_path)
+    upgraded.hybrid_search("楼面活荷载", 5)
+    assert upgraded.zhipu_client.embeddings.calls == 1
+
+
+def test_shared_store_is_bounded_and_version_checked(monkeypatch, tmp_path):
+    opened: list[sqlite3.Connection] = []
+    connect = sqlite3.connect
+
+    def tracked_connect(*args, **kwargs) -> sqlite3.Connection:
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(sqlite3, "connect", tracked_connect)
+    ticks = iter(range(100))
+    store = SharedSearchResultStore(tmp_path / "shared.sqlite3", 2, clock=lambda: next(ticks))
+    for key in ("a", "b", "c"):
+        store.put(key, "v1", (), 1.0)
+
+    assert store.get("a", "v1") is None
+    assert store.get("c", "v1") == ((), 1.0)
+    assert store.get("c", "v2") is None
+
+    cache = SearchResultCache(1, shared=store)
+    assert cache.get("b", "v1") == ((), 1.0)
+    assert len(cache) == 1
+    assert opened
+    for connection in opened:
+        with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+            connection.execute("SELECT 1")
+
+
+def test_data_version_comes_from_the_build_manifest(tmp_path):
+    db_dir = tmp_path / "version" / "db"
+    db_dir.mkdir(parents=True)
+    assert _manifest_for(db_dir) == {}
+
+    (db_dir.parent / "manifest.json").write_text(
+        json.dumps({"data_version_hash": "abc123"}), encoding="utf-8"
+    )
+    assert _manifest_for(db_dir)["data_version_hash"] == "abc123"
@@ -1,11 +1,17 @@
 import json
 from pathlib import Path
 
+from src.app.rag import structured_tables
 from src.app.rag.structured_tables import (
+    _score_row,
+    _source_matches,
+    clear_structured_table_cache,
     find_structured_table_matches,
     format_structured_table_context,
     load_structured_tables,
+    structured_table_index,
 )
+from src.app.retrieval.query import analyze_query
 from src.evaluation.runner import (
     STRUCTURED_EVAL_PATH,
     load_cases,
@@ -285,3 +291,108 @@ def test_snow_wind_structured_reference_files_shape():
     assert any(
         row["height"] == "≥550" and row["roughness_d"] == 2.91 for row in wind_height["rows"]
     )
+
+
+def _scan_every_row(query: str, limit: int) -> list[tuple[str, int, float, list[str]]]:
+    query_info = analyze_query(query)
+    scored = []
+    for table in load_structured_tables():
+        if not _source_matches(query_info, table.get("source", {})):
+            continue
+        for row_number, row in enumerate(table.get("rows", [])):
+            score, matched_terms = _score_row(query_info, table, row)
+            if score > 1.0:
+                scored.append((table["_path"], row_number, score, matched_terms))
+    return sorted(scored, key=lambda item: item[2], reverse=True)[:limit]
+
+
+def _indexed(query: str, limit: int) -> list[tuple[str, int, float, list[str]]]:
+    return [
+        (
+            match.table["_path"],
+            match.table["rows"].index(match.row),
+            match.score,
+            match.matched_terms,
+        )
+        for match in find_structured_table_matches(query, limit=limit)
+    ]
+
+
+def test_index_ranks_rows_exactly_like_a_full_scan():
+    queries = [
+        "办公楼的楼面活荷载标准值取多少？",
+        "墙柱基础计算截面以上9到20层时活荷载折减系数是多少？",
+        "表5.1.1 其他阳台",
+        "B类地面粗糙度100m风压高度变化系数是多少？",
+        "GB 50009 雪荷载标准值的计算公式是什么？",
+        "查一下这个表的数值是多少？",
+        "混凝土强度等级的分类",
+    ]
+    for query in queries:
+        for limit in (3, 50):
+            assert _indexed(query, limit) == _scan_every_row(query, limit), query
+
+
+def _synthetic_tables(count: int) -> list[dict]:
+    return [
+        {
+            "_path": f"synthetic-{number}.json",
+            "source": {
+                "code": "GB 99999",
+                "name": "合成规范",
+                "table_id": f"90.{number}",
+                "table_name": f"合成表{number}号构件参数",
+            },
+            "rows": [
+                {"item": f"构件{number}-{row}", "value": row, "aliases": [f"构件{number}-{row}"]}
+                for row in range(20)
+            ],
+        }
+        for number in range(count)
+    ]
+
+
+def test_unrelated_tables_do_not_widen_the_candidate_rows(monkeypatch):
+    query = "办公楼的楼面活荷载标准值取多少？"
+    real_tables = load_structured_tables()
+    expected = _indexed(query, 3)
+    candidate_counts = {}
+    for count in (0, 2000):
+        tables = real_tables + _synthetic_tables(count)
+        monkeypatch.setattr(
+            structured_tables, "load_structured_tables", lambda tables=tables: tables
+        )
+        index = structured_table_index()
+        query_info = analyze_query(query)
+        candidates = index.candidate_rows(
+            query_info, structured_tables._normalized_query_terms(query_info.normalized)
+        )
+        candidate_counts[count] = len(candidates)
+        assert _indexed(query, 3) == expected
+        assert len(index.rows) >= count * 20
+
+    assert candidate_counts[2000] == candidate_counts[0]
+
+
+def test_clearing_the_cache_rebuilds_the_index(tmp_path, monkeypatch):
+    table = _synthetic_tables(1)[0]
+    (tmp_path / "synthetic.json").write_text(
+        json.dumps(table, ensure_ascii=False), encoding="utf-8"
+    )
+    monkeypatch.setattr(structured_tables, "STRUCTURED_TABLE_DIR", tmp_path)
+    clear_structured_table_cache()
+    try:
+        first = structured_table_index()
+        assert structured_table_index() is first
+        assert len(first.rows) == 20
+
+        table["rows"] = table["rows"][:5]
+        (tmp_path / "synthetic.json").write_text(
+            json.dumps(table, ensure_ascii=False), encoding="utf-8"
+        )
+        clear_structured_table_cache()
+
+        assert len(structured_table_index().rows) == 5
+    finally:
+        monkeypatch.undo()
+        clear_structured_table_cache()